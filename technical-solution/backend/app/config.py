@@ -32,6 +32,17 @@ class Settings(BaseSettings):
     VECTOR_MODEL_PATH: Optional[str] = None
     VECTOR_DIMENSION: int = 1024
     VECTOR_OFFLINE_MODE: bool = True  # 是否使用离线模式（避免请求 HuggingFace）
+    VECTOR_WARMUP_ENABLED: bool = True  # 启动时在后台加载并预热模型（关闭时在首个语义检索请求时加载）
+    EMBEDDING_BACKEND: str = "flag"  # 向量编码后端: flag（FlagEmbedding/PyTorch fp32）/ onnx（ONNX Runtime int8，需要安装 onnxruntime）
+    EMBEDDING_ONNX_PATH: Optional[str] = None  # ONNX 模型文件（默认 data/models/<模型名>-int8.onnx，不存在时自动导出）
+    EMBEDDING_ONNX_THREADS: int = 4  # ONNX Runtime 推理线程数
+    
+    # 向量编码边车（多个 API worker 共用一个模型进程，未配置时各 worker 进程内加载模型）
+    EMBEDDING_SIDECAR_URL: Optional[str] = None  # 例如: unix:///tmp/ad-case-embedding.sock 或 http://127.0.0.1:8765
+    EMBEDDING_SIDECAR_TIMEOUT: float = 10.0  # 边车请求超时（秒）
+    EMBEDDING_SIDECAR_RETRY_SECONDS: float = 30.0  # 边车不可用时回退到进程内模型，该时间后再尝试边车
+    EMBEDDING_SIDECAR_MAX_BATCH: int = 32  # 边车每次批量编码的最大文本数
+    EMBEDDING_SIDECAR_MAX_WAIT_MS: float = 5.0  # 边车合并并发请求的最长等待时间（毫秒）
     
     # 缓存配置（可选）
     REDIS_HOST: Optional[str] = None
@@ -42,6 +53,19 @@ class Settings(BaseSettings):
     # 日志配置
     LOG_LEVEL: str = "INFO"
     
+    # 检索接口响应
+    SEARCH_FAST_RESPONSE: bool = True  # 检索结果直接映射为响应结构并序列化，跳过响应模型的重复校验（已安装 orjson 时使用 orjson）
+    
+    # 运行指标（Prometheus 格式，GET /metrics）
+    METRICS_ENABLED: bool = True  # 记录请求耗时等运行指标并注册 /metrics 接口
+    
+    # 请求耗时分析（Server-Timing 响应头和慢请求记录，排查慢检索时开启）
+    PROFILING_ENABLED: bool = False  # 是否启用（启用时注册 /api/v1/admin/slow-requests 接口）
+    PROFILING_SLOW_REQUEST_MS: float = 500.0  # 超过该耗时的请求记录为慢请求（毫秒）
+    PROFILING_SLOW_BUFFER_SIZE: int = 100  # 保留最近的慢请求数
+    PROFILING_CAPTURE_SQL: bool = True  # 慢请求记录中包含 SQL 和参数
+    PROFILING_EXPLAIN: bool = False  # 为慢请求中的 SELECT 获取 EXPLAIN 执行计划（需要 PROFILING_CAPTURE_SQL）
+    
     # 代理配置（可选）
     HTTP_PROXY: Optional[str] = None
     HTTPS_PROXY: Optional[str] = None
@@ -55,6 +79,16 @@ class Settings(BaseSettings):
     CLASH_SWITCH_INTERVAL_MINUTES: int = 10  # 时间间隔（分钟）
     CLASH_AUTO_SWITCH_ON_ERROR: bool = True  # 错误时自动切换
     
+    # 代理节点池（并发探测节点延迟，按 EWMA 健康评分为每个任务分配固定节点）
+    CLASH_PROXY_POOL_ENABLED: bool = True  # 是否启用节点池（关闭时随机选择节点）
+    CLASH_PROBE_URL: str = "https://www.adquan.com"  # 节点探测目标 URL
+    CLASH_PROBE_INTERVAL_SECONDS: int = 300  # 定时探测间隔（秒）
+    CLASH_PROBE_TIMEOUT_MS: int = 5000  # 单个节点探测超时（毫秒）
+    CLASH_PROBE_CONCURRENCY: int = 16  # 并发探测数
+    CLASH_NODE_PORTS: str = ""  # 节点专用监听端口，如 "香港01=7901,日本02=7902"（为空时共用全局选择器）
+    CLASH_PROXY_HOST: str = "127.0.0.1"  # 节点专用端口所在主机
+    CLASH_MIN_SWITCH_SECONDS: int = 60  # 全局选择器最小切换间隔（秒，无专用端口时生效）
+    
     # 图片存储配置
     IMAGE_STORAGE_DIR: str = "data/images"  # 图片存储目录
     IMAGE_DOWNLOAD_CONCURRENCY: int = 10  # 下载并发数
@@ -62,6 +96,58 @@ class Settings(BaseSettings):
     IMAGE_DOWNLOAD_RETRY: int = 3  # 下载重试次数
     IMAGE_STATIC_URL_PREFIX: str = "/static/images"  # 静态文件 URL 前缀
     
+    # 流水线入库配置（各阶段并发数与阶段间队列长度）
+    IMPORT_LOAD_WORKERS: int = 1  # 加载/验证线程数
+    IMPORT_EMBED_WORKERS: int = 1  # 向量生成线程数（共享同一个模型）
+    IMPORT_IMAGE_WORKERS: int = 2  # 图片下载线程数
+    IMPORT_INSERT_WORKERS: int = 2  # 入库线程数（每个线程一个数据库连接）
+    IMPORT_QUEUE_SIZE: int = 4  # 阶段之间队列最大批次数
+    
+    # 跨任务去重配置
+    CRAWL_SEEN_INDEX_ENABLED: bool = True  # 是否跳过其它任务已成功爬取的案例
+    CRAWL_SEEN_INDEX_REFRESH_SECONDS: int = 60  # 内存索引增量刷新间隔（秒）
+    
+    # 原始 HTML 归档（可使用 scripts/reparse.py 离线重新解析）
+    CRAWL_ARCHIVE_HTML: bool = True  # 是否归档抓取到的列表页/详情页 HTML
+    CRAWL_HTML_PARSER: str = "html.parser"  # HTML 解析后端: html.parser / lxml（需要安装 lxml）
+    
+    # 抓取与解析分离（详情页 HTML 交给解析进程池，解析不再占用抓取线程）
+    CRAWL_PARSE_WORKERS: int = 2  # 解析进程数，0 表示在抓取线程内解析
+    CRAWL_PARSE_QUEUE_SIZE: int = 8  # 解析阶段最大在途页面数（背压）
+    
+    # 自适应请求速率（AIMD：成功时加性增加，429/403/5xx/CSRF 失效/高延迟时乘性减少）
+    CRAWL_ADAPTIVE_RATE_ENABLED: bool = True  # 是否启用（关闭时按任务的 delay_min/delay_max 随机等待）
+    CRAWL_RATE_INITIAL: float = 0.3  # 初始速率（请求/秒）
+    CRAWL_RATE_MIN: float = 0.05  # 最低速率（请求/秒）
+    CRAWL_RATE_MAX: float = 3.0  # 最高速率（请求/秒）
+    CRAWL_RATE_INCREASE: float = 0.05  # 每个成功窗口增加的速率（请求/秒）
+    CRAWL_RATE_DECREASE_FACTOR: float = 0.5  # 拥塞时速率和并发数的缩减系数
+    CRAWL_RATE_SUCCESS_WINDOW: int = 10  # 连续成功多少次后增加一次速率
+    CRAWL_RATE_MAX_CONCURRENCY: int = 4  # 所有任务合计的最大并发请求数
+    CRAWL_RATE_TARGET_LATENCY_MS: int = 3000  # 响应延迟超过该值时降速（毫秒）
+    
+    # 共享 CSRF Token 缓存（进程内所有任务共用 Token 和会话 Cookie，接近过期前后台主动刷新）
+    CRAWL_TOKEN_CACHE_ENABLED: bool = True  # 是否启用（关闭时每个任务各自获取 Token）
+    CRAWL_TOKEN_MAX_AGE_SECONDS: int = 3600  # Token 有效期（秒）
+    CRAWL_TOKEN_REFRESH_RATIO: float = 0.8  # Token 年龄达到有效期的该比例时后台主动刷新
+    
+    # 爬取任务调度（开始执行的任务先进入队列，按优先级在额度内启动）
+    CRAWL_MAX_RUNNING_TASKS: int = 3  # 本进程同时运行的最大任务数
+    CRAWL_MAX_RUNNING_TASKS_PER_SOURCE: int = 2  # 同一数据源同时运行的最大任务数
+    CRAWL_MAX_QUEUED_TASKS: int = 100  # 调度队列最大长度，超过时拒绝入队
+    CRAWL_SCHEDULER_POLL_SECONDS: float = 10.0  # 轮询队列的间隔（秒）
+    
+    # 爬取日志（每个请求一条结构化事件，详细诊断信息按采样率记录为 DEBUG）
+    CRAWL_LOG_DEBUG_SAMPLE_RATE: float = 0.01  # 详细诊断事件（请求/响应头、响应内容）的采样率，0 关闭
+    CRAWL_LOG_MAX_FIELD_CHARS: int = 2000  # 日志字段值的最大字符数（超出部分截断）
+    CRAWL_LOG_FLUSH_SECONDS: float = 2.0  # 任务日志批量写入数据库的间隔（秒）
+    
+    # 失败重试（只重试失败的列表页和案例，指数退避加随机抖动，超过最大重试次数进入死信）
+    CRAWL_RETRY_MAX_RETRIES: int = 3  # 最大重试次数
+    CRAWL_RETRY_BASE_DELAY_SECONDS: float = 30.0  # 退避基础间隔（秒），第 n 次重试前等待约 基础间隔 × 2^n
+    CRAWL_RETRY_MAX_DELAY_SECONDS: float = 1800.0  # 退避最大间隔（秒）
+    CRAWL_RETRY_CONCURRENCY: int = 4  # 并发重试线程数（请求仍受数据源共享的速率控制器限制）
+    
     model_config = ConfigDict(
         env_file = ".env",
         env_file_encoding = "utf-8",
@@ -4,6 +4,7 @@
 import asyncpg
 from typing import Optional
 from app.config import settings
+from app.profiling import profile_query
 
 
 class Database:
@@ -39,23 +40,27 @@ class Database:
     
     async def execute(self, query: str, *args):
         """执行查询（无返回结果）"""
-        async with self.pool.acquire() as conn:
-            return await conn.execute(query, *args)
+        with profile_query(query, args):
+            async with self.pool.acquire() as conn:
+                return await conn.execute(query, *args)
     
     async def fetch(self, query: str, *args):
         """执行查询（返回多行）"""
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(query, *args)
+        with profile_query(query, args):
+            async with self.pool.acquire() as conn:
+                return await conn.fetch(query, *args)
     
     async def fetchrow(self, query: str, *args):
         """执行查询（返回单行）"""
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(query, *args)
+        with profile_query(query, args):
+            async with self.pool.acquire() as conn:
+                return await conn.fetchrow(query, *args)
     
     async def fetchval(self, query: str, *args):
         """执行查询（返回单个值）"""
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval(query, *args)
+        with profile_query(query, args):
+            async with self.pool.acquire() as conn:
+                return await conn.fetchval(query, *args)
 
 
 # 全局数据库实例
@@ -8,7 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import settings
 from app.database import db
-from app.routers import health, cases, crawl_tasks, task_imports
+from app.routers import health, cases, crawl_tasks, task_imports, embedding_jobs, metrics, admin
+from app.services.crawl_scheduler import get_crawl_scheduler
+from app.services.vector_service import start_vector_model_warmup
 
 
 @asynccontextmanager
@@ -16,8 +18,14 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时执行
     await db.connect()
+    # 后台预热向量模型（不阻塞启动，预热完成前 /health/ready 返回未就绪）
+    if settings.VECTOR_WARMUP_ENABLED:
+        start_vector_model_warmup()
+    # 启动爬取任务调度器（继续执行重启前仍在队列中的任务）
+    await get_crawl_scheduler().start()
     yield
     # 关闭时执行
+    await get_crawl_scheduler().stop()
     await db.disconnect()
 
 
@@ -38,11 +46,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 请求耗时分析（Server-Timing 响应头和慢请求记录）
+if settings.PROFILING_ENABLED:
+    from app.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
+# 记录请求耗时（放在最外层，包含 CORS 处理在内的完整耗时）
+if settings.METRICS_ENABLED:
+    from app.metrics import MetricsMiddleware
+    app.add_middleware(MetricsMiddleware)
+
 # 注册路由
 app.include_router(health.router)
 app.include_router(cases.router)
 app.include_router(crawl_tasks.router)
 app.include_router(task_imports.router)
+app.include_router(embedding_jobs.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
+if settings.PROFILING_ENABLED:
+    app.include_router(admin.router)
 
 # 配置静态文件服务（图片）
 image_storage_dir = Path(settings.IMAGE_STORAGE_DIR)
@@ -0,0 +1,87 @@
+"""
+API 运行指标
+请求耗时中间件和数据库连接池采集，指标定义和导出见 services/metrics.py
+"""
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+# 添加 backend 目录到路径，以便导入 services 模块
+backend_root = Path(__file__).parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from services.metrics import (
+    REGISTRY, CONTENT_TYPE, HTTP_REQUEST_SECONDS, CASE_SEARCH_SECONDS, DB_POOL_CONNECTIONS,
+)
+from app.config import settings
+from app.database import db
+
+# 路由通过本模块使用指标（本模块负责把 backend 目录加入导入路径）
+__all__ = [
+    'REGISTRY', 'CONTENT_TYPE', 'CASE_SEARCH_SECONDS', 'MetricsMiddleware',
+]
+
+
+class MetricsMiddleware:
+    """
+    记录每个 HTTP 请求的耗时（ASGI 中间件）
+
+    route 标签取匹配到的路由模板（如 /api/v1/cases/{case_id}），避免按实际路径产生大量标签；
+    图片静态文件统一记为静态目录前缀，未匹配任何路由的请求记为 unmatched
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.static_prefix = settings.IMAGE_STATIC_URL_PREFIX.rstrip('/')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope['method'],
+                route=self._route_label(scope),
+                status=status_code
+            )
+
+    def _route_label(self, scope) -> str:
+        route = scope.get('route')
+        path = getattr(route, 'path', None)
+        if path:
+            return path
+        if self.static_prefix and scope.get('path', '').startswith(self.static_prefix + '/'):
+            return self.static_prefix
+        return 'unmatched'
+
+
+def _pool_connections() -> Dict[Tuple[str, ...], float]:
+    pool = db.pool
+    if pool is None:
+        return {}
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    return {
+        ('size',): size,
+        ('idle',): idle,
+        ('in_use',): size - idle,
+        ('max',): pool.get_max_size(),
+    }
+
+
+DB_POOL_CONNECTIONS.set_function(_pool_connections)
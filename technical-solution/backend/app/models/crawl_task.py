@@ -19,6 +19,7 @@ class CrawlTask:
     
     状态枚举:
     - pending: 等待中
+    - queued: 排队中（已进入调度队列，等待空闲额度）
     - running: 运行中
     - paused: 已暂停
     - completed: 已完成
@@ -45,6 +46,11 @@ class CrawlTask:
     delay_max: float = 5.0  # 最大延迟时间（秒），默认5.0，>= delay_min
     enable_resume: bool = True  # 是否启用断点续传，默认True
     
+    # 调度
+    priority: int = 0  # 调度优先级，数值越大越先执行
+    queued_at: Optional[datetime] = None  # 进入调度队列的时间
+    queued_start_page: Optional[int] = None  # 出队执行时的起始页码
+    
     # 任务状态
     status: str = 'pending'  # 任务状态，默认pending，CHECK约束
     
@@ -69,6 +75,8 @@ class CrawlTask:
     avg_speed: Optional[float] = None  # 平均爬取速度（案例/分钟）
     avg_delay: Optional[float] = None  # 平均请求延迟（秒）
     error_rate: Optional[float] = None  # 错误率，0-1之间
+    request_rate: Optional[float] = None  # 当前请求速率（请求/秒，自适应速率控制）
+    request_concurrency: Optional[int] = None  # 当前请求并发数
     
     # 错误信息
     error_message: Optional[str] = None  # 错误信息
@@ -103,6 +111,9 @@ class CrawlTask:
             delay_min=data.get('delay_min', 2.0),
             delay_max=data.get('delay_max', 5.0),
             enable_resume=data.get('enable_resume', True),
+            priority=data.get('priority') or 0,
+            queued_at=data.get('queued_at'),
+            queued_start_page=data.get('queued_start_page'),
             status=data.get('status', 'pending'),
             created_at=data.get('created_at'),
             started_at=data.get('started_at'),
@@ -118,6 +129,8 @@ class CrawlTask:
             avg_speed=data.get('avg_speed'),
             avg_delay=data.get('avg_delay'),
             error_rate=data.get('error_rate'),
+            request_rate=data.get('request_rate'),
+            request_concurrency=data.get('request_concurrency'),
             error_message=data.get('error_message'),
             error_stack=data.get('error_stack'),
             created_by=data.get('created_by'),
@@ -148,6 +161,9 @@ class CrawlTask:
             'delay_min': self.delay_min,
             'delay_max': self.delay_max,
             'enable_resume': self.enable_resume,
+            'priority': self.priority,
+            'queued_at': self.queued_at,
+            'queued_start_page': self.queued_start_page,
             'status': self.status,
             'created_at': self.created_at,
             'started_at': self.started_at,
@@ -163,6 +179,8 @@ class CrawlTask:
             'avg_speed': self.avg_speed,
             'avg_delay': self.avg_delay,
             'error_rate': self.error_rate,
+            'request_rate': self.request_rate,
+            'request_concurrency': self.request_concurrency,
             'error_message': self.error_message,
             'error_stack': self.error_stack,
             'created_by': self.created_by,
@@ -0,0 +1,286 @@
+"""
+请求耗时分析（PROFILING_ENABLED=true 时启用）
+在请求内按名称记录各环节耗时（向量编码、COUNT、SELECT、本地图片检查、序列化等），
+通过 Server-Timing 响应头返回，超过阈值的慢请求连同 SQL（可选 EXPLAIN 执行计划）记录到环形缓冲区
+
+用法:
+    with span('db_count'):
+        total = await db.fetchval(...)
+
+    @profiled('local_image')
+    def _ensure_local_image_url(result): ...
+
+未启用或不在请求内时 span / profiled 只做一次 ContextVar 查找
+"""
+import asyncio
+import functools
+import inspect
+import itertools
+import logging
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 路由函数的耗时段名称（从路由函数返回到开始发送响应之间记为序列化耗时）
+ENDPOINT_SPAN = 'endpoint'
+SERIALIZE_SPAN = 'serialize'
+# 慢请求记录中单个 SQL 参数的最大字符数（向量参数很长）
+MAX_PARAM_CHARS = 200
+# 每个慢请求最多执行 EXPLAIN 的 SQL 数
+MAX_EXPLAIN_QUERIES = 10
+
+
+class RequestProfile:
+    """单个请求的耗时记录"""
+
+    def __init__(self, method: str, path: str, query_string: str):
+        self.method = method
+        self.path = path
+        self.query_string = query_string
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        # 名称 -> [累计耗时（秒）, 次数, 最后一次结束时刻]
+        self.spans: Dict[str, List[float]] = {}
+        self.queries: List[Dict[str, Any]] = []
+
+    def add_span(self, name: str, start: float, end: float):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [end - start, 1, end]
+        else:
+            entry[0] += end - start
+            entry[1] += 1
+            entry[2] = end
+
+    def add_query(self, span_name: Optional[str], sql: str, args: tuple, seconds: float):
+        self.queries.append({'span': span_name, 'sql': sql, 'args': args, 'seconds': seconds})
+
+    def mark_response_start(self, now: float):
+        """开始发送响应时调用：路由函数返回之后的耗时记为序列化"""
+        endpoint = self.spans.get(ENDPOINT_SPAN)
+        if endpoint is not None:
+            self.add_span(SERIALIZE_SPAN, endpoint[2], now)
+
+    def server_timing(self, now: float) -> str:
+        """生成 Server-Timing 响应头"""
+        parts = []
+        for name, (seconds, count, _) in self.spans.items():
+            part = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                part += f';desc="x{int(count)}"'
+            parts.append(part)
+        parts.append(f"total;dur={(now - self.start) * 1000:.1f}")
+        return ', '.join(parts)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('request_profile', default=None)
+# 当前所在的耗时段（用于把 SQL 归到对应环节）
+_current_span: ContextVar[Optional[str]] = ContextVar('request_profile_span', default=None)
+
+
+def get_current_profile() -> Optional[RequestProfile]:
+    """获取当前请求的耗时记录（未启用或不在请求内时为 None）"""
+    return _current_profile.get()
+
+
+@contextmanager
+def span(name: str):
+    """记录代码块耗时（同名耗时段累加）"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    token = _current_span.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, start, time.perf_counter())
+        _current_span.reset(token)
+
+
+def profiled(name: str):
+    """记录函数耗时的装饰器（支持同步和异步函数）"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_profile.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_profile.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile_query(sql: str, args: tuple):
+    """记录一次数据库查询（由 Database 的查询方法调用）"""
+    profile = _current_profile.get()
+    if profile is None or not settings.PROFILING_CAPTURE_SQL:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_query(_current_span.get(), sql, args, time.perf_counter() - start)
+
+
+class SlowRequestLog:
+    """慢请求环形缓冲区（只在事件循环线程中读写）"""
+
+    def __init__(self, capacity: int):
+        self._records: Deque[Dict[str, Any]] = deque(maxlen=max(1, capacity))
+        self._ids = itertools.count(1)
+        self.total = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._records.maxlen
+
+    def add(self, record: Dict[str, Any]):
+        record['id'] = next(self._ids)
+        self._records.append(record)
+        self.total += 1
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """最近的慢请求（新的在前）"""
+        return list(itertools.islice(reversed(self._records), limit))
+
+    def clear(self) -> int:
+        count = len(self._records)
+        self._records.clear()
+        return count
+
+
+slow_requests = SlowRequestLog(settings.PROFILING_SLOW_BUFFER_SIZE)
+# 正在记录的慢请求任务（保持引用，避免任务未完成就被回收）
+_pending_tasks: set = set()
+
+
+def _format_param(value: Any) -> str:
+    text = repr(value)
+    if len(text) > MAX_PARAM_CHARS:
+        text = text[:MAX_PARAM_CHARS] + f"...（共 {len(text)} 个字符）"
+    return text
+
+
+def _build_record(profile: RequestProfile, status_code: int, total: float) -> Dict[str, Any]:
+    return {
+        'time': profile.started_at.isoformat(),
+        'method': profile.method,
+        'path': profile.path,
+        'query_string': profile.query_string,
+        'status': status_code,
+        'duration_ms': round(total * 1000, 1),
+        'spans': [
+            {'name': name, 'ms': round(seconds * 1000, 1), 'count': int(count)}
+            for name, (seconds, count, _) in profile.spans.items()
+        ],
+        'queries': [
+            {
+                'span': query['span'],
+                'sql': re.sub(r'\s+', ' ', query['sql']).strip(),
+                'params': [_format_param(arg) for arg in query['args']],
+                'ms': round(query['seconds'] * 1000, 1),
+            }
+            for query in profile.queries
+        ],
+    }
+
+
+async def _explain_queries(profile: RequestProfile, record: Dict[str, Any]):
+    """为慢请求中的 SELECT 执行 EXPLAIN（不带 ANALYZE，不会再次执行查询）"""
+    from app.database import db
+
+    explained: Dict[str, List[str]] = {}
+    for query, item in zip(profile.queries, record['queries']):
+        if not item['sql'].upper().startswith(('SELECT', 'WITH')):
+            continue
+        if item['sql'] in explained:
+            item['plan'] = explained[item['sql']]
+            continue
+        if len(explained) >= MAX_EXPLAIN_QUERIES:
+            break
+        try:
+            async with db.pool.acquire() as conn:
+                rows = await conn.fetch(f"EXPLAIN {query['sql']}", *query['args'])
+            item['plan'] = explained[item['sql']] = [row[0] for row in rows]
+        except Exception as e:
+            item['plan_error'] = str(e) or type(e).__name__
+
+
+async def _record_slow_request(profile: RequestProfile, status_code: int, total: float):
+    record = _build_record(profile, status_code, total)
+    if settings.PROFILING_EXPLAIN and profile.queries:
+        try:
+            await _explain_queries(profile, record)
+        except Exception as e:
+            logger.warning(f"慢请求执行计划获取失败: {e}")
+    slow_requests.add(record)
+    logger.warning(
+        f"慢请求 {profile.method} {profile.path} {record['duration_ms']}ms: "
+        + ', '.join(f"{item['name']}={item['ms']}ms" for item in record['spans'])
+    )
+
+
+class ProfilingMiddleware:
+    """
+    请求耗时分析中间件（ASGI 中间件）
+
+    为每个请求创建耗时记录，开始发送响应时附加 Server-Timing 响应头；
+    请求结束后耗时超过 PROFILING_SLOW_REQUEST_MS 时记录为慢请求（执行计划在后台获取，不延迟响应）
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.slow_seconds = settings.PROFILING_SLOW_REQUEST_MS / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(
+            scope['method'], scope['path'], scope.get('query_string', b'').decode('latin-1')
+        )
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                now = time.perf_counter()
+                profile.mark_response_start(now)
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', profile.server_timing(now).encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            total = time.perf_counter() - profile.start
+            if total >= self.slow_seconds:
+                task = asyncio.get_running_loop().create_task(_record_slow_request(profile, status_code, total))
+                _pending_tasks.add(task)
+                task.add_done_callback(_pending_tasks.discard)
@@ -7,6 +7,7 @@ from datetime import date
 from pathlib import Path
 from app.database import db
 from app.config import settings
+from app.profiling import span, profiled
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,7 @@ class CaseRepository:
     """案例数据访问类"""
     
     @staticmethod
+    @profiled('local_image')
     def _ensure_local_image_url(result: Dict[str, Any]) -> None:
         """
         强制优先使用本地图片URL（如果存在）
@@ -283,7 +285,8 @@ class CaseRepository:
         """
         logger.debug(f"Count query: {count_query}")
         logger.debug(f"Count query params: {params}")
-        total = await db.fetchval(count_query, *params)
+        with span('db_count'):
+            total = await db.fetchval(count_query, *params)
         logger.debug(f"Total count: {total}")
         
         # 构建查询语句
@@ -328,7 +331,8 @@ class CaseRepository:
         logger.debug(f"Select query params: {params}")
         
         # 执行查询
-        rows = await db.fetch(select_query, *params)
+        with span('db_select'):
+            rows = await db.fetch(select_query, *params)
         logger.debug(f"Query returned {len(rows)} rows")
         
         # 转换为字典列表
@@ -636,7 +640,8 @@ class CaseRepository:
             FROM ad_cases 
             WHERE {where_clause}
         """
-        total = await db.fetchval(count_query, *params)
+        with span('db_count'):
+            total = await db.fetchval(count_query, *params)
         
         # 构建查询语句
         offset = (page - 1) * page_size
@@ -675,7 +680,8 @@ class CaseRepository:
         params.extend([page_size, offset])
         
         # 执行查询
-        rows = await db.fetch(select_query, *params)
+        with span('db_select'):
+            rows = await db.fetch(select_query, *params)
         
         # 转换为字典列表
         results = []
@@ -172,6 +172,91 @@ class CrawlCaseRecordRepository:
         
         await db.execute(query, batch_file_name, *record_ids)
 
+    @staticmethod
+    async def bulk_upsert_case_records(
+        task_id: str, records: List[Dict[str, Any]]
+    ) -> int:
+        """
+        批量创建或更新案例记录（一条语句完成创建、成功/失败状态和保存状态的更新）
+        
+        Args:
+            task_id: 任务ID
+            records: 案例记录列表，每项包含：
+                {
+                    'case_id': int,
+                    'case_url': str,
+                    'case_title': str,
+                    'status': 'success' 或 'failed',
+                    'error_message': str 或 None,
+                    'error_type': str 或 None,
+                    'batch_file_name': str,
+                    'list_item': dict 或 None（列表页数据，重试时与详情页合并）
+                }
+                
+        Returns:
+            写入的记录数
+        """
+        if not records:
+            return 0
+        
+        # 同一语句中不能两次更新同一行，按 case_id 去重（后出现的为准）
+        unique_records = {record['case_id']: record for record in records}
+        rows = list(unique_records.values())
+        
+        query = """
+            WITH upserted AS (
+                INSERT INTO crawl_case_records (
+                    task_id, case_id, case_url, case_title, status,
+                    error_message, error_type, error_stack,
+                    has_detail_data, crawled_at, duration_seconds,
+                    saved_to_json, batch_file_name, list_item
+                )
+                SELECT
+                    $1, t.case_id, t.case_url, t.case_title, t.status,
+                    t.error_message, t.error_type, NULL,
+                    t.status = 'success', CURRENT_TIMESTAMP, 0.0,
+                    TRUE, t.batch_file_name, t.list_item::jsonb
+                FROM unnest(
+                    $2::int[], $3::text[], $4::text[], $5::text[],
+                    $6::text[], $7::text[], $8::text[], $9::text[]
+                ) AS t(case_id, case_url, case_title, status, error_message, error_type, batch_file_name, list_item)
+                ON CONFLICT (task_id, case_id)
+                DO UPDATE SET
+                    case_url = EXCLUDED.case_url,
+                    case_title = EXCLUDED.case_title,
+                    status = EXCLUDED.status,
+                    error_message = EXCLUDED.error_message,
+                    error_type = EXCLUDED.error_type,
+                    error_stack = EXCLUDED.error_stack,
+                    has_detail_data = CASE
+                        WHEN EXCLUDED.status = 'success' THEN TRUE
+                        ELSE crawl_case_records.has_detail_data
+                    END,
+                    crawled_at = EXCLUDED.crawled_at,
+                    duration_seconds = EXCLUDED.duration_seconds,
+                    saved_to_json = TRUE,
+                    batch_file_name = EXCLUDED.batch_file_name,
+                    list_item = COALESCE(EXCLUDED.list_item, crawl_case_records.list_item),
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM upserted
+        """
+        
+        count = await db.fetchval(
+            query,
+            task_id,
+            [r['case_id'] for r in rows],
+            [r.get('case_url') for r in rows],
+            [(r.get('case_title') or '')[:500] for r in rows],
+            [r['status'] for r in rows],
+            [r.get('error_message') for r in rows],
+            [r.get('error_type') for r in rows],
+            [r.get('batch_file_name') for r in rows],
+            [json.dumps(r['list_item'], ensure_ascii=False) if r.get('list_item') else None for r in rows],
+        )
+        return count or 0
+
     @staticmethod
     async def update_case_import_status(
         record_id: int, 
@@ -262,16 +347,16 @@ class CrawlCaseRecordRepository:
         if not case_ids:
             return
         
-        placeholders = ','.join([f'${i+4}' for i in range(len(case_ids))])
-        query = f"""
+        # 以数组参数传入，避免案例数过多时超出参数个数上限
+        query = """
             UPDATE crawl_case_records
             SET imported = $1,
                 import_status = $2,
                 updated_at = CURRENT_TIMESTAMP
-            WHERE task_id = $3 AND case_id IN ({placeholders})
+            WHERE task_id = $3 AND case_id = ANY($4::int[])
         """
         
-        await db.execute(query, imported, import_status, task_id, *case_ids)
+        await db.execute(query, imported, import_status, task_id, list(case_ids))
 
     @staticmethod
     async def batch_verify_cases_by_case_ids(
@@ -290,15 +375,15 @@ class CrawlCaseRecordRepository:
         if not case_ids:
             return
         
-        placeholders = ','.join([f'${i+3}' for i in range(len(case_ids))])
-        query = f"""
+        # 以数组参数传入，避免案例数过多时超出参数个数上限
+        query = """
             UPDATE crawl_case_records
             SET verified = $1,
                 updated_at = CURRENT_TIMESTAMP
-            WHERE task_id = $2 AND case_id IN ({placeholders})
+            WHERE task_id = $2 AND case_id = ANY($3::int[])
         """
         
-        await db.execute(query, verified, task_id, *case_ids)
+        await db.execute(query, verified, task_id, list(case_ids))
 
     @staticmethod
     async def batch_update_validation_status_by_case_ids(
@@ -322,24 +407,30 @@ class CrawlCaseRecordRepository:
         if not case_validation_map:
             return
         
-        # 使用事务批量更新
+        case_ids = []
+        statuses = []
+        has_errors = []
+        errors_json = []
         for case_id, validation_info in case_validation_map.items():
-            has_validation_error = validation_info.get('has_validation_error', False)
             validation_errors = validation_info.get('validation_errors')
-            status = validation_info.get('status', 'validation_failed')
-            
-            validation_errors_json = json.dumps(validation_errors) if validation_errors else None
-            
-            query = """
-                UPDATE crawl_case_records
-                SET status = $1,
-                    has_validation_error = $2,
-                    validation_errors = $3::jsonb,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE task_id = $4 AND case_id = $5
-            """
-            
-            await db.execute(query, status, has_validation_error, validation_errors_json, task_id, case_id)
+            case_ids.append(case_id)
+            statuses.append(validation_info.get('status', 'validation_failed'))
+            has_errors.append(validation_info.get('has_validation_error', False))
+            errors_json.append(json.dumps(validation_errors) if validation_errors else None)
+        
+        # 一条语句更新所有案例
+        query = """
+            UPDATE crawl_case_records AS r
+            SET status = t.status,
+                has_validation_error = t.has_validation_error,
+                validation_errors = t.validation_errors::jsonb,
+                updated_at = CURRENT_TIMESTAMP
+            FROM unnest($2::int[], $3::text[], $4::bool[], $5::text[])
+                AS t(case_id, status, has_validation_error, validation_errors)
+            WHERE r.task_id = $1 AND r.case_id = t.case_id
+        """
+        
+        await db.execute(query, task_id, case_ids, statuses, has_errors, errors_json)
 
     @staticmethod
     async def get_failed_cases(task_id: str) -> List[Dict[str, Any]]:
@@ -360,7 +451,7 @@ class CrawlCaseRecordRepository:
                    imported, import_status, verified,
                    retry_count, last_retry_at, created_at, updated_at
             FROM crawl_case_records
-            WHERE task_id = $1 AND status IN ('failed', 'validation_failed')
+            WHERE task_id = $1 AND status IN ('failed', 'validation_failed', 'dead_letter')
             ORDER BY created_at DESC
         """
         
@@ -477,6 +568,57 @@ class CrawlCaseRecordRepository:
             'unverified_count': len(unverified_case_ids)
         }
 
+    @staticmethod
+    async def get_retry_summary(task_id: str, max_retries: int) -> Dict[str, Any]:
+        """
+        获取失败案例的重试队列概况
+
+        Args:
+            task_id: 任务ID
+            max_retries: 最大重试次数
+
+        Returns:
+            {'due': 已到重试时间, 'scheduled': 等待退避, 'dead_letter': 死信数, 'next_retry_at': 最近的重试时间}
+        """
+        query = """
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'failed' AND retry_count < $2
+                                 AND (next_retry_at IS NULL OR next_retry_at <= CURRENT_TIMESTAMP)) AS due,
+                COUNT(*) FILTER (WHERE status = 'failed' AND retry_count < $2
+                                 AND next_retry_at > CURRENT_TIMESTAMP) AS scheduled,
+                COUNT(*) FILTER (WHERE status = 'dead_letter') AS dead_letter,
+                MIN(next_retry_at) FILTER (WHERE status = 'failed' AND retry_count < $2) AS next_retry_at
+            FROM crawl_case_records
+            WHERE task_id = $1 AND status IN ('failed', 'dead_letter')
+        """
+
+        row = await db.fetchrow(query, task_id, max_retries)
+        return dict(row)
+
+    @staticmethod
+    async def requeue_dead_letters(task_id: str) -> int:
+        """
+        将死信中的案例重新放回重试队列（重试次数清零，立即可重试）
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            重新入队的记录数
+        """
+        query = """
+            UPDATE crawl_case_records
+            SET status = 'failed',
+                retry_count = 0,
+                next_retry_at = NULL,
+                dead_lettered_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE task_id = $1 AND status = 'dead_letter'
+        """
+
+        result = await db.execute(query, task_id)
+        return int(result.split()[-1]) if result else 0
+
     @staticmethod
     async def increment_retry_count(record_id: int):
         """
@@ -100,13 +100,64 @@ class CrawlListPageRepository:
                    items_count, crawled_at, duration_seconds, retry_count, last_retry_at,
                    created_at, updated_at
             FROM crawl_list_pages
-            WHERE task_id = $1 AND status = 'failed'
+            WHERE task_id = $1 AND status IN ('failed', 'dead_letter')
             ORDER BY page_number ASC
         """
         
         rows = await db.fetch(query, task_id)
         return [dict(row) for row in rows]
 
+    @staticmethod
+    async def get_retry_summary(task_id: str, max_retries: int) -> Dict[str, Any]:
+        """
+        获取失败列表页的重试队列概况
+
+        Args:
+            task_id: 任务ID
+            max_retries: 最大重试次数
+
+        Returns:
+            {'due': 已到重试时间, 'scheduled': 等待退避, 'dead_letter': 死信数, 'next_retry_at': 最近的重试时间}
+        """
+        query = """
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'failed' AND retry_count < $2
+                                 AND (next_retry_at IS NULL OR next_retry_at <= CURRENT_TIMESTAMP)) AS due,
+                COUNT(*) FILTER (WHERE status = 'failed' AND retry_count < $2
+                                 AND next_retry_at > CURRENT_TIMESTAMP) AS scheduled,
+                COUNT(*) FILTER (WHERE status = 'dead_letter') AS dead_letter,
+                MIN(next_retry_at) FILTER (WHERE status = 'failed' AND retry_count < $2) AS next_retry_at
+            FROM crawl_list_pages
+            WHERE task_id = $1 AND status IN ('failed', 'dead_letter')
+        """
+
+        row = await db.fetchrow(query, task_id, max_retries)
+        return dict(row)
+
+    @staticmethod
+    async def requeue_dead_letters(task_id: str) -> int:
+        """
+        将死信中的列表页重新放回重试队列（重试次数清零，立即可重试）
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            重新入队的记录数
+        """
+        query = """
+            UPDATE crawl_list_pages
+            SET status = 'failed',
+                retry_count = 0,
+                next_retry_at = NULL,
+                dead_lettered_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE task_id = $1 AND status = 'dead_letter'
+        """
+
+        result = await db.execute(query, task_id)
+        return int(result.split()[-1]) if result else 0
+
     @staticmethod
     async def increment_retry_count(record_id: int):
         """
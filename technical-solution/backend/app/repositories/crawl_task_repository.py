@@ -23,7 +23,10 @@ class CrawlTaskRepository:
         delay_min: float,
         delay_max: float,
         enable_resume: bool,
-        created_by: Optional[str] = None
+        created_by: Optional[str] = None,
+        incremental_mode: bool = False,
+        incremental_stop_pages: int = 2,
+        priority: int = 0
     ) -> str:
         """
         创建任务
@@ -38,9 +41,9 @@ class CrawlTaskRepository:
                 task_id, name, data_source, description,
                 start_page, end_page, case_type, search_value,
                 batch_size, delay_min, delay_max, enable_resume,
-                status, created_by
+                status, created_by, incremental_mode, incremental_stop_pages, priority
             ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14
+                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17
             ) RETURNING task_id
         """
         
@@ -49,7 +52,7 @@ class CrawlTaskRepository:
             task_id, name, data_source, description,
             start_page, end_page, case_type, search_value,
             batch_size, delay_min, delay_max, enable_resume,
-            'pending', created_by
+            'pending', created_by, incremental_mode, incremental_stop_pages, priority
         )
         
         return task_id
@@ -62,10 +65,13 @@ class CrawlTaskRepository:
                 task_id, name, data_source, description,
                 start_page, end_page, case_type, search_value,
                 batch_size, delay_min, delay_max, enable_resume,
+                incremental_mode, incremental_stop_pages, stopped_at_page,
+                priority, queued_at, queued_start_page,
                 status, created_at, started_at, completed_at, paused_at,
                 total_pages, completed_pages, current_page,
                 total_crawled, total_saved, total_failed, batches_saved,
                 avg_speed, avg_delay, error_rate,
+                request_rate, request_concurrency,
                 error_message, error_stack, created_by, updated_at
             FROM crawl_tasks
             WHERE task_id = $1
@@ -137,7 +143,8 @@ class CrawlTaskRepository:
                 created_at, started_at, completed_at,
                 total_pages, completed_pages, current_page,
                 total_crawled, total_saved, total_failed, batches_saved,
-                avg_speed, avg_delay, error_rate
+                avg_speed, avg_delay, error_rate,
+                request_rate, request_concurrency
             FROM crawl_tasks
             WHERE {where_clause}
             ORDER BY {sort_field} {sort_dir}
@@ -261,7 +268,9 @@ class CrawlTaskRepository:
         task_id: str,
         avg_speed: Optional[float] = None,
         avg_delay: Optional[float] = None,
-        error_rate: Optional[float] = None
+        error_rate: Optional[float] = None,
+        request_rate: Optional[float] = None,
+        request_concurrency: Optional[int] = None
     ) -> bool:
         """更新任务统计信息"""
         update_fields = []
@@ -283,6 +292,16 @@ class CrawlTaskRepository:
             params.append(error_rate)
             param_idx += 1
 
+        if request_rate is not None:
+            update_fields.append(f"request_rate = ${param_idx}")
+            params.append(request_rate)
+            param_idx += 1
+
+        if request_concurrency is not None:
+            update_fields.append(f"request_concurrency = ${param_idx}")
+            params.append(request_concurrency)
+            param_idx += 1
+
         if not update_fields:
             return False
 
@@ -403,24 +422,129 @@ class CrawlTaskRepository:
         """
         获取上一次爬取到的页数
         
+        取数据源高水位与已完成/已终止的全量任务页码中的较大值，
+        增量任务在到达已爬取区域时提前停止，其 end_page 不代表实际爬取到的页数，不参与计算
+        
         Args:
             data_source: 数据源，默认为 "adquan"
             
         Returns:
             上一次爬取到的页数，如果没有则返回 None
         """
-        # 查询已完成或已终止的任务，获取最大的 end_page 或 current_page
         query = """
-            SELECT COALESCE(MAX(end_page), MAX(current_page), 0) as last_page
-            FROM crawl_tasks
-            WHERE data_source = $1
-            AND status IN ('completed', 'terminated')
-            AND (end_page IS NOT NULL OR current_page IS NOT NULL)
+            SELECT COALESCE(GREATEST(
+                (SELECT last_page FROM crawl_source_watermarks WHERE data_source = $1),
+                (
+                    SELECT COALESCE(MAX(end_page), MAX(current_page))
+                    FROM crawl_tasks
+                    WHERE data_source = $1
+                    AND status IN ('completed', 'terminated')
+                    AND (end_page IS NOT NULL OR current_page IS NOT NULL)
+                    AND NOT COALESCE(incremental_mode, FALSE)
+                )
+            ), 0) as last_page
         """
         
         result = await db.fetchval(query, data_source)
         return result if result is not None else None
 
+    @staticmethod
+    async def get_source_watermark(data_source: str = "adquan") -> Optional[Dict[str, Any]]:
+        """
+        获取数据源高水位
+        
+        Args:
+            data_source: 数据源，默认为 "adquan"
+            
+        Returns:
+            高水位信息，如果没有则返回 None
+        """
+        query = """
+            SELECT data_source, last_page, newest_case_id, last_task_id,
+                   last_full_crawl_at, last_incremental_at, updated_at
+            FROM crawl_source_watermarks
+            WHERE data_source = $1
+        """
+        
+        row = await db.fetchrow(query, data_source)
+        return dict(row) if row else None
+
+    @staticmethod
+    async def enqueue_task(task_id: str, start_page: int) -> bool:
+        """
+        将任务放入调度队列
+
+        Args:
+            task_id: 任务ID
+            start_page: 出队执行时的起始页码
+
+        Returns:
+            是否入队成功（运行中或已在队列中的任务不会重复入队）
+        """
+        query = """
+            UPDATE crawl_tasks
+            SET status = 'queued', queued_at = CURRENT_TIMESTAMP, queued_start_page = $2,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE task_id = $1
+            AND status NOT IN ('running', 'queued')
+        """
+        result = await db.execute(query, task_id, start_page)
+        return result == "UPDATE 1"
+
+    @staticmethod
+    async def count_queued_tasks() -> int:
+        """获取调度队列中的任务数"""
+        return await db.fetchval("SELECT COUNT(*) FROM crawl_tasks WHERE status = 'queued'")
+
+    @staticmethod
+    async def list_queued_tasks(limit: int = 50) -> List[Dict[str, Any]]:
+        """按 优先级降序、入队时间升序 获取调度队列中的任务"""
+        query = """
+            SELECT
+                task_id, name, data_source, priority, queued_at, queued_start_page,
+                start_page, end_page, case_type, search_value,
+                batch_size, delay_min, delay_max, enable_resume,
+                incremental_mode, incremental_stop_pages
+            FROM crawl_tasks
+            WHERE status = 'queued'
+            ORDER BY priority DESC, queued_at ASC
+            LIMIT $1
+        """
+        rows = await db.fetch(query, limit)
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def claim_queued_task(task_id: str) -> bool:
+        """
+        将队列中的任务标记为运行中（条件更新，多个调度器同时出队时只有一个成功）
+        """
+        query = """
+            UPDATE crawl_tasks
+            SET status = 'running', started_at = CURRENT_TIMESTAMP, queued_at = NULL,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE task_id = $1
+            AND status = 'queued'
+        """
+        result = await db.execute(query, task_id)
+        return result == "UPDATE 1"
+
+    @staticmethod
+    async def get_queue_position(task_id: str) -> Optional[int]:
+        """获取任务在调度队列中的位置（从 1 开始），不在队列中返回 None"""
+        query = """
+            SELECT COUNT(*) + 1
+            FROM crawl_tasks q, crawl_tasks t
+            WHERE t.task_id = $1 AND t.status = 'queued'
+            AND q.status = 'queued'
+            AND (q.priority > t.priority OR (q.priority = t.priority AND q.queued_at < t.queued_at))
+        """
+        exists = await db.fetchval(
+            "SELECT 1 FROM crawl_tasks WHERE task_id = $1 AND status = 'queued'", task_id
+        )
+        if not exists:
+            return None
+        return await db.fetchval(query, task_id)
+
     @staticmethod
     async def delete_task(task_id: str) -> bool:
         """删除任务（仅限已完成、已失败、已取消的任务）"""
@@ -0,0 +1,41 @@
+"""
+向量重新生成作业数据访问层
+"""
+from typing import Optional, List, Dict, Any
+from app.database import db
+
+
+class EmbeddingJobRepository:
+    """向量重新生成作业数据访问类（作业记录由 ReembedStage 创建和更新）"""
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+        """获取作业记录"""
+        row = await db.fetchrow("SELECT * FROM embedding_jobs WHERE job_id = $1", job_id)
+        return dict(row) if row else None
+
+    @staticmethod
+    async def list_jobs(limit: int = 50) -> List[Dict[str, Any]]:
+        """获取最近的作业记录"""
+        rows = await db.fetch(
+            "SELECT * FROM embedding_jobs ORDER BY updated_at DESC LIMIT $1",
+            limit
+        )
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    async def cancel_job(job_id: str) -> bool:
+        """
+        标记作业为已取消（执行中的作业在写回当前批次后退出）
+
+        Returns:
+            是否更新成功（只有 pending / running 的作业可以取消）
+        """
+        result = await db.execute(
+            """
+            UPDATE embedding_jobs SET status = 'cancelled'
+            WHERE job_id = $1 AND status IN ('pending', 'running')
+            """,
+            job_id
+        )
+        return result.endswith(" 1")
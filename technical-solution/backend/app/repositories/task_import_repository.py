@@ -21,6 +21,7 @@ class TaskImportRepository:
         generate_vectors: bool,
         skip_invalid: bool,
         batch_size: int,
+        pipeline_mode: bool = False,
     ) -> str:
         """
         创建导入记录
@@ -34,9 +35,9 @@ class TaskImportRepository:
             INSERT INTO task_imports (
                 import_id, task_id, import_mode, selected_batches,
                 skip_existing, update_existing, generate_vectors,
-                skip_invalid, batch_size, status
+                skip_invalid, batch_size, pipeline_mode, status
             ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10
+                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11
             ) RETURNING import_id
         """
 
@@ -46,7 +47,7 @@ class TaskImportRepository:
             query,
             import_id, task_id, import_mode, selected_batches_json,
             skip_existing, update_existing, generate_vectors,
-            skip_invalid, batch_size, "pending"
+            skip_invalid, batch_size, pipeline_mode, "pending"
         )
 
         return import_id
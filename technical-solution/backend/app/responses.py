@@ -0,0 +1,47 @@
+"""
+快速 JSON 响应
+已安装 orjson 时使用 orjson 序列化，否则回退到标准库 json（输出格式与 Starlette JSONResponse 相同）；
+用于结果已是响应结构的接口，直接返回可跳过 FastAPI 按 response_model 重复校验和序列化
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """标准库 json 不支持的类型（与 pydantic 的 JSON 输出一致）"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 JSON 字节串"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson（未安装时为标准库 json）序列化的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,40 @@
+"""
+管理接口路由（慢请求记录）
+"""
+from fastapi import APIRouter, Query
+from app.config import settings
+from app.profiling import slow_requests
+from app.schemas.response import BaseResponse
+
+router = APIRouter(prefix="/api/v1/admin", tags=["管理"])
+
+
+@router.get("/slow-requests", response_model=BaseResponse[dict])
+async def list_slow_requests(
+    limit: int = Query(20, ge=1, le=1000, description="返回数量")
+):
+    """
+    获取最近的慢请求（新的在前）
+
+    每条记录包含各环节耗时，启用 PROFILING_CAPTURE_SQL / PROFILING_EXPLAIN 时包含 SQL 和执行计划
+    """
+    return BaseResponse(
+        code=200,
+        message="success",
+        data={
+            "threshold_ms": settings.PROFILING_SLOW_REQUEST_MS,
+            "capacity": slow_requests.capacity,
+            "total": slow_requests.total,
+            "requests": slow_requests.recent(limit),
+        }
+    )
+
+
+@router.delete("/slow-requests", response_model=BaseResponse[dict])
+async def clear_slow_requests():
+    """清空慢请求记录"""
+    return BaseResponse(
+        code=200,
+        message="success",
+        data={"cleared": slow_requests.clear()}
+    )
@@ -9,6 +9,10 @@ from app.schemas.case import SearchRequest, SearchResponse, FilterOptionsRespons
 from app.schemas.response import BaseResponse
 from app.services.search_service import SearchService
 from app.repositories.case_repository import CaseRepository
+from app.config import settings
+from app.metrics import CASE_SEARCH_SECONDS
+from app.profiling import profiled, span, ENDPOINT_SPAN, SERIALIZE_SPAN
+from app.responses import FastJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,7 @@ def get_search_service() -> SearchService:
 
 
 @router.get("/search", response_model=BaseResponse[SearchResponse])
+@profiled(ENDPOINT_SPAN)
 async def search_cases(
     request: Request,
     query: Optional[str] = Query(None, description="检索关键词（用于关键词检索）"),
@@ -114,7 +119,19 @@ async def search_cases(
         logger.info(f"SearchRequest built - brand_industry: {request.brand_industry}, type: {type(request.brand_industry)}")
         
         # 执行检索（延迟加载服务，避免启动时加载模型）
-        result = await get_search_service().search(request)
+        # search_type 未校验，非预期取值统一记为 other，避免标签数量无限增长
+        search_label = search_type if search_type in ('keyword', 'semantic', 'hybrid') else 'other'
+        fast_response = settings.SEARCH_FAST_RESPONSE
+        with CASE_SEARCH_SECONDS.time(search_type=search_label):
+            if fast_response:
+                result = await get_search_service().search_payload(request)
+            else:
+                result = await get_search_service().search(request)
+        
+        if fast_response:
+            # 检索结果已是响应结构，直接序列化返回（跳过按 response_model 重复校验和序列化）
+            with span(SERIALIZE_SPAN):
+                return FastJSONResponse({"code": 200, "message": "success", "data": result})
         
         return BaseResponse(
             code=200,
@@ -12,6 +12,8 @@ from app.services.crawl_task_service import CrawlTaskService
 from app.repositories.crawl_task_repository import CrawlTaskRepository
 from app.repositories.crawl_list_page_repository import CrawlListPageRepository
 from app.repositories.crawl_case_record_repository import CrawlCaseRecordRepository
+from app.services.crawl_scheduler import get_crawl_scheduler
+from app.services.crawl_retry_runner import get_retry_runner
 
 router = APIRouter(prefix="/api/v1/crawl-tasks", tags=["爬取任务"])
 
@@ -19,19 +21,44 @@ router = APIRouter(prefix="/api/v1/crawl-tasks", tags=["爬取任务"])
 task_service = CrawlTaskService()
 
 
+async def _current_status(task_id: str) -> str:
+    """获取任务当前状态（进入调度队列的任务可能是 queued 或 running）"""
+    task_data = await CrawlTaskRepository.get_task(task_id)
+    return task_data["status"] if task_data else "unknown"
+
+
+@router.get("/scheduler", response_model=BaseResponse[dict])
+async def get_scheduler_stats():
+    """
+    获取调度器状态（运行中/排队中的任务数和并发额度）
+    """
+    try:
+        stats = await get_crawl_scheduler().get_stats()
+        return BaseResponse(code=200, message="success", data=stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取调度器状态失败: {str(e)}")
+
+
 @router.get("/last-page", response_model=BaseResponse[dict])
 async def get_last_crawled_page(
     data_source: str = Query("adquan", description="数据源")
 ):
     """
-    获取上一次爬取到的页数
+    获取上一次爬取到的页数及数据源高水位
     """
     try:
         last_page = await CrawlTaskRepository.get_last_crawled_page(data_source)
+        watermark = await CrawlTaskRepository.get_source_watermark(data_source)
         return BaseResponse(
             code=200,
             message="success",
-            data={"last_page": last_page, "suggested_start_page": (last_page + 1) if last_page is not None else 0}
+            data={
+                "last_page": last_page,
+                "suggested_start_page": (last_page + 1) if last_page is not None else 0,
+                "newest_case_id": watermark.get("newest_case_id") if watermark else None,
+                "last_full_crawl_at": watermark.get("last_full_crawl_at") if watermark else None,
+                "last_incremental_at": watermark.get("last_incremental_at") if watermark else None,
+            }
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取上一次爬取页数失败: {str(e)}")
@@ -125,10 +152,12 @@ async def start_task(
         return BaseResponse(
             code=200,
             message="success",
-            data={"task_id": task_id, "status": "running"}
+            data={"task_id": task_id, "status": await _current_status(task_id)}
         )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"开始任务失败: {str(e)}")
 
@@ -171,10 +200,12 @@ async def resume_task(
         return BaseResponse(
             code=200,
             message="success",
-            data={"task_id": task_id, "status": "running"}
+            data={"task_id": task_id, "status": await _current_status(task_id)}
         )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"恢复任务失败: {str(e)}")
 
@@ -230,7 +261,10 @@ async def retry_task(
     task_id: str = Path(..., description="任务ID")
 ):
     """
-    重试任务（仅重试失败的案例）
+    重试任务（仅重试失败的列表页和案例）
+
+    有失败工作项记录时在后台按退避间隔并发重试（任务状态不变，retrying 为 true），
+    否则重置任务重新执行
     """
     try:
         success = await task_service.retry_task(task_id)
@@ -240,7 +274,11 @@ async def retry_task(
         return BaseResponse(
             code=200,
             message="success",
-            data={"task_id": task_id, "status": "pending"}
+            data={
+                "task_id": task_id,
+                "status": await _current_status(task_id),
+                "retrying": get_retry_runner(task_id) is not None
+            }
         )
     except HTTPException:
         raise
@@ -248,6 +286,52 @@ async def retry_task(
         raise HTTPException(status_code=500, detail=f"重试任务失败: {str(e)}")
 
 
+@router.get("/{task_id}/retry-queue", response_model=BaseResponse[dict])
+async def get_retry_queue(
+    task_id: str = Path(..., description="任务ID")
+):
+    """
+    获取失败重试队列概况（列表页和案例的待重试、退避中、死信数量）
+    """
+    try:
+        result = await task_service.get_retry_queue(task_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        
+        return BaseResponse(
+            code=200,
+            message="success",
+            data=result
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取重试队列失败: {str(e)}")
+
+
+@router.post("/{task_id}/dead-letters/requeue", response_model=BaseResponse[dict])
+async def requeue_dead_letters(
+    task_id: str = Path(..., description="任务ID")
+):
+    """
+    将死信中的列表页和案例重新放回重试队列（之后调用重试接口开始重试）
+    """
+    try:
+        result = await task_service.requeue_dead_letters(task_id)
+        if result is None:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        
+        return BaseResponse(
+            code=200,
+            message="success",
+            data={"task_id": task_id, "requeued": result}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"死信重新入队失败: {str(e)}")
+
+
 @router.post("/{task_id}/restart", response_model=BaseResponse[dict])
 async def restart_task(
     task_id: str = Path(..., description="任务ID")
@@ -263,10 +347,12 @@ async def restart_task(
         return BaseResponse(
             code=200,
             message="success",
-            data={"task_id": task_id, "status": "running"}
+            data={"task_id": task_id, "status": await _current_status(task_id)}
         )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"重新执行任务失败: {str(e)}")
 
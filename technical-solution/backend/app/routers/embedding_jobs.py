@@ -0,0 +1,94 @@
+"""
+向量重新生成作业相关路由
+"""
+from fastapi import APIRouter, HTTPException, Path, Query
+from app.schemas.embedding_job import EmbeddingJobCreate
+from app.schemas.response import BaseResponse
+from app.services.embedding_job_service import EmbeddingJobService
+
+router = APIRouter(prefix="/api/v1/embedding-jobs", tags=["向量重新生成"])
+
+# 创建服务实例
+job_service = EmbeddingJobService()
+
+
+@router.post("", response_model=BaseResponse[dict])
+async def start_embedding_job(request: EmbeddingJobCreate = EmbeddingJobCreate()):
+    """
+    启动向量重新生成作业（相同作业ID从检查点继续）
+    """
+    try:
+        result = await job_service.start_job(request)
+        return BaseResponse(
+            code=200,
+            message="success",
+            data=result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"启动向量重新生成作业失败: {str(e)}")
+
+
+@router.get("", response_model=BaseResponse[dict])
+async def list_embedding_jobs(
+    limit: int = Query(50, ge=1, le=200, description="返回数量")
+):
+    """
+    获取最近的向量重新生成作业
+    """
+    try:
+        jobs = await job_service.list_jobs(limit)
+        return BaseResponse(
+            code=200,
+            message="success",
+            data={"items": jobs, "total": len(jobs)}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取作业列表失败: {str(e)}")
+
+
+@router.get("/{job_id}", response_model=BaseResponse[dict])
+async def get_embedding_job(
+    job_id: str = Path(..., description="作业ID")
+):
+    """
+    获取作业状态和进度（检查点、已处理行数、写入向量数）
+    """
+    try:
+        job = await job_service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="作业不存在")
+        return BaseResponse(
+            code=200,
+            message="success",
+            data=job
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取作业状态失败: {str(e)}")
+
+
+@router.post("/{job_id}/cancel", response_model=BaseResponse[dict])
+async def cancel_embedding_job(
+    job_id: str = Path(..., description="作业ID")
+):
+    """
+    取消作业（写回当前批次并记录检查点后停止，重新启动即从检查点继续）
+    """
+    try:
+        success = await job_service.cancel_job(job_id)
+        if not success:
+            raise HTTPException(status_code=400, detail="作业不存在或未在执行")
+        return BaseResponse(
+            code=200,
+            message="success",
+            data={"job_id": job_id, "status": "cancelled"}
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"取消作业失败: {str(e)}")
@@ -1,9 +1,13 @@
 """
 健康检查路由
 """
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, Response
 from app.schemas.response import BaseResponse
-from typing import Dict
+from app.config import settings
+from app.database import db
+from app.services.vector_service import get_vector_model_status, get_sidecar_client
+from typing import Dict, Any
 
 router = APIRouter(prefix="/health", tags=["健康检查"])
 
@@ -16,3 +20,52 @@ async def health_check():
         message="success",
         data={"status": "healthy", "service": "ad-case-api"}
     )
+
+
+@router.get("/ready", response_model=BaseResponse[Dict[str, Any]])
+async def readiness_check(response: Response):
+    """
+    就绪检查接口
+
+    数据库可用且向量模型已预热完成（未启用预热时不要求）才返回就绪，否则返回 503；
+    配置了向量边车时同时报告边车状态
+    """
+    database: Dict[str, Any] = {"ready": False, "error": None}
+    try:
+        await asyncio.wait_for(db.fetchval("SELECT 1"), timeout=2.0)
+        database["ready"] = True
+    except Exception as e:
+        database["error"] = str(e) or type(e).__name__
+
+    pool: Dict[str, Any] = {"ready": db.pool is not None}
+    if db.pool is not None:
+        pool.update(
+            size=db.pool.get_size(),
+            idle=db.pool.get_idle_size(),
+            max_size=db.pool.get_max_size(),
+        )
+
+    model = get_vector_model_status()
+    model["warmup_enabled"] = settings.VECTOR_WARMUP_ENABLED
+    model["ready"] = model["status"] == "ready" or not settings.VECTOR_WARMUP_ENABLED
+
+    # 边车不可用时会回退到进程内模型，只报告状态，不影响就绪
+    client = get_sidecar_client()
+    if client is not None:
+        sidecar: Dict[str, Any] = {"url": client.url, "ready": False, "error": None}
+        try:
+            loop = asyncio.get_running_loop()
+            info = await asyncio.wait_for(loop.run_in_executor(None, client.health), timeout=2.0)
+            sidecar.update(ready=True, batcher=info.get("batcher"))
+        except Exception as e:
+            sidecar["error"] = str(e) or type(e).__name__
+        model["sidecar"] = sidecar
+
+    ready = database["ready"] and pool["ready"] and model["ready"]
+    if not ready:
+        response.status_code = 503
+    return BaseResponse(
+        code=200 if ready else 503,
+        message="success" if ready else "not ready",
+        data={"ready": ready, "database": database, "pool": pool, "model": model}
+    )
@@ -0,0 +1,14 @@
+"""
+运行指标路由
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.metrics import REGISTRY, CONTENT_TYPE
+
+router = APIRouter(tags=["运行指标"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus 抓取接口（文本格式 0.0.4，每个 worker 进程各自统计）"""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -16,6 +16,10 @@ class CrawlTaskConfig(BaseModel):
     delay_min: float = Field(default=2.0, ge=0, description="最小延迟时间（秒）")
     delay_max: float = Field(default=5.0, ge=0, description="最大延迟时间（秒）")
     enable_resume: bool = Field(default=True, description="是否启用断点续传")
+    incremental_mode: bool = Field(default=False, description="是否为增量模式")
+    incremental_stop_pages: int = Field(default=2, ge=1, description="增量模式下连续全部已知多少页后停止")
+    stopped_at_page: Optional[int] = Field(default=None, description="增量模式下到达已爬取区域而停止的页码")
+    priority: int = Field(default=0, description="调度优先级，数值越大越先执行")
 
 
 class CrawlTaskCreate(BaseModel):
@@ -23,7 +27,7 @@ class CrawlTaskCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255, description="任务名称")
     data_source: str = Field(default="adquan", description="数据源")
     description: Optional[str] = Field(default=None, description="任务描述")
-    start_page: Optional[int] = Field(default=None, ge=0, description="起始页码，为空时自动设置为上一次爬取到的页数")
+    start_page: Optional[int] = Field(default=None, ge=0, description="起始页码，为空时自动设置为上一次爬取到的页数（增量模式为第0页）")
     end_page: int = Field(..., ge=0, description="结束页码（必填）")
     case_type: Optional[int] = Field(default=None, description="案例类型")
     search_value: Optional[str] = Field(default=None, description="搜索关键词")
@@ -31,6 +35,9 @@ class CrawlTaskCreate(BaseModel):
     delay_min: float = Field(default=2.0, ge=0, description="最小延迟时间（秒）")
     delay_max: float = Field(default=5.0, ge=0, description="最大延迟时间（秒）")
     enable_resume: bool = Field(default=True, description="是否启用断点续传")
+    incremental_mode: bool = Field(default=False, description="增量模式：从最新页开始，连续多页全部为已知案例时停止")
+    incremental_stop_pages: int = Field(default=2, ge=1, description="增量模式下连续全部已知多少页后停止")
+    priority: int = Field(default=0, description="调度优先级，数值越大越先执行（同优先级按入队先后）")
     execute_immediately: bool = Field(default=True, description="是否立即执行")
 
 
@@ -53,6 +60,8 @@ class CrawlTaskStats(BaseModel):
     avg_speed: Optional[float] = Field(default=None, description="平均爬取速度（案例/分钟）")
     avg_delay: Optional[float] = Field(default=None, description="平均请求延迟（秒）")
     error_rate: Optional[float] = Field(default=None, ge=0.0, le=1.0, description="错误率")
+    request_rate: Optional[float] = Field(default=None, description="当前请求速率（请求/秒，自适应速率控制）")
+    request_concurrency: Optional[int] = Field(default=None, description="当前请求并发数")
 
 
 class CrawlTaskTimeline(BaseModel):
@@ -0,0 +1,16 @@
+"""
+向量重新生成作业相关的 Schema 定义
+"""
+from typing import Optional, List
+from pydantic import BaseModel, Field
+
+
+class EmbeddingJobCreate(BaseModel):
+    """启动向量重新生成作业请求"""
+    job_id: Optional[str] = Field(default=None, description="作业ID（相同作业ID从检查点继续，默认按模式、向量列和模型生成）")
+    columns: List[str] = Field(default=["combined_vector"], min_length=1, description="生成的向量列：combined_vector / title_vector / description_vector")
+    mode: str = Field(default="missing", description="missing：只生成为空的向量；all：全部重新生成（切换模型或编码后端时）")
+    fetch_size: int = Field(default=2000, ge=100, le=20000, description="每次读取并写回的行数（检查点间隔）")
+    batch_size: int = Field(default=64, ge=1, le=512, description="每次模型推理的文本数")
+    workers: int = Field(default=1, ge=1, le=16, description="编码进程数")
+    restart: bool = Field(default=False, description="忽略已有检查点，从头开始")
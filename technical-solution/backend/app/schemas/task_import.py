@@ -30,6 +30,7 @@ class ImportStartRequest(BaseModel):
     normalize_data: bool = Field(default=True, description="是否规范化数据（将非法值转为默认值或NULL，默认 True）")
     download_images: bool = Field(default=True, description="是否在导入时下载图片（默认 True）")
     image_download_concurrency: int = Field(default=5, ge=1, le=20, description="图片下载并发数（默认 5，最大 20）")
+    pipeline_mode: bool = Field(default=False, description="是否使用流水线入库（加载/向量/图片/入库各阶段并发执行，默认 False）")
 
 
 class ImportProgress(BaseModel):
@@ -44,6 +45,7 @@ class ImportProgress(BaseModel):
     current_file: Optional[str] = Field(default=None, description="当前处理的文件")
     percentage: float = Field(default=0.0, ge=0.0, le=100.0, description="完成百分比")
     estimated_remaining_time: Optional[int] = Field(default=None, description="预计剩余时间（秒）")
+    stage_stats: Optional[Dict[str, Any]] = Field(default=None, description="流水线各阶段统计（吞吐量、队列深度等，仅流水线模式）")
 
 
 class ImportStats(BaseModel):
@@ -0,0 +1,202 @@
+"""
+失败工作项重试
+只重试任务中失败的列表页和案例（crawl_list_pages / crawl_case_records），不重新爬取整个页码范围：
+- 多个重试线程（retry_only 模式的 CrawlWorker）通过 FOR UPDATE SKIP LOCKED 认领已到重试时间的工作项并发重试，
+  请求受数据源共享的自适应速率控制器限制；
+- 再次失败的工作项按指数退避加随机抖动安排下次重试，超过最大重试次数后进入死信（dead_letter）；
+- 没有待重试的工作项（全部成功或进入死信）时自动结束
+"""
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# 添加 backend 目录到路径，以便导入 services 模块
+backend_root = Path(__file__).parent.parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from services.pipeline.crawl_worker import CrawlWorker, _worker_name
+from services.spider.rate_controller import get_rate_controller
+from services.spider.token_cache import get_token_cache
+from app.config import settings
+from app.services.crawl_task_executor_sync_db import SyncDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlRetryRunner:
+    """单个任务的失败工作项重试"""
+
+    def __init__(
+        self,
+        task_id: str,
+        data_source: str = "adquan",
+        concurrency: int = 4,
+        max_retries: int = 3,
+        base_delay: float = 30.0,
+        max_delay: float = 1800.0,
+        batch_size: int = 30
+    ):
+        """
+        初始化重试
+
+        Args:
+            task_id: 任务ID
+            data_source: 数据源（决定共享的速率控制器）
+            concurrency: 并发重试线程数
+            max_retries: 最大重试次数，超过后进入死信
+            base_delay: 退避基础间隔（秒），第 n 次重试前等待约 base_delay × 2^n 秒
+            max_delay: 退避最大间隔（秒）
+            batch_size: 重试成功的案例每批写入的数量
+        """
+        self.task_id = task_id
+        self.data_source = data_source
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+
+        self._workers: List[CrawlWorker] = []
+        self._threads: List[threading.Thread] = []
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动重试线程（立即返回）"""
+        # 预先按配置创建数据源共享的速率控制器和 Token 缓存，重试线程与正在运行的任务共用
+        site_rate_controller = None
+        if settings.CRAWL_ADAPTIVE_RATE_ENABLED:
+            site_rate_controller = get_rate_controller(
+                self.data_source,
+                initial_rate=settings.CRAWL_RATE_INITIAL,
+                min_rate=settings.CRAWL_RATE_MIN,
+                max_rate=settings.CRAWL_RATE_MAX,
+                increase_step=settings.CRAWL_RATE_INCREASE,
+                decrease_factor=settings.CRAWL_RATE_DECREASE_FACTOR,
+                success_window=settings.CRAWL_RATE_SUCCESS_WINDOW,
+                max_concurrency=settings.CRAWL_RATE_MAX_CONCURRENCY,
+                target_latency_ms=settings.CRAWL_RATE_TARGET_LATENCY_MS,
+            )
+        if settings.CRAWL_TOKEN_CACHE_ENABLED:
+            get_token_cache(
+                max_age=settings.CRAWL_TOKEN_MAX_AGE_SECONDS,
+                refresh_ratio=settings.CRAWL_TOKEN_REFRESH_RATIO,
+                rate_controller=site_rate_controller,
+            )
+
+        db_config = {
+            'host': settings.DB_HOST,
+            'port': settings.DB_PORT,
+            'database': settings.DB_NAME,
+            'user': settings.DB_USER,
+            'password': settings.DB_PASSWORD,
+        }
+        base_name = _worker_name()
+        for i in range(self.concurrency):
+            worker = CrawlWorker(
+                db_config=db_config,
+                task_id=self.task_id,
+                output_dir=backend_root / "data" / "json" / self.task_id,
+                batch_size=self.batch_size,
+                max_retries=self.max_retries,
+                claim_size=1,
+                parser_backend=settings.CRAWL_HTML_PARSER,
+                archive_html=settings.CRAWL_ARCHIVE_HTML,
+                adaptive_rate=settings.CRAWL_ADAPTIVE_RATE_ENABLED,
+                worker_name=f"{base_name}:retry-{i}",
+                retry_only=True,
+                retry_base_delay=self.base_delay,
+                retry_max_delay=self.max_delay
+            )
+            thread = threading.Thread(target=worker.run, name=f"crawl-retry-{self.task_id}-{i}", daemon=True)
+            self._workers.append(worker)
+            self._threads.append(thread)
+
+        for thread in self._threads:
+            thread.start()
+        self._monitor = threading.Thread(target=self._wait_finished, name=f"crawl-retry-{self.task_id}", daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        """停止重试（各线程保存已爬取的案例并释放租约后退出）"""
+        for worker in self._workers:
+            worker.stop()
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _wait_finished(self):
+        for thread in self._threads:
+            thread.join()
+        stats = self.get_stats()
+        SyncDatabase.add_log(
+            task_id=self.task_id,
+            level="INFO",
+            message=(
+                f"失败重试结束: 重试成功 {stats['cases_recovered']} 个案例，"
+                f"新爬取 {stats['cases_crawled'] - stats['cases_recovered']} 个，"
+                f"列表页 {stats['list_pages']} 页，进入死信 {stats['dead_lettered']} 个"
+            ),
+            details=stats
+        )
+        _unregister_runner(self.task_id, self)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """汇总各重试线程的统计信息"""
+        keys = ('list_pages', 'list_pages_failed', 'cases_crawled', 'cases_recovered',
+                'cases_failed', 'dead_lettered', 'batches_saved')
+        stats = {key: sum(worker.stats[key] for worker in self._workers) for key in keys}
+        stats.update({
+            'running': self.is_running,
+            'concurrency': self.concurrency,
+            'max_retries': self.max_retries,
+        })
+        return stats
+
+
+# 进程内正在运行的重试：task_id -> CrawlRetryRunner
+_runners: Dict[str, CrawlRetryRunner] = {}
+_runners_lock = threading.Lock()
+
+
+def get_retry_runner(task_id: str) -> Optional[CrawlRetryRunner]:
+    """获取任务正在运行的重试"""
+    with _runners_lock:
+        runner = _runners.get(task_id)
+        return runner if runner and runner.is_running else None
+
+
+def start_retry_runner(task_id: str, data_source: str = "adquan", batch_size: int = 30) -> CrawlRetryRunner:
+    """
+    启动任务的失败工作项重试（已在运行时直接返回正在运行的实例）
+
+    Args:
+        task_id: 任务ID
+        data_source: 数据源
+        batch_size: 重试成功的案例每批写入的数量
+    """
+    with _runners_lock:
+        runner = _runners.get(task_id)
+        if runner and runner.is_running:
+            return runner
+        runner = CrawlRetryRunner(
+            task_id,
+            data_source=data_source,
+            concurrency=settings.CRAWL_RETRY_CONCURRENCY,
+            max_retries=settings.CRAWL_RETRY_MAX_RETRIES,
+            base_delay=settings.CRAWL_RETRY_BASE_DELAY_SECONDS,
+            max_delay=settings.CRAWL_RETRY_MAX_DELAY_SECONDS,
+            batch_size=batch_size
+        )
+        runner.start()
+        _runners[task_id] = runner
+        return runner
+
+
+def _unregister_runner(task_id: str, runner: CrawlRetryRunner):
+    with _runners_lock:
+        if _runners.get(task_id) is runner:
+            del _runners[task_id]
@@ -0,0 +1,243 @@
+"""
+爬取任务调度器
+开始执行的任务先进入 crawl_tasks 中的调度队列（status = 'queued'），
+调度器按 优先级降序、入队时间升序 出队，并保证：
+- 本进程同时运行的任务数不超过全局额度；
+- 同一数据源同时运行的任务数不超过数据源额度（同一数据源的请求速率由该数据源的速率控制器在运行中的任务之间平均分配）；
+- 队列长度超过上限时拒绝新任务入队（准入控制）
+队列持久化在数据库中，服务重启后调度器启动时继续执行队列中的任务
+"""
+import asyncio
+import logging
+from typing import Optional, Dict, Any
+
+from app.config import settings
+from app.repositories.crawl_task_repository import CrawlTaskRepository
+from app.services.crawl_task_executor import CrawlTaskExecutor, register_executor, get_executor
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlScheduler:
+    """爬取任务调度器"""
+
+    def __init__(
+        self,
+        max_running: int = 3,
+        max_running_per_source: int = 2,
+        max_queued: int = 100,
+        poll_interval: float = 10.0
+    ):
+        """
+        初始化调度器
+
+        Args:
+            max_running: 本进程同时运行的最大任务数
+            max_running_per_source: 同一数据源同时运行的最大任务数
+            max_queued: 调度队列最大长度，超过时拒绝新任务入队
+            poll_interval: 轮询队列的间隔（秒），用于接手其它进程入队或重启前遗留的任务
+        """
+        self.max_running = max(1, max_running)
+        self.max_running_per_source = max(1, max_running_per_source)
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.repo = CrawlTaskRepository()
+
+        # 本进程由调度器启动、仍在运行的任务：task_id -> data_source
+        self._running: Dict[str, str] = {}
+        self._dispatch_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def _ensure_primitives(self):
+        # asyncio 原语需要在事件循环中创建
+        if self._dispatch_lock is None:
+            self._dispatch_lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+
+    # ------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------
+
+    async def start(self):
+        """启动后台调度循环"""
+        self._ensure_primitives()
+        if self._loop_task and not self._loop_task.done():
+            return
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info(
+            f"爬取任务调度器已启动: 最多同时运行 {self.max_running} 个任务，"
+            f"每个数据源最多 {self.max_running_per_source} 个，队列上限 {self.max_queued}"
+        )
+
+    async def stop(self):
+        """停止后台调度循环（不影响已在运行的任务）"""
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.dispatch()
+            except Exception as e:
+                logger.error(f"调度任务失败: {e}", exc_info=True)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def wake(self):
+        """唤醒调度循环（有任务入队或结束时调用）"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------
+    # 入队与出队
+    # ------------------------------------------------------------
+
+    async def submit(self, task_id: str, start_page: int) -> bool:
+        """
+        将任务放入调度队列，有空闲额度时立即开始执行
+
+        Args:
+            task_id: 任务ID
+            start_page: 起始页码
+
+        Returns:
+            是否入队成功
+
+        Raises:
+            ValueError: 调度队列已满
+        """
+        self._ensure_primitives()
+        queued = await self.repo.count_queued_tasks()
+        if queued >= self.max_queued:
+            raise ValueError(f"调度队列已满（{queued}/{self.max_queued} 个任务等待中），请稍后再试")
+
+        if not await self.repo.enqueue_task(task_id, start_page):
+            return False
+
+        await self.dispatch()
+
+        position = await self.repo.get_queue_position(task_id)
+        if position is not None:
+            await self.repo.add_log(
+                task_id=task_id,
+                level="INFO",
+                message=f"任务已进入调度队列（第 {position} 位），等待空闲额度后从第 {start_page} 页开始执行"
+            )
+        return True
+
+    async def dispatch(self) -> int:
+        """
+        在额度允许的范围内启动队列中的任务
+
+        Returns:
+            本次启动的任务数
+        """
+        self._ensure_primitives()
+        async with self._dispatch_lock:
+            self._reap()
+            started = 0
+            while len(self._running) < self.max_running:
+                candidates = await self.repo.list_queued_tasks(limit=self.max_running * 10)
+                task_data = next(
+                    (t for t in candidates if self._source_running(t["data_source"]) < self.max_running_per_source),
+                    None
+                )
+                if not task_data:
+                    break
+                if not await self.repo.claim_queued_task(task_data["task_id"]):
+                    # 已被其它进程出队或状态已改变
+                    continue
+                await self._launch(task_data)
+                started += 1
+            return started
+
+    def _source_running(self, data_source: str) -> int:
+        return sum(1 for source in self._running.values() if source == data_source)
+
+    def _reap(self):
+        """移除已结束（执行器已注销）的任务"""
+        for task_id in list(self._running):
+            if get_executor(task_id) is None:
+                self._running.pop(task_id, None)
+
+    async def _launch(self, task_data: Dict[str, Any]):
+        task_id = task_data["task_id"]
+        start_page = task_data.get("queued_start_page")
+        if start_page is None:
+            start_page = task_data["start_page"]
+
+        await self.repo.add_log(
+            task_id=task_id,
+            level="INFO",
+            message=f"任务开始执行（从第 {start_page} 页开始，优先级 {task_data.get('priority') or 0}）"
+        )
+
+        executor = CrawlTaskExecutor(task_id)
+        register_executor(task_id, executor)
+        self._running[task_id] = task_data["data_source"]
+
+        # 在后台启动任务
+        task = asyncio.create_task(executor.execute(
+            name=task_data["name"],
+            data_source=task_data["data_source"],
+            start_page=start_page,
+            end_page=task_data.get("end_page"),
+            case_type=task_data.get("case_type"),
+            search_value=task_data.get("search_value"),
+            batch_size=task_data.get("batch_size", 30),
+            delay_min=task_data.get("delay_min", 2.0),
+            delay_max=task_data.get("delay_max", 5.0),
+            enable_resume=task_data.get("enable_resume", True),
+            incremental_mode=task_data.get("incremental_mode") or False,
+            incremental_stop_pages=task_data.get("incremental_stop_pages") or 2
+        ))
+        task.add_done_callback(lambda _: self._on_finished(task_id))
+
+    def _on_finished(self, task_id: str):
+        self._running.pop(task_id, None)
+        self.wake()
+
+    # ------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """获取调度器状态"""
+        self._reap()
+        by_source: Dict[str, int] = {}
+        for source in self._running.values():
+            by_source[source] = by_source.get(source, 0) + 1
+        return {
+            "running": len(self._running),
+            "running_by_source": by_source,
+            "queued": await self.repo.count_queued_tasks(),
+            "max_running": self.max_running,
+            "max_running_per_source": self.max_running_per_source,
+            "max_queued": self.max_queued,
+        }
+
+
+# 进程内共享的调度器
+_scheduler: Optional[CrawlScheduler] = None
+
+
+def get_crawl_scheduler() -> CrawlScheduler:
+    """获取进程内共享的调度器（首次调用时按配置创建）"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = CrawlScheduler(
+            max_running=settings.CRAWL_MAX_RUNNING_TASKS,
+            max_running_per_source=settings.CRAWL_MAX_RUNNING_TASKS_PER_SOURCE,
+            max_queued=settings.CRAWL_MAX_QUEUED_TASKS,
+            poll_interval=settings.CRAWL_SCHEDULER_POLL_SECONDS
+        )
+    return _scheduler
@@ -3,10 +3,12 @@
 集成现有的 CrawlStage，实现任务执行、进度更新和任务控制
 """
 import asyncio
+import contextvars
 import logging
 import threading
 import time
 import sys
+from collections import deque
 from pathlib import Path
 from typing import Optional, Callable, Dict, Any
 from datetime import datetime
@@ -17,11 +19,68 @@ if str(backend_root) not in sys.path:
     sys.path.insert(0, str(backend_root))
 
 from services.pipeline.crawl_stage import CrawlStage
+from services.pipeline.seen_index import get_seen_index
+from services.spider.rate_controller import get_rate_controller, RateBudget
+from services.spider.token_cache import get_token_cache
+from services.spider.event_log import Event, configure_event_log
+from app.config import settings
 from app.repositories.crawl_task_repository import CrawlTaskRepository
 from app.services.crawl_task_executor_sync_db import SyncDatabase
 
 logger = logging.getLogger(__name__)
 
+# 当前线程正在执行的爬取任务（多个任务并发执行时，日志只写入产生它的任务）
+_current_task_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('crawl_task_id', default=None)
+
+
+class DatabaseLogHandler(logging.Handler):
+    """
+    将爬取日志批量写入任务日志表
+
+    emit 只把记录放入内存缓冲（不格式化、不访问数据库），后台线程按间隔格式化并批量插入；
+    结构化事件的字段（截断后）写入 details。缓冲已满时丢弃最早的记录。
+    其它任务执行线程中产生的记录不写入；不属于任何任务的记录（节点探测、Token 刷新等共享后台线程）写入所有任务
+    """
+
+    def __init__(self, task_id: str, flush_interval: float = 2.0, max_buffer: int = 5000):
+        super().__init__(level=logging.INFO)
+        self.task_id = task_id
+        self.flush_interval = flush_interval
+        self._buffer: deque = deque(maxlen=max_buffer)
+        self._stop_event = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._flush_loop, name=f"crawl-log-{task_id}", daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord):
+        task_id = _current_task_id.get()
+        if task_id is not None and task_id != self.task_id:
+            return
+        self._buffer.append(record)
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            entries = []
+            while self._buffer:
+                record = self._buffer.popleft()
+                try:
+                    details = record.msg.capped_fields() if isinstance(record.msg, Event) else None
+                    entries.append((record.levelname, self.format(record), details))
+                except Exception:
+                    pass  # 避免日志记录失败影响主流程
+            if entries:
+                SyncDatabase.add_logs(self.task_id, entries)
+
+    def close(self):
+        self._stop_event.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+        super().close()
+
 
 class CrawlTaskExecutor:
     """爬取任务执行器"""
@@ -41,6 +100,7 @@ class CrawlTaskExecutor:
         self.should_stop = False
         self.execution_thread: Optional[threading.Thread] = None
         self.progress_callback: Optional[Callable] = None
+        self.rate_budget: Optional[RateBudget] = None
 
     async def execute(
         self,
@@ -54,6 +114,8 @@ class CrawlTaskExecutor:
         delay_min: float,
         delay_max: float,
         enable_resume: bool,
+        incremental_mode: bool = False,
+        incremental_stop_pages: int = 2,
     ):
         """
         执行任务（异步方法，在后台线程中运行）
@@ -69,6 +131,8 @@ class CrawlTaskExecutor:
             delay_min: 最小延迟
             delay_max: 最大延迟
             enable_resume: 是否启用断点续传
+            incremental_mode: 是否为增量模式
+            incremental_stop_pages: 增量模式下连续全部已知多少页后停止
         """
         # 在后台线程中执行同步代码
         import concurrent.futures
@@ -88,6 +152,8 @@ class CrawlTaskExecutor:
                 delay_min,
                 delay_max,
                 enable_resume,
+                incremental_mode,
+                incremental_stop_pages,
             )
 
     def _execute_sync(
@@ -102,10 +168,14 @@ class CrawlTaskExecutor:
         delay_min: float,
         delay_max: float,
         enable_resume: bool,
+        incremental_mode: bool = False,
+        incremental_stop_pages: int = 2,
     ):
         """
         同步执行任务（在后台线程中运行）
         """
+        # 标记本线程的日志属于当前任务（run_in_executor 不复制上下文，在执行线程中设置）
+        log_context = _current_task_id.set(self.task_id)
         try:
             self.is_running = True
             self.is_paused = False
@@ -122,6 +192,8 @@ class CrawlTaskExecutor:
             self._add_log("INFO", f"  - 批次大小: {batch_size}")
             self._add_log("INFO", f"  - 延迟范围: {delay_min} - {delay_max} 秒")
             self._add_log("INFO", f"  - 断点续传: {'启用' if enable_resume else '禁用'}")
+            if incremental_mode:
+                self._add_log("INFO", f"  - 增量模式: 连续 {incremental_stop_pages} 页全部为已知案例时停止")
 
             # 计算总页数
             max_pages = None
@@ -169,6 +241,57 @@ class CrawlTaskExecutor:
                 
                 return True
             
+            # 跨任务已爬取案例索引（进程内共享）
+            seen_index = None
+            if settings.CRAWL_SEEN_INDEX_ENABLED:
+                seen_index = get_seen_index(
+                    {
+                        'host': settings.DB_HOST,
+                        'port': settings.DB_PORT,
+                        'database': settings.DB_NAME,
+                        'user': settings.DB_USER,
+                        'password': settings.DB_PASSWORD,
+                    },
+                    refresh_interval=settings.CRAWL_SEEN_INDEX_REFRESH_SECONDS
+                )
+                index_stats = seen_index.get_stats()
+                self._add_log("INFO", f"跨任务去重已启用: 索引中已有 {index_stats['size']} 个已爬取案例")
+
+            # 自适应速率控制器（同一数据源的任务共用，替代 delay_min/delay_max 随机等待），
+            # 本任务领取一份额度，速率和并发在运行中的任务之间平均分配
+            site_rate_controller = None
+            if settings.CRAWL_ADAPTIVE_RATE_ENABLED:
+                site_rate_controller = get_rate_controller(
+                    data_source,
+                    initial_rate=settings.CRAWL_RATE_INITIAL,
+                    min_rate=settings.CRAWL_RATE_MIN,
+                    max_rate=settings.CRAWL_RATE_MAX,
+                    increase_step=settings.CRAWL_RATE_INCREASE,
+                    decrease_factor=settings.CRAWL_RATE_DECREASE_FACTOR,
+                    success_window=settings.CRAWL_RATE_SUCCESS_WINDOW,
+                    max_concurrency=settings.CRAWL_RATE_MAX_CONCURRENCY,
+                    target_latency_ms=settings.CRAWL_RATE_TARGET_LATENCY_MS,
+                )
+                self.rate_budget = site_rate_controller.register(self.task_id)
+                rate_stats = self.rate_budget.get_stats()
+                self._add_log(
+                    "INFO",
+                    f"自适应速率已启用: 本任务 {rate_stats['rate']} 次/秒，并发 {rate_stats['concurrency']}"
+                    f"（数据源合计 {rate_stats['site_rate']} 次/秒，{rate_stats['consumers']} 个任务共享）"
+                )
+
+            # 共享 CSRF Token 缓存（进程内所有任务共用，接近过期前后台主动刷新）
+            token_cache = None
+            if settings.CRAWL_TOKEN_CACHE_ENABLED:
+                token_cache = get_token_cache(
+                    max_age=settings.CRAWL_TOKEN_MAX_AGE_SECONDS,
+                    refresh_ratio=settings.CRAWL_TOKEN_REFRESH_RATIO,
+                    rate_controller=site_rate_controller,
+                )
+                cache_stats = token_cache.get_stats()
+                if cache_stats['has_token']:
+                    self._add_log("INFO", f"复用共享 CSRF Token（第 {cache_stats['generation']} 代，已使用 {cache_stats['token_age_seconds']} 秒）")
+
             # 创建 CrawlStage 实例
             self._add_log("INFO", "正在初始化爬取组件...")
             self.crawl_stage = CrawlStage(
@@ -178,53 +301,31 @@ class CrawlTaskExecutor:
                 delay_range=(delay_min, delay_max),
                 enable_resume=enable_resume,
                 progress_callback=progress_callback,
-                task_id=self.task_id  # 传递 task_id 用于记录列表页状态
+                task_id=self.task_id,  # 传递 task_id 用于记录列表页状态
+                seen_index=seen_index,
+                data_source=data_source,
+                archive_html=settings.CRAWL_ARCHIVE_HTML,
+                parser_backend=settings.CRAWL_HTML_PARSER,
+                parse_workers=settings.CRAWL_PARSE_WORKERS,
+                parse_queue_size=settings.CRAWL_PARSE_QUEUE_SIZE,
+                rate_controller=self.rate_budget,
+                token_cache=token_cache
             )
             self._add_log("INFO", "爬取组件初始化完成")
 
-            # 创建自定义日志处理器，将日志同时记录到数据库
-            class DatabaseLogHandler(logging.Handler):
-                def __init__(self, executor):
-                    super().__init__()
-                    self.executor = executor
-
-                def emit(self, record):
-                    try:
-                        level = record.levelname
-                        message = self.format(record)
-                        # 只记录 INFO、WARNING、ERROR 级别的日志
-                        if level in ['INFO', 'WARNING', 'ERROR']:
-                            asyncio.run(self.executor._add_log(level, message))
-                    except Exception:
-                        pass  # 避免日志记录失败影响主流程
-
-            # 添加数据库日志处理器到 pipeline logger 和 spider logger
-            # 注意：需要获取正确的 logger 名称（使用实际的模块路径）
-            # 由于代码在 backend 目录下，logger 名称应该是 services.pipeline.crawl_stage
-            pipeline_logger = logging.getLogger('services.pipeline.crawl_stage')
-            api_client_logger = logging.getLogger('services.spider.api_client')
-            
-            db_handler = DatabaseLogHandler(self)
-            db_handler.setFormatter(logging.Formatter('%(message)s'))
-            db_handler.setLevel(logging.INFO)
-            
-            # 添加到所有相关的 logger
-            pipeline_logger.addHandler(db_handler)
-            api_client_logger.addHandler(db_handler)
-            
-            # 同时添加到父级 logger 以确保捕获所有日志
+            # 结构化事件日志：详细诊断信息的采样率和字段长度上限
+            configure_event_log(
+                sample_rate=settings.CRAWL_LOG_DEBUG_SAMPLE_RATE,
+                max_field_chars=settings.CRAWL_LOG_MAX_FIELD_CHARS
+            )
+
+            # 日志处理器：spider/pipeline 的日志批量写入任务日志表（只挂在 services logger 上，子 logger 向上传播）
             services_logger = logging.getLogger('services')
+            db_handler = DatabaseLogHandler(self.task_id, flush_interval=settings.CRAWL_LOG_FLUSH_SECONDS)
+            db_handler.setFormatter(logging.Formatter('%(message)s'))
             services_logger.addHandler(db_handler)
-            services_logger.setLevel(logging.INFO)
-            
-            # 确保 propagate 为 True，让日志向上传播
-            pipeline_logger.propagate = True
-            api_client_logger.propagate = True
-            
-            self._add_log("INFO", f"日志处理器已添加:")
-            self._add_log("INFO", f"  - pipeline logger: {pipeline_logger.name} (level: {pipeline_logger.level})")
-            self._add_log("INFO", f"  - api_client logger: {api_client_logger.name} (level: {api_client_logger.level})")
-            self._add_log("INFO", f"  - services logger: {services_logger.name} (level: {services_logger.level})")
+            if services_logger.getEffectiveLevel() > logging.INFO:
+                services_logger.setLevel(logging.INFO)
 
             try:
                 # 执行爬取（在循环中定期更新进度）
@@ -242,7 +343,9 @@ class CrawlTaskExecutor:
                     max_pages=max_pages,
                     case_type=case_type or 3,
                     search_value=search_value or '',
-                    skip_existing=enable_resume
+                    skip_existing=enable_resume,
+                    incremental=incremental_mode,
+                    incremental_stop_pages=incremental_stop_pages
                 )
                 
                 self._add_log("INFO", f"爬取阶段完成，统计信息:")
@@ -252,17 +355,35 @@ class CrawlTaskExecutor:
                 self._add_log("INFO", f"  - 保存批次数: {stats.get('batches_saved', 0)}")
                 if stats.get('duration_seconds'):
                     self._add_log("INFO", f"  - 耗时: {stats.get('duration_seconds', 0):.2f} 秒")
+                for stage_name, stage in (stats.get('stage_stats') or {}).items():
+                    self._add_log(
+                        "INFO",
+                        f"  - 阶段 {stage_name}: {stage['items']} 页, 耗时 {stage['busy_seconds']:.2f} 秒, "
+                        f"吞吐 {stage['throughput']} 页/秒, 利用率 {stage['utilization']:.0%}"
+                    )
+                if stats.get('rate_control'):
+                    rate_stats = stats['rate_control']
+                    self._add_log(
+                        "INFO",
+                        f"  - 请求速率: {rate_stats['rate']} 次/秒, 并发 {rate_stats['concurrency']}, "
+                        f"限流 {rate_stats['throttled']} 次, 降速 {rate_stats['decreases']} 次, 提速 {rate_stats['increases']} 次"
+                    )
+                if stats.get('parse_wait_seconds'):
+                    self._add_log("INFO", f"  - 等待解析阶段: {stats['parse_wait_seconds']:.2f} 秒")
+                if incremental_mode:
+                    self._add_log("INFO", f"  - 跳过已知案例数: {stats.get('total_skipped_known', 0)}")
+                    if stats.get('stopped_at_page') is not None:
+                        self._add_log("INFO", f"  - 到达已爬取区域，停止于第 {stats['stopped_at_page']} 页")
             except KeyboardInterrupt:
                 # 任务被终止
                 self._add_log("WARNING", "任务被终止")
                 self._update_task_status_sync("terminated")
                 return
             finally:
-                # 移除日志处理器
+                # 移除日志处理器（写入缓冲中剩余的日志）
                 try:
-                    pipeline_logger.removeHandler(db_handler)
-                    api_client_logger.removeHandler(db_handler)
                     services_logger.removeHandler(db_handler)
+                    db_handler.close()
                 except Exception as e:
                     logger.warning(f"移除日志处理器失败: {e}")
 
@@ -275,6 +396,17 @@ class CrawlTaskExecutor:
             # 更新最终统计（同步方法）
             self._update_final_stats_sync(stats)
 
+            # 记录数据源高水位（全量任务推进页码，增量任务只更新最新案例ID）
+            SyncDatabase.update_source_watermark(
+                data_source=data_source,
+                task_id=self.task_id,
+                incremental=incremental_mode,
+                last_page=stats.get('last_page'),
+                newest_case_id=stats.get('newest_case_id')
+            )
+            if incremental_mode and stats.get('stopped_at_page') is not None:
+                SyncDatabase.update_stopped_at_page(self.task_id, stats['stopped_at_page'])
+
             # 验证所有已爬取的ID是否都被保存（如果启用了断点续传）
             if enable_resume and self.crawl_stage and self.crawl_stage.crawled_ids:
                 from services.pipeline.utils import get_saved_case_ids_from_json, validate_crawled_ids_saved
@@ -366,8 +498,13 @@ class CrawlTaskExecutor:
             self._add_log("ERROR", f"任务执行失败: {error_message}")
 
         finally:
+            _current_task_id.reset(log_context)
             self.is_running = False
             self.is_paused = False
+            # 释放速率额度，由同一数据源的其它任务分享
+            if self.rate_budget:
+                self.rate_budget.close()
+                self.rate_budget = None
             # 确保执行器被注销
             try:
                 unregister_executor(self.task_id)
@@ -444,7 +581,9 @@ class CrawlTaskExecutor:
         max_pages: Optional[int],
         case_type: int,
         search_value: str,
-        skip_existing: bool
+        skip_existing: bool,
+        incremental: bool = False,
+        incremental_stop_pages: int = 2
     ) -> Dict[str, Any]:
         """
         执行爬取并定期更新进度
@@ -457,7 +596,9 @@ class CrawlTaskExecutor:
             max_pages=max_pages,
             case_type=case_type,
             search_value=search_value,
-            skip_existing=skip_existing
+            skip_existing=skip_existing,
+            incremental=incremental,
+            incremental_stop_pages=incremental_stop_pages
         )
         
         # 最终更新进度
@@ -526,17 +667,25 @@ class CrawlTaskExecutor:
                 total_failed=total_failed,
                 batches_saved=batches_saved
             )
+            
+            # 自适应速率控制器的当前速率和并发数
+            if self.crawl_stage and self.crawl_stage.rate_controller:
+                rate_stats = self.crawl_stage.rate_controller.get_stats()
+                SyncDatabase.update_task_stats(
+                    task_id=self.task_id,
+                    avg_delay=rate_stats['delay_seconds'],
+                    request_rate=rate_stats['rate'],
+                    request_concurrency=rate_stats['concurrency']
+                )
         except Exception as e:
             logger.error(f"更新进度失败: {e}", exc_info=True)
 
     def _sync_case_records_from_json(self):
         """从JSON文件同步案例记录到数据库（同步方法）"""
         try:
-            from services.pipeline.utils import load_json
+            from services.pipeline.utils import collect_case_records_from_json
             import asyncio
             from app.repositories.crawl_case_record_repository import CrawlCaseRecordRepository
-            from app.repositories.crawl_list_page_repository import CrawlListPageRepository
-            from datetime import datetime
             
             output_dir = Path("data/json") / self.task_id
             if not output_dir.exists():
@@ -551,72 +700,15 @@ class CrawlTaskExecutor:
             
             logger.info(f"开始同步案例记录，共 {len(batch_files)} 个批次文件")
             
+            # 收集所有批次文件中的案例，一条语句批量写入
+            collected = collect_case_records_from_json(output_dir)
+            
             # 在异步上下文中执行（需要创建新的事件循环，因为这是在同步线程中）
             async def sync_records():
-                total_synced = 0
-                for batch_file in batch_files:
-                    try:
-                        data = load_json(batch_file)
-                        if not data or 'cases' not in data:
-                            continue
-                        
-                        cases = data['cases']
-                        batch_file_name = batch_file.name
-                        
-                        for case in cases:
-                            case_id = case.get('case_id')
-                            if not case_id:
-                                continue
-                            
-                            case_url = case.get('url') or case.get('source_url')
-                            case_title = case.get('title', '未知标题')
-                            
-                            # 检查是否有错误信息（表示失败）
-                            has_error = 'error' in case or 'validation_error' in case
-                            
-                            try:
-                                # 创建或更新案例记录
-                                record_id = await CrawlCaseRecordRepository.create_case_record(
-                                    task_id=self.task_id,
-                                    list_page_id=None,  # 列表页记录ID需要从其他地方获取
-                                    case_id=case_id,
-                                    case_url=case_url,
-                                    case_title=case_title
-                                )
-                                
-                                if has_error:
-                                    # 更新为失败状态
-                                    error_message = case.get('error') or case.get('validation_error', '未知错误')
-                                    error_type = 'parse_error' if 'error' in case else 'validation_error'
-                                    await CrawlCaseRecordRepository.update_case_failed(
-                                        record_id=record_id,
-                                        error_message=str(error_message),
-                                        error_type=error_type,
-                                        error_stack=None,
-                                        duration=0.0
-                                    )
-                                else:
-                                    # 更新为成功状态
-                                    await CrawlCaseRecordRepository.update_case_success(
-                                        record_id=record_id,
-                                        duration=0.0,
-                                        has_detail_data=True
-                                    )
-                                
-                                # 更新保存状态
-                                await CrawlCaseRecordRepository.update_case_saved(
-                                    record_id=record_id,
-                                    batch_file_name=batch_file_name
-                                )
-                                
-                                total_synced += 1
-                            except Exception as e:
-                                logger.error(f"同步案例记录失败 case_id={case_id}: {e}")
-                                continue
-                    except Exception as e:
-                        logger.error(f"处理批次文件失败 {batch_file}: {e}")
-                        continue
-                
+                total_synced = await CrawlCaseRecordRepository.bulk_upsert_case_records(
+                    task_id=self.task_id,
+                    records=collected['records']
+                )
                 logger.info(f"案例记录同步完成，共同步 {total_synced} 条记录")
                 return total_synced
             
@@ -729,11 +821,21 @@ class CrawlTaskExecutor:
             total_failed = stats.get('total_failed', 0)
             error_rate = min(total_failed / total_crawled_for_rate, 1.0) if total_crawled_for_rate > 0 else 0.0
             
+            # 平均请求延迟：启用速率控制器时为其当前请求间隔，否则为配置的随机延迟中值
+            avg_delay = None
+            rate_stats = stats.get('rate_control')
+            if rate_stats:
+                avg_delay = rate_stats['delay_seconds']
+            elif self.crawl_stage:
+                avg_delay = (self.crawl_stage.delay_range[0] + self.crawl_stage.delay_range[1]) / 2
+            
             SyncDatabase.update_task_stats(
                 task_id=self.task_id,
                 avg_speed=avg_speed,
-                avg_delay=(self.crawl_stage.delay_range[0] + self.crawl_stage.delay_range[1]) / 2 if self.crawl_stage else None,
-                error_rate=error_rate
+                avg_delay=avg_delay,
+                error_rate=error_rate,
+                request_rate=rate_stats['rate'] if rate_stats else None,
+                request_concurrency=rate_stats['concurrency'] if rate_stats else None
             )
 
             # 更新最终进度
@@ -3,8 +3,8 @@
 用于在后台线程中执行数据库操作，避免连接池耗尽
 """
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Optional, Dict, Any, List
+from psycopg2.extras import RealDictCursor, execute_values
+from typing import Optional, Dict, Any, List, Set, Tuple
 from datetime import datetime
 import json
 import logging
@@ -58,6 +58,44 @@ class SyncDatabase:
             logger.error(f"添加日志失败: {e}")
             return 0
 
+    @staticmethod
+    def add_logs(
+        task_id: str,
+        entries: List[Tuple[str, str, Optional[Dict[str, Any]]]]
+    ) -> int:
+        """
+        批量添加任务日志（一次连接、一条语句）
+
+        Args:
+            task_id: 任务ID
+            entries: (level, message, details) 列表
+
+        Returns:
+            写入的日志条数
+        """
+        if not entries:
+            return 0
+        try:
+            conn = SyncDatabase._get_connection()
+            try:
+                cur = conn.cursor()
+                execute_values(
+                    cur,
+                    "INSERT INTO crawl_task_logs (task_id, level, message, details) VALUES %s",
+                    [
+                        (task_id, level, message, json.dumps(details, ensure_ascii=False, default=str) if details else None)
+                        for level, message, details in entries
+                    ]
+                )
+                conn.commit()
+                return len(entries)
+            finally:
+                cur.close()
+                conn.close()
+        except Exception as e:
+            logger.error(f"批量添加日志失败: {e}")
+            return 0
+
     @staticmethod
     def update_task_progress(
         task_id: str,
@@ -212,7 +250,9 @@ class SyncDatabase:
         task_id: str,
         avg_speed: Optional[float] = None,
         avg_delay: Optional[float] = None,
-        error_rate: Optional[float] = None
+        error_rate: Optional[float] = None,
+        request_rate: Optional[float] = None,
+        request_concurrency: Optional[int] = None
     ) -> bool:
         """更新任务统计信息"""
         try:
@@ -234,6 +274,14 @@ class SyncDatabase:
                     update_fields.append("error_rate = %s")
                     params.append(error_rate)
 
+                if request_rate is not None:
+                    update_fields.append("request_rate = %s")
+                    params.append(request_rate)
+
+                if request_concurrency is not None:
+                    update_fields.append("request_concurrency = %s")
+                    params.append(request_concurrency)
+
                 if not update_fields:
                     return False
 
@@ -381,3 +429,103 @@ class SyncDatabase:
         except Exception as e:
             logger.error(f"更新列表页失败记录失败: {e}")
             return False
+
+    @staticmethod
+    def update_stopped_at_page(task_id: str, stopped_at_page: int) -> bool:
+        """记录增量任务到达已爬取区域而停止的页码"""
+        try:
+            conn = SyncDatabase._get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    """
+                    UPDATE crawl_tasks SET stopped_at_page = %s WHERE task_id = %s
+                    """,
+                    (stopped_at_page, task_id)
+                )
+                conn.commit()
+                return cur.rowcount == 1
+            finally:
+                cur.close()
+                conn.close()
+        except Exception as e:
+            logger.error(f"更新停止页码失败: {e}")
+            return False
+
+    @staticmethod
+    def get_known_case_ids(case_ids: List[int]) -> Set[int]:
+        """获取已入库或已被任意任务成功爬取的案例ID（增量爬取比对用）"""
+        if not case_ids:
+            return set()
+        try:
+            conn = SyncDatabase._get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    """
+                    SELECT case_id FROM ad_cases WHERE case_id = ANY(%s::int[])
+                    UNION
+                    SELECT case_id FROM crawl_case_records
+                    WHERE case_id = ANY(%s::int[]) AND status = 'success'
+                    """,
+                    (list(case_ids), list(case_ids))
+                )
+                return {row[0] for row in cur.fetchall()}
+            finally:
+                cur.close()
+                conn.close()
+        except Exception as e:
+            logger.error(f"查询已知案例ID失败: {e}")
+            return set()
+
+    @staticmethod
+    def update_source_watermark(
+        data_source: str,
+        task_id: str,
+        incremental: bool,
+        last_page: Optional[int] = None,
+        newest_case_id: Optional[int] = None
+    ) -> bool:
+        """
+        更新数据源高水位
+
+        全量任务推进 last_page（下次全量爬取的起点），增量任务只更新 newest_case_id 和增量时间
+        """
+        try:
+            conn = SyncDatabase._get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    """
+                    INSERT INTO crawl_source_watermarks (
+                        data_source, last_page, newest_case_id, last_task_id,
+                        last_full_crawl_at, last_incremental_at
+                    ) VALUES (
+                        %s, %s, %s, %s,
+                        CASE WHEN %s THEN NULL ELSE CURRENT_TIMESTAMP END,
+                        CASE WHEN %s THEN CURRENT_TIMESTAMP ELSE NULL END
+                    )
+                    ON CONFLICT (data_source) DO UPDATE SET
+                        last_page = GREATEST(crawl_source_watermarks.last_page, EXCLUDED.last_page),
+                        newest_case_id = GREATEST(crawl_source_watermarks.newest_case_id, EXCLUDED.newest_case_id),
+                        last_task_id = EXCLUDED.last_task_id,
+                        last_full_crawl_at = COALESCE(EXCLUDED.last_full_crawl_at, crawl_source_watermarks.last_full_crawl_at),
+                        last_incremental_at = COALESCE(EXCLUDED.last_incremental_at, crawl_source_watermarks.last_incremental_at)
+                    """,
+                    (
+                        data_source,
+                        None if incremental else last_page,
+                        newest_case_id,
+                        task_id,
+                        incremental,
+                        incremental,
+                    )
+                )
+                conn.commit()
+                return True
+            finally:
+                cur.close()
+                conn.close()
+        except Exception as e:
+            logger.error(f"更新数据源高水位失败: {e}")
+            return False
@@ -7,14 +7,17 @@ from pathlib import Path
 import json
 import shutil
 from app.repositories.crawl_task_repository import CrawlTaskRepository
-from app.services.crawl_task_executor import CrawlTaskExecutor, register_executor, get_executor, unregister_executor
+from app.services.crawl_task_executor import get_executor, unregister_executor
+from app.services.crawl_scheduler import get_crawl_scheduler
+from app.services.crawl_retry_runner import get_retry_runner, start_retry_runner
+from app.repositories.crawl_list_page_repository import CrawlListPageRepository
+from app.repositories.crawl_case_record_repository import CrawlCaseRecordRepository
 from app.schemas.crawl_task import (
     CrawlTaskCreate, CrawlTaskDetail, CrawlTaskListItem,
     CrawlTaskListResponse, CrawlTaskLogsResponse, CrawlTaskLog,
     CrawlTaskProgress, CrawlTaskStats, CrawlTaskTimeline, CrawlTaskConfig
 )
 from app.config import settings
-import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,8 +37,11 @@ class CrawlTaskService:
             任务信息（包含 task_id）
         """
         # 如果 start_page 为空，自动设置为上一次爬取到的页数
+        # 增量模式从最新的第0页开始，到达已爬取区域时自动停止
         start_page = request.start_page
-        if start_page is None:
+        if start_page is None and request.incremental_mode:
+            start_page = 0
+        elif start_page is None:
             last_page = await CrawlTaskRepository.get_last_crawled_page(request.data_source)
             start_page = (last_page + 1) if last_page is not None else 0
         
@@ -55,13 +61,16 @@ class CrawlTaskService:
             delay_min=request.delay_min,
             delay_max=request.delay_max,
             enable_resume=request.enable_resume,
-            created_by=created_by
+            created_by=created_by,
+            incremental_mode=request.incremental_mode,
+            incremental_stop_pages=request.incremental_stop_pages,
+            priority=request.priority
         )
 
         # 计算总页数
         total_pages = None
         if request.end_page is not None:
-            total_pages = request.end_page - request.start_page + 1
+            total_pages = request.end_page - start_page + 1
 
         # 更新总页数
         if total_pages:
@@ -79,13 +88,20 @@ class CrawlTaskService:
             details={"config": request.dict()}
         )
 
-        # 如果立即执行，启动任务
+        # 如果立即执行，启动任务（进入调度队列，有空闲额度时立即执行）
+        status = "pending"
         if request.execute_immediately:
-            await self.start_task(task_id)
+            try:
+                if await self.start_task(task_id):
+                    task_data = await self.repo.get_task(task_id)
+                    status = task_data["status"] if task_data else status
+            except ValueError as e:
+                # 调度队列已满，任务保持 pending，稍后可手动开始
+                await self.repo.add_log(task_id=task_id, level="WARNING", message=f"任务未能进入调度队列: {e}")
 
         return {
             "task_id": task_id,
-            "status": "pending",
+            "status": status,
             "created_at": datetime.now().isoformat()
         }
 
@@ -278,7 +294,14 @@ class CrawlTaskService:
         return await self.start_task_from_page(task_id, start_page)
     
     async def start_task_from_page(self, task_id: str, start_page: int) -> bool:
-        """从指定页码开始执行任务"""
+        """
+        从指定页码开始执行任务
+
+        任务先进入调度队列，由调度器在全局和数据源额度允许时启动
+
+        Raises:
+            ValueError: 调度队列已满
+        """
         task_data = await self.repo.get_task(task_id)
         if not task_data:
             return False
@@ -288,39 +311,7 @@ class CrawlTaskService:
         if executor and executor.is_running:
             return False
 
-        # 更新状态为 running
-        success = await self.repo.update_task_status(
-            task_id=task_id,
-            status="running",
-            started_at=datetime.now()
-        )
-
-        if success:
-            await self.repo.add_log(
-                task_id=task_id,
-                level="INFO",
-                message=f"任务开始执行（从第 {start_page} 页开始）"
-            )
-
-            # 创建并启动任务执行器
-            executor = CrawlTaskExecutor(task_id)
-            register_executor(task_id, executor)
-
-            # 在后台启动任务
-            asyncio.create_task(executor.execute(
-                name=task_data["name"],
-                data_source=task_data["data_source"],
-                start_page=start_page,
-                end_page=task_data.get("end_page"),
-                case_type=task_data.get("case_type"),
-                search_value=task_data.get("search_value"),
-                batch_size=task_data.get("batch_size", 30),
-                delay_min=task_data.get("delay_min", 2.0),
-                delay_max=task_data.get("delay_max", 5.0),
-                enable_resume=task_data.get("enable_resume", True)
-            ))
-
-        return success
+        return await get_crawl_scheduler().submit(task_id, start_page)
 
     async def pause_task(self, task_id: str) -> bool:
         """暂停任务"""
@@ -417,7 +408,7 @@ class CrawlTaskService:
         if not task_data:
             return False
 
-        if task_data["status"] not in ["pending", "paused"]:
+        if task_data["status"] not in ["pending", "queued", "paused"]:
             return False
 
         success = await self.repo.update_task_status(
@@ -484,7 +475,27 @@ class CrawlTaskService:
                 )
                 return False
 
-        # 重置状态和错误信息
+        # 有记录在案的失败列表页/案例时只重试这些工作项（退避重试，超过最大重试次数进入死信）
+        retry_queue = await self._get_retry_summaries(task_id)
+        pending_retries = sum(
+            summary["due"] + summary["scheduled"] for summary in retry_queue.values()
+        )
+        if pending_retries > 0:
+            if get_retry_runner(task_id) is None:
+                start_retry_runner(task_id, data_source=task_data.get("data_source") or "adquan",
+                                   batch_size=task_data.get("batch_size") or 30)
+                await self.repo.add_log(
+                    task_id=task_id,
+                    level="INFO",
+                    message=(
+                        f"开始重试失败的工作项: 列表页 {retry_queue['list_pages']['due'] + retry_queue['list_pages']['scheduled']} 页，"
+                        f"案例 {retry_queue['cases']['due'] + retry_queue['cases']['scheduled']} 个"
+                        f"（并发 {settings.CRAWL_RETRY_CONCURRENCY}，最多重试 {settings.CRAWL_RETRY_MAX_RETRIES} 次）"
+                    )
+                )
+            return True
+
+        # 没有可重试的工作项记录（旧任务或失败项已全部进入死信）：重置任务重新执行
         success = await self.repo.update_task_status(
             task_id=task_id,
             status="pending"
@@ -514,6 +525,45 @@ class CrawlTaskService:
 
         return success
 
+    async def _get_retry_summaries(self, task_id: str) -> Dict[str, Dict[str, Any]]:
+        max_retries = settings.CRAWL_RETRY_MAX_RETRIES
+        return {
+            "list_pages": await CrawlListPageRepository.get_retry_summary(task_id, max_retries),
+            "cases": await CrawlCaseRecordRepository.get_retry_summary(task_id, max_retries),
+        }
+
+    async def get_retry_queue(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务的失败重试队列概况（待重试、退避中、死信数量及正在运行的重试统计）"""
+        task_data = await self.repo.get_task(task_id)
+        if not task_data:
+            return None
+
+        runner = get_retry_runner(task_id)
+        return {
+            "task_id": task_id,
+            "max_retries": settings.CRAWL_RETRY_MAX_RETRIES,
+            **await self._get_retry_summaries(task_id),
+            "runner": runner.get_stats() if runner else None,
+        }
+
+    async def requeue_dead_letters(self, task_id: str) -> Optional[Dict[str, int]]:
+        """将任务死信中的列表页和案例重新放回重试队列（不自动开始重试）"""
+        task_data = await self.repo.get_task(task_id)
+        if not task_data:
+            return None
+
+        result = {
+            "list_pages": await CrawlListPageRepository.requeue_dead_letters(task_id),
+            "cases": await CrawlCaseRecordRepository.requeue_dead_letters(task_id),
+        }
+        if result["list_pages"] or result["cases"]:
+            await self.repo.add_log(
+                task_id=task_id,
+                level="INFO",
+                message=f"死信重新入队: 列表页 {result['list_pages']} 页，案例 {result['cases']} 个"
+            )
+        return result
+
     async def restart_task(self, task_id: str) -> bool:
         """重新执行任务（从起始页重新开始）"""
         task_data = await self.repo.get_task(task_id)
@@ -919,7 +969,7 @@ class CrawlTaskService:
             同步结果
         """
         from pathlib import Path
-        from services.pipeline.utils import load_json
+        from services.pipeline.utils import collect_case_records_from_json
         from app.repositories.crawl_case_record_repository import CrawlCaseRecordRepository
         
         output_dir = Path("data/json") / task_id
@@ -941,70 +991,13 @@ class CrawlTaskService:
         total_errors = 0
         
         try:
-            for batch_file in batch_files:
-                try:
-                    data = load_json(batch_file)
-                    if not data or 'cases' not in data:
-                        continue
-                    
-                    cases = data['cases']
-                    batch_file_name = batch_file.name
-                    
-                    for case in cases:
-                        case_id = case.get('case_id')
-                        if not case_id:
-                            continue
-                        
-                        case_url = case.get('url') or case.get('source_url')
-                        case_title = case.get('title', '未知标题')
-                        
-                        # 检查是否有错误信息（表示失败）
-                        has_error = 'error' in case or 'validation_error' in case
-                        
-                        try:
-                            # 创建或更新案例记录
-                            record_id = await CrawlCaseRecordRepository.create_case_record(
-                                task_id=task_id,
-                                list_page_id=None,
-                                case_id=case_id,
-                                case_url=case_url,
-                                case_title=case_title
-                            )
-                            
-                            if has_error:
-                                # 更新为失败状态
-                                error_message = case.get('error') or case.get('validation_error', '未知错误')
-                                error_type = 'parse_error' if 'error' in case else 'validation_error'
-                                await CrawlCaseRecordRepository.update_case_failed(
-                                    record_id=record_id,
-                                    error_message=str(error_message),
-                                    error_type=error_type,
-                                    error_stack=None,
-                                    duration=0.0
-                                )
-                            else:
-                                # 更新为成功状态
-                                await CrawlCaseRecordRepository.update_case_success(
-                                    record_id=record_id,
-                                    duration=0.0,
-                                    has_detail_data=True
-                                )
-                            
-                            # 更新保存状态
-                            await CrawlCaseRecordRepository.update_case_saved(
-                                record_id=record_id,
-                                batch_file_name=batch_file_name
-                            )
-                            
-                            total_synced += 1
-                        except Exception as e:
-                            logger.error(f"同步案例记录失败 case_id={case_id}: {e}")
-                            total_errors += 1
-                            continue
-                except Exception as e:
-                    logger.error(f"处理批次文件失败 {batch_file}: {e}")
-                    total_errors += 1
-                    continue
+            # 收集所有批次文件中的案例，一条语句批量写入
+            collected = collect_case_records_from_json(output_dir)
+            total_errors = collected['file_errors']
+            total_synced = await CrawlCaseRecordRepository.bulk_upsert_case_records(
+                task_id=task_id,
+                records=collected['records']
+            )
             
             return {
                 "success": True,
@@ -1174,7 +1167,9 @@ class CrawlTaskService:
             success_rate=success_rate,
             avg_speed=task_data.get("avg_speed"),
             avg_delay=task_data.get("avg_delay"),
-            error_rate=task_data.get("error_rate")
+            error_rate=task_data.get("error_rate"),
+            request_rate=task_data.get("request_rate"),
+            request_concurrency=task_data.get("request_concurrency")
         )
 
         timeline = CrawlTaskTimeline(
@@ -1192,7 +1187,11 @@ class CrawlTaskService:
             batch_size=task_data.get("batch_size", 100),
             delay_min=task_data.get("delay_min", 2.0),
             delay_max=task_data.get("delay_max", 5.0),
-            enable_resume=task_data.get("enable_resume", True)
+            enable_resume=task_data.get("enable_resume", True),
+            incremental_mode=task_data.get("incremental_mode") or False,
+            incremental_stop_pages=task_data.get("incremental_stop_pages") or 2,
+            stopped_at_page=task_data.get("stopped_at_page"),
+            priority=task_data.get("priority") or 0
         )
 
         return CrawlTaskDetail(
@@ -1274,7 +1273,9 @@ class CrawlTaskService:
             success_rate=success_rate,
             avg_speed=task_data.get("avg_speed"),
             avg_delay=task_data.get("avg_delay"),
-            error_rate=task_data.get("error_rate")
+            error_rate=task_data.get("error_rate"),
+            request_rate=task_data.get("request_rate"),
+            request_concurrency=task_data.get("request_concurrency")
         )
 
         return CrawlTaskListItem(
@@ -0,0 +1,130 @@
+"""
+向量重新生成作业服务
+在后台线程中执行 ReembedStage（与 scripts/reembed.py 共用同一张作业表和检查点）
+"""
+import asyncio
+import json
+import logging
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# 添加 backend 目录到路径，以便导入 services 模块
+backend_root = Path(__file__).parent.parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from services.pipeline.reembed_stage import ReembedStage
+from app.repositories.embedding_job_repository import EmbeddingJobRepository
+from app.schemas.embedding_job import EmbeddingJobCreate
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 本进程中正在执行的作业
+_running_stages: Dict[str, ReembedStage] = {}
+_running_lock = threading.Lock()
+
+
+def _run_stage(stage: ReembedStage):
+    """后台线程入口"""
+    try:
+        stage.run()
+    except Exception as e:
+        logger.error(f"向量重新生成作业 {stage.job_id} 失败: {e}", exc_info=True)
+    finally:
+        with _running_lock:
+            _running_stages.pop(stage.job_id, None)
+
+
+class EmbeddingJobService:
+    """向量重新生成作业服务类"""
+
+    def __init__(self):
+        self.repo = EmbeddingJobRepository()
+
+    async def start_job(self, request: EmbeddingJobCreate) -> Dict[str, Any]:
+        """
+        启动（或从检查点继续）作业
+
+        Returns:
+            作业信息
+        """
+        stage = ReembedStage(
+            db_config={
+                'host': settings.DB_HOST,
+                'port': settings.DB_PORT,
+                'database': settings.DB_NAME,
+                'user': settings.DB_USER,
+                'password': settings.DB_PASSWORD,
+            },
+            job_id=request.job_id,
+            columns=request.columns,
+            mode=request.mode,
+            model_name=settings.VECTOR_MODEL_PATH,
+            embedding_backend=settings.EMBEDDING_BACKEND,
+            onnx_path=settings.EMBEDDING_ONNX_PATH,
+            onnx_threads=settings.EMBEDDING_ONNX_THREADS if request.workers <= 1 else None,
+            fetch_size=request.fetch_size,
+            encode_batch_size=request.batch_size,
+            workers=request.workers,
+            restart=request.restart
+        )
+
+        with _running_lock:
+            if stage.job_id in _running_stages:
+                raise ValueError(f"作业 {stage.job_id} 正在执行")
+            _running_stages[stage.job_id] = stage
+
+        try:
+            # 在线程池中创建作业记录并确定检查点，配置冲突或作业已在其它进程执行时直接返回错误
+            loop = asyncio.get_event_loop()
+            has_work = await loop.run_in_executor(None, stage.prepare)
+        except Exception:
+            with _running_lock:
+                _running_stages.pop(stage.job_id, None)
+            raise
+
+        if has_work:
+            threading.Thread(
+                target=_run_stage, args=(stage,), name=f"reembed-{stage.job_id}", daemon=True
+            ).start()
+        else:
+            with _running_lock:
+                _running_stages.pop(stage.job_id, None)
+
+        return {
+            "job_id": stage.job_id,
+            "status": stage.stats['status'],
+            "total_rows": stage.stats['total_rows'],
+            "last_id": stage.stats['last_id'],
+        }
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取作业状态和进度"""
+        job = await self.repo.get_job(job_id)
+        return self._format_job(job) if job else None
+
+    async def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """获取最近的作业"""
+        return [self._format_job(job) for job in await self.repo.list_jobs(limit)]
+
+    async def cancel_job(self, job_id: str) -> bool:
+        """取消作业（写回当前批次并记录检查点后停止，之后可以继续）"""
+        success = await self.repo.cancel_job(job_id)
+        with _running_lock:
+            stage = _running_stages.get(job_id)
+        if stage:
+            stage.stop()
+        return success
+
+    @staticmethod
+    def _format_job(job: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(job.get("columns"), str):
+            job["columns"] = json.loads(job["columns"])
+        total = job.get("total_rows") or 0
+        job["percentage"] = round(min(100.0, (job.get("processed_rows") or 0) * 100 / total), 2) if total else 0.0
+        with _running_lock:
+            job["running_in_process"] = job["job_id"] in _running_stages
+        return job
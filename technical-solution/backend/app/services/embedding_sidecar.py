@@ -0,0 +1,334 @@
+"""
+向量编码边车服务
+多个 API worker 共用一个独立进程中的向量模型（避免每个 worker 各加载一份模型）：
+- 服务端监听 Unix socket 或本机 HTTP 端口，把并发请求在很短的时间窗口内合并为一次批量编码；
+- 客户端由 VectorService 使用，边车不可用时回退到进程内加载模型
+
+协议（HTTP/1.1 + JSON）:
+    POST /encode  {"texts": ["...", ...]}  ->  {"vectors": [[...], ...], "dimension": 1024}
+    GET  /health                           ->  {"status": "ok", "model": {...}, "batcher": {...}}
+    GET  /metrics                          ->  Prometheus 文本格式的运行指标
+"""
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+from services.metrics import REGISTRY, CONTENT_TYPE, EMBEDDING_SECONDS, EMBEDDING_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 单个请求最多的文本数和请求体大小上限
+MAX_TEXTS_PER_REQUEST = 256
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+class _EncodeRequest:
+    __slots__ = ('texts', 'future')
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+
+
+class EmbeddingBatcher:
+    """
+    请求合并器
+
+    第一个请求到达后最多再等待 max_wait_ms 收集其它请求，文本数达到 max_batch_size 时立即编码
+    """
+
+    def __init__(self, encode: Callable[[List[str]], Any], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            encode: 批量编码函数（文本列表 -> 二维向量数组）
+            max_batch_size: 每次编码的最大文本数
+            max_wait_ms: 收集请求的最长等待时间（毫秒）
+        """
+        self._encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Optional[_EncodeRequest]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'texts': 0, 'batches': 0, 'encode_seconds': 0.0}
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        """提交编码请求，返回结果为向量列表的 Future"""
+        request = _EncodeRequest(texts)
+        self._queue.put(request)
+        return request.future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['avg_batch_texts'] = round(stats['texts'] / stats['batches'], 2) if stats['batches'] else 0
+        stats['encode_seconds'] = round(stats['encode_seconds'], 3)
+        stats['queued'] = self._queue.qsize()
+        return stats
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = [first]
+            count = len(first.texts)
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                pending.append(request)
+                count += len(request.texts)
+
+            self._encode_pending(pending, count)
+            if stopping:
+                return
+
+    def _encode_pending(self, pending: List[_EncodeRequest], count: int):
+        texts = [text for request in pending for text in request.texts]
+        start = time.time()
+        try:
+            vectors = np.asarray(self._encode(texts), dtype=np.float32).reshape(count, -1)
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        except Exception as e:
+            logger.error(f"批量编码失败（{len(pending)} 个请求，{count} 条文本）: {e}")
+            for request in pending:
+                request.future.set_exception(e)
+            return
+
+        elapsed = time.time() - start
+        with self._stats_lock:
+            self.stats['requests'] += len(pending)
+            self.stats['texts'] += count
+            self.stats['batches'] += 1
+            self.stats['encode_seconds'] += elapsed
+        EMBEDDING_SECONDS.observe(elapsed, source='batcher')
+        EMBEDDING_BATCH_SIZE.observe(count, source='batcher')
+
+        offset = 0
+        for request in pending:
+            size = len(request.texts)
+            request.future.set_result(vectors[offset:offset + size].tolist())
+            offset += size
+
+
+class _EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_EmbeddingHTTPServer"
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "model": self.server.model_info,
+            "batcher": self.server.batcher.get_stats(),
+        })
+
+    def do_POST(self):
+        if self.path != "/encode":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(413 if length > 0 else 400, {"error": "invalid body size"})
+            return
+        try:
+            texts = json.loads(self.rfile.read(length))["texts"]
+            if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+                raise ValueError("texts 必须是非空字符串列表")
+            if len(texts) > MAX_TEXTS_PER_REQUEST:
+                raise ValueError(f"单个请求最多 {MAX_TEXTS_PER_REQUEST} 条文本")
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            vectors = self.server.batcher.submit(texts).result(timeout=self.server.request_timeout)
+        except Exception as e:
+            self._send_json(500, {"error": str(e) or type(e).__name__})
+            return
+        self._send_json(200, {"vectors": vectors, "dimension": len(vectors[0])})
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Unix socket 下没有客户端地址，访问日志只在 DEBUG 级别输出
+        logger.debug(format % args)
+
+
+class _EmbeddingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 多个 worker 同时建立连接时默认的 listen 队列（5）会溢出
+    request_queue_size = 128
+
+    def __init__(self, address, batcher: EmbeddingBatcher, model_info: Dict[str, Any], request_timeout: float):
+        self.batcher = batcher
+        self.model_info = model_info
+        self.request_timeout = request_timeout
+        super().__init__(address, _EmbeddingRequestHandler)
+
+
+class _UnixEmbeddingHTTPServer(_EmbeddingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # 上次异常退出遗留的 socket 文件
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def create_sidecar_server(
+    encode: Callable[[List[str]], Any],
+    socket_path: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    max_batch_size: int = 32,
+    max_wait_ms: float = 5.0,
+    request_timeout: float = 30.0,
+    model_info: Optional[Dict[str, Any]] = None
+) -> _EmbeddingHTTPServer:
+    """
+    创建边车服务（调用 serve_forever() 开始服务）
+
+    Args:
+        encode: 批量编码函数（文本列表 -> 二维向量数组）
+        socket_path: Unix socket 路径（指定时忽略 host/port）
+        host: 监听地址
+        port: 监听端口
+        max_batch_size: 每次编码的最大文本数
+        max_wait_ms: 合并请求的最长等待时间（毫秒）
+        request_timeout: 单个请求等待编码结果的超时时间（秒）
+        model_info: /health 返回的模型信息
+    """
+    batcher = EmbeddingBatcher(encode, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    if socket_path:
+        server = _UnixEmbeddingHTTPServer(socket_path, batcher, model_info or {}, request_timeout)
+        os.chmod(socket_path, 0o660)
+    else:
+        server = _EmbeddingHTTPServer((host, port), batcher, model_info or {}, request_timeout)
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class EmbeddingSidecarClient:
+    """
+    边车客户端（线程安全，每个线程复用一个连接）
+
+    url 格式: unix:///run/ad-case/embedding.sock 或 http://127.0.0.1:8765
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        parsed = urlparse(url)
+        if parsed.scheme == "unix":
+            self.socket_path = parsed.path
+            self.host, self.port = None, None
+        elif parsed.scheme == "http":
+            self.socket_path = None
+            self.host, self.port = parsed.hostname or "127.0.0.1", parsed.port or 80
+        else:
+            raise ValueError(f"不支持的边车地址: {url}（应为 unix:///path 或 http://host:port）")
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.socket_path:
+                conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+            else:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        # 复用的连接可能已被服务端关闭，失败时重连一次
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = json.loads(response.read() or b"{}")
+                break
+            except socket.timeout:
+                conn.close()
+                self._local.conn = None
+                raise
+            except (ConnectionError, http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt == 1:
+                    raise
+        if response.status != 200:
+            raise RuntimeError(f"边车返回错误 {response.status}: {data.get('error')}")
+        return data
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        """批量编码（返回归一化后的向量）"""
+        return self._request("POST", "/encode", {"texts": texts})["vectors"]
+
+    def health(self) -> Dict[str, Any]:
+        """获取边车状态"""
+        return self._request("GET", "/health")
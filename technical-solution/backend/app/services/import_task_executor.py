@@ -16,6 +16,7 @@ if str(backend_root) not in sys.path:
     sys.path.insert(0, str(backend_root))
 
 from services.pipeline.import_stage import ImportStage
+from services.pipeline.import_pipeline import StagedImportPipeline
 from app.repositories.task_import_repository import TaskImportRepository
 from app.services.import_task_executor_sync_db import ImportSyncDatabase
 from app.config import settings
@@ -55,6 +56,7 @@ class ImportTaskExecutor:
         normalize_data: bool = True,
         download_images: bool = True,
         image_download_concurrency: int = 5,
+        pipeline_mode: bool = False,
     ):
         """
         执行导入任务（异步方法，在后台线程中运行）
@@ -70,6 +72,7 @@ class ImportTaskExecutor:
             normalize_data: 是否规范化数据（将非法值转为默认值或NULL，默认 True）
             download_images: 是否在导入时下载图片（默认 False）
             image_download_concurrency: 图片下载并发数（默认 5）
+            pipeline_mode: 是否使用流水线入库（默认 False，逐个文件顺序导入）
         """
         # 在后台线程中执行同步代码
         import concurrent.futures
@@ -90,6 +93,7 @@ class ImportTaskExecutor:
                 normalize_data,
                 download_images,
                 image_download_concurrency,
+                pipeline_mode,
             )
 
     def _execute_sync(
@@ -105,6 +109,7 @@ class ImportTaskExecutor:
         normalize_data: bool = True,
         download_images: bool = True,
         image_download_concurrency: int = 5,
+        pipeline_mode: bool = False,
     ):
         """
         同步执行导入任务（在后台线程中运行）
@@ -145,7 +150,10 @@ class ImportTaskExecutor:
                 import_failed_only=import_failed_only,
                 task_id=self.task_id,
                 download_images=download_images,
-                image_download_concurrency=image_download_concurrency
+                image_download_concurrency=image_download_concurrency,
+                embedding_backend=settings.EMBEDDING_BACKEND,
+                onnx_path=settings.EMBEDDING_ONNX_PATH,
+                onnx_threads=settings.EMBEDDING_ONNX_THREADS
             )
 
             # 获取任务数据目录
@@ -194,104 +202,20 @@ class ImportTaskExecutor:
                 total_cases=total_cases
             )
 
-            # 遍历文件，导入数据
-            total_loaded = 0
-            total_valid = 0
-            total_invalid = 0
-            total_existing = 0
-            total_imported = 0
-            total_failed = 0
-            
-            # 收集所有导入成功的案例ID
-            all_imported_case_ids = []
-            # 收集所有无效案例的验证错误信息
-            all_invalid_case_errors = {}
-            # 收集所有导入失败的案例错误信息
-            all_import_failed_cases = {}  # {case_id: error_message}
-
-            for json_file in json_files:
-                # 检查是否取消
-                if self.is_cancelled:
-                    self._add_log("WARNING", "导入任务被取消")
-                    ImportSyncDatabase.update_import_status(
-                        import_id=self.import_id,
-                        status="cancelled",
-                        cancelled_at=datetime.now()
-                    )
-                    return
-
-                # 更新当前文件
-                ImportSyncDatabase.update_import_progress(
-                    import_id=self.import_id,
-                    current_file=json_file.name
-                )
-                self._add_log("INFO", f"开始导入文件: {json_file.name}")
-
-                try:
-                    # 导入文件
-                    stats = self.import_stage.import_from_json(json_file)
-
-                    # 累计统计
-                    total_loaded += stats.get('total_loaded', 0)
-                    total_valid += stats.get('total_valid', 0)
-                    total_invalid += stats.get('total_invalid', 0)
-                    total_existing += stats.get('total_existing', 0)
-                    total_imported += stats.get('total_imported', 0)
-                    total_failed += stats.get('total_failed', 0)
-                    
-                    # 收集导入成功的案例ID
-                    imported_case_ids = stats.get('imported_case_ids', [])
-                    if imported_case_ids:
-                        all_imported_case_ids.extend(imported_case_ids)
-                    
-                    # 收集无效案例的验证错误信息
-                    invalid_case_errors = stats.get('invalid_case_errors', {})
-                    if invalid_case_errors:
-                        all_invalid_case_errors.update(invalid_case_errors)
-                    
-                    # 收集导入失败的案例错误信息
-                    import_failed_cases = stats.get('import_failed_cases', {})
-                    if import_failed_cases:
-                        all_import_failed_cases.update(import_failed_cases)
-                        # 记录导入失败的错误到数据库
-                        for case_id, error_message in import_failed_cases.items():
-                            ImportSyncDatabase.add_import_error(
-                                import_id=self.import_id,
-                                file_name=json_file.name,
-                                case_id=case_id,
-                                error_type="database_error",
-                                error_message=error_message,
-                                error_details={"error": error_message}
-                            )
-
-                    # 更新进度
-                    ImportSyncDatabase.update_import_progress(
-                        import_id=self.import_id,
-                        loaded_cases=total_loaded,
-                        valid_cases=total_valid,
-                        invalid_cases=total_invalid,
-                        existing_cases=total_existing,
-                        imported_cases=total_imported,
-                        failed_cases=total_failed
-                    )
+            # 遍历文件，导入数据（流水线模式下各阶段并发执行）
+            if pipeline_mode:
+                import_result = self._import_files_pipelined(json_files)
+            else:
+                import_result = self._import_files_sequential(json_files)
 
-                    self._add_log("INFO", f"文件导入完成: {json_file.name}, 导入 {stats.get('total_imported', 0)} 个案例")
+            if import_result is None:
+                # 导入任务被取消
+                return
 
-                except Exception as e:
-                    logger.error(f"导入文件失败 {json_file.name}: {e}", exc_info=True)
-                    error_message = str(e)
-                    import traceback
-                    error_stack = traceback.format_exc()
-
-                    ImportSyncDatabase.add_import_error(
-                        import_id=self.import_id,
-                        file_name=json_file.name,
-                        case_id=None,
-                        error_type="import_error",
-                        error_message=error_message,
-                        error_details={"error_stack": error_stack}
-                    )
-                    total_failed += 1
+            total_imported = import_result['total_imported']
+            total_failed = import_result['total_failed']
+            all_imported_case_ids = import_result['imported_case_ids']
+            all_invalid_case_errors = import_result['invalid_case_errors']
 
             # 更新最终结果
             # 从数据库获取开始时间
@@ -443,6 +367,203 @@ class ImportTaskExecutor:
         finally:
             self.is_running = False
 
+    def _import_files_sequential(self, json_files: List[Path]) -> Optional[Dict[str, Any]]:
+        """
+        逐个文件顺序导入
+
+        Args:
+            json_files: 要导入的JSON文件列表
+
+        Returns:
+            汇总结果（total_imported、total_failed、imported_case_ids、invalid_case_errors 等），任务被取消时返回 None
+        """
+        total_loaded = 0
+        total_valid = 0
+        total_invalid = 0
+        total_existing = 0
+        total_imported = 0
+        total_failed = 0
+        
+        # 收集所有导入成功的案例ID
+        all_imported_case_ids = []
+        # 收集所有无效案例的验证错误信息
+        all_invalid_case_errors = {}
+        # 收集所有导入失败的案例错误信息
+        all_import_failed_cases = {}  # {case_id: error_message}
+
+        for json_file in json_files:
+            # 检查是否取消
+            if self.is_cancelled:
+                self._mark_cancelled()
+                return None
+
+            # 更新当前文件
+            ImportSyncDatabase.update_import_progress(
+                import_id=self.import_id,
+                current_file=json_file.name
+            )
+            self._add_log("INFO", f"开始导入文件: {json_file.name}")
+
+            try:
+                # 导入文件
+                stats = self.import_stage.import_from_json(json_file)
+
+                # 累计统计
+                total_loaded += stats.get('total_loaded', 0)
+                total_valid += stats.get('total_valid', 0)
+                total_invalid += stats.get('total_invalid', 0)
+                total_existing += stats.get('total_existing', 0)
+                total_imported += stats.get('total_imported', 0)
+                total_failed += stats.get('total_failed', 0)
+                
+                # 收集导入成功的案例ID
+                imported_case_ids = stats.get('imported_case_ids', [])
+                if imported_case_ids:
+                    all_imported_case_ids.extend(imported_case_ids)
+                
+                # 收集无效案例的验证错误信息
+                invalid_case_errors = stats.get('invalid_case_errors', {})
+                if invalid_case_errors:
+                    all_invalid_case_errors.update(invalid_case_errors)
+                
+                # 收集导入失败的案例错误信息
+                import_failed_cases = stats.get('import_failed_cases', {})
+                if import_failed_cases:
+                    all_import_failed_cases.update(import_failed_cases)
+                    # 记录导入失败的错误到数据库
+                    for case_id, error_message in import_failed_cases.items():
+                        ImportSyncDatabase.add_import_error(
+                            import_id=self.import_id,
+                            file_name=json_file.name,
+                            case_id=case_id,
+                            error_type="database_error",
+                            error_message=error_message,
+                            error_details={"error": error_message}
+                        )
+
+                # 更新进度
+                ImportSyncDatabase.update_import_progress(
+                    import_id=self.import_id,
+                    loaded_cases=total_loaded,
+                    valid_cases=total_valid,
+                    invalid_cases=total_invalid,
+                    existing_cases=total_existing,
+                    imported_cases=total_imported,
+                    failed_cases=total_failed
+                )
+
+                self._add_log("INFO", f"文件导入完成: {json_file.name}, 导入 {stats.get('total_imported', 0)} 个案例")
+
+            except Exception as e:
+                logger.error(f"导入文件失败 {json_file.name}: {e}", exc_info=True)
+                error_message = str(e)
+                import traceback
+                error_stack = traceback.format_exc()
+
+                ImportSyncDatabase.add_import_error(
+                    import_id=self.import_id,
+                    file_name=json_file.name,
+                    case_id=None,
+                    error_type="import_error",
+                    error_message=error_message,
+                    error_details={"error_stack": error_stack}
+                )
+                total_failed += 1
+
+        return {
+            'total_imported': total_imported,
+            'total_failed': total_failed,
+            'imported_case_ids': all_imported_case_ids,
+            'invalid_case_errors': all_invalid_case_errors,
+            'import_failed_cases': all_import_failed_cases
+        }
+
+    def _import_files_pipelined(self, json_files: List[Path]) -> Optional[Dict[str, Any]]:
+        """
+        流水线导入：加载/验证、生成向量、下载图片、入库四个阶段通过有界队列并发执行，
+        各阶段的吞吐量和队列深度随进度一起写入 task_imports.stage_stats
+
+        Args:
+            json_files: 要导入的JSON文件列表
+
+        Returns:
+            汇总结果（字段同 _import_files_sequential），任务被取消时返回 None
+        """
+        pipeline = StagedImportPipeline(
+            import_stage=self.import_stage,
+            load_workers=settings.IMPORT_LOAD_WORKERS,
+            embed_workers=settings.IMPORT_EMBED_WORKERS,
+            image_workers=settings.IMPORT_IMAGE_WORKERS,
+            insert_workers=settings.IMPORT_INSERT_WORKERS,
+            queue_size=settings.IMPORT_QUEUE_SIZE,
+            should_stop=lambda: self.is_cancelled,
+            progress_callback=self._on_pipeline_progress,
+            file_callback=self._on_pipeline_file_done
+        )
+        self._add_log("INFO", f"使用流水线模式导入 {len(json_files)} 个文件")
+
+        result = pipeline.run(json_files)
+
+        if result['cancelled']:
+            self._mark_cancelled()
+            return None
+
+        # 加载失败的文件单独记录（文件级错误，不在 file_callback 中处理）
+        for file_name, file_result in result['file_results'].items():
+            if file_result.get('error'):
+                ImportSyncDatabase.add_import_error(
+                    import_id=self.import_id,
+                    file_name=file_name,
+                    case_id=None,
+                    error_type="import_error",
+                    error_message=file_result['error'],
+                    error_details={"error": file_result['error']}
+                )
+
+        self._add_log(
+            "INFO",
+            f"流水线导入完成，耗时 {result['duration_seconds']:.1f} 秒",
+            details={"stage_stats": result['stage_stats']}
+        )
+        return result
+
+    def _on_pipeline_progress(self, snapshot: Dict[str, Any]):
+        """流水线进度回调：同步累计计数和各阶段统计到数据库"""
+        ImportSyncDatabase.update_import_progress(
+            import_id=self.import_id,
+            loaded_cases=snapshot['total_loaded'],
+            valid_cases=snapshot['total_valid'],
+            invalid_cases=snapshot['total_invalid'],
+            existing_cases=snapshot['total_existing'],
+            imported_cases=snapshot['total_imported'],
+            failed_cases=snapshot['total_failed'],
+            current_file=snapshot['current_file'],
+            stage_stats=snapshot['stage_stats']
+        )
+
+    def _on_pipeline_file_done(self, file_name: str, file_result: Dict[str, Any]):
+        """流水线文件完成回调：记录导入失败的案例"""
+        for case_id, error_message in file_result['import_failed_cases'].items():
+            ImportSyncDatabase.add_import_error(
+                import_id=self.import_id,
+                file_name=file_name,
+                case_id=case_id,
+                error_type="database_error",
+                error_message=error_message,
+                error_details={"error": error_message}
+            )
+        if not file_result.get('error'):
+            self._add_log("INFO", f"文件导入完成: {file_name}, 导入 {file_result['stats']['total_imported']} 个案例")
+
+    def _mark_cancelled(self):
+        """标记导入任务已取消"""
+        self._add_log("WARNING", "导入任务被取消")
+        ImportSyncDatabase.update_import_status(
+            import_id=self.import_id,
+            status="cancelled",
+            cancelled_at=datetime.now()
+        )
+
     async def cancel(self):
         """取消导入任务"""
         self.is_cancelled = True
@@ -38,6 +38,7 @@ class ImportSyncDatabase:
         imported_cases: Optional[int] = None,
         failed_cases: Optional[int] = None,
         current_file: Optional[str] = None,
+        stage_stats: Optional[Dict[str, Any]] = None,
     ) -> bool:
         """更新导入进度"""
         try:
@@ -71,6 +72,9 @@ class ImportSyncDatabase:
                 if current_file is not None:
                     update_fields.append("current_file = %s")
                     params.append(current_file)
+                if stage_stats is not None:
+                    update_fields.append("stage_stats = %s::jsonb")
+                    params.append(json.dumps(stage_stats))
 
                 if not update_fields:
                     return False
@@ -6,9 +6,36 @@ from typing import Optional, List, Dict, Any
 from app.repositories.case_repository import CaseRepository
 from app.schemas.case import SearchRequest, SearchResponse, CaseSearchResult, Facets, FacetItem
 from app.services.vector_service import VectorService
+from app.profiling import span
 
 logger = logging.getLogger(__name__)
 
+# 检索结果字段（与 CaseSearchResult 的字段及顺序一致）
+RESULT_FIELDS = tuple(CaseSearchResult.model_fields)
+
+
+def to_search_result(row: Dict[str, Any], similarity: Optional[float] = None) -> Dict[str, Any]:
+    """
+    把数据库查询结果转换为检索结果字典（结构与 CaseSearchResult 相同，不经过模型校验）
+
+    Args:
+        row: 案例数据字典（CaseRepository 的查询结果）
+        similarity: 相似度（关键词检索为 None）
+
+    Returns:
+        检索结果字典
+    """
+    result = {field: row.get(field) for field in RESULT_FIELDS}
+    # 与模型默认值一致
+    if result["images"] is None:
+        result["images"] = []
+    if result["tags"] is None:
+        result["tags"] = []
+    if result["favourite"] is None:
+        result["favourite"] = 0
+    result["similarity"] = similarity
+    return result
+
 
 class SearchService:
     """检索服务类"""
@@ -27,6 +54,20 @@ class SearchService:
         Returns:
             检索响应
         """
+        return SearchResponse(**await self.search_payload(request))
+    
+    async def search_payload(self, request: SearchRequest) -> Dict[str, Any]:
+        """
+        执行检索，返回与 SearchResponse 结构相同的字典
+        
+        结果不经过模型校验，可直接序列化为响应（见 SEARCH_FAST_RESPONSE）
+        
+        Args:
+            request: 检索请求参数
+        
+        Returns:
+            检索响应字典
+        """
         # 根据检索类型选择检索方法
         if request.search_type == "keyword":
             return await self._search_keyword(request)
@@ -38,7 +79,22 @@ class SearchService:
             # 默认使用关键词检索
             return await self._search_keyword(request)
     
-    async def _search_keyword(self, request: SearchRequest) -> SearchResponse:
+    @staticmethod
+    def _build_response(request: SearchRequest, results: List[Dict[str, Any]], total: int) -> Dict[str, Any]:
+        """构建检索响应字典（字段与 SearchResponse 一致）"""
+        # 计算总页数
+        total_pages = (total + request.page_size - 1) // request.page_size if total > 0 else 0
+        
+        return {
+            "total": total,
+            "page": request.page,
+            "page_size": request.page_size,
+            "total_pages": total_pages,
+            "results": results,
+            "facets": None,  # 分面统计待实现
+        }
+    
+    async def _search_keyword(self, request: SearchRequest) -> Dict[str, Any]:
         """关键词检索"""
         import logging
         logger = logging.getLogger(__name__)
@@ -70,58 +126,21 @@ class SearchService:
             page_size=request.page_size
         )
         
-        # 转换为响应模型
-        case_results = []
-        for result in results:
-            case_result = CaseSearchResult(
-                case_id=result["case_id"],
-                title=result["title"],
-                description=result.get("description"),
-                source_url=result["source_url"],
-                main_image=result.get("main_image"),
-                images=result.get("images", []),
-                video_url=result.get("video_url"),
-                brand_name=result.get("brand_name"),
-                brand_industry=result.get("brand_industry"),
-                activity_type=result.get("activity_type"),
-                location=result.get("location"),
-                tags=result.get("tags", []),
-                score=result.get("score"),
-                score_decimal=result.get("score_decimal"),
-                favourite=result.get("favourite", 0),
-                publish_time=result.get("publish_time"),
-                author=result.get("author"),
-                company_name=result.get("company_name"),
-                company_logo=result.get("company_logo"),
-                agency_name=result.get("agency_name"),
-                similarity=None,  # 关键词检索没有相似度
-                highlight=None,  # 高亮功能待实现
-            )
-            case_results.append(case_result)
+        # 转换为响应结构（关键词检索没有相似度，高亮功能待实现）
+        with span('build_results'):
+            case_results = [to_search_result(result) for result in results]
         
-        # 计算总页数
-        total_pages = (total + request.page_size - 1) // request.page_size if total > 0 else 0
-        
-        # 构建响应
-        response = SearchResponse(
-            total=total,
-            page=request.page,
-            page_size=request.page_size,
-            total_pages=total_pages,
-            results=case_results,
-            facets=None  # 分面统计待实现
-        )
-        
-        return response
+        return self._build_response(request, case_results, total)
     
-    async def _search_semantic(self, request: SearchRequest) -> SearchResponse:
+    async def _search_semantic(self, request: SearchRequest) -> Dict[str, Any]:
         """语义检索"""
         # 验证语义查询文本
         if not request.semantic_query or not request.semantic_query.strip():
             raise ValueError("语义检索查询文本不能为空")
         
         # 将查询文本编码为向量
-        query_vector = await self.vector_service.encode_query(request.semantic_query)
+        with span('embedding'):
+            query_vector = await self.vector_service.encode_query(request.semantic_query)
         
         # 构建筛选条件
         filters = {
@@ -147,51 +166,16 @@ class SearchService:
             page_size=request.page_size
         )
         
-        # 转换为响应模型
-        case_results = []
-        for result in results:
-            case_result = CaseSearchResult(
-                case_id=result["case_id"],
-                title=result["title"],
-                description=result.get("description"),
-                source_url=result["source_url"],
-                main_image=result.get("main_image"),
-                images=result.get("images", []),
-                video_url=result.get("video_url"),
-                brand_name=result.get("brand_name"),
-                brand_industry=result.get("brand_industry"),
-                activity_type=result.get("activity_type"),
-                location=result.get("location"),
-                tags=result.get("tags", []),
-                score=result.get("score"),
-                score_decimal=result.get("score_decimal"),
-                favourite=result.get("favourite", 0),
-                publish_time=result.get("publish_time"),
-                author=result.get("author"),
-                company_name=result.get("company_name"),
-                company_logo=result.get("company_logo"),
-                agency_name=result.get("agency_name"),
-                similarity=float(result.get("similarity", 0.0)),  # 语义检索包含相似度
-                highlight=None,  # 高亮功能待实现
-            )
-            case_results.append(case_result)
-        
-        # 计算总页数
-        total_pages = (total + request.page_size - 1) // request.page_size if total > 0 else 0
-        
-        # 构建响应
-        response = SearchResponse(
-            total=total,
-            page=request.page,
-            page_size=request.page_size,
-            total_pages=total_pages,
-            results=case_results,
-            facets=None  # 分面统计待实现
-        )
+        # 转换为响应结构（语义检索包含相似度）
+        with span('build_results'):
+            case_results = [
+                to_search_result(result, float(result.get("similarity", 0.0)))
+                for result in results
+            ]
         
-        return response
+        return self._build_response(request, case_results, total)
     
-    async def _search_hybrid(self, request: SearchRequest) -> SearchResponse:
+    async def _search_hybrid(self, request: SearchRequest) -> Dict[str, Any]:
         """混合检索（关键词 + 语义）"""
         # 混合检索需要同时有 query 和 semantic_query
         if not request.query and not request.semantic_query:
@@ -238,14 +222,14 @@ class SearchService:
         query_lower = request.query.lower()
         hybrid_results = []
         
-        for case in semantic_response.results:
-            similarity = case.similarity or 0.0
+        for case in semantic_response["results"]:
+            similarity = case["similarity"] or 0.0
             
             # 计算关键词匹配得分（简单匹配）
             keyword_score = 0.0
-            title = (case.title or "").lower()
-            description = (case.description or "").lower()
-            brand_name = (case.brand_name or "").lower()
+            title = (case["title"] or "").lower()
+            description = (case["description"] or "").lower()
+            brand_name = (case["brand_name"] or "").lower()
             
             if query_lower in title:
                 keyword_score = 1.0  # 标题完全匹配
@@ -259,12 +243,9 @@ class SearchService:
             # 加权融合得分
             final_score = keyword_score * keyword_weight + similarity * semantic_weight
             
-            # 创建新结果对象（保留原数据，更新相似度为最终得分）
-            hybrid_case = CaseSearchResult(
-                **case.dict(exclude={'similarity'}),
-                similarity=final_score
-            )
-            hybrid_results.append((hybrid_case, final_score))
+            # 更新相似度为最终得分（结果字典只在本次检索中使用，直接修改）
+            case["similarity"] = final_score
+            hybrid_results.append((case, final_score))
         
         # 按最终得分排序
         hybrid_results.sort(key=lambda x: x[1], reverse=True)
@@ -275,17 +256,4 @@ class SearchService:
         end = start + request.page_size
         paginated_results = [case for case, _ in hybrid_results[start:end]]
         
-        # 计算总页数
-        total_pages = (total + request.page_size - 1) // request.page_size if total > 0 else 0
-        
-        # 构建响应
-        response = SearchResponse(
-            total=total,
-            page=request.page,
-            page_size=request.page_size,
-            total_pages=total_pages,
-            results=paginated_results,
-            facets=None
-        )
-        
-        return response
\ No newline at end of file
+        return self._build_response(request, paginated_results, total)
\ No newline at end of file
@@ -208,7 +208,10 @@ class SingleCaseService:
             batch_size=1,
             skip_existing=False,
             skip_invalid=False,
-            normalize_data=normalize_data
+            normalize_data=normalize_data,
+            embedding_backend=settings.EMBEDDING_BACKEND,
+            onnx_path=settings.EMBEDDING_ONNX_PATH,
+            onnx_threads=settings.EMBEDDING_ONNX_THREADS
         )
         
         # 生成向量（如果需要）
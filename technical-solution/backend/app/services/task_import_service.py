@@ -13,6 +13,7 @@ from app.schemas.task_import import (
     ImportResultResponse, ImportResult, ImportError, ImportHistoryResponse, ImportHistoryItem
 )
 import asyncio
+import json
 
 
 class TaskImportService:
@@ -122,6 +123,7 @@ class TaskImportService:
             generate_vectors=request.generate_vectors,
             skip_invalid=request.skip_invalid,
             batch_size=request.batch_size,
+            pipeline_mode=request.pipeline_mode,
         )
 
         # 添加创建日志
@@ -149,6 +151,7 @@ class TaskImportService:
             normalize_data=request.normalize_data,
             download_images=request.download_images,
             image_download_concurrency=request.image_download_concurrency,
+            pipeline_mode=request.pipeline_mode,
         ))
 
         return {
@@ -254,6 +257,14 @@ class TaskImportService:
                     remaining = (latest_import.get("total_cases", 0) - imported)
                     estimated_time = int(remaining * avg_time_per_case)
 
+        # 流水线阶段统计（asyncpg 默认以字符串返回 JSONB）
+        stage_stats = latest_import.get("stage_stats")
+        if isinstance(stage_stats, str):
+            try:
+                stage_stats = json.loads(stage_stats)
+            except ValueError:
+                stage_stats = None
+
         progress = ImportProgress(
             total_cases=latest_import.get("total_cases", 0),
             loaded_cases=latest_import.get("loaded_cases", 0),
@@ -264,7 +275,8 @@ class TaskImportService:
             failed_cases=latest_import.get("failed_cases", 0),
             current_file=latest_import.get("current_file"),
             percentage=percentage,
-            estimated_remaining_time=estimated_time
+            estimated_remaining_time=estimated_time,
+            stage_stats=stage_stats
         )
 
         stats = ImportStats(
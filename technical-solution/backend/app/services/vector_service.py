@@ -1,52 +1,69 @@
 """
 向量服务层
 """
+import asyncio
 import logging
 import hashlib
 import os
-from typing import List, Optional
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Dict, Any
 import numpy as np
-from FlagEmbedding import FlagModel
+
+# 添加 backend 目录到路径，以便导入 services 模块
+backend_root = Path(__file__).parent.parent.parent
+if str(backend_root) not in sys.path:
+    sys.path.insert(0, str(backend_root))
+
+from services.embedding import EmbeddingBackend, create_embedding_backend, resolve_model_path
+from services.metrics import EMBEDDING_SECONDS, EMBEDDING_BATCH_SIZE, CACHE_LOOKUPS
 from app.config import settings
+from app.services.embedding_sidecar import EmbeddingSidecarClient
 
 logger = logging.getLogger(__name__)
 
 # 全局模型实例（单例模式）
-_vector_model: Optional[FlagModel] = None
+_vector_model: Optional[EmbeddingBackend] = None
+# 模型加载锁（预热线程和首个检索请求可能同时加载）
+_model_lock = threading.Lock()
+# 模型状态: not_loaded / loading / loaded（已加载，测试编码未完成）/ ready（测试编码成功）/ failed
+_model_state: Dict[str, Any] = {
+    'status': 'not_loaded',
+    'source': 'local',  # local: 进程内模型，sidecar: 边车进程
+    'embedding': None,  # 编码后端信息
+    'error': None,
+    'load_seconds': None,
+    'warmup_seconds': None,
+    'loaded_at': None,
+}
 
 
-def get_vector_model() -> FlagModel:
+def get_vector_model() -> EmbeddingBackend:
     """
     获取向量模型实例（单例）
     
+    首次调用时才按 EMBEDDING_BACKEND 创建编码后端（导入 FlagEmbedding/torch 或 onnxruntime）并加载模型，
+    只提供爬取任务接口的进程不承担导入和内存开销
+    
     Returns:
-        向量模型实例
+        向量编码后端实例
     """
+    if _vector_model is not None:
+        return _vector_model
+    with _model_lock:
+        if _vector_model is None:
+            _load_vector_model()
+    return _vector_model
+
+
+def _load_vector_model():
     global _vector_model
     if _vector_model is None:
-        model_path = settings.VECTOR_MODEL_PATH or 'BAAI/bge-large-zh-v1.5'
-        
-        # 如果指定了本地路径，检查是否是 HuggingFace 缓存目录
-        # 如果是缓存根目录，自动查找快照目录
-        if model_path and os.path.exists(model_path):
-            from pathlib import Path
-            cache_path = Path(model_path)
-            # 如果是 HuggingFace 缓存目录结构，查找快照
-            if cache_path.name.startswith('models--') and (cache_path / 'snapshots').exists():
-                snapshots_dir = cache_path / 'snapshots'
-                # 查找所有快照目录（包含 config.json 的目录）
-                snapshots = [d for d in snapshots_dir.iterdir() if d.is_dir() and (d / 'config.json').exists()]
-                if snapshots:
-                    # 使用最新的快照目录（按修改时间排序）
-                    snapshots.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-                    model_path = str(snapshots[0])
-                    logger.info(f"自动检测到模型快照路径: {model_path}")
-            # 如果路径不存在，回退到使用模型名称
-            elif not cache_path.exists():
-                logger.warning(f"指定的模型路径不存在: {model_path}，将使用模型名称: BAAI/bge-large-zh-v1.5")
-                model_path = 'BAAI/bge-large-zh-v1.5'
-        
-        logger.info(f"正在加载向量模型: {model_path}")
+        model_path = resolve_model_path(settings.VECTOR_MODEL_PATH)
+        logger.info(f"正在加载向量模型: {model_path}（后端: {settings.EMBEDDING_BACKEND}）")
         try:
             # 配置 HuggingFace 环境
             # 如果启用离线模式，强制使用本地缓存，避免网络请求
@@ -60,23 +77,130 @@ def get_vector_model() -> FlagModel:
                 if settings.HTTP_PROXY:
                     os.environ.setdefault('HTTP_PROXY', settings.HTTP_PROXY)
             
-            _vector_model = FlagModel(
+            _model_state.update(status='loading', error=None)
+            start = time.time()
+            _vector_model = create_embedding_backend(
+                settings.EMBEDDING_BACKEND,
                 model_path,
-                query_instruction_for_retrieval="为这个句子生成表示以用于检索相关文章："
+                onnx_path=settings.EMBEDDING_ONNX_PATH,
+                onnx_threads=settings.EMBEDDING_ONNX_THREADS
+            )
+            _model_state.update(
+                status='loaded',
+                source='local',
+                embedding=_vector_model.describe(),
+                load_seconds=round(time.time() - start, 2),
+                loaded_at=datetime.now().isoformat()
             )
-            logger.info("向量模型加载成功")
+            logger.info(f"向量模型加载成功（耗时 {_model_state['load_seconds']} 秒）")
         except Exception as e:
+            _model_state.update(status='failed', error=str(e))
             logger.error(f"向量模型加载失败: {e}")
             raise RuntimeError(f"向量服务不可用: {e}")
-    return _vector_model
+
+
+def warm_up_vector_model():
+    """
+    预热向量模型：加载模型并编码一条测试文本（触发权重加载和首次推理的初始化），
+    使首个语义检索请求的延迟与后续请求一致
+    """
+    client = get_sidecar_client()
+    if client is not None:
+        # 配置了边车时只确认边车可用，进程内不加载模型
+        try:
+            start = time.time()
+            client.encode(["预热"])
+            _model_state.update(
+                status='ready',
+                source='sidecar',
+                warmup_seconds=round(time.time() - start, 2),
+                loaded_at=datetime.now().isoformat()
+            )
+            logger.info(f"向量边车可用: {client.url}")
+            return
+        except Exception as e:
+            logger.warning(f"向量边车不可用（{client.url}）: {e}，回退到进程内加载模型")
+
+    try:
+        model = get_vector_model()
+        start = time.time()
+        model.encode(["预热"])
+        # 测试编码成功后才算就绪（/health/ready 以此判断）
+        _model_state.update(status='ready', error=None, warmup_seconds=round(time.time() - start, 2))
+        logger.info(f"向量模型预热完成（测试编码耗时 {_model_state['warmup_seconds']} 秒）")
+    except Exception as e:
+        # 首个语义检索请求会再次尝试加载和编码，成功后状态恢复为就绪
+        _model_state.update(status='failed', error=str(e))
+        logger.error(f"向量模型预热失败: {e}")
+
+
+def start_vector_model_warmup() -> threading.Thread:
+    """在后台线程中预热向量模型（立即返回，不阻塞应用启动）"""
+    thread = threading.Thread(target=warm_up_vector_model, name="vector-model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_vector_model_status() -> Dict[str, Any]:
+    """获取向量模型的加载状态"""
+    return dict(_model_state)
+
+
+# 边车客户端（配置了 EMBEDDING_SIDECAR_URL 时使用）
+_sidecar_client: Optional[EmbeddingSidecarClient] = None
+# 边车不可用后暂停使用到该时间（期间回退到进程内模型）
+_sidecar_retry_at = 0.0
+
+
+def get_sidecar_client() -> Optional[EmbeddingSidecarClient]:
+    """获取边车客户端（未配置边车时返回 None）"""
+    global _sidecar_client
+    if _sidecar_client is None and settings.EMBEDDING_SIDECAR_URL:
+        _sidecar_client = EmbeddingSidecarClient(
+            settings.EMBEDDING_SIDECAR_URL,
+            timeout=settings.EMBEDDING_SIDECAR_TIMEOUT
+        )
+    return _sidecar_client
+
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """
+    批量编码文本（同步，返回二维数组）
+
+    配置了边车时优先通过边车编码，边车不可用时回退到进程内加载的模型，
+    并在 EMBEDDING_SIDECAR_RETRY_SECONDS 秒后再尝试边车
+    """
+    global _sidecar_retry_at
+    client = get_sidecar_client()
+    if client is not None and time.time() >= _sidecar_retry_at:
+        try:
+            start = time.perf_counter()
+            vectors = np.asarray(client.encode(texts), dtype=np.float32)
+            EMBEDDING_SECONDS.observe(time.perf_counter() - start, source='sidecar')
+            EMBEDDING_BATCH_SIZE.observe(len(texts), source='sidecar')
+            return vectors
+        except Exception as e:
+            _sidecar_retry_at = time.time() + settings.EMBEDDING_SIDECAR_RETRY_SECONDS
+            logger.warning(
+                f"向量边车不可用（{client.url}）: {e}，"
+                f"{settings.EMBEDDING_SIDECAR_RETRY_SECONDS} 秒内回退到进程内模型"
+            )
+    model = get_vector_model()
+    start = time.perf_counter()
+    vectors = np.asarray(model.encode(texts))
+    EMBEDDING_SECONDS.observe(time.perf_counter() - start, source='local')
+    EMBEDDING_BATCH_SIZE.observe(len(texts), source='local')
+    if _model_state['status'] != 'ready':
+        # 未预热（或预热失败）时以首次编码成功为就绪
+        _model_state.update(status='ready', error=None)
+    return vectors
 
 
 class VectorService:
     """向量服务类"""
     
     def __init__(self):
-        """初始化向量服务"""
-        self.model = get_vector_model()
+        """初始化向量服务（模型在首次编码时获取，未预热完成时在线程池中等待加载）"""
         self.cache: dict = {}
         self.cache_size = getattr(settings, 'VECTOR_CACHE_SIZE', 1000)
         self.cache_enabled = getattr(settings, 'VECTOR_CACHE_ENABLED', True)
@@ -93,6 +217,13 @@ class VectorService:
         """
         return hashlib.md5(query.encode('utf-8')).hexdigest()
     
+    @property
+    def model(self) -> EmbeddingBackend:
+        return get_vector_model()
+    
+    def _encode(self, query: str):
+        return encode_texts([query])[0]
+    
     async def encode_query(self, query: str) -> List[float]:
         """
         将查询文本转换为向量
@@ -112,13 +243,17 @@ class VectorService:
         if self.cache_enabled:
             cache_key = self._get_cache_key(query)
             if cache_key in self.cache:
+                CACHE_LOOKUPS.inc(cache='query_vector', result='hit')
                 logger.debug(f"向量缓存命中: {query[:50]}...")
                 return self.cache[cache_key]
+            CACHE_LOOKUPS.inc(cache='query_vector', result='miss')
         
         try:
             # 使用模型编码
             logger.debug(f"正在编码查询文本: {query[:50]}...")
-            vector = self.model.encode(query)
+            # 边车请求、模型加载和推理都在线程池中执行，避免阻塞事件循环
+            loop = asyncio.get_running_loop()
+            vector = await loop.run_in_executor(None, self._encode, query)
             
             # 归一化向量
             vector_norm = vector / np.linalg.norm(vector)
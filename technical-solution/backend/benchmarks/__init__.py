@@ -0,0 +1,4 @@
+"""
+性能基准测试
+离线运行的基准测试和一致性基准数据（不发起网络请求）
+"""
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+解析器基准语料
+从仓库中已保存的页面（backend/data/samples、ad-browser/data/detail-card.html）构建，
+供解析后端一致性测试和基准测试共用；
+另可加入爬取时的 HTML 归档（html_archive）中录制的页面，
+以及 backend/data/json 中已保存的案例（拆分为列表项/详情页数据，并构造列表接口响应）
+"""
+
+import html
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from services.spider.detail_parser import DetailPageParser
+from services.spider.html_archive import HtmlArchive
+from services.spider.html_backend import BACKEND_HTML_PARSER
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = BACKEND_ROOT.parent
+
+# 语料页面（不存在的文件自动跳过）
+CORPUS_FILES = [
+    BACKEND_ROOT / 'data' / 'samples' / 'detail_page_sample.html',  # 移动端详情页（new_neirong）
+    BACKEND_ROOT / 'data' / 'samples' / 'detail_page_340836.html',  # PC端详情页（articleContent）
+    BACKEND_ROOT / 'data' / 'samples' / 'adquan_page_source.html',  # 案例库首页（覆盖兜底提取逻辑）
+    PROJECT_ROOT / 'ad-browser' / 'data' / 'detail-card.html',  # 非广告门页面（覆盖兜底提取逻辑）
+]
+
+# 语料页面统一使用的详情页URL（只影响 source_url 字段）
+CORPUS_URL = 'https://www.adquan.com/post-2-000000.html'
+
+# 已保存的案例批次文件（爬取输出）
+CASES_DIR = BACKEND_ROOT / 'data' / 'json'
+
+# 列表接口返回的案例项字段（其余字段来自详情页）
+LIST_ITEM_FIELDS = (
+    'title', 'url', 'thumb', 'score', 'score_decimal', 'favourite', 'company_name', 'company_logo',
+)
+
+
+def load_detail_pages() -> List[Tuple[str, str]]:
+    """
+    加载详情页语料
+
+    Returns:
+        [(文件名, HTML), ...]
+    """
+    pages = []
+    for path in CORPUS_FILES:
+        if path.exists():
+            pages.append((path.name, path.read_text(encoding='utf-8')))
+    return pages
+
+
+def load_list_pages() -> List[Tuple[str, str]]:
+    """
+    加载列表页语料（包含 article_1 案例卡片的页面）
+
+    Returns:
+        [(文件名, HTML), ...]
+    """
+    return [(name, page_html) for name, page_html in load_detail_pages() if 'article_1' in page_html]
+
+
+def load_archive_pages(archive_dir: Path, kind: str, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+    """
+    加载 HTML 归档中录制的页面（每个 URL 取最近一次抓取）
+
+    Args:
+        archive_dir: 归档根目录（爬取输出目录下的 html_archive）
+        kind: 归档类型（detail / list）
+        limit: 最多加载的页面数
+
+    Returns:
+        [(URL, HTML), ...]
+    """
+    if not (Path(archive_dir) / HtmlArchive.INDEX_FILE).exists():
+        return []
+    archive = HtmlArchive(Path(archive_dir))
+    pages = []
+    for entry in archive.latest_entries(kind):
+        page_html = archive.get(entry['sha256'])
+        if page_html:
+            pages.append((entry.get('url') or entry['sha256'], page_html))
+            if limit is not None and len(pages) >= limit:
+                break
+    return pages
+
+
+def load_saved_cases(cases_dir: Path = CASES_DIR) -> List[Dict[str, Any]]:
+    """
+    加载已保存的案例（按 case_id 去重，跳过爬取失败的记录）
+
+    Returns:
+        案例列表（按文件路径排序，结果稳定）
+    """
+    cases: Dict[Any, Dict[str, Any]] = {}
+    for path in sorted(Path(cases_dir).rglob('cases_batch_*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for case in data.get('cases', []) if isinstance(data, dict) else []:
+            if case.get('case_id') and case.get('title') and not case.get('error'):
+                cases.setdefault(case['case_id'], case)
+    return list(cases.values())
+
+
+def split_case(case: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    把已保存的案例拆分为列表接口的案例项和详情页解析结果（merge_case_data 的输入）
+
+    Returns:
+        (列表项, 详情页数据)
+    """
+    list_item = {'id': case['case_id']}
+    for field in LIST_ITEM_FIELDS:
+        if field in case:
+            list_item[field] = case[field]
+    list_item.setdefault('url', case.get('source_url'))
+    # 标题、URL 等字段合并时取详情页数据，其余列表项字段不出现在详情页解析结果中
+    detail = {
+        key: value for key, value in case.items()
+        if key == 'title' or (key not in LIST_ITEM_FIELDS and key != 'case_id')
+    }
+    return list_item, detail
+
+
+def build_list_fragments(cases: List[Dict[str, Any]], page_size: int = 15,
+                         pages: int = 20) -> List[Tuple[str, str]]:
+    """
+    按列表接口返回的 HTML 片段结构（article_1 案例卡片）渲染已保存的案例
+
+    仓库中没有保存列表接口的原始响应，这里按 ListPageHTMLParser 解析的结构构造，
+    字段取值来自真实案例
+
+    Returns:
+        [(名称, HTML 片段), ...]，每页 page_size 个案例
+    """
+    fragments = []
+    for page, start in enumerate(range(0, min(len(cases), page_size * pages), page_size), 1):
+        cards = []
+        for case in cases[start:start + page_size]:
+            publish_time = (case.get('publish_time') or '')[:10].replace('-', '/')
+            score = f"{case['score_decimal']}分" if case.get('score_decimal') else '暂无'
+            company_name = html.escape(case.get('company_name') or '')
+            cards.append(
+                f'<div class="article_1">'
+                f'<a class="article_2_href" href="/article/{case["case_id"]}">'
+                f'<img class="article_1_img" src="{html.escape(case.get("thumb") or "")}"></a>'
+                f'<div class="article_1_fu"><p class="article_2_p">{html.escape(case["title"])}</p>'
+                f'<p>{publish_time}</p></div>'
+                f'<div class="article_3"><img class="article_3_img" src="{html.escape(case.get("company_logo") or "")}"'
+                f' alt="{company_name}"><normal>{score}</normal></div>'
+                f'<div class="hover_one"><a href="/company/0"><span>{company_name}</span></a></div>'
+                f'</div>'
+            )
+        fragments.append((f"fragment:page_{page}", '\n'.join(cards)))
+    return fragments
+
+
+def build_list_api_responses(list_pages: List[Tuple[str, str]],
+                             cases: List[Dict[str, Any]],
+                             page_size: int = 15, json_pages: int = 20) -> List[Tuple[str, str]]:
+    """
+    构造列表接口响应（JSON 文本）
+
+    新接口的 data 字段是列表页 HTML 片段，旧接口的 data 字段是 {'items': [...], 'page': N}，
+    两种格式都按接口原样构造，用于测试响应解码耗时
+
+    Args:
+        list_pages: 列表页语料（新接口格式）
+        cases: 已保存的案例（旧接口格式，每页 page_size 个）
+        page_size: 旧接口格式每页的案例数
+        json_pages: 旧接口格式最多构造的页数
+
+    Returns:
+        [(名称, 响应 JSON), ...]
+    """
+    responses = []
+    for name, page_html in list_pages:
+        body = {'code': 0, 'message': '请求成功', 'data': page_html}
+        responses.append((f"html:{name}", json.dumps(body, ensure_ascii=False)))
+    for page, start in enumerate(range(0, min(len(cases), page_size * json_pages), page_size), 1):
+        items = [split_case(case)[0] for case in cases[start:start + page_size]]
+        body = {'code': 0, 'message': '请求成功', 'data': {'items': items, 'page': page}}
+        responses.append((f"json:page_{page}", json.dumps(body, ensure_ascii=False)))
+    return responses
+
+
+class ReferenceDetailPageParser(DetailPageParser):
+    """
+    基准详情页解析器
+
+    使用 html.parser，并按原实现将子树序列化后重新解析来复制节点，
+    发布时间和PC端案例信息按原实现提取（忽略预先计算的页面文本），
+    作为新解析后端、节点复制方式和提取逻辑改动的一致性基准
+    """
+
+    def __init__(self):
+        super().__init__(parser_backend=BACKEND_HTML_PARSER)
+
+    def _copy_element(self, element):
+        soup_copy = BeautifulSoup(str(element), 'html.parser')
+        if element.name == 'p':
+            return soup_copy.find('p')
+        element_copy = soup_copy.find(element.name, class_=element.get('class'))
+        if not element_copy:
+            element_copy = soup_copy.find(['div', 'section', 'article'])
+        return element_copy
+
+    def _extract_publish_time(self, soup: BeautifulSoup, is_pc_page: bool = False,
+                              page_text: Optional[str] = None) -> Optional[str]:
+        """提取发布时间"""
+        # 移动端
+        case_info = soup.find('div', class_='case_info')
+        if case_info:
+            span_02 = case_info.find('span', class_='span_02')
+            if span_02:
+                time_text = self._clean_text(span_02.get_text())
+                # 验证时间格式 (YYYY-MM-DD)
+                if re.match(r'^\d{4}-\d{2}-\d{2}', time_text):
+                    return time_text
+
+        # PC端：从页面中查找发布时间
+        if is_pc_page:
+            # 查找包含"发布时间"或"发布时间："的文本
+            time_patterns = [
+                r'发布时间[：:]\s*(\d{4}-\d{2}-\d{2})',
+                r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})',
+            ]
+
+            # 在页面文本中搜索
+            page_text = soup.get_text()
+            for pattern in time_patterns:
+                match = re.search(pattern, page_text)
+                if match:
+                    time_str = match.group(1)
+                    # 只提取日期部分（YYYY-MM-DD）
+                    date_match = re.match(r'(\d{4}-\d{2}-\d{2})', time_str)
+                    if date_match:
+                        return date_match.group(1)
+
+            # 尝试从特定的时间元素中提取
+            time_elements = soup.find_all(string=re.compile(r'\d{4}-\d{2}-\d{2}'))
+            for time_elem in time_elements:
+                time_text = self._clean_text(str(time_elem))
+                if re.match(r'^\d{4}-\d{2}-\d{2}', time_text):
+                    return time_text[:10]  # 只取日期部分
+
+        return None
+
+    def _extract_pc_case_info(self, soup: BeautifulSoup, page_text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        从PC端"案例信息"区域提取信息
+
+        根据网页内容，PC端的案例信息区域包含：
+        - 行业：互联网
+        - 类型：平面
+        - 地区：中国大陆
+        - 时间：2023
+        """
+        result = {
+            'brand_industry': None,
+            'activity_type': None,
+            'location': None,
+            'tags': [],
+        }
+
+        # 查找"案例信息"区域
+        # 可能的容器：包含"案例信息"文本的div
+        case_info_containers = [
+            soup.find('div', string=re.compile('案例信息')),
+            soup.find('h3', string=re.compile('案例信息')),
+            soup.find('h4', string=re.compile('案例信息')),
+        ]
+
+        case_info_section = None
+        for container in case_info_containers:
+            if container:
+                # 找到包含"案例信息"的元素，向上或向下查找信息区域
+                case_info_section = container.find_parent() or container.find_next_sibling()
+                if case_info_section:
+                    break
+
+        # 如果没有找到，尝试查找包含这些关键词的区域
+        if not case_info_section:
+            # 查找包含"行业"、"类型"、"地区"等关键词的区域
+            page_text = soup.get_text()
+            if '行业：' in page_text or '类型：' in page_text or '地区：' in page_text:
+                # 查找包含这些信息的div
+                all_divs = soup.find_all('div')
+                for div in all_divs:
+                    div_text = div.get_text()
+                    if '行业：' in div_text or '类型：' in div_text:
+                        case_info_section = div
+                        break
+
+        if case_info_section:
+            section_text = case_info_section.get_text()
+
+            # 提取行业
+            industry_match = re.search(r'行业[：:]\s*([^\n\r]+)', section_text)
+            if industry_match:
+                result['brand_industry'] = self._clean_text(industry_match.group(1))
+
+            # 提取类型（活动类型）
+            type_match = re.search(r'类型[：:]\s*([^\n\r]+)', section_text)
+            if type_match:
+                result['activity_type'] = self._clean_text(type_match.group(1))
+
+            # 提取地区
+            area_match = re.search(r'地区[：:]\s*([^\n\r]+)', section_text)
+            if area_match:
+                result['location'] = self._clean_text(area_match.group(1))
+
+            # 提取标签（如果有）
+            # PC端标签可能在页面其他地方，这里先提取文本中的标签
+
+        # 备用方案：直接从页面文本中提取
+        if not result['brand_industry'] or not result['activity_type'] or not result['location']:
+            page_text = soup.get_text()
+
+            # 行业
+            if not result['brand_industry']:
+                industry_match = re.search(r'行业[：:]\s*([^\n\r]+)', page_text)
+                if industry_match:
+                    result['brand_industry'] = self._clean_text(industry_match.group(1))
+
+            # 类型
+            if not result['activity_type']:
+                type_match = re.search(r'类型[：:]\s*([^\n\r]+)', page_text)
+                if type_match:
+                    result['activity_type'] = self._clean_text(type_match.group(1))
+
+            # 地区
+            if not result['location']:
+                area_match = re.search(r'地区[：:]\s*([^\n\r]+)', page_text)
+                if area_match:
+                    result['location'] = self._clean_text(area_match.group(1))
+
+        return result
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+向量编码后端评估
+以 FlagEmbedding fp32 为基准，在已爬取的案例（data/json/**/cases_batch_*.json）上评估其它编码后端：
+- 余弦一致性：同一文本两个后端向量的余弦相似度；
+- recall@10：案例标题作为查询，候选后端检索结果前 10 条与基准前 10 条的重合率
+  （full: 查询和案例都用候选后端重新编码；query_only: 只有查询用候选后端，案例向量保持 fp32，
+   对应只切换 API 编码后端、未重新生成库内向量的情况）；
+- 单条查询延迟和批量编码吞吐量
+
+运行: python -m benchmarks.embedding_backends --backend onnx --limit 2000 --queries 200 [--json result.json]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.embedding import BACKEND_FLAG, EMBEDDING_BACKENDS, EmbeddingBackend, create_embedding_backend
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+TOP_K = 10
+
+
+def load_case_texts(json_dir: Path, limit: int) -> Tuple[List[str], List[str]]:
+    """
+    加载案例文本（按 case_id 去重）
+
+    Returns:
+        (案例文本列表「标题 描述」, 对应的标题列表)
+    """
+    texts, titles, seen = [], [], set()
+    for path in sorted(json_dir.rglob('cases_batch_*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cases = json.load(f).get('cases', [])
+        except (OSError, ValueError, AttributeError):
+            continue
+        for case in cases:
+            title = (case.get('title') or '').strip()
+            combined = f"{title} {(case.get('description') or '').strip()}".strip()
+            if not title or case.get('case_id') in seen:
+                continue
+            seen.add(case.get('case_id'))
+            texts.append(combined)
+            titles.append(title)
+            if len(texts) >= limit:
+                return texts, titles
+    return texts, titles
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _encode_bulk(backend: EmbeddingBackend, texts: List[str], batch_size: int) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    vectors = _normalize(backend.encode(texts, batch_size=batch_size))
+    return vectors, time.perf_counter() - start
+
+
+def _query_latency(backend: EmbeddingBackend, queries: List[str]) -> Dict[str, float]:
+    # 预热一次，排除首次推理的初始化开销
+    backend.encode(queries[:1], batch_size=1)
+    durations = []
+    for query in queries:
+        start = time.perf_counter()
+        backend.encode([query], batch_size=1)
+        durations.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': round(float(np.percentile(durations, 50)), 2),
+        'p95_ms': round(float(np.percentile(durations, 95)), 2),
+        'mean_ms': round(float(np.mean(durations)), 2),
+    }
+
+
+def _top_k(queries: np.ndarray, docs: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ docs.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def _recall(reference: np.ndarray, candidate: np.ndarray) -> float:
+    k = reference.shape[1]
+    hits = [len(set(r) & set(c)) / k for r, c in zip(reference.tolist(), candidate.tolist())]
+    return round(float(np.mean(hits)), 4)
+
+
+def run(
+    backend: str,
+    json_dir: Path,
+    limit: int,
+    query_count: int,
+    batch_size: int,
+    model_path: str = None,
+    onnx_path: str = None,
+    onnx_threads: int = None,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """执行评估"""
+    texts, titles = load_case_texts(json_dir, limit)
+    if len(texts) <= TOP_K:
+        raise ValueError(f"语料不足（{len(texts)} 条），请检查 --json-dir")
+    queries = random.Random(seed).sample(titles, min(query_count, len(titles)))
+
+    reference = create_embedding_backend(BACKEND_FLAG, model_path)
+    candidate = create_embedding_backend(backend, model_path, onnx_path=onnx_path, onnx_threads=onnx_threads)
+
+    results: Dict[str, Any] = {
+        'corpus': {'json_dir': str(json_dir), 'documents': len(texts), 'queries': len(queries)},
+        'reference': reference.describe(),
+        'candidate': candidate.describe(),
+    }
+
+    ref_docs, ref_seconds = _encode_bulk(reference, texts, batch_size)
+    cand_docs, cand_seconds = _encode_bulk(candidate, texts, batch_size)
+    ref_queries, _ = _encode_bulk(reference, queries, batch_size)
+    cand_queries, _ = _encode_bulk(candidate, queries, batch_size)
+
+    cosine = np.sum(ref_docs * cand_docs, axis=1)
+    results['cosine_agreement'] = {
+        'mean': round(float(np.mean(cosine)), 5),
+        'p05': round(float(np.percentile(cosine, 5)), 5),
+        'min': round(float(np.min(cosine)), 5),
+    }
+
+    ref_top = _top_k(ref_queries, ref_docs, TOP_K)
+    results[f'recall@{TOP_K}'] = {
+        'full': _recall(ref_top, _top_k(cand_queries, cand_docs, TOP_K)),
+        'query_only': _recall(ref_top, _top_k(cand_queries, ref_docs, TOP_K)),
+    }
+
+    results['bulk'] = {
+        name: {
+            'seconds': round(seconds, 2),
+            'texts_per_second': round(len(texts) / seconds, 1) if seconds > 0 else 0.0,
+        }
+        for name, seconds in (('reference', ref_seconds), ('candidate', cand_seconds))
+    }
+    latency_queries = queries[:min(len(queries), 100)]
+    results['query_latency'] = {
+        'reference': _query_latency(reference, latency_queries),
+        'candidate': _query_latency(candidate, latency_queries),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向量编码后端评估（以 FlagEmbedding fp32 为基准）')
+    parser.add_argument('--backend', type=str, default='onnx', choices=[b for b in EMBEDDING_BACKENDS if b != BACKEND_FLAG],
+                        help='待评估的编码后端（默认: onnx）')
+    parser.add_argument('--json-dir', type=str, default=str(BACKEND_ROOT / 'data' / 'json'),
+                        help='案例 JSON 目录（默认: data/json）')
+    parser.add_argument('--limit', type=int, default=2000, help='最多使用的案例数（默认: 2000）')
+    parser.add_argument('--queries', type=int, default=200, help='查询数（默认: 200）')
+    parser.add_argument('--batch-size', type=int, default=32, help='批量编码大小（默认: 32）')
+    parser.add_argument('--model-path', type=str, default=None, help='本地模型目录（默认: BAAI/bge-large-zh-v1.5）')
+    parser.add_argument('--onnx-path', type=str, default=None, help='ONNX 模型文件路径（默认 data/models/<模型名>-int8.onnx）')
+    parser.add_argument('--onnx-threads', type=int, default=None, help='ONNX Runtime 推理线程数')
+    parser.add_argument('--json', type=str, default=None, help='结果输出 JSON 文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run(
+        args.backend, Path(args.json_dir), args.limit, args.queries, args.batch_size,
+        model_path=args.model_path, onnx_path=args.onnx_path, onnx_threads=args.onnx_threads
+    )
+
+    print("=" * 60)
+    print(f"向量编码后端评估: {args.backend} vs {BACKEND_FLAG}（{results['corpus']['documents']} 个案例，"
+          f"{results['corpus']['queries']} 个查询）")
+    print("=" * 60)
+    cosine = results['cosine_agreement']
+    print(f"余弦一致性: 平均 {cosine['mean']:.5f}  P5 {cosine['p05']:.5f}  最小 {cosine['min']:.5f}")
+    recall = results[f'recall@{TOP_K}']
+    print(f"recall@{TOP_K}: 重新编码案例 {recall['full']:.4f}  仅切换查询 {recall['query_only']:.4f}")
+    for name in ('reference', 'candidate'):
+        bulk = results['bulk'][name]
+        latency = results['query_latency'][name]
+        print(f"{name:<10} 批量 {bulk['texts_per_second']:>8.1f} 条/秒  "
+              f"查询 P50 {latency['p50_ms']:>7.2f} ms  P95 {latency['p95_ms']:>7.2f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
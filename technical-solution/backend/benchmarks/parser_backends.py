@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+HTML 解析后端基准测试
+对比基准解析器（html.parser + 子树重新解析）与各解析后端的详情页/列表页解析吞吐量
+
+运行: python -m benchmarks.parser_backends --iterations 50 [--json result.json]
+"""
+
+import sys
+import json
+import time
+import argparse
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Tuple
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import CORPUS_URL, load_detail_pages, load_list_pages, ReferenceDetailPageParser
+from services.spider.detail_parser import DetailPageParser
+from services.spider.list_page_html_parser import ListPageHTMLParser
+from services.spider.html_backend import PARSER_BACKENDS, resolve_parser_backend
+
+
+def _measure(parse: Callable[[str], Any], pages: List[Tuple[str, str]], iterations: int) -> Dict[str, Any]:
+    """多轮解析全部语料页面，返回吞吐量"""
+    # 预热一轮，排除首次导入和缓存的影响
+    for _, html in pages:
+        parse(html)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for _, html in pages:
+            parse(html)
+    duration = time.perf_counter() - start
+
+    total = iterations * len(pages)
+    return {
+        'pages': total,
+        'seconds': round(duration, 4),
+        'pages_per_second': round(total / duration, 1) if duration > 0 else 0.0,
+        'ms_per_page': round(duration * 1000 / total, 3) if total else 0.0,
+    }
+
+
+def run(iterations: int) -> Dict[str, Any]:
+    """执行基准测试"""
+    detail_pages = load_detail_pages()
+    list_pages = load_list_pages()
+    backends = [b for b in PARSER_BACKENDS if resolve_parser_backend(b) == b]
+
+    results: Dict[str, Any] = {
+        'iterations': iterations,
+        'detail_corpus': [name for name, _ in detail_pages],
+        'list_corpus': [name for name, _ in list_pages],
+        'detail': {},
+        'list': {},
+    }
+
+    reference = ReferenceDetailPageParser()
+    results['detail']['reference'] = _measure(
+        lambda html: reference.parse_html(html, CORPUS_URL), detail_pages, iterations
+    )
+    for backend in backends:
+        parser = DetailPageParser(parser_backend=backend)
+        results['detail'][backend] = _measure(
+            lambda html: parser.parse_html(html, CORPUS_URL), detail_pages, iterations
+        )
+
+    if list_pages:
+        for backend in backends:
+            list_parser = ListPageHTMLParser(parser_backend=backend)
+            results['list'][backend] = _measure(list_parser.parse_html, list_pages, iterations)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML 解析后端基准测试')
+    parser.add_argument('--iterations', type=int, default=20, help='每个页面的解析轮数（默认: 20）')
+    parser.add_argument('--json', type=str, default=None, help='结果输出 JSON 文件')
+    args = parser.parse_args()
+
+    # 解析器按页输出 INFO 日志，会干扰计时
+    logging.basicConfig(level=logging.WARNING)
+
+    results = run(args.iterations)
+
+    print("=" * 60)
+    print(f"HTML 解析后端基准测试（{args.iterations} 轮）")
+    print("=" * 60)
+    for kind in ('detail', 'list'):
+        baseline = results[kind].get('reference') or results[kind].get('html.parser')
+        for name, r in results[kind].items():
+            speedup = r['pages_per_second'] / baseline['pages_per_second'] if baseline['pages_per_second'] else 0.0
+            print(f"{kind:<7} {name:<12} {r['pages_per_second']:>9.1f} 页/秒  "
+                  f"{r['ms_per_page']:>8.3f} ms/页  x{speedup:.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
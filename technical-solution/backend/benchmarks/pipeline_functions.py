@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+爬取链路函数基准测试（离线）
+测试列表接口响应解码、列表页解析、详情页解析及各字段提取、列表/详情数据合并、
+数据验证/格式化、批次 JSON 读写的单位耗时和内存分配，用于在上线前发现爬取链路的 CPU 退化
+
+语料来自 benchmarks.corpus（仓库中保存的页面和案例），可通过 --archive 加入爬取时归档的页面
+
+运行: python -m benchmarks.pipeline_functions --scale 5000 [--archive data/json/task_xxx/html_archive]
+      [--json result.json] [--baseline baseline.json]
+"""
+
+import sys
+import gc
+import json
+import time
+import argparse
+import logging
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import (
+    CORPUS_URL, build_list_api_responses, build_list_fragments, load_archive_pages,
+    load_detail_pages, load_list_pages, load_saved_cases, split_case,
+)
+from services.pipeline.utils import merge_case_data, save_json, load_json, format_batch_filename
+from services.pipeline.validator import CaseValidator
+from services.spider.detail_parser import DetailPageParser
+from services.spider.html_archive import KIND_DETAIL, KIND_LIST
+from services.spider.html_backend import PARSER_BACKENDS, make_soup
+from services.spider.list_page_html_parser import ListPageHTMLParser
+
+# 每个批次文件的案例数（与爬取阶段默认批次大小一致）
+BATCH_SIZE = 30
+# 每次放大语料时 case_id 的偏移量（避免与原案例重复）
+CASE_ID_STRIDE = 10_000_000
+
+# 详情页字段提取方法: 名称 -> (parser, soup, is_pc_page, page_text) -> 结果
+DETAIL_EXTRACTORS: Dict[str, Callable] = {
+    'title': lambda p, soup, is_pc, text: p._extract_title(soup, is_pc),
+    'description': lambda p, soup, is_pc, text: p._extract_description(soup),
+    'main_image': lambda p, soup, is_pc, text: p._extract_main_image(soup, is_pc),
+    'images': lambda p, soup, is_pc, text: p._extract_images(soup),
+    'video': lambda p, soup, is_pc, text: p._extract_video(soup),
+    'author': lambda p, soup, is_pc, text: p._extract_author(soup, is_pc),
+    'publish_time': lambda p, soup, is_pc, text: p._extract_publish_time(soup, is_pc, text),
+    'agent_info': lambda p, soup, is_pc, text: p._extract_agent_info(soup, is_pc, text),
+}
+
+
+def scale_cases(cases: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """循环复制已保存的案例到指定数量（复制的案例使用新的 case_id）"""
+    scaled = []
+    for i in range(count):
+        case = cases[i % len(cases)]
+        round_num = i // len(cases)
+        scaled.append(case if round_num == 0 else {**case, 'case_id': case['case_id'] + round_num * CASE_ID_STRIDE})
+    return scaled
+
+
+def _measure_time(func: Callable[[], Any], units: int, min_time: float) -> Dict[str, Any]:
+    """重复调用直到累计耗时达到 min_time，返回单位耗时"""
+    # 预热一次，排除首次导入和缓存的影响
+    func()
+
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        duration = time.perf_counter() - start
+        if duration >= min_time:
+            break
+
+    total = calls * units
+    return {
+        'calls': calls,
+        'units_per_call': units,
+        'seconds': round(duration, 4),
+        'us_per_unit': round(duration * 1e6 / total, 2) if total else 0.0,
+        'units_per_second': round(total / duration, 1) if duration > 0 else 0.0,
+    }
+
+
+def _measure_allocations(func: Callable[[], Any], units: int) -> Dict[str, Any]:
+    """
+    用 tracemalloc 统计一次调用的内存分配
+
+    CPython 不提供累计分配次数，这里统计调用期间的峰值内存，
+    以及调用结束后仍存活的内存块数和大小（包括返回值）
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    # 排除 tracemalloc 自身（快照对象）的分配
+    exclude = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(exclude).compare_to(before.filter_traces(exclude), 'filename')
+    blocks = sum(stat.count_diff for stat in diff)
+    size = sum(stat.size_diff for stat in diff)
+    return {
+        'peak_kib_per_call': round((peak - base) / 1024, 1),
+        'retained_blocks_per_unit': round(blocks / units, 1) if units else 0.0,
+        'retained_bytes_per_unit': round(size / units, 1) if units else 0.0,
+    }
+
+
+def _bench(func: Callable[[], Any], units: int, min_time: float) -> Dict[str, Any]:
+    result = _measure_time(func, units, min_time)
+    result.update(_measure_allocations(func, units))
+    return result
+
+
+def run(scale: int, min_time: float, backend: Optional[str] = None,
+        archive_dir: Optional[Path] = None, archive_limit: int = 200) -> Dict[str, Any]:
+    """
+    执行基准测试
+
+    Args:
+        scale: 合并/验证/格式化/JSON 读写测试的案例数
+        min_time: 每个函数的最短计时时间（秒）
+        backend: HTML 解析后端
+        archive_dir: HTML 归档目录（加入其中录制的页面）
+        archive_limit: 每种类型最多加载的归档页面数
+    """
+    saved_cases = load_saved_cases()
+    if not saved_cases:
+        raise RuntimeError('未找到已保存的案例（backend/data/json/**/cases_batch_*.json）')
+    cases = scale_cases(saved_cases, scale)
+    pairs = [split_case(case) for case in cases]
+
+    detail_parser = DetailPageParser(parser_backend=backend)
+    list_parser = ListPageHTMLParser(parser_backend=backend)
+    validator = CaseValidator()
+
+    detail_pages = load_detail_pages()
+    list_pages = load_list_pages() + build_list_fragments(saved_cases)
+    if archive_dir:
+        detail_pages += load_archive_pages(archive_dir, KIND_DETAIL, archive_limit)
+        list_pages += load_archive_pages(archive_dir, KIND_LIST, archive_limit)
+    # 解析不出案例的页面只会走失败分支（并输出整页 HTML 日志），不计入列表页语料
+    list_pages = [(name, html) for name, html in list_pages if list_parser.parse_html(html)]
+    list_api_responses = build_list_api_responses(list_pages, saved_cases)
+
+    results: Dict[str, Any] = {
+        'backend': detail_parser.parser_backend,
+        'scale': scale,
+        'min_time': min_time,
+        'corpus': {
+            'detail_pages': len(detail_pages),
+            'list_pages': len(list_pages),
+            'list_api_responses': len(list_api_responses),
+            'saved_cases': len(saved_cases),
+        },
+        'functions': {},
+    }
+    functions = results['functions']
+
+    # 列表接口与列表页
+    functions['list_api.json_loads'] = _bench(
+        lambda: [json.loads(text) for _, text in list_api_responses], len(list_api_responses), min_time
+    )
+    if list_pages:
+        functions['list.parse_html'] = _bench(
+            lambda: [list_parser.parse_html(html) for _, html in list_pages], len(list_pages), min_time
+        )
+
+    # 详情页：完整解析、建树、各字段提取（在预先建好的树上执行）
+    if detail_pages:
+        functions['detail.parse_html'] = _bench(
+            lambda: [detail_parser.parse_html(html, CORPUS_URL) for _, html in detail_pages],
+            len(detail_pages), min_time
+        )
+        functions['detail.make_soup'] = _bench(
+            lambda: [make_soup(html, detail_parser.parser_backend) for _, html in detail_pages],
+            len(detail_pages), min_time
+        )
+        contexts: List[Tuple[Any, bool, Optional[str]]] = []
+        for _, html in detail_pages:
+            soup = make_soup(html, detail_parser.parser_backend)
+            is_pc_page = detail_parser._is_pc_page(soup)
+            contexts.append((soup, is_pc_page, soup.get_text() if is_pc_page else None))
+        for name, extract in DETAIL_EXTRACTORS.items():
+            functions[f'detail.extract_{name}'] = _bench(
+                lambda extract=extract: [extract(detail_parser, *context) for context in contexts],
+                len(contexts), min_time
+            )
+
+    # 数据合并、格式化、验证（与导入阶段顺序一致：先格式化再验证）
+    merged = [merge_case_data(list_item, detail) for list_item, detail in pairs]
+    formatted = validator.format_batch(merged)
+    functions['merge_case_data'] = _bench(
+        lambda: [merge_case_data(list_item, detail) for list_item, detail in pairs], len(pairs), min_time
+    )
+    functions['validator.format_batch'] = _bench(lambda: validator.format_batch(merged), len(merged), min_time)
+    functions['validator.validate_batch'] = _bench(
+        lambda: validator.validate_batch(formatted), len(formatted), min_time
+    )
+
+    # 批次 JSON 读写（按爬取阶段的批次文件格式）
+    batches = [
+        {'batch_num': num, 'batch_size': BATCH_SIZE, 'cases': merged[start:start + BATCH_SIZE]}
+        for num, start in enumerate(range(0, len(merged), BATCH_SIZE))
+    ]
+    with tempfile.TemporaryDirectory(prefix='pipeline_bench_') as tmp:
+        paths = [Path(tmp) / format_batch_filename(batch['batch_num']) for batch in batches]
+        functions['save_json'] = _bench(
+            lambda: [save_json(batch, path) for batch, path in zip(batches, paths)], len(merged), min_time
+        )
+        functions['load_json'] = _bench(lambda: [load_json(path) for path in paths], len(merged), min_time)
+
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    与基线结果对比
+
+    Returns:
+        性能退化说明列表（单位耗时或调用期间峰值内存上升超过 max_regression 比例）
+    """
+    regressions = []
+    for name, current in results['functions'].items():
+        base = baseline.get('functions', {}).get(name)
+        if not base:
+            continue
+        if base['us_per_unit'] and current['us_per_unit'] > base['us_per_unit'] * (1 + max_regression):
+            regressions.append(f"{name}: {current['us_per_unit']}us/单位 > 基线 {base['us_per_unit']}us")
+        if base['peak_kib_per_call'] and current['peak_kib_per_call'] > base['peak_kib_per_call'] * (1 + max_regression):
+            regressions.append(
+                f"{name}: 峰值内存 {current['peak_kib_per_call']}KiB > 基线 {base['peak_kib_per_call']}KiB"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬取链路函数基准测试（离线）')
+    parser.add_argument('--scale', type=int, default=5000, help='合并/验证/格式化/JSON 读写的案例数（默认: 5000）')
+    parser.add_argument('--min-time', type=float, default=1.0, help='每个函数的最短计时时间（秒，默认: 1.0）')
+    parser.add_argument('--backend', choices=PARSER_BACKENDS, default=None, help='HTML 解析后端（默认: html.parser）')
+    parser.add_argument('--archive', type=str, default=None, help='HTML 归档目录（加入爬取时录制的页面）')
+    parser.add_argument('--archive-limit', type=int, default=200, help='每种类型最多加载的归档页面数（默认: 200）')
+    parser.add_argument('--json', type=str, default=None, help='结果输出 JSON 文件')
+    parser.add_argument('--baseline', type=str, default=None, help='基线结果 JSON 文件（与之对比，退化时返回 1）')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='允许的单位耗时/峰值内存上升比例（默认: 0.2）')
+    args = parser.parse_args()
+
+    # 解析器按页、save_json 按文件输出 INFO 日志，会干扰计时；列表页解析失败时输出整页 HTML
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('services.spider').setLevel(logging.ERROR)
+
+    results = run(
+        scale=args.scale,
+        min_time=args.min_time,
+        backend=args.backend,
+        archive_dir=Path(args.archive) if args.archive else None,
+        archive_limit=args.archive_limit,
+    )
+
+    corpus = results['corpus']
+    print("=" * 60)
+    print(f"爬取链路函数基准测试（{results['backend']}，{args.scale} 个案例）")
+    print(f"语料: 详情页 {corpus['detail_pages']}，列表页 {corpus['list_pages']}，"
+          f"列表接口响应 {corpus['list_api_responses']}，已保存案例 {corpus['saved_cases']}")
+    print("=" * 60)
+    for name, r in results['functions'].items():
+        print(f"{name:<28} {r['us_per_unit']:>10.2f} us/单位  {r['units_per_second']:>11.1f} 单位/秒  "
+              f"峰值 {r['peak_kib_per_call']:>9.1f} KiB  存活 {r['retained_blocks_per_unit']:>7.1f} 块/单位")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        results['regressions'] = regressions
+        if regressions:
+            print("\n性能退化:")
+            for line in regressions:
+                print(f"  ✗ {line}")
+            exit_code = 1
+        else:
+            print(f"\n✓ 与基线 {args.baseline} 相比无明显退化")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+检索接口压测
+以固定并发数依次压测关键词/语义/混合检索、筛选项、统计和相似案例接口，
+输出各场景的吞吐量和 p50/p95/p99 延迟（JSON），可与基线结果对比发现性能退化
+
+先用 benchmarks.search_corpus 生成语料，并让 API 连接该数据库:
+    python -m benchmarks.search_corpus --db-name ad_case_bench --init-schema --rows 100000
+    DB_NAME=ad_case_bench python run.py
+
+运行:
+    python -m benchmarks.search_load --concurrency 16 --duration 30 --json result.json
+    python -m benchmarks.search_load --scenarios keyword semantic --baseline baseline.json --max-regression 0.2
+
+合成向量与真实查询向量不相关，语义/混合检索默认使用 --min-similarity 0 以覆盖完整的排序和分页开销
+"""
+
+import sys
+import math
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlencode
+
+import aiohttp
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.search_corpus import (
+    INDUSTRIES, ACTIVITY_TYPES, LOCATIONS, TAGS, THEMES, SLOGANS, brand_names,
+)
+
+SCENARIOS = ('keyword', 'semantic', 'hybrid', 'filter_options', 'stats', 'similar')
+FILTER_FIELDS = ('brand_name', 'brand_industry', 'activity_type', 'location')
+PERCENTILES = (50, 95, 99)
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩百分位数（输入已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class RequestFactory:
+    """生成各场景的请求路径（词表与语料生成器一致，保证关键词和筛选条件能命中）"""
+
+    def __init__(self, seed: int, min_similarity: float, case_ids: List[int]):
+        self.rng = random.Random(seed)
+        self.min_similarity = min_similarity
+        self.case_ids = case_ids
+        # 与语料生成器相同种子时品牌列表一致，取出现最多的前 200 个
+        self.brands = brand_names(2000, random.Random(seed))[:200]
+
+    def _keyword(self) -> str:
+        return self.rng.choice([
+            self.rng.choice(TAGS), self.rng.choice(THEMES), self.rng.choice(self.brands),
+            self.rng.choice(SLOGANS)[:4],
+        ])
+
+    def _semantic(self) -> str:
+        # 组合生成，查询文本大多不重复（接近真实流量的查询向量缓存命中率）
+        return (f"{self.rng.choice(INDUSTRIES)}品牌{self.rng.choice(TAGS)}"
+                f"{self.rng.choice(ACTIVITY_TYPES)}{self.rng.choice(THEMES)}")
+
+    def _filters(self) -> List[Tuple[str, Any]]:
+        params: List[Tuple[str, Any]] = []
+        if self.rng.random() < 0.3:
+            params.append(('brand_industry', self.rng.choice(INDUSTRIES)))
+        if self.rng.random() < 0.15:
+            params.append(('location', self.rng.choice(LOCATIONS)))
+        if self.rng.random() < 0.1:
+            params.append(('tags', self.rng.choice(TAGS)))
+        return params
+
+    def _page(self) -> List[Tuple[str, Any]]:
+        # 大多数请求查看前几页
+        return [('page', self.rng.choice([1, 1, 1, 2, 2, 3, 5])), ('page_size', 20)]
+
+    def build(self, scenario: str) -> str:
+        rng = self.rng
+        if scenario == 'keyword':
+            params = [('search_type', 'keyword'), ('query', self._keyword())]
+            params += self._filters() + self._page()
+            params.append(('sort_by', rng.choice(['relevance', 'relevance', 'time', 'score'])))
+            return '/api/v1/cases/search?' + urlencode(params)
+        if scenario == 'semantic':
+            params = [('search_type', 'semantic'), ('semantic_query', self._semantic()),
+                      ('min_similarity', self.min_similarity)]
+            return '/api/v1/cases/search?' + urlencode(params + self._filters() + self._page())
+        if scenario == 'hybrid':
+            params = [('search_type', 'hybrid'), ('query', self._keyword()), ('semantic_query', self._semantic()),
+                      ('min_similarity', self.min_similarity)]
+            return '/api/v1/cases/search?' + urlencode(params + self._filters() + self._page())
+        if scenario == 'filter_options':
+            params = [('field', rng.choice(FILTER_FIELDS)), ('limit', 20)]
+            if rng.random() < 0.5:
+                params.append(('keyword', rng.choice(INDUSTRIES + LOCATIONS)[:1]))
+            return '/api/v1/cases/filter-options?' + urlencode(params)
+        if scenario == 'stats':
+            return '/api/v1/cases/stats'
+        if scenario == 'similar':
+            params = [('limit', 10), ('min_similarity', rng.choice([0.5, 0.6]))]
+            return f"/api/v1/cases/{rng.choice(self.case_ids)}/similar?" + urlencode(params)
+        raise ValueError(f"未知的压测场景: {scenario}")
+
+
+async def fetch_case_ids(session: aiohttp.ClientSession, base_url: str, count: int = 500) -> List[int]:
+    """通过检索接口获取一批案例ID（相似案例场景使用）"""
+    case_ids: List[int] = []
+    page = 1
+    while len(case_ids) < count:
+        url = f"{base_url}/api/v1/cases/search?" + urlencode({'page': page, 'page_size': 100})
+        async with session.get(url) as response:
+            response.raise_for_status()
+            results = (await response.json())['data']['results']
+        if not results:
+            break
+        case_ids.extend(result['case_id'] for result in results)
+        page += 1
+    return case_ids
+
+
+async def run_scenario(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    build: Callable[[], str],
+    concurrency: int,
+    duration: float,
+    warmup: int,
+) -> Dict[str, Any]:
+    """
+    以固定并发数压测一个场景
+
+    每个并发连接发送完一个请求后立即发送下一个（闭环），持续 duration 秒；
+    预热请求不计入结果
+    """
+    for _ in range(warmup):
+        try:
+            async with session.get(base_url + build()) as response:
+                await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path = build()
+            start = time.perf_counter()
+            try:
+                async with session.get(base_url + path) as response:
+                    await response.read()
+                    status = str(response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            status_counts[status] = status_counts.get(status, 0) + 1
+            if status == '200':
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies) + errors
+    result = {
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'status_counts': status_counts,
+        'seconds': round(elapsed, 2),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            'max': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+    }
+    for p in PERCENTILES:
+        result['latency_ms'][f"p{p}"] = round(percentile(latencies, p) * 1000, 2)
+    return result
+
+
+async def run(
+    base_url: str,
+    scenarios: List[str],
+    concurrency: int,
+    duration: float,
+    warmup: int,
+    seed: int,
+    min_similarity: float,
+    timeout: float,
+) -> Dict[str, Any]:
+    """执行压测"""
+    base_url = base_url.rstrip('/')
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    results: Dict[str, Any] = {
+        'started_at': datetime.now().isoformat(),
+        'base_url': base_url,
+        'concurrency': concurrency,
+        'duration_seconds': duration,
+        'warmup_requests': warmup,
+        'seed': seed,
+        'min_similarity': min_similarity,
+        'scenarios': {},
+    }
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        case_ids: List[int] = []
+        if 'similar' in scenarios:
+            case_ids = await fetch_case_ids(session, base_url)
+            if not case_ids:
+                logger.warning("库中没有案例，跳过相似案例场景")
+                scenarios = [s for s in scenarios if s != 'similar']
+        factory = RequestFactory(seed, min_similarity, case_ids)
+
+        for scenario in scenarios:
+            logger.info(f"压测 {scenario}: 并发 {concurrency}，持续 {duration} 秒")
+            results['scenarios'][scenario] = await run_scenario(
+                session, base_url, lambda: factory.build(scenario), concurrency, duration, warmup
+            )
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    与基线结果对比
+
+    Returns:
+        性能退化说明列表（吞吐量下降或 p95 延迟上升超过 max_regression 比例，或出现错误）
+    """
+    regressions = []
+    for scenario, current in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(scenario)
+        if not base:
+            continue
+        if base['throughput_rps'] and current['throughput_rps'] < base['throughput_rps'] * (1 - max_regression):
+            regressions.append(
+                f"{scenario}: 吞吐量 {current['throughput_rps']} < 基线 {base['throughput_rps']}"
+            )
+        if base['latency_ms']['p95'] and current['latency_ms']['p95'] > base['latency_ms']['p95'] * (1 + max_regression):
+            regressions.append(
+                f"{scenario}: p95 {current['latency_ms']['p95']}ms > 基线 {base['latency_ms']['p95']}ms"
+            )
+        if current['error_rate'] > base.get('error_rate', 0.0):
+            regressions.append(f"{scenario}: 错误率 {current['error_rate']} > 基线 {base.get('error_rate', 0.0)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检索接口压测（固定并发，输出吞吐量和延迟分位数）')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='API 地址（默认: http://127.0.0.1:8000）')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS),
+                        help='压测场景（默认: 全部）')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发数（默认: 8）')
+    parser.add_argument('--duration', type=float, default=20.0, help='每个场景的持续时间（秒，默认: 20）')
+    parser.add_argument('--warmup', type=int, default=20, help='每个场景的预热请求数（默认: 20）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子，与生成语料时相同（默认: 42）')
+    parser.add_argument('--min-similarity', type=float, default=0.0,
+                        help='语义/混合检索的最小相似度（默认: 0，合成向量与查询向量不相关）')
+    parser.add_argument('--timeout', type=float, default=30.0, help='单个请求超时（秒，默认: 30）')
+    parser.add_argument('--json', type=str, default=None, help='结果输出 JSON 文件')
+    parser.add_argument('--baseline', type=str, default=None, help='基线结果 JSON 文件（与之对比，退化时返回 1）')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='允许的吞吐量下降/p95 上升比例（默认: 0.2）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    results = asyncio.run(run(
+        base_url=args.base_url,
+        scenarios=args.scenarios,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        warmup=args.warmup,
+        seed=args.seed,
+        min_similarity=args.min_similarity,
+        timeout=args.timeout,
+    ))
+
+    print("=" * 60)
+    print(f"检索接口压测（并发 {args.concurrency}，每个场景 {args.duration} 秒）")
+    print("=" * 60)
+    for scenario, r in results['scenarios'].items():
+        latency = r['latency_ms']
+        print(f"{scenario:<15} {r['throughput_rps']:>8.1f} 请求/秒  p50 {latency['p50']:>8.1f}ms  "
+              f"p95 {latency['p95']:>8.1f}ms  p99 {latency['p99']:>8.1f}ms  错误 {r['errors']}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        results['regressions'] = regressions
+        if regressions:
+            print("\n性能退化:")
+            for line in regressions:
+                print(f"  ✗ {line}")
+            exit_code = 1
+        else:
+            print(f"\n✓ 与基线 {args.baseline} 相比无明显退化")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
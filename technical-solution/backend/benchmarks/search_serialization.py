@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+检索接口响应序列化基准测试（离线，不需要数据库）
+对比 SEARCH_FAST_RESPONSE 关闭时（构建 SearchResponse 模型，FastAPI 按 response_model 校验后序列化）
+与开启时（查询结果直接映射为响应结构，orjson / 标准库 json 序列化）的单次请求 CPU 耗时，
+并检查两者输出的 JSON 内容一致
+
+查询结果来自 backend/data/json 中保存的案例，按 CaseRepository 返回的字段构造
+
+运行: python -m benchmarks.search_serialization --page-sizes 20 100 --iterations 500 [--json result.json]
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+try:
+    from fastapi.utils import create_model_field
+except ImportError:  # 旧版本 FastAPI
+    from fastapi.utils import create_response_field as create_model_field
+
+from app import responses
+from app.responses import FastJSONResponse
+from app.schemas.case import SearchResponse
+from app.schemas.response import BaseResponse
+from app.services.search_service import SearchService, to_search_result
+from benchmarks.corpus import load_saved_cases
+
+# 与检索接口相同的响应模型字段
+RESPONSE_FIELD = create_model_field(name="Response_search_cases", type_=BaseResponse[SearchResponse])
+
+
+def build_rows(count: int) -> List[Dict[str, Any]]:
+    """按 CaseRepository.search_semantic 的返回结构构造查询结果（循环使用已保存的案例）"""
+    cases = load_saved_cases()
+    if not cases:
+        raise RuntimeError('未找到已保存的案例（backend/data/json/**/cases_batch_*.json）')
+
+    rows = []
+    for i in range(count):
+        case = cases[i % len(cases)]
+        publish_time = case.get('publish_time')
+        try:
+            publish_time = date.fromisoformat(publish_time[:10]) if publish_time else None
+        except (TypeError, ValueError):
+            publish_time = None
+        score = case.get('score')
+        rows.append({
+            'case_id': case['case_id'] + i // len(cases) * 10_000_000,
+            'title': case.get('title'),
+            'description': case.get('description'),
+            'source_url': case.get('source_url'),
+            'main_image': case.get('main_image'),
+            'main_image_local': None,
+            'images': case.get('images') or [],
+            'video_url': case.get('video_url'),
+            'brand_name': case.get('brand_name'),
+            'brand_industry': case.get('brand_industry'),
+            'activity_type': case.get('activity_type'),
+            'location': case.get('location'),
+            'tags': case.get('tags') or [],
+            'score': int(score) if isinstance(score, (int, float)) and 0 <= score <= 5 else None,
+            'score_decimal': case.get('score_decimal'),
+            'favourite': case.get('favourite') or 0,
+            'publish_time': publish_time,
+            'author': case.get('author'),
+            'company_name': case.get('company_name'),
+            'company_logo': case.get('company_logo'),
+            'agency_name': case.get('agency_name'),
+            'similarity': 0.9 - i * 0.0005,
+        })
+    return rows
+
+
+def _payload(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """与 SearchService._search_semantic 相同的结果映射"""
+    request = SimpleNamespace(page=1, page_size=len(rows))
+    results = [to_search_result(row, float(row.get('similarity', 0.0))) for row in rows]
+    return SearchService._build_response(request, results, total=len(rows) * 50)
+
+
+async def render_model(rows: List[Dict[str, Any]]) -> bytes:
+    """SEARCH_FAST_RESPONSE=false：构建模型，按 response_model 校验并序列化（与 FastAPI 处理路由返回值相同）"""
+    response = BaseResponse(code=200, message="success", data=SearchResponse(**_payload(rows)))
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=response, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def render_fast(rows: List[Dict[str, Any]]) -> bytes:
+    """SEARCH_FAST_RESPONSE=true：直接序列化响应结构"""
+    return FastJSONResponse({"code": 200, "message": "success", "data": _payload(rows)}).body
+
+
+async def _measure(render: Callable[[List[Dict[str, Any]]], Awaitable[bytes]],
+                   rows: List[Dict[str, Any]], iterations: int) -> Dict[str, Any]:
+    # 预热
+    for _ in range(min(iterations, 20)):
+        body = await render(rows)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await render(rows)
+    duration = time.perf_counter() - start
+
+    return {
+        'iterations': iterations,
+        'seconds': round(duration, 4),
+        'ms_per_request': round(duration * 1000 / iterations, 3),
+        'requests_per_second': round(iterations / duration, 1) if duration > 0 else 0.0,
+        'bytes': len(body),
+    }
+
+
+async def run(page_sizes: List[int], iterations: int) -> Dict[str, Any]:
+    """执行基准测试"""
+    orjson_module = responses.orjson
+    results: Dict[str, Any] = {
+        'iterations': iterations,
+        'orjson_installed': orjson_module is not None,
+        'page_sizes': {},
+    }
+
+    for page_size in page_sizes:
+        rows = build_rows(page_size)
+        variants = {'model': await _measure(render_model, rows, iterations)}
+        expected = json.loads(await render_model(rows))
+
+        try:
+            # 未安装 orjson 时的标准库 json 回退
+            responses.orjson = None
+            variants['fast_json'] = await _measure(render_fast, rows, iterations)
+            identical = json.loads(await render_fast(rows)) == expected
+        finally:
+            responses.orjson = orjson_module
+        if orjson_module is not None:
+            variants['fast_orjson'] = await _measure(render_fast, rows, iterations)
+            identical = identical and json.loads(await render_fast(rows)) == expected
+
+        baseline = variants['model']['ms_per_request']
+        for variant in variants.values():
+            variant['speedup'] = round(baseline / variant['ms_per_request'], 2) if variant['ms_per_request'] else 0.0
+        results['page_sizes'][str(page_size)] = {'identical': identical, 'variants': variants}
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检索接口响应序列化基准测试')
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 100], help='每页结果数（默认: 20 100）')
+    parser.add_argument('--iterations', type=int, default=500, help='每种方式的请求次数（默认: 500）')
+    parser.add_argument('--json', type=str, default=None, help='结果输出 JSON 文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = asyncio.run(run(args.page_sizes, args.iterations))
+
+    print("=" * 60)
+    print(f"检索接口响应序列化基准测试（{args.iterations} 次，orjson: "
+          f"{'已安装' if results['orjson_installed'] else '未安装'}）")
+    print("=" * 60)
+    exit_code = 0
+    for page_size, r in results['page_sizes'].items():
+        for name, v in r['variants'].items():
+            print(f"page_size={page_size:<4} {name:<12} {v['ms_per_request']:>8.3f} ms/请求  "
+                  f"{v['requests_per_second']:>9.1f} 请求/秒  x{v['speedup']:.2f}  {v['bytes']} 字节")
+        if not r['identical']:
+            print(f"  ✗ page_size={page_size} 快速序列化输出与模型序列化不一致")
+            exit_code = 1
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
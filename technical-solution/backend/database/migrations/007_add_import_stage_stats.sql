@@ -0,0 +1,18 @@
+-- 为 task_imports 表添加流水线阶段统计字段
+-- 创建时间：2026-10-19
+-- 说明：流水线入库模式下记录各阶段（加载/向量/图片/入库）的吞吐量和队列深度
+
+-- ============================================================
+-- 添加阶段统计字段
+-- ============================================================
+
+ALTER TABLE task_imports
+ADD COLUMN IF NOT EXISTS pipeline_mode BOOLEAN DEFAULT FALSE, -- 是否使用流水线入库
+ADD COLUMN IF NOT EXISTS stage_stats JSONB; -- 各阶段统计，如: {"embed": {"items": 100, "throughput": 12.5, "queue_depth": 2, ...}}
+
+-- ============================================================
+-- 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN task_imports.pipeline_mode IS '是否使用流水线入库（加载/向量/图片/入库各阶段并发执行）';
+COMMENT ON COLUMN task_imports.stage_stats IS '流水线各阶段统计：处理案例数、吞吐量（案例/秒）、利用率、当前及最大队列深度';
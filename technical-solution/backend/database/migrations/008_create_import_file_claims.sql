@@ -0,0 +1,96 @@
+-- 多进程并行入库数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：创建文件级认领表（支持断点续传）和入库暂存表（支持最终单事务合并）
+
+-- ============================================================
+-- 1. 创建入库文件认领表（import_file_claims）
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS import_file_claims (
+    id BIGSERIAL PRIMARY KEY,
+    job_id VARCHAR(255) NOT NULL, -- 入库作业ID（同一作业重复运行时跳过已完成的文件）
+    file_name VARCHAR(255) NOT NULL,
+
+    -- 认领状态
+    status VARCHAR(32) NOT NULL DEFAULT 'pending', -- pending, claimed, done, failed, merged
+    worker VARCHAR(128), -- 认领的工作进程（主机名:进程号）
+    attempts INTEGER DEFAULT 0,
+    claimed_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+
+    -- 结果信息
+    stats JSONB, -- 文件入库统计 {"total_loaded": 30, "total_imported": 28, ...}
+    error_message TEXT,
+
+    -- 元数据
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    -- 约束
+    CONSTRAINT uq_import_file_claims_job_file UNIQUE (job_id, file_name),
+    CONSTRAINT valid_import_claim_status CHECK (status IN ('pending', 'claimed', 'done', 'failed', 'merged'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_import_file_claims_job_status ON import_file_claims(job_id, status);
+
+-- ============================================================
+-- 2. 创建入库暂存表（ad_cases_import_staging）
+-- ============================================================
+-- single_transaction 模式下，各进程先写入暂存表（按文件提交），
+-- 全部文件完成后在一个事务中合并到 ad_cases 并清空该作业的暂存数据
+-- UNLOGGED：暂存数据可重建，不写 WAL 以提高写入速度
+
+CREATE UNLOGGED TABLE IF NOT EXISTS ad_cases_import_staging (
+    job_id VARCHAR(255) NOT NULL,
+    case_id INTEGER NOT NULL,
+    source_url TEXT,
+    title VARCHAR(500),
+    description TEXT,
+    author VARCHAR(100),
+    publish_time DATE,
+    main_image TEXT,
+    main_image_local TEXT,
+    images JSONB,
+    video_url TEXT,
+    brand_name VARCHAR(200),
+    brand_industry VARCHAR(100),
+    activity_type VARCHAR(100),
+    location VARCHAR(100),
+    tags JSONB,
+    score INTEGER,
+    score_decimal VARCHAR(10),
+    favourite INTEGER,
+    company_name VARCHAR(200),
+    company_logo TEXT,
+    agency_name VARCHAR(200),
+    combined_vector vector(1024),
+    file_name VARCHAR(255),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (job_id, case_id)
+);
+
+-- ============================================================
+-- 3. 创建触发器：自动更新 updated_at
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION update_import_file_claims_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_import_file_claims_updated_at ON import_file_claims;
+CREATE TRIGGER trigger_update_import_file_claims_updated_at
+    BEFORE UPDATE ON import_file_claims
+    FOR EACH ROW
+    EXECUTE FUNCTION update_import_file_claims_updated_at();
+
+-- ============================================================
+-- 4. 添加注释
+-- ============================================================
+
+COMMENT ON TABLE import_file_claims IS '并行入库文件认领表：多个进程通过 FOR UPDATE SKIP LOCKED 认领文件，已完成的文件在重复运行时跳过';
+COMMENT ON TABLE ad_cases_import_staging IS '入库暂存表：single_transaction 模式下的中间结果，合并到 ad_cases 后删除';
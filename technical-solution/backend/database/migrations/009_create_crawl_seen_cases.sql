@@ -0,0 +1,47 @@
+-- 跨任务已爬取案例索引数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：记录所有任务已成功爬取的 case_id，爬取前查询该索引跳过其它任务已爬取的案例
+
+-- ============================================================
+-- 1. 创建已爬取案例索引表（crawl_seen_cases）
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS crawl_seen_cases (
+    case_id INTEGER PRIMARY KEY, -- 原始案例ID（来自爬虫）
+    data_source VARCHAR(64), -- 数据源
+    first_task_id VARCHAR(64), -- 首次爬取该案例的任务ID
+    last_task_id VARCHAR(64), -- 最近一次爬取该案例的任务ID
+    seen_count INTEGER DEFAULT 1, -- 被爬取次数
+
+    -- 时间信息
+    first_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 增量刷新内存索引时按 last_seen_at 查询
+CREATE INDEX IF NOT EXISTS idx_crawl_seen_cases_last_seen_at ON crawl_seen_cases(last_seen_at);
+
+-- ============================================================
+-- 2. 回填历史数据
+-- ============================================================
+-- 已成功爬取的案例记录
+INSERT INTO crawl_seen_cases (case_id, data_source, first_task_id, last_task_id, first_seen_at, last_seen_at)
+SELECT DISTINCT ON (r.case_id)
+    r.case_id, t.data_source, r.task_id, r.task_id,
+    COALESCE(r.crawled_at, r.created_at), COALESCE(r.crawled_at, r.created_at)
+FROM crawl_case_records r
+LEFT JOIN crawl_tasks t ON t.task_id = r.task_id
+WHERE r.status = 'success' AND r.case_id IS NOT NULL
+ORDER BY r.case_id, COALESCE(r.crawled_at, r.created_at)
+ON CONFLICT (case_id) DO NOTHING;
+
+-- 已入库的案例（包括通过脚本直接入库的数据）
+INSERT INTO crawl_seen_cases (case_id)
+SELECT case_id FROM ad_cases
+ON CONFLICT (case_id) DO NOTHING;
+
+-- ============================================================
+-- 3. 添加注释
+-- ============================================================
+
+COMMENT ON TABLE crawl_seen_cases IS '跨任务已爬取案例索引：爬取阶段在请求详情页前查询（内存位图缓存 + 定时增量刷新），避免不同任务重复爬取同一案例';
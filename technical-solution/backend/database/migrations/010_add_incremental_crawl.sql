@@ -0,0 +1,60 @@
+-- 增量爬取数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：为 crawl_tasks 添加增量模式字段，创建按数据源记录的高水位表
+
+-- ============================================================
+-- 1. 添加增量模式字段
+-- ============================================================
+
+ALTER TABLE crawl_tasks
+ADD COLUMN IF NOT EXISTS incremental_mode BOOLEAN DEFAULT FALSE, -- 是否为增量模式
+ADD COLUMN IF NOT EXISTS incremental_stop_pages INTEGER DEFAULT 2, -- 连续全部已知多少页后停止
+ADD COLUMN IF NOT EXISTS stopped_at_page INTEGER; -- 到达已爬取区域而停止的页码
+
+-- ============================================================
+-- 2. 创建数据源高水位表（crawl_source_watermarks）
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS crawl_source_watermarks (
+    data_source VARCHAR(64) PRIMARY KEY,
+
+    -- 高水位
+    last_page INTEGER, -- 全量爬取到的最大页码（下次全量爬取从其后一页开始）
+    newest_case_id INTEGER, -- 列表中出现过的最大案例ID
+    last_task_id VARCHAR(64), -- 最近一次更新高水位的任务ID
+
+    -- 时间信息
+    last_full_crawl_at TIMESTAMP WITH TIME ZONE, -- 最近一次全量爬取完成时间
+    last_incremental_at TIMESTAMP WITH TIME ZONE, -- 最近一次增量爬取完成时间
+
+    -- 元数据
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================================
+-- 3. 创建触发器：自动更新 updated_at
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION update_crawl_source_watermarks_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_crawl_source_watermarks_updated_at ON crawl_source_watermarks;
+CREATE TRIGGER trigger_update_crawl_source_watermarks_updated_at
+    BEFORE UPDATE ON crawl_source_watermarks
+    FOR EACH ROW
+    EXECUTE FUNCTION update_crawl_source_watermarks_updated_at();
+
+-- ============================================================
+-- 4. 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN crawl_tasks.incremental_mode IS '增量模式：列表按发布时间倒序，连续多页全部为已知案例时停止';
+COMMENT ON COLUMN crawl_tasks.incremental_stop_pages IS '增量模式下连续全部已知多少页后停止';
+COMMENT ON COLUMN crawl_tasks.stopped_at_page IS '增量模式下到达已爬取区域而停止的页码';
+COMMENT ON TABLE crawl_source_watermarks IS '数据源高水位：全量爬取到的页码和最新案例ID，用于推算下次爬取起点';
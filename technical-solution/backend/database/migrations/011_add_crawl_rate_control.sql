@@ -0,0 +1,18 @@
+-- 自适应请求速率数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：为 crawl_tasks 添加自适应速率控制器的当前速率和并发数
+
+-- ============================================================
+-- 1. 添加速率控制字段
+-- ============================================================
+
+ALTER TABLE crawl_tasks
+ADD COLUMN IF NOT EXISTS request_rate FLOAT, -- 当前请求速率（请求/秒）
+ADD COLUMN IF NOT EXISTS request_concurrency INTEGER; -- 当前请求并发数
+
+-- ============================================================
+-- 2. 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN crawl_tasks.request_rate IS '自适应速率控制器的当前请求速率（请求/秒），任务运行期间定期更新';
+COMMENT ON COLUMN crawl_tasks.request_concurrency IS '自适应速率控制器的当前请求并发数';
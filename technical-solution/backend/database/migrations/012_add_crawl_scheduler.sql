@@ -0,0 +1,41 @@
+-- 爬取任务调度数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：为 crawl_tasks 添加调度队列字段（优先级、入队时间、入队时的起始页码），新增 queued 状态
+
+-- ============================================================
+-- 1. 添加调度字段
+-- ============================================================
+
+ALTER TABLE crawl_tasks
+ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0, -- 优先级，数值越大越先执行
+ADD COLUMN IF NOT EXISTS queued_at TIMESTAMP WITH TIME ZONE, -- 进入调度队列的时间（同优先级按先后执行）
+ADD COLUMN IF NOT EXISTS queued_start_page INTEGER; -- 出队执行时的起始页码（新启动为 start_page，恢复为 current_page）
+
+-- ============================================================
+-- 2. 新增 queued 状态
+-- ============================================================
+
+ALTER TABLE crawl_tasks DROP CONSTRAINT IF EXISTS valid_status;
+ALTER TABLE crawl_tasks ADD CONSTRAINT valid_status
+    CHECK (status IN ('pending', 'queued', 'running', 'paused', 'completed', 'failed', 'cancelled', 'terminated'));
+
+ALTER TABLE crawl_task_status_history DROP CONSTRAINT IF EXISTS valid_status_history;
+ALTER TABLE crawl_task_status_history ADD CONSTRAINT valid_status_history
+    CHECK (status IN ('pending', 'queued', 'running', 'paused', 'completed', 'failed', 'cancelled', 'terminated'));
+
+-- ============================================================
+-- 3. 创建索引
+-- ============================================================
+
+-- 调度器按 优先级降序、入队时间升序 取队首任务
+CREATE INDEX IF NOT EXISTS idx_crawl_tasks_queue
+    ON crawl_tasks(priority DESC, queued_at ASC)
+    WHERE status = 'queued';
+
+-- ============================================================
+-- 4. 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN crawl_tasks.priority IS '调度优先级，数值越大越先执行';
+COMMENT ON COLUMN crawl_tasks.queued_at IS '进入调度队列的时间，同优先级按入队先后执行';
+COMMENT ON COLUMN crawl_tasks.queued_start_page IS '出队执行时的起始页码';
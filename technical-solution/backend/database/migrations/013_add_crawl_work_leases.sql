@@ -0,0 +1,61 @@
+-- 分布式爬取数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：为 crawl_list_pages 和 crawl_case_records 添加认领租约字段，
+--       多个爬取工作进程通过 FOR UPDATE SKIP LOCKED 认领列表页和案例，心跳续约，租约过期后可被重新认领
+
+-- ============================================================
+-- 1. 列表页认领字段
+-- ============================================================
+
+ALTER TABLE crawl_list_pages
+ADD COLUMN IF NOT EXISTS lease_owner VARCHAR(128), -- 持有租约的工作进程（主机名:进程号）
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE, -- 租约过期时间（心跳续约）
+ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE; -- 最近一次心跳时间
+
+ALTER TABLE crawl_list_pages DROP CONSTRAINT IF EXISTS valid_status;
+ALTER TABLE crawl_list_pages ADD CONSTRAINT valid_status
+    CHECK (status IN ('success', 'failed', 'skipped', 'pending', 'claimed'));
+
+-- ============================================================
+-- 2. 案例认领字段
+-- ============================================================
+
+ALTER TABLE crawl_case_records
+ADD COLUMN IF NOT EXISTS list_item JSONB, -- 列表页中的案例数据（详情页爬取后与之合并）
+ADD COLUMN IF NOT EXISTS lease_owner VARCHAR(128), -- 持有租约的工作进程（主机名:进程号）
+ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE, -- 租约过期时间（心跳续约）
+ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE; -- 最近一次心跳时间
+
+ALTER TABLE crawl_case_records DROP CONSTRAINT IF EXISTS valid_status;
+ALTER TABLE crawl_case_records ADD CONSTRAINT valid_status
+    CHECK (status IN ('success', 'failed', 'skipped', 'validation_failed', 'pending', 'claimed'));
+
+-- ============================================================
+-- 3. 创建索引
+-- ============================================================
+
+-- 认领时只扫描未完成的行
+CREATE INDEX IF NOT EXISTS idx_crawl_list_pages_claimable
+    ON crawl_list_pages(task_id, page_number)
+    WHERE status IN ('pending', 'claimed', 'failed');
+CREATE INDEX IF NOT EXISTS idx_crawl_case_records_claimable
+    ON crawl_case_records(task_id, id)
+    WHERE status IN ('pending', 'claimed', 'failed');
+
+-- 心跳按工作进程续约
+CREATE INDEX IF NOT EXISTS idx_crawl_list_pages_lease_owner
+    ON crawl_list_pages(lease_owner)
+    WHERE status = 'claimed';
+CREATE INDEX IF NOT EXISTS idx_crawl_case_records_lease_owner
+    ON crawl_case_records(lease_owner)
+    WHERE status = 'claimed';
+
+-- ============================================================
+-- 4. 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN crawl_list_pages.lease_owner IS '持有认领租约的爬取工作进程（主机名:进程号）';
+COMMENT ON COLUMN crawl_list_pages.lease_expires_at IS '认领租约过期时间，工作进程定期心跳续约，过期后其它进程可重新认领';
+COMMENT ON COLUMN crawl_case_records.list_item IS '列表页中的案例数据，详情页爬取后与之合并';
+COMMENT ON COLUMN crawl_case_records.lease_owner IS '持有认领租约的爬取工作进程（主机名:进程号）';
+COMMENT ON COLUMN crawl_case_records.lease_expires_at IS '认领租约过期时间，工作进程定期心跳续约，过期后其它进程可重新认领';
@@ -0,0 +1,49 @@
+-- 失败重试队列数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：为 crawl_list_pages 和 crawl_case_records 添加重试调度字段（指数退避 + 抖动），
+--       新增 dead_letter 状态：超过最大重试次数的列表页/案例不再自动重试
+
+-- ============================================================
+-- 1. 添加重试调度字段
+-- ============================================================
+
+ALTER TABLE crawl_list_pages
+ADD COLUMN IF NOT EXISTS next_retry_at TIMESTAMP WITH TIME ZONE, -- 下次允许重试的时间（为空表示立即可重试）
+ADD COLUMN IF NOT EXISTS dead_lettered_at TIMESTAMP WITH TIME ZONE; -- 进入死信的时间
+
+ALTER TABLE crawl_case_records
+ADD COLUMN IF NOT EXISTS next_retry_at TIMESTAMP WITH TIME ZONE, -- 下次允许重试的时间（为空表示立即可重试）
+ADD COLUMN IF NOT EXISTS dead_lettered_at TIMESTAMP WITH TIME ZONE; -- 进入死信的时间
+
+-- ============================================================
+-- 2. 新增 dead_letter 状态
+-- ============================================================
+
+ALTER TABLE crawl_list_pages DROP CONSTRAINT IF EXISTS valid_status;
+ALTER TABLE crawl_list_pages ADD CONSTRAINT valid_status
+    CHECK (status IN ('success', 'failed', 'skipped', 'pending', 'claimed', 'dead_letter'));
+
+ALTER TABLE crawl_case_records DROP CONSTRAINT IF EXISTS valid_status;
+ALTER TABLE crawl_case_records ADD CONSTRAINT valid_status
+    CHECK (status IN ('success', 'failed', 'skipped', 'validation_failed', 'pending', 'claimed', 'dead_letter'));
+
+-- ============================================================
+-- 3. 创建索引
+-- ============================================================
+
+-- 按到期时间取待重试的工作项
+CREATE INDEX IF NOT EXISTS idx_crawl_list_pages_retry_due
+    ON crawl_list_pages(task_id, next_retry_at)
+    WHERE status = 'failed';
+CREATE INDEX IF NOT EXISTS idx_crawl_case_records_retry_due
+    ON crawl_case_records(task_id, next_retry_at)
+    WHERE status = 'failed';
+
+-- ============================================================
+-- 4. 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN crawl_list_pages.next_retry_at IS '下次允许重试的时间（指数退避加随机抖动），为空表示立即可重试';
+COMMENT ON COLUMN crawl_list_pages.dead_lettered_at IS '超过最大重试次数进入死信的时间';
+COMMENT ON COLUMN crawl_case_records.next_retry_at IS '下次允许重试的时间（指数退避加随机抖动），为空表示立即可重试';
+COMMENT ON COLUMN crawl_case_records.dead_lettered_at IS '超过最大重试次数进入死信的时间';
@@ -0,0 +1,68 @@
+-- 批量重新生成向量数据库迁移脚本
+-- 创建时间：2026-10-19
+-- 说明：创建向量重新生成作业表，按 ad_cases.id 顺序流式处理，
+--       每批写回向量时在同一事务中记录检查点（last_id），中断后从检查点继续
+
+-- ============================================================
+-- 1. 创建向量重新生成作业表（embedding_jobs）
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS embedding_jobs (
+    job_id VARCHAR(255) PRIMARY KEY,
+
+    -- 作业配置
+    columns JSONB NOT NULL, -- 生成的向量列 ["combined_vector", "title_vector", "description_vector"]
+    mode VARCHAR(16) NOT NULL DEFAULT 'missing', -- missing: 只生成为空的向量，all: 全部重新生成（切换模型时）
+    model_name VARCHAR(255),
+    embedding_backend VARCHAR(32),
+    fetch_size INTEGER DEFAULT 2000, -- 每次从游标读取的行数
+    workers INTEGER DEFAULT 1, -- 编码进程数
+
+    -- 状态与检查点
+    status VARCHAR(32) NOT NULL DEFAULT 'pending', -- pending, running, completed, failed, cancelled
+    last_id BIGINT NOT NULL DEFAULT 0, -- 已写回的最大 ad_cases.id
+    total_rows INTEGER DEFAULT 0, -- 已处理行数 + 开始（或继续）时剩余的行数
+    processed_rows INTEGER DEFAULT 0,
+    vectors_written INTEGER DEFAULT 0,
+    worker VARCHAR(128), -- 执行的进程（主机名:进程号）
+    error_message TEXT,
+
+    -- 时间信息
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    -- 约束
+    CONSTRAINT valid_embedding_job_mode CHECK (mode IN ('missing', 'all')),
+    CONSTRAINT valid_embedding_job_status CHECK (status IN ('pending', 'running', 'completed', 'failed', 'cancelled'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_embedding_jobs_status ON embedding_jobs(status);
+
+-- ============================================================
+-- 2. 创建触发器：自动更新 updated_at
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION update_embedding_jobs_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_update_embedding_jobs_updated_at ON embedding_jobs;
+CREATE TRIGGER trigger_update_embedding_jobs_updated_at
+    BEFORE UPDATE ON embedding_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION update_embedding_jobs_updated_at();
+
+-- ============================================================
+-- 3. 添加注释
+-- ============================================================
+
+COMMENT ON TABLE embedding_jobs IS '向量重新生成作业表：按 ad_cases.id 顺序流式编码，检查点 last_id 与向量在同一事务中提交，中断后从检查点继续';
+COMMENT ON COLUMN embedding_jobs.last_id IS '检查点：已写回向量的最大 ad_cases.id';
+COMMENT ON COLUMN embedding_jobs.mode IS 'missing: 只生成为空的向量；all: 全部重新生成（切换模型或编码后端时）';
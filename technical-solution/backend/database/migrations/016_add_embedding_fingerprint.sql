@@ -0,0 +1,20 @@
+-- 为 ad_cases 表添加向量文本指纹字段
+-- 创建时间：2026-10-19
+-- 说明：记录生成 combined_vector 时的文本指纹（编码文本 + 模型标识的 SHA-256），
+--       入库和批量重新生成向量时指纹一致的案例复用已有向量，不再重复推理
+
+-- ============================================================
+-- 1. 添加向量文本指纹字段
+-- ============================================================
+
+ALTER TABLE ad_cases
+ADD COLUMN IF NOT EXISTS embedding_fingerprint VARCHAR(64); -- sha256(模型标识 + 换行 + 「标题 描述」)
+
+ALTER TABLE ad_cases_import_staging
+ADD COLUMN IF NOT EXISTS embedding_fingerprint VARCHAR(64);
+
+-- ============================================================
+-- 2. 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN ad_cases.embedding_fingerprint IS '向量文本指纹：生成 combined_vector 时编码文本与模型标识的 SHA-256，标题、描述和模型都未变化时复用已有向量；为空表示向量生成于该字段加入之前';
@@ -0,0 +1,19 @@
+-- 为 ad_cases 表添加标题/描述向量的文本指纹字段
+-- 创建时间：2026-10-19
+-- 说明：embedding_fingerprint 只记录 combined_vector 的指纹，
+--       title_vector / description_vector 各自记录指纹，批量重新生成向量时逐列判断是否复用已有向量
+
+-- ============================================================
+-- 1. 添加向量文本指纹字段
+-- ============================================================
+
+ALTER TABLE ad_cases
+ADD COLUMN IF NOT EXISTS title_embedding_fingerprint VARCHAR(64), -- sha256(模型标识 + 换行 + 标题)
+ADD COLUMN IF NOT EXISTS description_embedding_fingerprint VARCHAR(64); -- sha256(模型标识 + 换行 + 描述)
+
+-- ============================================================
+-- 2. 添加注释
+-- ============================================================
+
+COMMENT ON COLUMN ad_cases.title_embedding_fingerprint IS '标题向量文本指纹：生成 title_vector 时编码文本与模型标识的 SHA-256，标题和模型都未变化时复用已有向量';
+COMMENT ON COLUMN ad_cases.description_embedding_fingerprint IS '描述向量文本指纹：生成 description_vector 时编码文本与模型标识的 SHA-256，描述和模型都未变化时复用已有向量';
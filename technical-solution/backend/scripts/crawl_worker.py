@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+分布式爬取工作进程
+认领爬取任务的列表页和案例（FOR UPDATE SKIP LOCKED 租约 + 心跳），可在多台机器上同时运行多个进程。
+任务需先通过 API 创建（execute_immediately=false，不由后端进程内执行）
+
+使用示例:
+    python scripts/crawl_worker.py --task-id task_xxx --db-name ad_case_db --db-user postgres --db-password xxx
+    python scripts/crawl_worker.py --task-id task_xxx --output db --output-dir /mnt/shared/json/task_xxx ...
+    python scripts/crawl_worker.py --task-id task_xxx --retry-only --concurrency 4 ...   # 只重试失败的列表页和案例
+"""
+
+import sys
+import argparse
+import logging
+import threading
+from pathlib import Path
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.pipeline.crawl_worker import CrawlWorker, OUTPUT_MODES, OUTPUT_JSON, _worker_name
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='分布式爬取工作进程')
+
+    parser.add_argument(
+        '--task-id',
+        type=str,
+        required=True,
+        help='爬取任务ID（必需）'
+    )
+
+    parser.add_argument(
+        '--output',
+        type=str,
+        default=OUTPUT_JSON,
+        choices=list(OUTPUT_MODES),
+        help='输出方式: json 只写批次文件，db 写批次文件后直接入库（默认: json）'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=None,
+        help='批次文件目录（默认: data/json/<task-id>，多台机器时应为共享目录）'
+    )
+
+    parser.add_argument(
+        '--db-host',
+        type=str,
+        default='localhost',
+        help='数据库主机（默认: localhost）'
+    )
+
+    parser.add_argument(
+        '--db-port',
+        type=int,
+        default=5432,
+        help='数据库端口（默认: 5432）'
+    )
+
+    parser.add_argument(
+        '--db-name',
+        type=str,
+        required=True,
+        help='数据库名称（必需）'
+    )
+
+    parser.add_argument(
+        '--db-user',
+        type=str,
+        required=True,
+        help='数据库用户（必需）'
+    )
+
+    parser.add_argument(
+        '--db-password',
+        type=str,
+        required=True,
+        help='数据库密码（必需）'
+    )
+
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=30,
+        help='每个批次文件的案例数量（默认: 30）'
+    )
+
+    parser.add_argument(
+        '--lease-seconds',
+        type=int,
+        default=300,
+        help='认领租约时长（秒），超时未续约的工作项可被其它进程接手（默认: 300）'
+    )
+
+    parser.add_argument(
+        '--heartbeat-seconds',
+        type=int,
+        default=30,
+        help='心跳续约间隔（秒）（默认: 30）'
+    )
+
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=3,
+        help='失败或租约过期的工作项最多重新认领的次数（默认: 3）'
+    )
+
+    parser.add_argument(
+        '--claim-size',
+        type=int,
+        default=5,
+        help='每次认领的案例数（默认: 5）'
+    )
+
+    parser.add_argument(
+        '--max-rate',
+        type=float,
+        default=None,
+        help='本进程最高请求速率（请求/秒），多个进程时应按进程数分摊站点总速率'
+    )
+
+    parser.add_argument(
+        '--no-adaptive-rate',
+        action='store_true',
+        help='关闭自适应速率控制'
+    )
+
+    parser.add_argument(
+        '--archive-html',
+        action='store_true',
+        help='归档抓取到的 HTML（写入 <output-dir>/html_archive）'
+    )
+
+    parser.add_argument(
+        '--parser-backend',
+        type=str,
+        default='html.parser',
+        choices=['html.parser', 'lxml'],
+        help='HTML 解析后端（默认: html.parser，lxml 需要安装 lxml）'
+    )
+
+    parser.add_argument(
+        '--retry-only',
+        action='store_true',
+        help='只重试失败的列表页和案例（按退避间隔，超过最大重试次数进入死信），不处理新工作项'
+    )
+
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='本进程的工作线程数，共享速率控制器和 Token 缓存（默认: 1）'
+    )
+
+    parser.add_argument(
+        '--retry-base-delay',
+        type=float,
+        default=30.0,
+        help='失败重试的退避基础间隔（秒），第 n 次重试前等待约 基础间隔 × 2^n（默认: 30）'
+    )
+
+    parser.add_argument(
+        '--retry-max-delay',
+        type=float,
+        default=1800.0,
+        help='失败重试的退避最大间隔（秒）（默认: 1800）'
+    )
+
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error('--concurrency 必须大于 0')
+
+    db_config = {
+        'host': args.db_host,
+        'port': args.db_port,
+        'database': args.db_name,
+        'user': args.db_user,
+        'password': args.db_password
+    }
+
+    base_name = _worker_name()
+    workers = []
+    try:
+        for i in range(args.concurrency):
+            workers.append(CrawlWorker(
+                db_config=db_config,
+                task_id=args.task_id,
+                output=args.output,
+                output_dir=Path(args.output_dir) if args.output_dir else None,
+                batch_size=args.batch_size,
+                lease_seconds=args.lease_seconds,
+                heartbeat_seconds=args.heartbeat_seconds,
+                max_retries=args.max_retries,
+                claim_size=args.claim_size,
+                parser_backend=args.parser_backend,
+                archive_html=args.archive_html,
+                adaptive_rate=not args.no_adaptive_rate,
+                max_rate=args.max_rate,
+                worker_name=base_name if args.concurrency == 1 else f"{base_name}:{i}",
+                retry_only=args.retry_only,
+                retry_base_delay=args.retry_base_delay,
+                retry_max_delay=args.retry_max_delay
+            ))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if len(workers) == 1:
+        workers[0].run()
+    else:
+        threads = [threading.Thread(target=worker.run, name=worker.worker_name) for worker in workers]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            logger.info("收到中断信号，等待各线程保存已爬取的案例并释放租约")
+            for worker in workers:
+                worker.stop()
+            for thread in threads:
+                thread.join()
+
+    stats = {key: sum(worker.stats[key] for worker in workers)
+             for key in ('list_pages', 'list_pages_failed', 'cases_crawled', 'cases_recovered',
+                         'validation_failed', 'cases_failed', 'dead_lettered', 'batches_saved', 'cases_imported')}
+
+    print("\n" + "=" * 60)
+    print(f"工作进程 {base_name} 已退出（{len(workers)} 个线程）")
+    print("=" * 60)
+    print(f"列表页: {stats['list_pages']}（失败 {stats['list_pages_failed']}）")
+    print(f"案例: {stats['cases_crawled']}（验证失败 {stats['validation_failed']}，最终失败 {stats['cases_failed']}）")
+    if args.retry_only:
+        print(f"重试成功: {stats['cases_recovered']}，进入死信: {stats['dead_lettered']}")
+    print(f"保存批次数: {stats['batches_saved']}")
+    if args.output == 'db':
+        print(f"入库案例数: {stats['cases_imported']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+向量编码边车进程
+加载一份向量模型，通过 Unix socket 或本机 HTTP 端口为同一台机器上的多个 API worker 提供编码，
+并把并发请求合并为批量编码。API 侧配置 EMBEDDING_SIDECAR_URL 后使用
+
+使用示例:
+    python scripts/embedding_sidecar.py --socket /tmp/ad-case-embedding.sock
+    python scripts/embedding_sidecar.py --host 127.0.0.1 --port 8765 --max-batch-size 64 --max-wait-ms 10
+"""
+
+import sys
+import argparse
+import logging
+import signal
+import threading
+from pathlib import Path
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.services.embedding_sidecar import create_sidecar_server
+from app.services.vector_service import get_vector_model, get_vector_model_status
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向量编码边车进程')
+
+    parser.add_argument(
+        '--socket',
+        type=str,
+        default=None,
+        help='Unix socket 路径（指定时忽略 --host/--port）'
+    )
+
+    parser.add_argument(
+        '--host',
+        type=str,
+        default='127.0.0.1',
+        help='监听地址（默认: 127.0.0.1，不要暴露到外网）'
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='监听端口（默认: 8765）'
+    )
+
+    parser.add_argument(
+        '--max-batch-size',
+        type=int,
+        default=settings.EMBEDDING_SIDECAR_MAX_BATCH,
+        help=f'每次批量编码的最大文本数（默认: {settings.EMBEDDING_SIDECAR_MAX_BATCH}）'
+    )
+
+    parser.add_argument(
+        '--max-wait-ms',
+        type=float,
+        default=settings.EMBEDDING_SIDECAR_MAX_WAIT_MS,
+        help=f'合并并发请求的最长等待时间（毫秒）（默认: {settings.EMBEDDING_SIDECAR_MAX_WAIT_MS}）'
+    )
+
+    args = parser.parse_args()
+
+    # 先加载并预热模型，再开始监听（API 侧在边车可用前回退到进程内模型）
+    model = get_vector_model()
+    model.encode(["预热"])
+    model_status = get_vector_model_status()
+
+    server = create_sidecar_server(
+        encode=model.encode,
+        socket_path=args.socket,
+        host=args.host,
+        port=args.port,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        model_info={
+            **model.describe(),
+            'load_seconds': model_status['load_seconds'],
+            'loaded_at': model_status['loaded_at'],
+        }
+    )
+
+    def shutdown(signum, frame):
+        logger.info("收到停止信号，正在关闭边车")
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    address = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    logger.info(f"向量边车已启动: {address}（批量上限 {args.max_batch_size}，等待 {args.max_wait_ms} ms）")
+    try:
+        server.serve_forever()
+    finally:
+        server.batcher.close()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
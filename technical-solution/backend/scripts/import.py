@@ -13,6 +13,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from services.pipeline.import_stage import ImportStage
+from services.pipeline.parallel_import import ParallelImporter, COMMIT_MODES, COMMIT_MODE_PER_FILE
+from services.embedding import BACKEND_FLAG, EMBEDDING_BACKENDS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -95,6 +97,28 @@ def main():
         help='嵌入模型名称（默认: BAAI/bge-large-zh-v1.5）'
     )
     
+    parser.add_argument(
+        '--embedding-backend',
+        type=str,
+        default=BACKEND_FLAG,
+        choices=list(EMBEDDING_BACKENDS),
+        help='向量编码后端: flag 为 FlagEmbedding（PyTorch fp32），onnx 为 ONNX Runtime int8（默认: flag）'
+    )
+    
+    parser.add_argument(
+        '--onnx-path',
+        type=str,
+        default=None,
+        help='ONNX 模型文件路径（onnx 后端，默认 data/models/<模型名>-int8.onnx，不存在时自动导出）'
+    )
+    
+    parser.add_argument(
+        '--onnx-threads',
+        type=int,
+        default=None,
+        help='ONNX Runtime 推理线程数（onnx 后端，并行入库时默认按进程数分摊 CPU）'
+    )
+    
     parser.add_argument(
         '--no-skip-existing',
         action='store_true',
@@ -107,6 +131,28 @@ def main():
         help='不跳过无效的案例（默认: 跳过）'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='并行入库进程数（默认: 0，单进程顺序导入；大于 0 时每个进程加载一份模型）'
+    )
+    
+    parser.add_argument(
+        '--commit-mode',
+        type=str,
+        choices=COMMIT_MODES,
+        default=COMMIT_MODE_PER_FILE,
+        help='并行入库提交方式: per_file（每个文件单独提交）或 single_transaction（全部完成后单事务合并），默认: per_file'
+    )
+    
+    parser.add_argument(
+        '--job-id',
+        type=str,
+        default=None,
+        help='并行入库作业ID，重复运行同一作业时跳过已完成的文件（默认: 根据目录和匹配模式生成）'
+    )
+    
     args = parser.parse_args()
     
     # 数据库配置
@@ -118,13 +164,52 @@ def main():
         'password': args.db_password
     }
     
+    # 并行入库（仅目录模式）
+    if args.workers > 0 and not args.json_file:
+        json_dir = Path(args.json_dir)
+        if not json_dir.exists():
+            logger.error(f"JSON目录不存在: {json_dir}")
+            return 1
+        
+        importer = ParallelImporter(
+            db_config=db_config,
+            workers=args.workers,
+            commit_mode=args.commit_mode,
+            job_id=args.job_id,
+            model_name=args.model_name,
+            batch_size=args.batch_size,
+            skip_existing=not args.no_skip_existing,
+            skip_invalid=not args.no_skip_invalid,
+            embedding_backend=args.embedding_backend,
+            onnx_path=args.onnx_path,
+            onnx_threads=args.onnx_threads
+        )
+        try:
+            stats = importer.import_from_directory(json_dir, args.pattern)
+        except KeyboardInterrupt:
+            logger.info("用户中断导入（重新运行相同命令可从断点继续）")
+            return 1
+        
+        print("\n" + "=" * 60)
+        print("并行导入完成！")
+        print("=" * 60)
+        print(f"作业ID: {stats['job_id']}")
+        print(f"完成文件: {len(stats['files_done'])}, 失败文件: {len(stats['files_failed'])}, 已跳过: {stats['files_skipped']}")
+        print(f"总加载数: {stats['total_loaded']}")
+        print(f"成功导入数: {stats['total_imported']}")
+        print(f"失败数: {stats['total_failed']}")
+        return 0 if not stats['files_failed'] else 1
+    
     # 创建入库阶段
     import_stage = ImportStage(
         db_config=db_config,
         model_name=args.model_name,
         batch_size=args.batch_size,
         skip_existing=not args.no_skip_existing,
-        skip_invalid=not args.no_skip_invalid
+        skip_invalid=not args.no_skip_invalid,
+        embedding_backend=args.embedding_backend,
+        onnx_path=args.onnx_path,
+        onnx_threads=args.onnx_threads
     )
     
     # 执行导入
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+批量重新生成向量脚本
+按 id 顺序流式读取 ad_cases，批量编码后通过 COPY 写回，每批记录检查点，
+中断后使用相同参数（或相同 --job-id）再次执行即从检查点继续
+
+示例:
+    # 补齐缺失的 combined_vector
+    python scripts/reembed.py
+    # 为已有案例补充标题和描述向量
+    python scripts/reembed.py --columns title_vector description_vector --workers 4
+    # 切换到 ONNX int8 后端后全量重新生成
+    python scripts/reembed.py --mode all --embedding-backend onnx --workers 4
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.embedding import BACKEND_FLAG, DEFAULT_MODEL_NAME, EMBEDDING_BACKENDS
+from services.pipeline.reembed_stage import ReembedStage, VECTOR_COLUMNS, REEMBED_MODES, MODE_MISSING
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量重新生成案例向量（可断点续传）')
+    parser.add_argument('--db-name', default='ad_case_db', help='数据库名称')
+    parser.add_argument('--db-user', default='bing', help='数据库用户')
+    parser.add_argument('--db-password', default='', help='数据库密码')
+    parser.add_argument('--db-host', default='localhost', help='数据库主机')
+    parser.add_argument('--db-port', type=int, default=5432, help='数据库端口')
+
+    parser.add_argument('--job-id', default=None,
+                        help='作业ID（默认按模式、向量列、模型和后端生成，相同作业ID从检查点继续）')
+    parser.add_argument('--columns', nargs='+', default=['combined_vector'], choices=list(VECTOR_COLUMNS),
+                        help='生成的向量列（默认: combined_vector）')
+    parser.add_argument('--mode', default=MODE_MISSING, choices=list(REEMBED_MODES),
+                        help='missing: 只生成为空的向量；all: 全部重新生成（切换模型或后端时）（默认: missing）')
+    parser.add_argument('--fetch-size', type=int, default=2000,
+                        help='每次从游标读取并写回的行数，也是检查点间隔（默认: 2000）')
+    parser.add_argument('--batch-size', type=int, default=64, help='每次模型推理的文本数（默认: 64）')
+    parser.add_argument('--workers', type=int, default=1, help='编码进程数（默认: 1）')
+    parser.add_argument('--restart', action='store_true', help='忽略已有检查点，从头开始')
+    parser.add_argument('--no-reuse', action='store_true',
+                        help='all 模式下向量文本指纹未变化的向量列也重新编码（默认跳过）')
+
+    parser.add_argument('--model-name', default=DEFAULT_MODEL_NAME, help='模型名称或本地模型目录')
+    parser.add_argument('--embedding-backend', default=BACKEND_FLAG, choices=list(EMBEDDING_BACKENDS),
+                        help='向量编码后端: flag（PyTorch fp32）/ onnx（ONNX Runtime int8）（默认: flag）')
+    parser.add_argument('--onnx-path', default=None, help='ONNX 模型文件路径（默认 data/models/<模型名>-int8.onnx）')
+    parser.add_argument('--onnx-threads', type=int, default=None,
+                        help='ONNX Runtime 推理线程数（默认按编码进程数均分 CPU）')
+
+    args = parser.parse_args()
+
+    db_config = {
+        'dbname': args.db_name,
+        'user': args.db_user,
+        'password': args.db_password,
+        'host': args.db_host,
+        'port': args.db_port
+    }
+
+    stage = ReembedStage(
+        db_config=db_config,
+        job_id=args.job_id,
+        columns=args.columns,
+        mode=args.mode,
+        model_name=args.model_name,
+        embedding_backend=args.embedding_backend,
+        onnx_path=args.onnx_path,
+        onnx_threads=args.onnx_threads,
+        fetch_size=args.fetch_size,
+        encode_batch_size=args.batch_size,
+        workers=args.workers,
+        restart=args.restart,
+        reuse_vectors=not args.no_reuse
+    )
+
+    try:
+        stats = stage.run()
+    except KeyboardInterrupt:
+        logger.info(f"用户中断，已写回的批次已记录检查点，使用相同参数再次执行即可继续（作业ID: {stage.job_id}）")
+        return 1
+    except Exception as e:
+        logger.error(f"批量重新生成向量失败: {e}")
+        return 1
+
+    print("\n" + "=" * 60)
+    print(f"作业 {stats['job_id']}: {stats['status']}")
+    print("=" * 60)
+    print(f"处理行数: {stats['processed_rows']}/{stats['total_rows']}，写入向量: {stats['vectors_written']}，"
+          f"指纹未变化跳过: {stats['vectors_reused']}")
+    print(f"检查点: {stats['last_id']}")
+    print(f"总耗时: {stats['duration_seconds']:.2f} 秒 ({stats['rows_per_second']:.1f} 行/秒)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
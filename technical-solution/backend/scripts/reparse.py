@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+离线重新解析脚本
+使用当前的解析器重新解析爬取任务归档的原始 HTML，生成新的批次文件（不发起网络请求）
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.pipeline.reparse_stage import ReparseStage
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线重新解析归档的原始 HTML')
+
+    parser.add_argument(
+        '--task-dir',
+        type=str,
+        default=None,
+        help='爬取任务目录（如 data/json/task_xxx），归档目录默认为其下的 html_archive'
+    )
+
+    parser.add_argument(
+        '--archive-dir',
+        type=str,
+        default=None,
+        help='原始 HTML 归档目录（优先于 --task-dir）'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=None,
+        help='新批次文件输出目录（默认: <task-dir>/reparsed）'
+    )
+
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=30,
+        help='每批保存的案例数量（默认: 30）'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='解析进程数（默认: CPU 核数）'
+    )
+
+    parser.add_argument(
+        '--parser-backend',
+        type=str,
+        default='html.parser',
+        choices=['html.parser', 'lxml'],
+        help='HTML 解析后端（默认: html.parser，lxml 需要安装 lxml）'
+    )
+
+    args = parser.parse_args()
+
+    if args.archive_dir:
+        archive_dir = Path(args.archive_dir)
+    elif args.task_dir:
+        archive_dir = Path(args.task_dir) / 'html_archive'
+    else:
+        parser.error('必须指定 --task-dir 或 --archive-dir')
+
+    if not archive_dir.exists():
+        logger.error(f"归档目录不存在: {archive_dir}")
+        return 1
+
+    output_dir = Path(args.output_dir) if args.output_dir else archive_dir.parent / 'reparsed'
+
+    stage = ReparseStage(
+        archive_dir=archive_dir,
+        output_dir=output_dir,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        parser_backend=args.parser_backend
+    )
+
+    try:
+        stats = stage.run()
+    except KeyboardInterrupt:
+        logger.info("用户中断重新解析")
+        return 1
+
+    print("\n" + "=" * 60)
+    print("重新解析完成！")
+    print("=" * 60)
+    print(f"列表页: {stats['total_list_pages']}, 详情页: {stats['total_detail_pages']}")
+    print(f"解析成功: {stats['total_parsed']}（验证失败 {stats['total_invalid']}）")
+    print(f"解析失败: {stats['total_failed']}")
+    print(f"保存批次数: {stats['batches_saved']}")
+    print(f"输出目录: {stats['output_dir']}")
+    print(f"总耗时: {stats['duration_seconds']:.2f} 秒 ({stats['pages_per_second']:.1f} 页/秒)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""
+向量编码模块
+可替换的向量编码后端（FlagEmbedding / ONNX Runtime int8）和向量文本指纹
+"""
+
+from .backends import (
+    BACKEND_FLAG, BACKEND_ONNX, EMBEDDING_BACKENDS, DEFAULT_MODEL_NAME,
+    EmbeddingBackend, FlagEmbeddingBackend, OnnxEmbeddingBackend,
+    create_embedding_backend, embedding_model_id, resolve_model_path,
+)
+from .fingerprint import FINGERPRINT_COLUMNS, build_embedding_text, embedding_fingerprint
+
+__all__ = [
+    'BACKEND_FLAG', 'BACKEND_ONNX', 'EMBEDDING_BACKENDS', 'DEFAULT_MODEL_NAME',
+    'EmbeddingBackend', 'FlagEmbeddingBackend', 'OnnxEmbeddingBackend',
+    'create_embedding_backend', 'embedding_model_id', 'resolve_model_path',
+    'FINGERPRINT_COLUMNS', 'build_embedding_text', 'embedding_fingerprint',
+]
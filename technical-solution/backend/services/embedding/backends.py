@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+向量编码后端
+检索查询编码、入库和批量重新生成向量共用的编码后端：
+- flag: FlagEmbedding（PyTorch fp32），默认；
+- onnx: ONNX Runtime CPU 推理，模型导出为 ONNX 后做 int8 动态量化，可指定推理线程数，
+  没有 GPU 的服务器上查询延迟和批量编码耗时明显降低（需要安装 onnxruntime，首次导出还需要 torch 和 transformers）
+
+两个后端都使用 CLS 向量作为句向量，encode 返回未归一化的二维数组，由调用方归一化
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKEND_FLAG = 'flag'
+BACKEND_ONNX = 'onnx'
+EMBEDDING_BACKENDS = (BACKEND_FLAG, BACKEND_ONNX)
+
+DEFAULT_MODEL_NAME = 'BAAI/bge-large-zh-v1.5'
+QUERY_INSTRUCTION = "为这个句子生成表示以用于检索相关文章："
+MAX_SEQ_LENGTH = 512
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent.parent
+# 导出的 ONNX 模型默认保存目录
+ONNX_MODEL_DIR = BACKEND_ROOT / 'data' / 'models'
+
+
+def resolve_model_path(model_path: Optional[str] = None) -> str:
+    """
+    解析模型路径：HuggingFace 缓存根目录（models--xxx）自动定位到最新的快照目录
+
+    Args:
+        model_path: 本地模型目录或模型名称，为空时使用 BAAI/bge-large-zh-v1.5
+
+    Returns:
+        可传给 from_pretrained 的路径或名称
+    """
+    model_path = model_path or DEFAULT_MODEL_NAME
+    if os.path.exists(model_path):
+        cache_path = Path(model_path)
+        # 如果是 HuggingFace 缓存目录结构，查找快照
+        if cache_path.name.startswith('models--') and (cache_path / 'snapshots').exists():
+            snapshots_dir = cache_path / 'snapshots'
+            # 查找所有快照目录（包含 config.json 的目录）
+            snapshots = [d for d in snapshots_dir.iterdir() if d.is_dir() and (d / 'config.json').exists()]
+            if snapshots:
+                # 使用最新的快照目录（按修改时间排序）
+                snapshots.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+                model_path = str(snapshots[0])
+                logger.info(f"自动检测到模型快照路径: {model_path}")
+    return model_path
+
+
+class EmbeddingBackend:
+    """向量编码后端基类"""
+
+    name = ''
+    # 模型标识（见 embedding_model_id）
+    model_id = ''
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        批量编码文本
+
+        Args:
+            texts: 文本列表
+            batch_size: 每次推理的文本数
+
+        Returns:
+            形状为 (len(texts), 维度) 的数组（未归一化）
+        """
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        """后端信息（写入日志和评估结果）"""
+        return {'backend': self.name, 'model_id': self.model_id}
+
+
+class FlagEmbeddingBackend(EmbeddingBackend):
+    """FlagEmbedding（PyTorch）后端"""
+
+    name = BACKEND_FLAG
+
+    def __init__(self, model_path: str):
+        # FlagEmbedding 连同 torch 在此处才导入
+        from FlagEmbedding import FlagModel
+        self.model_path = model_path
+        self.model_id = embedding_model_id(BACKEND_FLAG, model_path)
+        self.model = FlagModel(model_path, query_instruction_for_retrieval=QUERY_INSTRUCTION)
+
+    def encode(self, texts: List[str], batch_size: int = 256) -> np.ndarray:
+        vectors = np.asarray(self.model.encode(texts, batch_size=batch_size))
+        return vectors.reshape(len(texts), -1)
+
+    def describe(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'model': self.model_path, 'model_id': self.model_id}
+
+
+def model_display_name(model_path: str) -> str:
+    """模型短名称（BAAI/bge-large-zh-v1.5、HuggingFace 缓存目录和快照目录都得到 bge-large-zh-v1.5）"""
+    path = Path(model_path.rstrip('/'))
+    name = path.name
+    if name and len(name) == 40 and path.parent.name == 'snapshots':
+        # HuggingFace 快照目录名是提交哈希，使用仓库目录名
+        name = path.parent.parent.name
+    return name.split('--')[-1] if name.startswith('models--') else name
+
+
+def default_onnx_path(model_path: str, quantize: bool = True) -> Path:
+    """按模型名称生成默认的 ONNX 模型文件路径（data/models/<模型名>-int8.onnx）"""
+    return ONNX_MODEL_DIR / f"{model_display_name(model_path)}-{'int8' if quantize else 'fp32'}.onnx"
+
+
+def embedding_model_id(backend: str, model_path: str, onnx_path: Optional[str] = None) -> str:
+    """
+    模型标识（计入向量文本指纹，切换模型或编码后端后指纹随之变化）
+
+    Returns:
+        如 bge-large-zh-v1.5/flag、bge-large-zh-v1.5/onnx/bge-large-zh-v1.5-int8
+    """
+    name = model_display_name(model_path or DEFAULT_MODEL_NAME)
+    if backend == BACKEND_ONNX:
+        return f"{name}/{BACKEND_ONNX}/{Path(onnx_path or default_onnx_path(model_path or DEFAULT_MODEL_NAME)).stem}"
+    return f"{name}/{backend or BACKEND_FLAG}"
+
+
+def export_onnx_model(model_path: str, output_path: Path, quantize: bool = True) -> Path:
+    """
+    将模型导出为 ONNX（可选 int8 动态量化）
+
+    Args:
+        model_path: 本地模型目录或模型名称
+        output_path: 输出文件路径
+        quantize: 是否做 int8 动态量化（只量化权重，激活在推理时动态量化）
+
+    Returns:
+        输出文件路径
+    """
+    import torch
+    from transformers import AutoModel
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_path if not quantize else output_path.with_name(output_path.stem + '.fp32.onnx')
+
+    logger.info(f"导出 ONNX 模型: {model_path} -> {fp32_path}")
+    model = AutoModel.from_pretrained(model_path)
+    model.eval()
+    dummy = {
+        'input_ids': torch.ones(1, 8, dtype=torch.long),
+        'attention_mask': torch.ones(1, 8, dtype=torch.long),
+        'token_type_ids': torch.zeros(1, 8, dtype=torch.long),
+    }
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in dummy}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy,),
+            str(fp32_path),
+            input_names=list(dummy),
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        logger.info(f"int8 动态量化: {fp32_path} -> {output_path}")
+        quantize_dynamic(str(fp32_path), str(output_path), weight_type=QuantType.QInt8)
+    logger.info(f"ONNX 模型已保存: {output_path}（{output_path.stat().st_size / 1024 / 1024:.1f} MB）")
+    return output_path
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """ONNX Runtime CPU 后端"""
+
+    name = BACKEND_ONNX
+
+    def __init__(
+        self,
+        model_path: str,
+        onnx_path: Optional[str] = None,
+        num_threads: Optional[int] = None,
+        quantize: bool = True
+    ):
+        """
+        Args:
+            model_path: 本地模型目录或模型名称（加载分词器，ONNX 文件不存在时从该模型导出）
+            onnx_path: ONNX 模型文件路径（默认 data/models/<模型名>-int8.onnx）
+            num_threads: 推理线程数（默认使用全部 CPU 核心）
+            quantize: 导出时是否做 int8 动态量化
+        """
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_path = model_path
+        self.onnx_path = Path(onnx_path) if onnx_path else default_onnx_path(model_path, quantize)
+        if not self.onnx_path.exists():
+            export_onnx_model(model_path, self.onnx_path, quantize=quantize)
+        self.model_id = embedding_model_id(BACKEND_ONNX, model_path, str(self.onnx_path))
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = 1
+        self.num_threads = num_threads
+        self.session = ort.InferenceSession(str(self.onnx_path), options, providers=['CPUExecutionProvider'])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"ONNX 编码后端已加载: {self.onnx_path}（线程数 {num_threads or '自动'}）")
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        # 按长度排序后分批，减少同一批次内的填充长度
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in indices],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors='np',
+            )
+            feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self._input_names}
+            last_hidden_state = self.session.run(None, feed)[0]
+            for i, vector in zip(indices, last_hidden_state[:, 0]):
+                vectors[i] = vector
+        return np.stack(vectors).astype(np.float32)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'model': self.model_path,
+            'model_id': self.model_id,
+            'onnx_path': str(self.onnx_path),
+            'num_threads': self.num_threads,
+        }
+
+
+def create_embedding_backend(
+    backend: Optional[str] = None,
+    model_path: Optional[str] = None,
+    onnx_path: Optional[str] = None,
+    onnx_threads: Optional[int] = None
+) -> EmbeddingBackend:
+    """
+    创建向量编码后端
+
+    Args:
+        backend: 后端名称（flag / onnx），为空时使用 flag
+        model_path: 本地模型目录或模型名称
+        onnx_path: ONNX 模型文件路径（onnx 后端）
+        onnx_threads: ONNX Runtime 推理线程数（onnx 后端）
+
+    Returns:
+        编码后端实例
+    """
+    backend = backend or BACKEND_FLAG
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"未知的向量编码后端: {backend}（可选: {', '.join(EMBEDDING_BACKENDS)}）")
+
+    model_path = resolve_model_path(model_path)
+    if backend == BACKEND_ONNX:
+        return OnnxEmbeddingBackend(model_path, onnx_path=onnx_path, num_threads=onnx_threads)
+    return FlagEmbeddingBackend(model_path)
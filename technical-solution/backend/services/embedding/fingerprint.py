@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+向量文本指纹
+入库、单条导入和批量重新生成向量共用：编码文本的拼接规则和指纹计算必须一致，
+每个向量列单独记录指纹，与库中的指纹相同时复用该列已有向量，不再重复推理
+"""
+
+import hashlib
+from typing import Optional
+
+# 向量列 -> ad_cases 中记录该列向量文本指纹的字段
+FINGERPRINT_COLUMNS = {
+    'combined_vector': 'embedding_fingerprint',
+    'title_vector': 'title_embedding_fingerprint',
+    'description_vector': 'description_embedding_fingerprint',
+}
+
+
+def build_embedding_text(column: str, title: Optional[str], description: Optional[str]) -> str:
+    """
+    生成向量列对应的编码文本
+
+    Args:
+        column: 向量列名（combined_vector / title_vector / description_vector）
+        title: 标题
+        description: 描述
+
+    Returns:
+        编码文本（为空时不生成该列向量）
+    """
+    title = (title or '').strip()
+    description = (description or '').strip()
+    if column == 'title_vector':
+        return title
+    if column == 'description_vector':
+        return description
+    return f"{title} {description}".strip()
+
+
+def embedding_fingerprint(text: str, model_id: str) -> str:
+    """
+    计算向量文本指纹
+
+    Args:
+        text: 编码文本
+        model_id: 模型标识（见 embedding_model_id）
+
+    Returns:
+        64 位十六进制 SHA-256
+    """
+    return hashlib.sha256(f"{model_id}\n{text}".encode('utf-8')).hexdigest()
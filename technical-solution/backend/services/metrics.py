@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+进程内运行指标（Prometheus 文本格式）
+API、爬取和入库的热路径上每次记录只做一次加锁累加，抓取 /metrics 时才汇总和格式化；
+不依赖 prometheus_client。多个 worker 进程各自累计，由 Prometheus 按实例抓取后聚合。
+速率类指标（每秒页数、案例数、阶段吞吐量）以计数器暴露，用 rate() 计算
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 批量大小分桶（条）
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指标基类（按标签值分组存储）"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """当前值（可设置回调，在抓取时计算）"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]):
+        """
+        设置抓取时调用的回调
+
+        Args:
+            function: 返回 {标签值元组: 值}，回调异常时该指标本次不输出
+        """
+        self._function = function
+
+    def _samples(self) -> Iterator[str]:
+        if self._function is not None:
+            try:
+                values = self._function()
+            except Exception:
+                values = {}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各分桶计数（最后一个为 +Inf）, 总和, 次数]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """记录代码块耗时（秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            snapshot = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        bounds = list(self.buckets) + [float('inf')]
+        for key, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {count}"
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"指标 {metric.name} 已以不同的类型或标签注册")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """导出为 Prometheus 文本格式（0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# ============================================================
+# API
+# ============================================================
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'HTTP 请求耗时（秒），route 为路由模板', ('method', 'route', 'status')
+)
+CASE_SEARCH_SECONDS = REGISTRY.histogram(
+    'case_search_duration_seconds', '案例检索耗时（秒）', ('search_type',)
+)
+DB_POOL_CONNECTIONS = REGISTRY.gauge(
+    'db_pool_connections', 'asyncpg 连接池连接数（size: 当前连接，idle: 空闲，in_use: 使用中，max: 上限）', ('state',)
+)
+
+# ============================================================
+# 向量编码与缓存
+# ============================================================
+
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    'embedding_encode_duration_seconds',
+    '向量编码耗时（秒），source: local 进程内模型 / sidecar 边车 / batcher 边车合并编码 / import 入库',
+    ('source',)
+)
+EMBEDDING_BATCH_SIZE = REGISTRY.histogram(
+    'embedding_batch_size', '每次编码的文本数', ('source',), buckets=BATCH_SIZE_BUCKETS
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'cache_lookups_total', '缓存查找次数（result: hit / miss）', ('cache', 'result')
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    'cache_hit_ratio', '进程启动以来的缓存命中率', ('cache',)
+)
+
+
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in CACHE_LOOKUPS.values().items():
+        entry = totals.setdefault(cache, [0.0, 0.0])
+        entry[0 if result == 'hit' else 1] += value
+    return {(cache,): hits / (hits + misses) for cache, (hits, misses) in totals.items() if hits + misses}
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratios)
+
+# ============================================================
+# 爬取
+# ============================================================
+
+CRAWL_LIST_PAGES = REGISTRY.counter(
+    'crawl_list_pages_total', '处理的列表页数（result: success / empty / failed）', ('result',)
+)
+CRAWL_CASES = REGISTRY.counter(
+    'crawl_cases_total', '处理的案例数（result: crawled 详情解析成功 / failed 失败 / saved 写入批次文件）', ('result',)
+)
+CRAWL_PROXY_SWITCHES = REGISTRY.counter(
+    'crawl_proxy_switches_total', '代理节点切换次数（result: switched / skipped 全局节点刚切换过 / failed）', ('result',)
+)
+ADQUAN_RESPONSES = REGISTRY.counter(
+    'adquan_http_responses_total', '广告门接口响应数（status 为 HTTP 状态码，网络错误为 error）', ('endpoint', 'status')
+)
+ADQUAN_REQUEST_SECONDS = REGISTRY.histogram(
+    'adquan_request_duration_seconds', '广告门接口请求耗时（秒）', ('endpoint',)
+)
+
+# ============================================================
+# 入库
+# ============================================================
+
+IMPORT_CASES = REGISTRY.counter(
+    'import_cases_total', '入库案例数（result: imported / failed）', ('result',)
+)
+IMPORT_VECTORS = REGISTRY.counter(
+    'import_vectors_total', '入库时的向量数（result: generated 新生成 / reused 指纹未变化复用）', ('result',)
+)
+PIPELINE_STAGE_ITEMS = REGISTRY.counter(
+    'pipeline_stage_items_total', '流水线各阶段处理的条目数（rate() 即阶段吞吐量）', ('pipeline', 'stage')
+)
+PIPELINE_STAGE_BUSY_SECONDS = REGISTRY.counter(
+    'pipeline_stage_busy_seconds_total', '流水线各阶段的累计处理耗时（秒）', ('pipeline', 'stage')
+)
@@ -5,7 +5,12 @@
 
 from .crawl_stage import CrawlStage
 from .import_stage import ImportStage
+from .import_pipeline import StagedImportPipeline
+from .parallel_import import ParallelImporter
+from .seen_index import SeenCaseIndex
+from .reparse_stage import ReparseStage
+from .reembed_stage import ReembedStage
 from .validator import CaseValidator
 
-__all__ = ['CrawlStage', 'ImportStage', 'CaseValidator']
+__all__ = ['CrawlStage', 'ImportStage', 'StagedImportPipeline', 'ParallelImporter', 'SeenCaseIndex', 'ReparseStage', 'ReembedStage', 'CaseValidator']
 
@@ -13,12 +13,21 @@ from datetime import datetime
 from ..spider.api_client import AdquanAPIClient
 from ..spider.detail_parser import DetailPageParser
 from ..spider.proxy_manager import ProxyManager
+from ..spider.proxy_pool import get_proxy_pool, parse_node_ports
+from ..spider.rate_controller import AdaptiveRateController
+from ..spider.token_cache import SharedTokenCache
+from ..spider.html_archive import HtmlArchive
+from ..spider.parse_pool import DetailParsePool
+from ..spider.event_log import log_event
 from .utils import (
     save_json, save_resume_file, load_resume_file,
     format_batch_filename, get_next_batch_number, merge_case_data,
     get_saved_case_ids_from_json, validate_crawled_ids_saved
 )
 from .validator import CaseValidator
+from .seen_index import SeenCaseIndex
+from .import_pipeline import StageStats
+from ..metrics import CRAWL_LIST_PAGES, CRAWL_CASES
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +43,15 @@ class CrawlStage:
         delay_range: tuple = (2, 5),
         enable_resume: bool = True,
         progress_callback: Optional[Callable[[], bool]] = None,
-        task_id: Optional[str] = None
+        task_id: Optional[str] = None,
+        seen_index: Optional[SeenCaseIndex] = None,
+        data_source: Optional[str] = None,
+        archive_html: bool = False,
+        parser_backend: Optional[str] = None,
+        parse_workers: int = 0,
+        parse_queue_size: Optional[int] = None,
+        rate_controller: Optional[AdaptiveRateController] = None,
+        token_cache: Optional[SharedTokenCache] = None
     ):
         """
         初始化爬取阶段
@@ -47,6 +64,17 @@ class CrawlStage:
             enable_resume: 是否启用断点续传
             progress_callback: 进度回调函数，每处理一定数量的案例后调用
                                返回 True 表示继续执行，False 表示暂停
+            task_id: 任务ID
+            seen_index: 跨任务已爬取案例索引，设置后跳过其它任务已成功爬取的案例
+            data_source: 数据源（写入已爬取案例索引）
+            archive_html: 是否归档原始 HTML（保存在 output_dir/html_archive，可离线重新解析）
+            parser_backend: HTML 解析后端（html.parser / lxml），默认 html.parser
+            parse_workers: 详情页解析进程数，大于 0 时抓取与解析分离（抓取线程只发请求，
+                           HTML 交给解析进程池），0 表示在抓取线程内解析
+            parse_queue_size: 解析阶段最大在途页面数（背压），默认为解析进程数的 2 倍
+            rate_controller: 自适应速率控制器，设置后请求间隔和并发由其根据响应情况调整，
+                             不再按 delay_range 随机等待
+            token_cache: 进程内共享的 CSRF Token 缓存，设置后各任务共用 Token，不再各自请求页面获取
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -56,6 +84,13 @@ class CrawlStage:
         self.enable_resume = enable_resume
         self.progress_callback = progress_callback
         self.task_id = task_id  # 任务ID，用于记录列表页状态
+        self.seen_index = seen_index
+        self.data_source = data_source
+        self.parser_backend = parser_backend
+        self.parse_workers = parse_workers
+        self.parse_queue_size = parse_queue_size
+        self.rate_controller = rate_controller
+        self.token_cache = token_cache
         
         # 断点续传文件
         if resume_file:
@@ -67,30 +102,61 @@ class CrawlStage:
         self.crawled_ids: Set[int] = set()
         # 已保存的case_id集合（用于验证）
         self.saved_ids: Set[int] = set()
+        # 已成功保存的case_id集合（不含爬取失败和验证失败的案例，增量比对用）
+        self.success_ids: Set[int] = set()
         
         if self.enable_resume:
             self.crawled_ids = load_resume_file(self.resume_file)
             # 加载已保存的ID，用于验证
             try:
                 self.saved_ids = get_saved_case_ids_from_json(self.output_dir)
+                self.success_ids = get_saved_case_ids_from_json(self.output_dir, successful_only=True)
             except Exception as e:
                 logger.warning(f"加载已保存的ID失败: {e}，将从头开始验证")
                 self.saved_ids = set()
+                self.success_ids = set()
         
         # 初始化代理管理器（如果配置了 Clash API）
         self.proxy_manager = self._init_proxy_manager()
         
+        # 原始 HTML 归档
+        self.html_archive = HtmlArchive(self.output_dir / 'html_archive') if archive_html else None
+        
         # 初始化组件
-        self.api_client = AdquanAPIClient(proxy_manager=self.proxy_manager)
-        self.detail_parser = DetailPageParser(session=self.api_client.session, proxy_manager=self.proxy_manager)
+        self.api_client = AdquanAPIClient(
+            proxy_manager=self.proxy_manager,
+            html_archive=self.html_archive,
+            parser_backend=parser_backend,
+            rate_controller=rate_controller,
+            token_cache=token_cache
+        )
+        self.detail_parser = DetailPageParser(
+            session=self.api_client.session,
+            proxy_manager=self.proxy_manager,
+            html_archive=self.html_archive,
+            parser_backend=parser_backend,
+            rate_controller=rate_controller
+        )
         self.validator = CaseValidator()
         
+        # 列表页返回空数据时的重试次数（页码 -> 次数）
+        self._empty_retry_count: Dict[int, int] = {}
+        
         # 统计信息
         self.stats = {
             'total_crawled': 0,
             'total_saved': 0,
             'total_failed': 0,
             'batches_saved': 0,
+            'total_skipped_seen': 0,  # 其它任务已爬取而跳过的案例数
+            'total_skipped_known': 0,  # 增量模式下已知而跳过的案例数
+            'known_pages': 0,  # 增量模式下全部为已知案例的页数
+            'stopped_at_page': None,  # 增量模式下到达已爬取区域而停止的页码
+            'last_page': None,  # 最后处理的列表页码
+            'newest_case_id': None,  # 列表中出现的最大案例ID
+            'parse_wait_seconds': 0.0,  # 抓取线程等待解析阶段空闲槽位的总秒数
+            'stage_stats': {},  # 各阶段（抓取/解析/写入）耗时统计
+            'rate_control': None,  # 自适应速率控制器的当前速率、并发数和统计
             'start_time': None,
             'end_time': None
         }
@@ -101,7 +167,9 @@ class CrawlStage:
         max_pages: Optional[int] = 100,
         case_type: int = 3,
         search_value: str = '',
-        skip_existing: bool = True
+        skip_existing: bool = True,
+        incremental: bool = False,
+        incremental_stop_pages: int = 2
     ) -> Dict[str, Any]:
         """
         执行爬取任务
@@ -112,6 +180,9 @@ class CrawlStage:
             case_type: 案例类型
             search_value: 搜索关键词
             skip_existing: 是否跳过已爬取的案例
+            incremental: 增量模式。列表按发布时间倒序，逐页比对已入库/已爬取的案例，
+                         跳过已知案例，连续 incremental_stop_pages 页全部已知时停止
+            incremental_stop_pages: 增量模式下连续全部已知多少页后停止
             
         Returns:
             爬取统计信息
@@ -123,21 +194,40 @@ class CrawlStage:
         logger.info(f"批次大小: {self.batch_size}")
         logger.info(f"已爬取案例数: {len(self.crawled_ids)}")
         logger.info(f"起始页: {start_page}, 最大页数: {max_pages}")
+        if incremental:
+            logger.info(f"增量模式: 连续 {incremental_stop_pages} 页全部为已知案例时停止")
         
         self.stats['start_time'] = datetime.now()
         
+        # 阶段统计：抓取（当前线程）→ 解析（进程池）→ 写入批次（当前线程）
+        self._stage_stats = {
+            'fetch': StageStats('fetch', 1, pipeline='crawl'),
+            'parse': StageStats('parse', max(1, self.parse_workers), pipeline='crawl'),
+            'write': StageStats('write', 1, pipeline='crawl'),
+        }
+        for stage in self._stage_stats.values():
+            stage.mark_started()
+        
+        # 解析阶段：抓取线程只负责请求，解析结果按完成顺序交给 _write_parsed
+        parse_pool = DetailParsePool(
+            workers=self.parse_workers,
+            parser_backend=self.parser_backend,
+            max_pending=self.parse_queue_size
+        )
+        
         try:
             # 流式处理：边获取边处理，不一次性加载所有数据
             logger.info("开始流式获取和处理列表页数据...")
             logger.info(f"列表页获取参数: start_page={start_page}, max_pages={max_pages}, case_type={case_type}, search_value='{search_value}'")
             
-            # 当前批次数据
-            current_batch: List[Dict[str, Any]] = []
-            batch_num = get_next_batch_number(self.output_dir)
+            # 当前批次数据（由 _add_to_batch 追加，达到批次大小时保存）
+            self._current_batch: List[Dict[str, Any]] = []
+            self._batch_num = get_next_batch_number(self.output_dir)
             
             # 处理计数器（用于进度更新，包括成功和失败的案例）
             processed_count = 0
             total_list_items = 0  # 累计列表项数量
+            consecutive_known_pages = 0  # 增量模式：连续全部已知的页数
             
             # 使用生成器逐页获取并处理（流式处理）
             logger.info("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
@@ -149,15 +239,33 @@ class CrawlStage:
                 max_pages=max_pages,
                 case_type=case_type
             ):
-                logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                logger.info(f"收到第 {page_num} 页数据，开始处理...")
-                
                 if not page_items:
                     logger.info(f"第 {page_num} 页无数据，停止获取")
                     break
                 
                 total_list_items += len(page_items)
-                logger.info(f"第 {page_num} 页获取到 {len(page_items)} 个案例，开始处理...")
+                
+                # 记录高水位（最新案例ID、最后处理的页码）
+                self.stats['last_page'] = page_num
+                page_case_ids = [item.get('id') for item in page_items if item.get('id')]
+                if page_case_ids:
+                    self.stats['newest_case_id'] = max(self.stats['newest_case_id'] or 0, *page_case_ids)
+                
+                # 增量模式：比对本页案例是否已知
+                known_ids: Set[int] = set()
+                if incremental:
+                    known_ids = self._get_known_case_ids(page_case_ids)
+                    if page_case_ids and len(known_ids) == len(set(page_case_ids)):
+                        consecutive_known_pages += 1
+                        self.stats['known_pages'] += 1
+                        logger.info(f"第 {page_num} 页案例全部已知（连续 {consecutive_known_pages}/{incremental_stop_pages} 页）")
+                        if consecutive_known_pages >= incremental_stop_pages:
+                            logger.info(f"增量模式: 已到达已爬取区域，在第 {page_num} 页停止")
+                            self.stats['stopped_at_page'] = page_num
+                            break
+                    else:
+                        consecutive_known_pages = 0
+                        logger.info(f"第 {page_num} 页新案例数: {len(set(page_case_ids)) - len(known_ids)}")
                 
                 # 立即处理这一页的数据
                 for i, item in enumerate(page_items, 1):
@@ -178,86 +286,86 @@ class CrawlStage:
                             # 从已爬取列表中移除，以便重新爬取
                             self.crawled_ids.discard(case_id)
                     
+                    # 增量模式：跳过已入库或已爬取的案例
+                    if incremental and case_id in known_ids:
+                        logger.debug(f"[{item_index}/{total_list_items}] 跳过已知案例: {case_title} (case_id={case_id})")
+                        self.stats['total_skipped_known'] += 1
+                        continue
+                    
+                    # 检查其它任务是否已成功爬取（跨任务索引）
+                    if skip_existing and case_id and self.seen_index and self.seen_index.contains(case_id):
+                        logger.debug(f"[{item_index}/{total_list_items}] 跳过其它任务已爬取: {case_title} (case_id={case_id})")
+                        self.stats['total_skipped_seen'] += 1
+                        continue
+                    
                     if not case_url:
                         logger.warning(f"[{item_index}/{total_list_items}] 跳过：没有URL")
                         self.stats['total_failed'] += 1
+                        CRAWL_CASES.inc(result='failed')
                         processed_count += 1
                         # 检查进度更新
                         if processed_count % 10 == 0:
                             self._check_progress_and_pause()
                         continue
                     
-                    logger.info(f"[{item_index}/{total_list_items}] 爬取: {case_title}")
-                    logger.debug(f"  URL: {case_url}")
+                    logger.debug(f"[{item_index}/{total_list_items}] 爬取: {case_title} ({case_url})")
                     
+                    # 抓取详情页（解析交给解析阶段）
+                    fetch_start = time.perf_counter()
                     try:
-                        # 解析详情页
-                        detail_data = self.detail_parser.parse(case_url)
-                        
-                        # 合并数据
-                        case_data = merge_case_data(item, detail_data)
-                        
-                        # 验证数据
-                        is_valid, error = self.validator.validate_case(case_data)
-                        if not is_valid:
-                            logger.warning(f"  数据验证失败: {error}")
-                            case_data['validation_error'] = error
-                        
-                        # 添加到批次
-                        current_batch.append(case_data)
-                        self.crawled_ids.add(case_id)
-                        self.stats['total_crawled'] += 1
-                        processed_count += 1
-                        
-                        # 标记为已保存（将在保存批次后更新）
-                        
-                        logger.info(f"  ✓ 爬取成功")
-                        logger.debug(f"    标题: {case_data.get('title')}")
-                        logger.debug(f"    描述长度: {len(case_data.get('description', ''))} 字符")
-                        
-                        # 达到批次大小，保存JSON
-                        if len(current_batch) >= self.batch_size:
-                            self._save_batch(current_batch, batch_num)
-                            current_batch = []
-                            batch_num += 1
-                        
-                        # 每10个案例更新进度并检查暂停状态
-                        if processed_count % 10 == 0:
-                            self._check_progress_and_pause()
-                        
-                        # 请求延迟（每处理一个案例后）
-                        delay = self._get_delay()
-                        time.sleep(delay)
-                            
+                        html = self.detail_parser.fetch(case_url, case_id=case_id)
+                        self._stage_stats['fetch'].record(1, time.perf_counter() - fetch_start)
                     except Exception as e:
-                        logger.error(f"  ✗ 爬取失败: {e}")
+                        self._stage_stats['fetch'].record(1, time.perf_counter() - fetch_start, error=True)
+                        log_event(
+                            logger, 'case_failed', logging.ERROR,
+                            case_id=case_id, title=case_title, stage='fetch', error=f"{type(e).__name__}: {e}"
+                        )
                         
                         # 处理网络错误，触发代理切换（如果配置了代理管理器）
                         if self.proxy_manager:
                             self.proxy_manager.handle_error(e)
                         
                         self.stats['total_failed'] += 1
+                        CRAWL_CASES.inc(result='failed')
                         processed_count += 1
                         
                         # 保存失败信息
-                        failed_case = {
+                        self._add_to_batch({
                             'case_id': case_id,
                             'url': case_url,
                             'title': case_title,
                             'error': str(e),
-                            'crawl_time': datetime.now().isoformat()
-                        }
-                        current_batch.append(failed_case)
+                            'crawl_time': datetime.now().isoformat(),
+                            'list_item': item,  # 重试时与重新爬取的详情页合并
+                        })
                         
                         # 每10个案例更新进度并检查暂停状态
                         if processed_count % 10 == 0:
                             self._check_progress_and_pause()
                         
                         continue
+                    
+                    processed_count += 1
+                    
+                    # 提交解析（在途页面已满时等待，解析跟不上抓取时体现为等待时间），写入已完成的解析结果
+                    self.stats['parse_wait_seconds'] += parse_pool.submit(case_url, html, item)
+                    self._write_parsed(parse_pool.drain())
+                    
+                    # 每10个案例更新进度并检查暂停状态
+                    if processed_count % 10 == 0:
+                        self._check_progress_and_pause()
+                    
+                    # 请求延迟（每处理一个案例后，启用速率控制器时由其在下一次请求前等待）
+                    if not self.rate_controller:
+                        delay = self._get_delay()
+                        time.sleep(delay)
+            
+            # 等待解析阶段处理完剩余页面
+            self._write_parsed(parse_pool.drain(wait=True))
             
             # 保存剩余批次
-            if current_batch:
-                self._save_batch(current_batch, batch_num)
+            self._flush_batch()
             
             # 验证所有已爬取的ID是否都被保存
             if self.enable_resume and self.crawled_ids:
@@ -289,7 +397,7 @@ class CrawlStage:
                         
                         # 保存失败记录到单独的批次
                         if failed_batch:
-                            self._save_batch(failed_batch, batch_num)
+                            self._save_batch(failed_batch, self._batch_num)
                             logger.warning(f"已将 {len(failed_batch)} 个未保存的案例记录为失败")
             
             # 最终更新断点续传文件
@@ -307,8 +415,17 @@ class CrawlStage:
             logger.info(f"总爬取数: {self.stats['total_crawled']}")
             logger.info(f"总保存数: {self.stats['total_saved']}")
             logger.info(f"总失败数: {self.stats['total_failed']}")
+            if self.seen_index:
+                logger.info(f"跳过其它任务已爬取数: {self.stats['total_skipped_seen']}")
+            if incremental:
+                logger.info(f"跳过已知案例数: {self.stats['total_skipped_known']}")
             logger.info(f"保存批次数: {self.stats['batches_saved']}")
             logger.info(f"总耗时: {duration:.2f} 秒")
+            self._finish_stage_stats()
+            for name, stage in self.stats['stage_stats'].items():
+                logger.info(f"  阶段 {name}: {stage['items']} 页, 耗时 {stage['busy_seconds']:.2f} 秒, 利用率 {stage['utilization']:.0%}")
+            if self.stats['parse_wait_seconds'] > 0:
+                logger.info(f"  等待解析阶段: {self.stats['parse_wait_seconds']:.2f} 秒")
             
             return {
                 **self.stats,
@@ -320,9 +437,95 @@ class CrawlStage:
         except Exception as e:
             logger.error(f"爬取阶段失败: {e}")
             raise
+        finally:
+            parse_pool.close()
+            self._finish_stage_stats()
+            if self.proxy_manager:
+                self.proxy_manager.close()
+    
+    def _write_parsed(self, results: List[Dict[str, Any]]):
+        """
+        写入阶段：合并列表页数据、验证并加入当前批次
+        
+        Args:
+            results: 解析阶段返回的结果（context 为列表项）
+        """
+        for result in results:
+            item = result['context']
+            case_id = item.get('id')
+            self._stage_stats['parse'].record(1, result['parse_seconds'], error=bool(result['error']))
+            
+            write_start = time.perf_counter()
+            if result['error']:
+                log_event(
+                    logger, 'case_failed', logging.ERROR,
+                    case_id=case_id, title=item.get('title', '未知标题'), error=result['error']
+                )
+                self.stats['total_failed'] += 1
+                CRAWL_CASES.inc(result='failed')
+                self._add_to_batch({
+                    'case_id': case_id,
+                    'url': item.get('url'),
+                    'title': item.get('title', '未知标题'),
+                    'error': result['error'],
+                    'crawl_time': datetime.now().isoformat(),
+                    'list_item': item,  # 重试时与重新爬取的详情页合并
+                })
+            else:
+                # 合并数据
+                case_data = merge_case_data(item, result['detail'])
+                
+                # 验证数据
+                is_valid, error = self.validator.validate_case(case_data)
+                if not is_valid:
+                    logger.warning(f"  数据验证失败 (case_id={case_id}): {error}")
+                    case_data['validation_error'] = error
+                
+                self.crawled_ids.add(case_id)
+                self.stats['total_crawled'] += 1
+                CRAWL_CASES.inc(result='crawled')
+                
+                log_event(
+                    logger, 'case_crawled',
+                    case_id=case_id, title=case_data.get('title'),
+                    parse_ms=round(result['parse_seconds'] * 1000, 1),
+                    description_chars=len(case_data.get('description') or '')
+                )
+                
+                self._add_to_batch(case_data)
+            self._stage_stats['write'].record(1, time.perf_counter() - write_start)
+    
+    def _add_to_batch(self, case: Dict[str, Any]):
+        """加入当前批次，达到批次大小时保存JSON"""
+        self._current_batch.append(case)
+        if len(self._current_batch) >= self.batch_size:
+            self._flush_batch()
+    
+    def _flush_batch(self):
+        """保存当前批次并开始新批次"""
+        if self._current_batch:
+            self._save_batch(self._current_batch, self._batch_num)
+            self._current_batch = []
+            self._batch_num += 1
+    
+    def _finish_stage_stats(self):
+        """结束阶段计时并写入统计信息"""
+        for stage in self._stage_stats.values():
+            if stage.end_time is None:
+                stage.mark_finished()
+        self.stats['stage_stats'] = {name: stage.to_dict() for name, stage in self._stage_stats.items()}
+        if self.rate_controller:
+            self.stats['rate_control'] = self.rate_controller.get_stats()
+        if self.token_cache:
+            self.stats['token_cache'] = self.token_cache.get_stats()
     
     def _check_progress_and_pause(self):
         """检查进度并处理暂停逻辑"""
+        if self.rate_controller:
+            self.stats['rate_control'] = self.rate_controller.get_stats()
+        if self.token_cache:
+            self.stats['token_cache'] = self.token_cache.get_stats()
+        
         # 更新断点续传文件
         if self.enable_resume:
             save_resume_file(self.resume_file, self.crawled_ids)
@@ -349,6 +552,28 @@ class CrawlStage:
                 # 如果回调抛出 KeyboardInterrupt，重新抛出以中断爬取
                 raise
     
+    def _get_known_case_ids(self, case_ids: List[int]) -> Set[int]:
+        """
+        获取已知的案例ID（本任务已成功保存、跨任务索引、已入库或已成功爬取）
+        
+        爬取失败和验证失败的案例不算已知，需要重新爬取，也不计入连续已知页数
+        
+        Args:
+            case_ids: 本页案例ID列表
+            
+        Returns:
+            已知的案例ID集合
+        """
+        known = {case_id for case_id in case_ids if case_id in self.success_ids}
+        if self.seen_index:
+            known.update(case_id for case_id in case_ids if self.seen_index.contains(case_id))
+        
+        unknown = [case_id for case_id in case_ids if case_id not in known]
+        if unknown:
+            from app.services.crawl_task_executor_sync_db import SyncDatabase
+            known.update(SyncDatabase.get_known_case_ids(unknown))
+        return known
+    
     def _save_batch(self, batch: List[Dict[str, Any]], batch_num: int) -> bool:
         """
         保存批次数据到JSON文件
@@ -374,6 +599,7 @@ class CrawlStage:
         # 保存JSON
         if save_json(output_data, file_path):
             self.stats['total_saved'] += len(batch)
+            CRAWL_CASES.inc(len(batch), result='saved')
             self.stats['batches_saved'] += 1
             
             # 更新已保存的ID集合
@@ -381,6 +607,17 @@ class CrawlStage:
                 case_id = case.get('case_id')
                 if case_id:
                     self.saved_ids.add(case_id)
+                    if 'error' not in case and 'validation_error' not in case:
+                        self.success_ids.add(case_id)
+            
+            # 成功爬取的案例写入跨任务索引（失败和验证失败的案例允许其它任务重新爬取）
+            if self.seen_index:
+                self.seen_index.mark_seen(
+                    [case.get('case_id') for case in batch
+                     if 'error' not in case and 'validation_error' not in case],
+                    data_source=self.data_source,
+                    task_id=self.task_id
+                )
             
             logger.info(f"批次 {batch_num} 已保存: {file_path} ({len(batch)} 个案例)")
             return True
@@ -415,302 +652,109 @@ class CrawlStage:
         # 导入同步数据库类
         from app.services.crawl_task_executor_sync_db import SyncDatabase
         
-        logger.info(f"开始流式获取案例列表")
-        logger.info(f"  - 起始页: {start_page}")
-        logger.info(f"  - 最大页数: {max_pages if max_pages is not None else '无限制（爬取到最后一页）'}")
-        logger.info(f"  - API客户端已初始化: {self.api_client is not None}")
-        
-        # 如果 max_pages 为 None，表示爬取到最后一页
-        if max_pages is None:
-            # 无限循环，直到没有更多数据
-            while True:
-                page_start_time = time.time()
-                logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                logger.info(f"开始获取第 {page} 页数据")
-                logger.info(f"请求时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                # 创建列表页记录
-                SyncDatabase.create_list_page_record(self.task_id, page)
+        logger.info(
+            f"开始流式获取案例列表: 起始页 {start_page}，"
+            f"最大页数 {max_pages if max_pages is not None else '无限制（爬取到最后一页）'}"
+        )
+        
+        # max_pages 为 None 表示爬取到最后一页（直到没有更多数据）
+        max_empty_retries = 3
+        while max_pages is None or page < start_page + max_pages:
+            page_start_time = time.time()
+            
+            # 创建列表页记录
+            SyncDatabase.create_list_page_record(self.task_id, page)
+            
+            try:
+                # 获取当前页数据
+                data = self.api_client.get_creative_list(page, case_type=case_type)
                 
-                try:
-                    # 获取当前页数据
-                    logger.info(f"正在请求API: page={page}, case_type={case_type}")
-                    data = self.api_client.get_creative_list(page, case_type=case_type)
-                    logger.info(f"API请求成功，响应数据类型: {type(data).__name__}")
-                    
-                    # 解析返回数据
+                if not isinstance(data, dict) or not isinstance(data.get('data'), dict):
+                    # 返回数据不是字典，或 data 字段不是字典
                     if isinstance(data, dict):
-                        logger.info(f"响应数据结构检查:")
-                        logger.info(f"  - 是否为字典: ✓")
-                        logger.info(f"  - 包含 'data' 键: {'✓' if 'data' in data else '✗'}")
-                        
-                        # 检查数据结构
-                        if 'data' in data and isinstance(data['data'], dict):
-                            logger.info(f"  - 'data' 是字典: ✓")
-                            items = data['data'].get('items', [])
-                            logger.info(f"  - 'items' 数量: {len(items)}")
-                            
-                            # 检查API返回的状态码
-                            if 'code' in data:
-                                api_code = data.get('code')
-                                api_message = data.get('message', '')
-                                logger.info(f"  - API状态码: {api_code}")
-                                if api_message:
-                                    logger.info(f"  - API消息: {api_message}")
-                            
-                            if not items:
-                                logger.warning(f"⚠️ 第 {page} 页返回空数据（items为空）")
-                                logger.warning(f"  响应数据键: {list(data.keys())}")
-                                if 'data' in data:
-                                    logger.warning(f"  data 键: {list(data['data'].keys())}")
-                                # 记录完整的响应数据用于诊断（限制长度）
-                                data_str = str(data)
-                                if len(data_str) > 1000:
-                                    logger.warning(f"  响应数据预览（前1000字符）: {data_str[:1000]}")
-                                else:
-                                    logger.warning(f"  完整响应数据: {data_str}")
-                                
-                                # 对于空数据，尝试重试（最多3次）
-                                max_empty_retries = 3
-                                empty_retry_count = getattr(self, '_empty_retry_count', {}).get(page, 0)
-                                
-                                if empty_retry_count < max_empty_retries:
-                                    empty_retry_count += 1
-                                    if not hasattr(self, '_empty_retry_count'):
-                                        self._empty_retry_count = {}
-                                    self._empty_retry_count[page] = empty_retry_count
-                                    
-                                    logger.warning(f"  检测到空数据，准备重试（第 {empty_retry_count}/{max_empty_retries} 次）...")
-                                    logger.warning(f"  等待 5 秒后重试...")
-                                    time.sleep(5)  # 等待5秒后重试
-                                    continue  # 重新请求当前页
-                                else:
-                                    logger.warning(f"  已达到最大重试次数 {max_empty_retries}，停止重试")
-                                    # 更新为成功状态（0个案例）
-                                    duration = time.time() - page_start_time
-                                    SyncDatabase.update_list_page_success(
-                                        self.task_id, page, 0, duration
-                                    )
-                                    logger.info(f"第 {page} 页处理完成（0个案例），停止获取")
-                                    break
-                            
-                            # 如果成功获取到数据，重置该页的重试计数
-                            if hasattr(self, '_empty_retry_count') and page in self._empty_retry_count:
-                                del self._empty_retry_count[page]
-                            
-                            duration = time.time() - page_start_time
-                            logger.info(f"✓ 第 {page} 页获取成功:")
-                            logger.info(f"  - 本页案例数: {len(items)}")
-                            logger.info(f"  - 请求耗时: {duration:.2f} 秒")
-                            
-                            # 更新为成功状态
-                            SyncDatabase.update_list_page_success(
-                                self.task_id, page, len(items), duration
-                            )
-                            
-                            # 立即 yield 这一页的数据（流式处理）
-                            # 注意：yield 会暂停生成器，等待调用者处理完当前页数据后才会继续
-                            logger.info(f"  → 准备 yield 第 {page} 页数据（{len(items)} 个案例）")
-                            yield items, page
-                            logger.info(f"  ← 第 {page} 页数据处理完成，继续获取下一页")
-                            
-                            # 等待后再请求下一页（在 yield 之后，确保当前页已处理）
-                            # 注意：这个等待会在调用者处理完当前页数据后执行
-                            self.api_client._wait()
-                            page += 1
-                            
-                        else:
-                            logger.error(f"✗ 第 {page} 页数据格式异常")
-                            logger.error(f"  响应数据类型: {type(data).__name__}")
-                            logger.error(f"  响应数据键: {list(data.keys()) if isinstance(data, dict) else 'N/A'}")
-                            if isinstance(data, dict) and 'data' in data:
-                                logger.error(f"  'data' 类型: {type(data['data']).__name__}")
-                                if isinstance(data['data'], dict):
-                                    logger.error(f"  'data' 键: {list(data['data'].keys())}")
-                            logger.error(f"  原始响应数据（前500字符）: {str(data)[:500]}")
-                            duration = time.time() - page_start_time
-                            error_msg = f"数据格式异常: data字段不是字典或不存在"
-                            SyncDatabase.update_list_page_failed(
-                                self.task_id, page, 
-                                error_msg,
-                                'parse_error', duration
-                            )
-                            break
+                        error_msg = "数据格式异常: data字段不是字典或不存在"
                     else:
-                        logger.error(f"✗ 第 {page} 页返回数据不是字典格式")
-                        logger.error(f"  响应数据类型: {type(data).__name__}")
-                        logger.error(f"  响应数据内容（前500字符）: {str(data)[:500]}")
-                        duration = time.time() - page_start_time
-                        SyncDatabase.update_list_page_failed(
-                            self.task_id, page,
-                            f"返回数据不是字典格式，实际类型: {type(data).__name__}",
-                            'parse_error', duration
-                        )
-                        break
-                    
-                except Exception as e:
-                    logger.error(f"获取第{page}页时发生错误: {e}")
-                    duration = time.time() - page_start_time
-                    # 确定错误类型
-                    error_type = 'network_error'
-                    if 'SSL' in str(e) or 'SSLError' in str(type(e).__name__):
-                        error_type = 'network_error'
-                    elif 'JSON' in str(e) or 'JSONDecodeError' in str(type(e).__name__):
-                        error_type = 'parse_error'
-                    elif 'timeout' in str(e).lower() or 'Timeout' in str(type(e).__name__):
-                        error_type = 'timeout_error'
-                    
+                        error_msg = f"返回数据不是字典格式，实际类型: {type(data).__name__}"
+                    CRAWL_LIST_PAGES.inc(result='failed')
+                    log_event(
+                        logger, 'list_page_failed', logging.ERROR,
+                        page=page, error_type='parse_error', error=error_msg, body=str(data)
+                    )
                     SyncDatabase.update_list_page_failed(
                         self.task_id, page,
-                        str(e), error_type, duration
+                        error_msg,
+                        'parse_error', time.time() - page_start_time
                     )
-                    # 停止获取，避免无限循环
                     break
-        else:
-            # max_pages 不为 None，有页数限制
-            while page < start_page + max_pages:
-                page_start_time = time.time()
-                logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                logger.info(f"开始获取第 {page} 页数据")
-                logger.info(f"请求时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 
-                # 创建列表页记录
-                SyncDatabase.create_list_page_record(self.task_id, page)
+                items = data['data'].get('items', [])
                 
-                try:
-                    # 获取当前页数据
-                    logger.info(f"正在请求API: page={page}, case_type={case_type}")
-                    data = self.api_client.get_creative_list(page, case_type=case_type)
-                    logger.info(f"API请求成功，响应数据类型: {type(data).__name__}")
-                    
-                    # 解析返回数据
-                    if isinstance(data, dict):
-                        logger.info(f"响应数据结构检查:")
-                        logger.info(f"  - 是否为字典: ✓")
-                        logger.info(f"  - 包含 'data' 键: {'✓' if 'data' in data else '✗'}")
-                        
-                        # 检查数据结构
-                        if 'data' in data and isinstance(data['data'], dict):
-                            logger.info(f"  - 'data' 是字典: ✓")
-                            items = data['data'].get('items', [])
-                            logger.info(f"  - 'items' 数量: {len(items)}")
-                            
-                            # 检查API返回的状态码
-                            if 'code' in data:
-                                api_code = data.get('code')
-                                api_message = data.get('message', '')
-                                logger.info(f"  - API状态码: {api_code}")
-                                if api_message:
-                                    logger.info(f"  - API消息: {api_message}")
-                            
-                            if not items:
-                                logger.warning(f"⚠️ 第 {page} 页返回空数据（items为空）")
-                                logger.warning(f"  响应数据键: {list(data.keys())}")
-                                if 'data' in data:
-                                    logger.warning(f"  data 键: {list(data['data'].keys())}")
-                                # 记录完整的响应数据用于诊断（限制长度）
-                                data_str = str(data)
-                                if len(data_str) > 1000:
-                                    logger.warning(f"  响应数据预览（前1000字符）: {data_str[:1000]}")
-                                else:
-                                    logger.warning(f"  完整响应数据: {data_str}")
-                                
-                                # 对于空数据，尝试重试（最多3次）
-                                max_empty_retries = 3
-                                empty_retry_count = getattr(self, '_empty_retry_count', {}).get(page, 0)
-                                
-                                if empty_retry_count < max_empty_retries:
-                                    empty_retry_count += 1
-                                    if not hasattr(self, '_empty_retry_count'):
-                                        self._empty_retry_count = {}
-                                    self._empty_retry_count[page] = empty_retry_count
-                                    
-                                    logger.warning(f"  检测到空数据，准备重试（第 {empty_retry_count}/{max_empty_retries} 次）...")
-                                    logger.warning(f"  等待 5 秒后重试...")
-                                    time.sleep(5)  # 等待5秒后重试
-                                    continue  # 重新请求当前页
-                                else:
-                                    logger.warning(f"  已达到最大重试次数 {max_empty_retries}，停止重试")
-                                    duration = time.time() - page_start_time
-                                    SyncDatabase.update_list_page_success(
-                                        self.task_id, page, 0, duration
-                                    )
-                                    logger.info(f"第{page}页没有更多数据，停止获取")
-                                    break
-                            
-                            # 如果成功获取到数据，重置该页的重试计数
-                            if hasattr(self, '_empty_retry_count') and page in self._empty_retry_count:
-                                del self._empty_retry_count[page]
-                            
-                            duration = time.time() - page_start_time
-                            logger.info(f"✓ 第 {page} 页获取成功:")
-                            logger.info(f"  - 本页案例数: {len(items)}")
-                            logger.info(f"  - 请求耗时: {duration:.2f} 秒")
-                            
-                            # 更新为成功状态
-                            SyncDatabase.update_list_page_success(
-                                self.task_id, page, len(items), duration
-                            )
-                            
-                            # 立即 yield 这一页的数据（流式处理）
-                            # 注意：yield 会暂停生成器，等待调用者处理完当前页数据后才会继续
-                            logger.info(f"  → 准备 yield 第 {page} 页数据（{len(items)} 个案例）")
-                            yield items, page
-                            logger.info(f"  ← 第 {page} 页数据处理完成，继续获取下一页")
-                            
-                            # 等待后再请求下一页（在 yield 之后，确保当前页已处理）
-                            # 注意：这个等待会在调用者处理完当前页数据后执行
-                            self.api_client._wait()
-                            page += 1
-                            
-                        else:
-                            logger.error(f"✗ 第 {page} 页数据格式异常")
-                            logger.error(f"  响应数据类型: {type(data).__name__}")
-                            logger.error(f"  响应数据键: {list(data.keys()) if isinstance(data, dict) else 'N/A'}")
-                            if isinstance(data, dict) and 'data' in data:
-                                logger.error(f"  'data' 类型: {type(data['data']).__name__}")
-                                if isinstance(data['data'], dict):
-                                    logger.error(f"  'data' 键: {list(data['data'].keys())}")
-                            logger.error(f"  原始响应数据（前500字符）: {str(data)[:500]}")
-                            duration = time.time() - page_start_time
-                            error_msg = f"数据格式异常: data字段不是字典或不存在"
-                            SyncDatabase.update_list_page_failed(
-                                self.task_id, page, 
-                                error_msg,
-                                'parse_error', duration
-                            )
-                            break
-                    else:
-                        logger.error(f"✗ 第 {page} 页返回数据不是字典格式")
-                        logger.error(f"  响应数据类型: {type(data).__name__}")
-                        logger.error(f"  响应数据内容（前500字符）: {str(data)[:500]}")
-                        duration = time.time() - page_start_time
-                        SyncDatabase.update_list_page_failed(
-                            self.task_id, page,
-                            f"返回数据不是字典格式，实际类型: {type(data).__name__}",
-                            'parse_error', duration
+                if not items:
+                    # 对于空数据，尝试重试（最多3次）
+                    empty_retry_count = self._empty_retry_count.get(page, 0)
+                    if empty_retry_count < max_empty_retries:
+                        self._empty_retry_count[page] = empty_retry_count + 1
+                        log_event(
+                            logger, 'list_page_empty', logging.WARNING,
+                            page=page, attempt=empty_retry_count + 1, max_attempts=max_empty_retries,
+                            api_code=data.get('code'), body=str(data)
                         )
-                        break
+                        time.sleep(5)  # 等待5秒后重试
+                        continue  # 重新请求当前页
                     
-                except Exception as e:
-                    logger.error(f"获取第{page}页时发生错误: {e}")
+                    # 已达到最大重试次数，更新为成功状态（0个案例）
+                    CRAWL_LIST_PAGES.inc(result='empty')
                     duration = time.time() - page_start_time
-                    # 确定错误类型
-                    error_type = 'network_error'
-                    if 'SSL' in str(e) or 'SSLError' in str(type(e).__name__):
-                        error_type = 'network_error'
-                    elif 'JSON' in str(e) or 'JSONDecodeError' in str(type(e).__name__):
-                        error_type = 'parse_error'
-                    elif 'timeout' in str(e).lower() or 'Timeout' in str(type(e).__name__):
-                        error_type = 'timeout_error'
-                    
-                    SyncDatabase.update_list_page_failed(
-                        self.task_id, page,
-                        str(e), error_type, duration
+                    SyncDatabase.update_list_page_success(
+                        self.task_id, page, 0, duration
                     )
-                    # 可以选择继续或停止
-                    # 这里选择停止，避免无限循环
+                    logger.info(f"第 {page} 页没有更多数据（已重试 {max_empty_retries} 次），停止获取")
                     break
+                
+                # 如果成功获取到数据，重置该页的重试计数
+                self._empty_retry_count.pop(page, None)
+                
+                duration = time.time() - page_start_time
+                CRAWL_LIST_PAGES.inc(result='success')
+                log_event(logger, 'list_page', page=page, items=len(items), ms=round(duration * 1000, 1))
+                
+                # 更新为成功状态
+                SyncDatabase.update_list_page_success(
+                    self.task_id, page, len(items), duration
+                )
+                
+                # 立即 yield 这一页的数据（流式处理）
+                # 注意：yield 会暂停生成器，等待调用者处理完当前页数据后才会继续
+                yield items, page
+                
+                # 等待后再请求下一页（在 yield 之后，确保当前页已处理）
+                # 注意：这个等待会在调用者处理完当前页数据后执行
+                self.api_client._wait()
+                page += 1
+                
+            except Exception as e:
+                duration = time.time() - page_start_time
+                # 确定错误类型
+                error_type = 'network_error'
+                if 'SSL' in str(e) or 'SSLError' in str(type(e).__name__):
+                    error_type = 'network_error'
+                elif 'JSON' in str(e) or 'JSONDecodeError' in str(type(e).__name__):
+                    error_type = 'parse_error'
+                elif 'timeout' in str(e).lower() or 'Timeout' in str(type(e).__name__):
+                    error_type = 'timeout_error'
+                
+                CRAWL_LIST_PAGES.inc(result='failed')
+                log_event(
+                    logger, 'list_page_failed', logging.ERROR,
+                    page=page, error_type=error_type, error=f"{type(e).__name__}: {e}",
+                    ms=round(duration * 1000, 1)
+                )
+                SyncDatabase.update_list_page_failed(
+                    self.task_id, page,
+                    str(e), error_type, duration
+                )
+                # 停止获取，避免无限循环
+                break
     
     def _get_list_items_with_status_recording(
         self, start_page: int, max_pages: Optional[int], case_type: int = 1
@@ -748,6 +792,23 @@ class CrawlStage:
                 return None
             
             logger.info("初始化代理管理器...")
+            
+            # 进程内共享的节点池：所有任务共用探测结果，每个任务分配固定节点
+            proxy_pool = None
+            if settings.CLASH_PROXY_POOL_ENABLED:
+                proxy_pool = get_proxy_pool(
+                    api_url=settings.CLASH_API_URL,
+                    secret=settings.CLASH_SECRET,
+                    proxy_group=settings.CLASH_PROXY_GROUP,
+                    probe_url=settings.CLASH_PROBE_URL,
+                    probe_timeout_ms=settings.CLASH_PROBE_TIMEOUT_MS,
+                    probe_interval=settings.CLASH_PROBE_INTERVAL_SECONDS,
+                    probe_concurrency=settings.CLASH_PROBE_CONCURRENCY,
+                    node_ports=parse_node_ports(settings.CLASH_NODE_PORTS),
+                    proxy_host=settings.CLASH_PROXY_HOST,
+                    min_switch_interval=settings.CLASH_MIN_SWITCH_SECONDS,
+                )
+            
             proxy_manager = ProxyManager(
                 api_url=settings.CLASH_API_URL,
                 secret=settings.CLASH_SECRET,
@@ -756,6 +817,8 @@ class CrawlStage:
                 switch_interval=settings.CLASH_SWITCH_INTERVAL,
                 switch_interval_minutes=settings.CLASH_SWITCH_INTERVAL_MINUTES,
                 auto_switch_on_error=settings.CLASH_AUTO_SWITCH_ON_ERROR,
+                proxy_pool=proxy_pool,
+                worker_id=self.task_id,
             )
             logger.info("代理管理器初始化成功")
             return proxy_manager
@@ -771,10 +834,6 @@ class CrawlStage:
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
         return self.stats.copy()
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """获取统计信息"""
-        return self.stats.copy()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,878 @@
+#!/usr/bin/env python3
+"""
+分布式爬取工作进程
+多个工作进程（可在不同机器上）通过 Postgres 协同爬取同一个任务：
+- 列表页和案例分别记录在 crawl_list_pages / crawl_case_records 中，工作进程用
+  FOR UPDATE SKIP LOCKED 认领，认领时写入租约（lease_owner / lease_expires_at）；
+- 后台心跳线程定期为本进程持有的租约续期，进程崩溃后租约过期，其它进程可重新认领；
+- 列表页爬取后把案例写入 crawl_case_records（pending），任意工作进程都可以认领详情页；
+- 爬取结果写入与 CrawlStage 相同的批次文件（cases_batch_NNNN.json），批次号由数据库分配，
+  也可以在保存后直接入库；
+- 失败的列表页/案例按指数退避加随机抖动安排下次重试时间（next_retry_at），超过最大重试次数后
+  进入死信（dead_letter）。retry_only 模式只重试已有任务中失败的工作项，不重新爬取整个页码范围
+"""
+
+import os
+import socket
+import time
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import psycopg2
+import requests
+from psycopg2.extras import RealDictCursor, Json, execute_batch
+
+from ..spider.api_client import AdquanAPIClient
+from ..spider.detail_parser import DetailPageParser
+from ..spider.html_archive import HtmlArchive
+from ..spider.rate_controller import get_rate_controller
+from ..spider.token_cache import get_token_cache
+from .utils import save_json, format_batch_filename, merge_case_data
+from .validator import CaseValidator
+from ..metrics import CRAWL_LIST_PAGES, CRAWL_CASES
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_JSON = 'json'
+OUTPUT_DB = 'db'
+OUTPUT_MODES = (OUTPUT_JSON, OUTPUT_DB)
+
+# 可认领：pending；failed 且未超过最大重试次数、已到重试时间；claimed 但租约已过期（工作进程崩溃）
+_CLAIMABLE_CONDITION = """
+    status = 'pending'
+    OR (status = 'failed' AND retry_count < %(max_retries)s
+        AND (next_retry_at IS NULL OR next_retry_at <= CURRENT_TIMESTAMP))
+    OR (status = 'claimed' AND lease_expires_at < CURRENT_TIMESTAMP AND retry_count < %(max_retries)s)
+"""
+
+# 下次重试时间：min(最大间隔, 基础间隔 × 2^已重试次数)，再乘以 0.5~1 的随机系数（避免同时失败的工作项同时重试）
+_NEXT_RETRY_AT = """
+    CURRENT_TIMESTAMP + make_interval(secs => LEAST(%(retry_max_delay)s, %(retry_base_delay)s * power(2, retry_count))
+                                              * (0.5 + random() / 2))
+"""
+
+_CLAIM_SET = """
+    status = 'claimed',
+    lease_owner = %(worker)s,
+    lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %(lease_seconds)s),
+    heartbeat_at = CURRENT_TIMESTAMP,
+    retry_count = CASE WHEN status = 'pending' THEN retry_count ELSE retry_count + 1 END,
+    last_retry_at = CASE WHEN status = 'pending' THEN last_retry_at ELSE CURRENT_TIMESTAMP END,
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class CrawlWorker:
+    """分布式爬取工作进程"""
+
+    def __init__(
+        self,
+        db_config: Dict[str, Any],
+        task_id: str,
+        output: str = OUTPUT_JSON,
+        output_dir: Optional[Path] = None,
+        batch_size: int = 30,
+        lease_seconds: int = 300,
+        heartbeat_seconds: int = 30,
+        max_retries: int = 3,
+        claim_size: int = 5,
+        idle_seconds: float = 10.0,
+        parser_backend: Optional[str] = None,
+        archive_html: bool = False,
+        adaptive_rate: bool = True,
+        max_rate: Optional[float] = None,
+        worker_name: Optional[str] = None,
+        retry_only: bool = False,
+        retry_base_delay: float = 30.0,
+        retry_max_delay: float = 1800.0
+    ):
+        """
+        初始化工作进程
+
+        Args:
+            db_config: 数据库配置字典（host/port/database/user/password）
+            task_id: 爬取任务ID（任务需已创建，状态为 pending 或 running）
+            output: 输出方式，json 只写批次文件，db 写批次文件后直接入库
+            output_dir: 批次文件目录（默认 data/json/<task_id>，多台机器时应为共享目录）
+            batch_size: 每个批次文件的案例数
+            lease_seconds: 认领租约时长（秒），超过该时间没有心跳的认领可被其它进程接手
+            heartbeat_seconds: 心跳续约间隔（秒），应明显小于 lease_seconds
+            max_retries: 失败或租约过期的列表页/案例最多重新认领的次数
+            claim_size: 每次认领的案例数
+            idle_seconds: 暂时没有可认领的工作（其它进程仍持有租约或任务已暂停）时的等待间隔（秒）
+            parser_backend: HTML 解析后端（html.parser / lxml）
+            archive_html: 是否归档抓取到的 HTML（写入 <output_dir>/html_archive）
+            adaptive_rate: 是否启用自适应速率控制（每个进程独立控制，进程数多时应相应调低 max_rate）
+            max_rate: 本进程最高请求速率（请求/秒），默认使用速率控制器的默认值
+            worker_name: 工作进程名称（默认 主机名:进程号）
+            retry_only: 只重试失败的工作项（任务已由后端执行过，不生成列表页、不修改任务状态）
+            retry_base_delay: 重试退避的基础间隔（秒）
+            retry_max_delay: 重试退避的最大间隔（秒）
+        """
+        if output not in OUTPUT_MODES:
+            raise ValueError(f"不支持的输出方式: {output}，可选: {', '.join(OUTPUT_MODES)}")
+        if heartbeat_seconds >= lease_seconds:
+            raise ValueError("心跳间隔必须小于租约时长")
+
+        self.db_config = db_config
+        self.task_id = task_id
+        self.output = output
+        self.output_dir = Path(output_dir) if output_dir else Path('data/json') / task_id
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_retries = max_retries
+        self.claim_size = max(1, claim_size)
+        self.idle_seconds = idle_seconds
+        self.parser_backend = parser_backend
+        self.archive_html = archive_html
+        self.adaptive_rate = adaptive_rate
+        self.max_rate = max_rate
+        self.worker_name = worker_name or _worker_name()
+        self.retry_only = retry_only
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self.conn = None
+        self.task: Optional[Dict[str, Any]] = None
+        self.api_client: Optional[AdquanAPIClient] = None
+        self.detail_parser: Optional[DetailPageParser] = None
+        self.validator = CaseValidator()
+        self.rate_budget = None
+        self._import_stage = None
+
+        # 已爬取、等待写入批次文件的案例：(记录ID, 案例数据, 耗时, 是否为重试成功)
+        self._batch: List[tuple] = []
+
+        self._stop_requested = threading.Event()
+        self._stop_event = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'list_pages': 0,
+            'list_pages_failed': 0,
+            'cases_crawled': 0,
+            'cases_failed': 0,
+            'cases_recovered': 0,
+            'dead_lettered': 0,
+            'validation_failed': 0,
+            'batches_saved': 0,
+            'cases_imported': 0,
+            'lease_renewals': 0,
+            'start_time': None,
+            'end_time': None,
+        }
+
+    # ------------------------------------------------------------
+    # 主流程
+    # ------------------------------------------------------------
+
+    def run(self) -> Dict[str, Any]:
+        """
+        认领并处理任务的列表页和案例，直到任务没有剩余工作、被取消或终止
+
+        Returns:
+            统计信息
+        """
+        self.stats['start_time'] = datetime.now()
+        self.conn = psycopg2.connect(**self.db_config)
+        try:
+            if not self._prepare_task():
+                return self.stats
+            self._init_components()
+            self._start_heartbeat()
+
+            logger.info(f"工作进程 {self.worker_name} 开始处理任务 {self.task_id}（输出: {self.output}，目录: {self.output_dir}）")
+            while not self._stop_requested.is_set():
+                status = self._get_task_status()
+                if status is None or status in self._exit_statuses():
+                    logger.info(f"任务状态为 {status}，工作进程退出")
+                    break
+                if status == 'paused' and not self.retry_only:
+                    self._flush_batch()
+                    self._stop_requested.wait(self.idle_seconds)
+                    continue
+
+                records = self._claim_cases()
+                if records:
+                    for record in records:
+                        self._process_case(record)
+                    continue
+
+                page = self._claim_list_page()
+                if page:
+                    self._process_list_page(page)
+                    continue
+
+                # 没有可认领的工作：先保存手上的案例，其它进程的工作也全部结束时任务完成
+                self._flush_batch()
+                if self._remaining_work() == 0:
+                    if not self.retry_only:
+                        self._complete_task()
+                    break
+                # 等待其它进程持有的工作项或下一个到期的重试
+                wait = self.idle_seconds
+                next_retry = self._seconds_until_next_retry()
+                if next_retry is not None:
+                    wait = min(max(next_retry, 1.0), 60.0 if self.retry_only else self.idle_seconds)
+                self._stop_requested.wait(wait)
+        except KeyboardInterrupt:
+            logger.info("收到中断信号，保存已爬取的案例并释放租约")
+        finally:
+            try:
+                self._flush_batch()
+            finally:
+                self._stop_heartbeat()
+                self._release_leases()
+                if self.rate_budget is not None:
+                    self.rate_budget.close()
+                self.conn.close()
+                self.stats['end_time'] = datetime.now()
+
+        logger.info(
+            f"工作进程 {self.worker_name} 结束: 列表页 {self.stats['list_pages']}，"
+            f"案例 {self.stats['cases_crawled']}（重试成功 {self.stats['cases_recovered']}），"
+            f"死信 {self.stats['dead_lettered']}，批次 {self.stats['batches_saved']}"
+        )
+        return self.stats
+
+    def stop(self):
+        """请求停止（处理完当前工作项后保存批次、释放租约并退出）"""
+        self._stop_requested.set()
+
+    def _exit_statuses(self) -> tuple:
+        if self.retry_only:
+            # 任务被重新执行或取消时停止重试
+            return ('cancelled', 'queued', 'running')
+        return ('cancelled', 'terminated', 'failed', 'completed')
+
+    def _prepare_task(self) -> bool:
+        """加载任务并生成列表页工作项"""
+        cur = self.conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute("SELECT * FROM crawl_tasks WHERE task_id = %s", (self.task_id,))
+            self.task = cur.fetchone()
+            if not self.task:
+                logger.error(f"任务不存在: {self.task_id}")
+                return False
+            if self.retry_only:
+                if self.task['status'] in self._exit_statuses():
+                    logger.error(f"任务状态为 {self.task['status']}，无法重试失败的工作项")
+                    return False
+                return True
+            if self.task['status'] not in ('pending', 'running', 'paused'):
+                logger.error(f"任务状态为 {self.task['status']}，无法由工作进程执行")
+                return False
+
+            cur.execute(
+                """
+                UPDATE crawl_tasks
+                SET status = 'running', started_at = COALESCE(started_at, CURRENT_TIMESTAMP), updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = %s AND status = 'pending'
+                """,
+                (self.task_id,)
+            )
+
+            # 有结束页时一次生成全部列表页；爬取到最后一页时只生成起始页，之后每页成功后生成下一页
+            start_page = self.task['start_page'] or 0
+            end_page = self.task['end_page'] if self.task['end_page'] is not None else start_page
+            cur.execute(
+                """
+                INSERT INTO crawl_list_pages (task_id, page_number, status)
+                SELECT %s, page_number, 'pending' FROM generate_series(%s, %s) AS page_number
+                ON CONFLICT (task_id, page_number) DO NOTHING
+                """,
+                (self.task_id, start_page, end_page)
+            )
+            if self.task['end_page'] is not None:
+                cur.execute(
+                    "UPDATE crawl_tasks SET total_pages = %s WHERE task_id = %s",
+                    (end_page - start_page + 1, self.task_id)
+                )
+            self.conn.commit()
+            return True
+        finally:
+            cur.close()
+
+    def _init_components(self):
+        """创建 API 客户端和详情页解析器"""
+        rate_controller = None
+        if self.adaptive_rate:
+            rate_kwargs = {'max_rate': self.max_rate} if self.max_rate else {}
+            rate_controller = get_rate_controller(self.task['data_source'] or 'adquan', **rate_kwargs)
+            self.rate_budget = rate_controller.register(self.worker_name)
+
+        html_archive = HtmlArchive(self.output_dir / 'html_archive') if self.archive_html else None
+        self.api_client = AdquanAPIClient(
+            html_archive=html_archive,
+            parser_backend=self.parser_backend,
+            rate_controller=self.rate_budget,
+            token_cache=get_token_cache(rate_controller=rate_controller)
+        )
+        self.detail_parser = DetailPageParser(
+            session=self.api_client.session,
+            html_archive=html_archive,
+            parser_backend=self.parser_backend,
+            rate_controller=self.rate_budget
+        )
+
+    def _get_task_status(self) -> Optional[str]:
+        cur = self.conn.cursor()
+        try:
+            cur.execute("SELECT status FROM crawl_tasks WHERE task_id = %s", (self.task_id,))
+            row = cur.fetchone()
+            self.conn.commit()
+            return row[0] if row else None
+        finally:
+            cur.close()
+
+    # ------------------------------------------------------------
+    # 认领
+    # ------------------------------------------------------------
+
+    def _claim_params(self, **extra) -> Dict[str, Any]:
+        return {
+            'task_id': self.task_id,
+            'worker': self.worker_name,
+            'lease_seconds': self.lease_seconds,
+            'max_retries': self.max_retries,
+            'retry_base_delay': self.retry_base_delay,
+            'retry_max_delay': self.retry_max_delay,
+            **extra
+        }
+
+    def _claim_cases(self) -> List[Dict[str, Any]]:
+        """认领一组待爬取的案例"""
+        cur = self.conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                f"""
+                UPDATE crawl_case_records
+                SET {_CLAIM_SET}
+                WHERE id IN (
+                    SELECT id FROM crawl_case_records
+                    WHERE task_id = %(task_id)s AND ({_CLAIMABLE_CONDITION})
+                    ORDER BY id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT %(limit)s
+                )
+                RETURNING id, case_id, case_url, case_title, list_item, retry_count
+                """,
+                self._claim_params(limit=self.claim_size)
+            )
+            rows = cur.fetchall()
+            self.conn.commit()
+            return rows
+        finally:
+            cur.close()
+
+    def _claim_list_page(self) -> Optional[Dict[str, Any]]:
+        """认领下一个待爬取的列表页"""
+        cur = self.conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cur.execute(
+                f"""
+                UPDATE crawl_list_pages
+                SET {_CLAIM_SET}
+                WHERE id = (
+                    SELECT id FROM crawl_list_pages
+                    WHERE task_id = %(task_id)s AND ({_CLAIMABLE_CONDITION})
+                    ORDER BY page_number
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING id, page_number, retry_count
+                """,
+                self._claim_params()
+            )
+            row = cur.fetchone()
+            self.conn.commit()
+            return row
+        finally:
+            cur.close()
+
+    def _remaining_work(self) -> int:
+        """
+        统计任务剩余的工作项（包括其它进程持有租约的）
+
+        已达到最大重试次数的失败工作项和租约多次过期的工作项不会再被认领，先将其移入死信
+        """
+        params = self._claim_params()
+        cur = self.conn.cursor()
+        try:
+            remaining = 0
+            for table in ('crawl_list_pages', 'crawl_case_records'):
+                cur.execute(
+                    f"""
+                    UPDATE {table}
+                    SET status = 'dead_letter', dead_lettered_at = CURRENT_TIMESTAMP, next_retry_at = NULL,
+                        error_type = CASE WHEN status = 'claimed' THEN 'lease_expired' ELSE error_type END,
+                        error_message = CASE WHEN status = 'claimed'
+                            THEN '认领租约多次过期（工作进程崩溃或处理超时）' ELSE error_message END,
+                        lease_owner = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                    WHERE task_id = %(task_id)s AND retry_count >= %(max_retries)s
+                    AND (status = 'failed' OR (status = 'claimed' AND lease_expires_at < CURRENT_TIMESTAMP))
+                    """,
+                    params
+                )
+                self.stats['dead_lettered'] += cur.rowcount
+                cur.execute(
+                    f"""
+                    SELECT COUNT(*) FROM {table}
+                    WHERE task_id = %(task_id)s
+                    AND (status IN ('pending', 'claimed') OR (status = 'failed' AND retry_count < %(max_retries)s))
+                    """,
+                    params
+                )
+                remaining += cur.fetchone()[0]
+            self.conn.commit()
+            return remaining
+        finally:
+            cur.close()
+
+    def _seconds_until_next_retry(self) -> Optional[float]:
+        """距离最近一个失败工作项到达重试时间的秒数（没有待重试的工作项时返回 None）"""
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                """
+                SELECT EXTRACT(EPOCH FROM MIN(next_retry_at) - CURRENT_TIMESTAMP) FROM (
+                    SELECT next_retry_at FROM crawl_list_pages
+                    WHERE task_id = %(task_id)s AND status = 'failed' AND retry_count < %(max_retries)s
+                    UNION ALL
+                    SELECT next_retry_at FROM crawl_case_records
+                    WHERE task_id = %(task_id)s AND status = 'failed' AND retry_count < %(max_retries)s
+                ) AS due
+                """,
+                self._claim_params()
+            )
+            row = cur.fetchone()
+            self.conn.commit()
+            return float(row[0]) if row and row[0] is not None else None
+        finally:
+            cur.close()
+
+    # ------------------------------------------------------------
+    # 列表页
+    # ------------------------------------------------------------
+
+    def _process_list_page(self, page: Dict[str, Any]):
+        """爬取列表页，将案例写入 crawl_case_records 供所有工作进程认领"""
+        page_number = page['page_number']
+        start = time.time()
+        logger.info(f"获取第 {page_number} 页列表")
+        try:
+            data = self.api_client.get_creative_list(page_number, case_type=self.task.get('case_type') or 1)
+            items = data.get('data', {}).get('items', []) if isinstance(data, dict) else []
+        except Exception as e:
+            logger.error(f"第 {page_number} 页获取失败: {e}")
+            self._fail_item('crawl_list_pages', page['id'], e)
+            self.stats['list_pages_failed'] += 1
+            CRAWL_LIST_PAGES.inc(result='failed')
+            return
+
+        duration = time.time() - start
+        cur = self.conn.cursor()
+        try:
+            execute_batch(
+                cur,
+                """
+                INSERT INTO crawl_case_records (task_id, list_page_id, case_id, case_url, case_title, status, list_item)
+                VALUES (%s, %s, %s, %s, %s, 'pending', %s)
+                ON CONFLICT (task_id, case_id) DO NOTHING
+                """,
+                [
+                    (self.task_id, page['id'], item.get('id'), item.get('url'), (item.get('title') or '')[:500], Json(item))
+                    for item in items if item.get('id')
+                ]
+            )
+            cur.execute(
+                """
+                UPDATE crawl_list_pages
+                SET status = 'success', items_count = %s, crawled_at = CURRENT_TIMESTAMP, duration_seconds = %s,
+                    error_message = NULL, error_type = NULL, next_retry_at = NULL,
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND lease_owner = %s
+                """,
+                (len(items), duration, page['id'], self.worker_name)
+            )
+            cur.execute(
+                """
+                UPDATE crawl_tasks
+                SET completed_pages = COALESCE(completed_pages, 0) + 1,
+                    current_page = GREATEST(COALESCE(current_page, 0), %s),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = %s
+                """,
+                (page_number, self.task_id)
+            )
+            # 爬取到最后一页的任务：本页有数据时生成下一页（只重试失败工作项时不扩展页码范围）
+            if items and self.task['end_page'] is None and not self.retry_only:
+                cur.execute(
+                    """
+                    INSERT INTO crawl_list_pages (task_id, page_number, status)
+                    VALUES (%s, %s, 'pending')
+                    ON CONFLICT (task_id, page_number) DO NOTHING
+                    """,
+                    (self.task_id, page_number + 1)
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+        self.stats['list_pages'] += 1
+        CRAWL_LIST_PAGES.inc(result='success' if items else 'empty')
+        logger.info(f"第 {page_number} 页: {len(items)} 个案例（{duration:.2f} 秒）")
+
+    # ------------------------------------------------------------
+    # 案例
+    # ------------------------------------------------------------
+
+    def _process_case(self, record: Dict[str, Any]):
+        """爬取案例详情页，成功后加入当前批次（批次保存后才标记为成功）"""
+        item = record['list_item'] or {
+            'id': record['case_id'],
+            'url': record['case_url'],
+            'title': record['case_title'],
+        }
+        url = item.get('url') or record['case_url']
+        start = time.time()
+        try:
+            html = self.detail_parser.fetch(url, case_id=record['case_id'])
+            detail = self.detail_parser.parse_html(html, url)
+        except Exception as e:
+            logger.error(f"  ✗ 爬取失败: {item.get('title', '未知标题')} ({e})")
+            dead = self._fail_item('crawl_case_records', record['id'], e, duration=time.time() - start)
+            self.stats['cases_failed'] += 1
+            CRAWL_CASES.inc(result='failed')
+            # 重试模式下原失败已计入任务失败数
+            if dead and not self.retry_only:
+                self._increment_task_counter('total_failed', 1)
+            return
+
+        case_data = merge_case_data(item, detail)
+        is_valid, error = self.validator.validate_case(case_data)
+        if not is_valid:
+            logger.warning(f"  数据验证失败 (case_id={record['case_id']}): {error}")
+            case_data['validation_error'] = error
+
+        logger.info(f"  ✓ 爬取成功: {case_data.get('title')}")
+        CRAWL_CASES.inc(result='crawled')
+        self._batch.append((record['id'], case_data, time.time() - start, record['retry_count'] > 0))
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+
+    def _fail_item(self, table: str, item_id: int, error: Exception, duration: Optional[float] = None) -> bool:
+        """
+        标记列表页或案例失败并释放租约：未达到最大重试次数时按退避时间安排下次重试，否则移入死信
+
+        Returns:
+            是否已移入死信
+        """
+        error_type = 'network_error' if isinstance(error, requests.RequestException) else 'parse_error'
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                f"""
+                UPDATE {table}
+                SET status = CASE WHEN retry_count >= %(max_retries)s THEN 'dead_letter' ELSE 'failed' END,
+                    next_retry_at = CASE WHEN retry_count >= %(max_retries)s THEN NULL ELSE {_NEXT_RETRY_AT} END,
+                    dead_lettered_at = CASE WHEN retry_count >= %(max_retries)s THEN CURRENT_TIMESTAMP ELSE NULL END,
+                    error_message = %(error_message)s, error_type = %(error_type)s, duration_seconds = %(duration)s,
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %(item_id)s AND lease_owner = %(worker)s
+                RETURNING status, retry_count, next_retry_at
+                """,
+                self._claim_params(
+                    error_message=str(error)[:2000], error_type=error_type, duration=duration, item_id=item_id
+                )
+            )
+            row = cur.fetchone()
+            self.conn.commit()
+        finally:
+            cur.close()
+
+        if not row:
+            return False
+        status, retry_count, next_retry_at = row
+        if status == 'dead_letter':
+            self.stats['dead_lettered'] += 1
+            logger.warning(f"{table} #{item_id} 已重试 {retry_count} 次仍失败，移入死信: {error}")
+            return True
+        logger.info(f"{table} #{item_id} 失败（已重试 {retry_count} 次），下次重试时间 {next_retry_at:%H:%M:%S}")
+        return False
+
+    def _increment_task_counter(self, column: str, amount: int):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                f"UPDATE crawl_tasks SET {column} = COALESCE({column}, 0) + %s, updated_at = CURRENT_TIMESTAMP WHERE task_id = %s",
+                (amount, self.task_id)
+            )
+            self.conn.commit()
+        finally:
+            cur.close()
+
+    # ------------------------------------------------------------
+    # 批次输出
+    # ------------------------------------------------------------
+
+    def _allocate_batch_num(self) -> int:
+        """从数据库分配批次号（多个工作进程写同一目录时不会冲突）"""
+        cur = self.conn.cursor()
+        try:
+            while True:
+                cur.execute(
+                    """
+                    UPDATE crawl_tasks
+                    SET batches_saved = COALESCE(batches_saved, 0) + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE task_id = %s
+                    RETURNING batches_saved - 1
+                    """,
+                    (self.task_id,)
+                )
+                batch_num = cur.fetchone()[0]
+                self.conn.commit()
+                # 兼容此前由进程内执行器写入的批次文件
+                if not (self.output_dir / format_batch_filename(batch_num)).exists():
+                    return batch_num
+        finally:
+            cur.close()
+
+    def _flush_batch(self):
+        """保存当前批次文件，并将其中的案例标记为成功"""
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+
+        batch_num = self._allocate_batch_num()
+        filename = format_batch_filename(batch_num)
+        file_path = self.output_dir / filename
+
+        cur = self.conn.cursor()
+        try:
+            # 锁定仍由本进程持有租约的案例（提交前其它进程无法重新认领）；
+            # 租约已过期并被其它进程认领的案例由对方保存，不写入本批次
+            cur.execute(
+                """
+                SELECT id FROM crawl_case_records
+                WHERE id = ANY(%s) AND lease_owner = %s
+                FOR UPDATE
+                """,
+                ([record_id for record_id, *_ in batch], self.worker_name)
+            )
+            owned = {row[0] for row in cur.fetchall()}
+            if len(owned) < len(batch):
+                logger.warning(f"批次 {batch_num}: {len(batch) - len(owned)} 个案例的租约已被其它进程接管，跳过")
+                batch = [entry for entry in batch if entry[0] in owned]
+            if not batch:
+                self.conn.rollback()
+                return
+
+            cases = [case for _, case, _, _ in batch]
+            output_data = {
+                'batch_num': batch_num,
+                'batch_size': len(cases),
+                'created_at': datetime.now().isoformat(),
+                'worker': self.worker_name,
+                'cases': cases
+            }
+            if not save_json(output_data, file_path):
+                self.conn.rollback()
+                logger.error(f"批次 {batch_num} 保存失败: {file_path}")
+                for record_id, _, duration, _ in batch:
+                    self._fail_item(
+                        'crawl_case_records', record_id, IOError(f"批次文件保存失败: {file_path}"), duration
+                    )
+                return
+            recovered = sum(1 for *_, is_retry in batch if is_retry)
+
+            execute_batch(
+                cur,
+                """
+                UPDATE crawl_case_records
+                SET status = %s, crawled_at = CURRENT_TIMESTAMP, duration_seconds = %s,
+                    has_detail_data = TRUE, has_validation_error = %s, validation_errors = %s,
+                    saved_to_json = TRUE, batch_file_name = %s,
+                    error_message = NULL, error_type = NULL, next_retry_at = NULL,
+                    lease_owner = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND lease_owner = %s
+                """,
+                [
+                    (
+                        'validation_failed' if 'validation_error' in case else 'success',
+                        duration,
+                        'validation_error' in case,
+                        Json({'error': case['validation_error']}) if 'validation_error' in case else None,
+                        filename,
+                        record_id,
+                        self.worker_name
+                    )
+                    for record_id, case, duration, _ in batch
+                ]
+            )
+            # 重试模式下重试成功的案例此前已计入任务失败数
+            cur.execute(
+                """
+                UPDATE crawl_tasks
+                SET total_crawled = COALESCE(total_crawled, 0) + %s,
+                    total_saved = COALESCE(total_saved, 0) + %s,
+                    total_failed = GREATEST(COALESCE(total_failed, 0) - %s, 0),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = %s
+                """,
+                (len(batch), len(batch), recovered if self.retry_only else 0, self.task_id)
+            )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+        invalid = sum(1 for case in cases if 'validation_error' in case)
+        self.stats['cases_crawled'] += len(batch)
+        CRAWL_CASES.inc(len(batch), result='saved')
+        self.stats['cases_recovered'] += recovered
+        self.stats['validation_failed'] += invalid
+        self.stats['batches_saved'] += 1
+        logger.info(f"批次 {batch_num} 已保存: {file_path} ({len(batch)} 个案例)")
+
+        if self.output == OUTPUT_DB:
+            self._import_batch(file_path)
+
+    def _import_batch(self, file_path: Path):
+        """将批次文件直接入库（首次调用时加载嵌入模型）"""
+        if self._import_stage is None:
+            from .import_stage import ImportStage
+            self._import_stage = ImportStage(db_config=self.db_config, task_id=self.task_id)
+
+        try:
+            result = self._import_stage.import_from_json(file_path)
+        except Exception as e:
+            logger.error(f"批次入库失败 {file_path}: {e}")
+            return
+
+        imported = [case_id for case_id in result.get('imported_case_ids', []) if case_id is not None]
+        failed = [case_id for case_id in result.get('import_failed_cases', {}) if case_id is not None]
+        cur = self.conn.cursor()
+        try:
+            for status, case_ids in (('success', imported), ('failed', failed)):
+                if case_ids:
+                    cur.execute(
+                        """
+                        UPDATE crawl_case_records
+                        SET imported = TRUE, import_status = %s, updated_at = CURRENT_TIMESTAMP
+                        WHERE task_id = %s AND case_id = ANY(%s)
+                        """,
+                        (status, self.task_id, case_ids)
+                    )
+            self.conn.commit()
+        finally:
+            cur.close()
+        self.stats['cases_imported'] += len(imported)
+
+    # ------------------------------------------------------------
+    # 任务完成与租约
+    # ------------------------------------------------------------
+
+    def _complete_task(self):
+        """所有工作项处理完毕，标记任务完成（多个进程同时到达时只有一个生效）"""
+        cur = self.conn.cursor()
+        try:
+            cur.execute(
+                """
+                UPDATE crawl_tasks
+                SET status = 'completed', completed_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE task_id = %s AND status = 'running'
+                """,
+                (self.task_id,)
+            )
+            completed = cur.rowcount > 0
+            if completed:
+                cur.execute(
+                    "INSERT INTO crawl_task_logs (task_id, level, message) VALUES (%s, 'INFO', %s)",
+                    (self.task_id, f"所有列表页和案例已处理完毕，任务完成（由工作进程 {self.worker_name} 确认）")
+                )
+            self.conn.commit()
+        finally:
+            cur.close()
+        if completed:
+            logger.info(f"任务 {self.task_id} 已完成")
+
+    def _release_leases(self):
+        """释放本进程仍持有的租约（正常退出时让其它进程立即接手，不必等待过期）"""
+        try:
+            cur = self.conn.cursor()
+            try:
+                for table in ('crawl_list_pages', 'crawl_case_records'):
+                    cur.execute(
+                        f"""
+                        UPDATE {table}
+                        SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                        WHERE lease_owner = %s AND status = 'claimed'
+                        """,
+                        (self.worker_name,)
+                    )
+                self.conn.commit()
+            finally:
+                cur.close()
+        except Exception as e:
+            logger.warning(f"释放租约失败（将在租约过期后由其它进程接手）: {e}")
+
+    def _start_heartbeat(self):
+        self._stop_event.clear()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='crawl-worker-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+
+    def _stop_heartbeat(self):
+        self._stop_event.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join(timeout=self.heartbeat_seconds)
+            self._heartbeat_thread = None
+
+    def _heartbeat_loop(self):
+        """定期为本进程持有的租约续期（使用独立连接，不受主线程中长时间请求的影响）"""
+        conn = None
+        while not self._stop_event.wait(self.heartbeat_seconds):
+            try:
+                if conn is None or conn.closed:
+                    conn = psycopg2.connect(**self.db_config)
+                cur = conn.cursor()
+                try:
+                    renewed = 0
+                    for table in ('crawl_list_pages', 'crawl_case_records'):
+                        cur.execute(
+                            f"""
+                            UPDATE {table}
+                            SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                                heartbeat_at = CURRENT_TIMESTAMP
+                            WHERE lease_owner = %s AND status = 'claimed'
+                            """,
+                            (self.lease_seconds, self.worker_name)
+                        )
+                        renewed += cur.rowcount
+                    conn.commit()
+                finally:
+                    cur.close()
+                self.stats['lease_renewals'] += renewed
+            except Exception as e:
+                logger.warning(f"租约续期失败: {e}")
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                    conn = None
+        if conn is not None:
+            conn.close()
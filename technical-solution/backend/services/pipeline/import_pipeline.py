@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+流水线入库
+将入库拆分为 加载/验证 → 生成向量 → 下载图片 → 写入数据库 四个阶段，
+阶段之间通过有界队列连接、各自独立并发，使 CPU（向量）、网络（图片）和数据库时间相互重叠，
+总耗时接近最慢阶段而不是各阶段之和
+"""
+
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Iterable
+
+from .import_stage import ImportStage
+from ..metrics import PIPELINE_STAGE_ITEMS, PIPELINE_STAGE_BUSY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_SENTINEL = object()
+
+
+class StageStats:
+    """单个阶段的运行统计（线程安全）"""
+
+    def __init__(self, name: str, workers: int, input_queue: Optional[queue.Queue] = None,
+                 pipeline: str = 'import'):
+        self.name = name
+        self.workers = workers
+        self.input_queue = input_queue
+        self.pipeline = pipeline
+        self.items = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def mark_started(self):
+        with self._lock:
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+
+    def mark_finished(self):
+        with self._lock:
+            self.end_time = time.monotonic()
+
+    def record(self, items: int, busy_seconds: float, error: bool = False):
+        """记录一次批次处理"""
+        with self._lock:
+            self.items += items
+            self.batches += 1
+            self.busy_seconds += busy_seconds
+            if error:
+                self.errors += 1
+        PIPELINE_STAGE_ITEMS.inc(items, pipeline=self.pipeline, stage=self.name)
+        PIPELINE_STAGE_BUSY_SECONDS.inc(busy_seconds, pipeline=self.pipeline, stage=self.name)
+
+    def observe_queue(self):
+        """采样输入队列深度"""
+        if self.input_queue is None:
+            return
+        depth = self.input_queue.qsize()
+        with self._lock:
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可 JSON 序列化的字典"""
+        with self._lock:
+            if self.start_time is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self.end_time or time.monotonic()) - self.start_time
+            return {
+                'workers': self.workers,
+                'items': self.items,
+                'batches': self.batches,
+                'errors': self.errors,
+                'busy_seconds': round(self.busy_seconds, 3),
+                'throughput': round(self.items / elapsed, 2) if elapsed > 0 else 0.0,  # 案例/秒
+                'utilization': round(self.busy_seconds / (elapsed * self.workers), 3) if elapsed > 0 else 0.0,
+                'queue_depth': self.input_queue.qsize() if self.input_queue is not None else 0,
+                'max_queue_depth': self.max_queue_depth,
+                'finished': self.end_time is not None
+            }
+
+
+class StagedImportPipeline:
+    """流水线入库类（复用 ImportStage 的格式化、验证、向量、图片和入库逻辑）"""
+
+    def __init__(
+        self,
+        import_stage: ImportStage,
+        load_workers: int = 1,
+        embed_workers: int = 1,
+        image_workers: int = 2,
+        insert_workers: int = 1,
+        queue_size: int = 4,
+        should_stop: Optional[Callable[[], bool]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        file_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        progress_interval: float = 2.0
+    ):
+        """
+        初始化流水线入库
+
+        Args:
+            import_stage: 已初始化的 ImportStage（提供模型、验证器和数据库配置）
+            load_workers: 加载/验证阶段线程数
+            embed_workers: 向量生成阶段线程数
+            image_workers: 图片下载阶段线程数（每个线程内部再按 image_download_concurrency 并发）
+            insert_workers: 入库阶段线程数（每个线程持有独立的数据库连接）
+            queue_size: 阶段之间队列的最大批次数（背压）
+            should_stop: 返回 True 时停止流水线（用于取消任务）
+            progress_callback: 进度回调，参数为 get_snapshot() 的结果（按 progress_interval 节流）
+            file_callback: 单个文件全部批次处理完成时的回调，参数为 (文件名, 文件结果)
+            progress_interval: 进度回调最小间隔（秒）
+        """
+        self.import_stage = import_stage
+        self.batch_size = import_stage.batch_size
+        self.should_stop = should_stop
+        self.progress_callback = progress_callback
+        self.file_callback = file_callback
+        self.progress_interval = progress_interval
+
+        self.workers = {
+            'load': max(1, load_workers),
+            'embed': max(1, embed_workers),
+            'image': max(1, image_workers) if import_stage.download_images else 0,
+            'insert': max(1, insert_workers)
+        }
+        self.queue_size = max(1, queue_size)
+
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._stage_stats: Dict[str, StageStats] = {}
+        self._last_progress_time = 0.0
+        self._cancelled = False
+        self._thread_local = threading.local()
+
+    def run(self, json_files: Iterable[Path]) -> Dict[str, Any]:
+        """
+        运行流水线
+
+        Args:
+            json_files: 要导入的JSON文件列表
+
+        Returns:
+            汇总结果（字段与 ImportStage.import_from_directory 一致，另含 file_results、stage_stats、cancelled）
+        """
+        json_files = [Path(f) for f in json_files]
+        start = time.monotonic()
+
+        # 文件队列不限长度（只放路径），其余队列有界以形成背压
+        file_queue: queue.Queue = queue.Queue()
+        for json_file in json_files:
+            file_queue.put(json_file)
+
+        # 按顺序构建阶段：(名称, 处理函数, 输入队列)
+        stage_defs = [('load', self._handle_load, file_queue)]
+        stage_defs.append(('embed', self._handle_embed, queue.Queue(maxsize=self.queue_size)))
+        if self.workers['image']:
+            stage_defs.append(('image', self._handle_image, queue.Queue(maxsize=self.queue_size)))
+        stage_defs.append(('insert', self._handle_insert, queue.Queue(maxsize=self.queue_size)))
+
+        for name, _, in_queue in stage_defs:
+            self._stage_stats[name] = StageStats(name, self.workers[name], in_queue)
+
+        logger.info(
+            f"启动流水线入库: {len(json_files)} 个文件, "
+            + ", ".join(f"{name}×{self.workers[name]}" for name, _, _ in stage_defs)
+            + f", 队列长度 {self.queue_size}"
+        )
+
+        stage_threads = []
+        for index, (name, handler, in_queue) in enumerate(stage_defs):
+            out_queue = stage_defs[index + 1][2] if index + 1 < len(stage_defs) else None
+            on_exit = self._close_thread_connection if name == 'insert' else None
+            threads = []
+            for worker_index in range(self.workers[name]):
+                thread = threading.Thread(
+                    target=self._worker_loop,
+                    args=(self._stage_stats[name], in_queue, out_queue, handler, on_exit),
+                    name=f"import-{name}-{worker_index}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+            stage_threads.append((name, threads))
+
+        # 文件队列已全部放入，追加结束标记
+        for _ in range(self.workers['load']):
+            file_queue.put(_SENTINEL)
+
+        # 按阶段顺序等待：上游全部结束后，向下游发送结束标记
+        for index, (name, threads) in enumerate(stage_threads):
+            for thread in threads:
+                thread.join()
+            self._stage_stats[name].mark_finished()
+            if index + 1 < len(stage_defs):
+                next_name, _, next_queue = stage_defs[index + 1]
+                for _ in range(self.workers[next_name]):
+                    next_queue.put(_SENTINEL)
+
+        self._emit_progress(force=True)
+        duration = time.monotonic() - start
+
+        result = self._build_result()
+        result['duration_seconds'] = duration
+        logger.info(
+            f"流水线入库完成: 导入 {result['total_imported']}, 失败 {result['total_failed']}, "
+            f"向量生成 {result['vectors_generated']}/复用 {result['vectors_reused']}, 耗时 {duration:.2f} 秒"
+        )
+        for name, stats in result['stage_stats'].items():
+            logger.info(
+                f"  阶段 {name}: {stats['items']} 个案例, {stats['throughput']} 个/秒, "
+                f"利用率 {stats['utilization']:.0%}, 最大队列深度 {stats['max_queue_depth']}"
+            )
+        return result
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """
+        获取当前进度快照（累计计数 + 各阶段吞吐量与队列深度）
+
+        Returns:
+            进度快照字典
+        """
+        totals = {
+            'total_loaded': 0,
+            'total_valid': 0,
+            'total_invalid': 0,
+            'total_existing': 0,
+            'total_imported': 0,
+            'total_failed': 0
+        }
+        current_files = []
+        with self._lock:
+            for file_name, file_result in self._files.items():
+                for key in totals:
+                    totals[key] += file_result['stats'][key]
+                if not file_result['done']:
+                    current_files.append(file_name)
+
+        return {
+            **totals,
+            'current_file': current_files[0] if current_files else None,
+            'files_in_flight': len(current_files),
+            'stage_stats': {name: stats.to_dict() for name, stats in self._stage_stats.items()}
+        }
+
+    # ------------------------------------------------------------------
+    # 阶段处理
+    # ------------------------------------------------------------------
+
+    def _worker_loop(
+        self,
+        stage: StageStats,
+        in_queue: queue.Queue,
+        out_queue: Optional[queue.Queue],
+        handler: Callable[[Any], List[Dict[str, Any]]],
+        on_exit: Optional[Callable[[], None]] = None
+    ):
+        """阶段工作线程：从输入队列取批次，处理后放入输出队列"""
+        stage.mark_started()
+        try:
+            while True:
+                stage.observe_queue()
+                item = in_queue.get()
+                if item is _SENTINEL:
+                    break
+
+                # 已取消：继续消费队列（避免上游阻塞），但不再处理
+                if self._is_stopped():
+                    if isinstance(item, dict):
+                        self._finish_batch(item['file_name'])
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    outputs = handler(item)
+                except Exception as e:
+                    stage.record(0, time.perf_counter() - started, error=True)
+                    logger.error(f"流水线阶段 {stage.name} 处理失败: {e}", exc_info=True)
+                    try:
+                        self._fail_item(item, f"{stage.name} 阶段失败: {e}")
+                    except Exception as fail_error:
+                        # 记录失败出错时线程继续消费队列，否则上游 put 会一直阻塞
+                        logger.error(f"流水线阶段 {stage.name} 记录失败批次出错: {fail_error}", exc_info=True)
+                    continue
+
+                # 加载阶段输入为文件，按产出的案例数统计
+                if isinstance(item, dict):
+                    items = len(item['cases'])
+                else:
+                    items = sum(len(output['cases']) for output in outputs)
+                stage.record(items, time.perf_counter() - started)
+
+                if out_queue is not None:
+                    for output in outputs:
+                        out_queue.put(output)
+        finally:
+            if on_exit:
+                on_exit()
+
+    def _handle_load(self, json_file: Path) -> List[Dict[str, Any]]:
+        """加载/验证阶段：一个文件 → 多个批次"""
+        file_name = json_file.name
+        file_result = self._new_file_result()
+        with self._lock:
+            self._files[file_name] = file_result
+
+        prepared = self.import_stage._prepare_cases(json_file)
+        cases = prepared['cases_to_import']
+        batches = [
+            {'file_name': file_name, 'cases': cases[i:i + self.batch_size]}
+            for i in range(0, len(cases), self.batch_size)
+        ]
+
+        with self._lock:
+            for key in ['total_loaded', 'total_valid', 'total_invalid', 'total_existing']:
+                file_result['stats'][key] = prepared[key]
+            file_result['invalid_case_errors'] = prepared['invalid_case_errors']
+            file_result['pending_batches'] = len(batches)
+            file_result['loaded'] = True
+
+        if not batches:
+            self._check_file_done(file_name)
+        return batches
+
+    def _handle_embed(self, batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """向量生成阶段"""
+        batch['cases'] = self.import_stage._generate_vectors_batch(batch['cases'])
+        return [batch]
+
+    def _handle_image(self, batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """图片下载阶段"""
+        self.import_stage._download_images_for_batch(batch['cases'])
+        return [batch]
+
+    def _handle_insert(self, batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """入库阶段：每个批次单独提交"""
+        conn = self._get_thread_connection()
+        try:
+            imported_ids, failed_cases = self.import_stage._insert_batch(conn, batch['cases'])
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            # 连接可能已失效，下个批次重新建立
+            self._close_thread_connection()
+            raise
+
+        file_name = batch['file_name']
+        with self._lock:
+            file_result = self._files[file_name]
+            file_result['imported_case_ids'].extend(imported_ids)
+            file_result['import_failed_cases'].update(failed_cases)
+            file_result['stats']['total_imported'] += len(imported_ids)
+            file_result['stats']['total_failed'] += len(failed_cases)
+
+        self._finish_batch(file_name)
+        self._emit_progress()
+        return []
+
+    # ------------------------------------------------------------------
+    # 文件与进度跟踪
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _new_file_result() -> Dict[str, Any]:
+        return {
+            'stats': {
+                'total_loaded': 0,
+                'total_valid': 0,
+                'total_invalid': 0,
+                'total_existing': 0,
+                'total_imported': 0,
+                'total_failed': 0
+            },
+            'imported_case_ids': [],
+            'invalid_case_errors': {},
+            'import_failed_cases': {},
+            'error': None,
+            'pending_batches': 0,
+            'loaded': False,
+            'done': False
+        }
+
+    def _fail_item(self, item: Any, error_message: str):
+        """将处理失败的批次（或文件）记录为失败"""
+        if isinstance(item, dict):
+            file_name = item['file_name']
+            with self._lock:
+                file_result = self._files[file_name]
+                for case in item['cases']:
+                    case_id = case.get('case_id')
+                    if case_id:
+                        file_result['import_failed_cases'][case_id] = error_message
+                file_result['stats']['total_failed'] += len(item['cases'])
+            self._finish_batch(file_name)
+        else:
+            # 加载阶段失败：整个文件失败
+            file_name = Path(item).name
+            with self._lock:
+                file_result = self._files.setdefault(file_name, self._new_file_result())
+                file_result['error'] = error_message
+                file_result['stats']['total_failed'] += 1
+                file_result['loaded'] = True
+            self._check_file_done(file_name)
+
+    def _finish_batch(self, file_name: str):
+        """一个批次处理结束（成功、失败或取消）"""
+        with self._lock:
+            self._files[file_name]['pending_batches'] -= 1
+        self._check_file_done(file_name)
+
+    def _check_file_done(self, file_name: str):
+        """文件的全部批次处理完成时触发文件回调"""
+        with self._lock:
+            file_result = self._files[file_name]
+            if file_result['done'] or not file_result['loaded'] or file_result['pending_batches'] > 0:
+                return
+            file_result['done'] = True
+
+        if self.file_callback and not self._is_stopped():
+            try:
+                self.file_callback(file_name, file_result)
+            except Exception as e:
+                logger.warning(f"文件完成回调失败 {file_name}: {e}")
+
+    def _emit_progress(self, force: bool = False):
+        """按间隔触发进度回调"""
+        if not self.progress_callback:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_progress_time < self.progress_interval:
+                return
+            self._last_progress_time = now
+        try:
+            self.progress_callback(self.get_snapshot())
+        except Exception as e:
+            logger.warning(f"进度回调失败: {e}")
+
+    def _is_stopped(self) -> bool:
+        if not self._cancelled and self.should_stop and self.should_stop():
+            self._cancelled = True
+            logger.warning("流水线入库收到停止信号")
+        return self._cancelled
+
+    def _build_result(self) -> Dict[str, Any]:
+        """汇总所有文件的结果"""
+        snapshot = self.get_snapshot()
+        all_imported_case_ids = []
+        all_invalid_case_errors = {}
+        all_import_failed_cases = {}
+        with self._lock:
+            for file_result in self._files.values():
+                all_imported_case_ids.extend(file_result['imported_case_ids'])
+                all_invalid_case_errors.update(file_result['invalid_case_errors'])
+                all_import_failed_cases.update(file_result['import_failed_cases'])
+            file_results = dict(self._files)
+
+        # 向量统计由向量生成阶段的多个线程累加
+        with self.import_stage._stats_lock:
+            vectors_generated = self.import_stage.stats['vectors_generated']
+            vectors_reused = self.import_stage.stats['vectors_reused']
+
+        return {
+            'total_loaded': snapshot['total_loaded'],
+            'total_valid': snapshot['total_valid'],
+            'total_invalid': snapshot['total_invalid'],
+            'total_existing': snapshot['total_existing'],
+            'total_imported': snapshot['total_imported'],
+            'total_failed': snapshot['total_failed'],
+            'vectors_generated': vectors_generated,
+            'vectors_reused': vectors_reused,
+            'imported_case_ids': all_imported_case_ids,
+            'invalid_case_errors': all_invalid_case_errors,
+            'import_failed_cases': all_import_failed_cases,
+            'file_results': file_results,
+            'stage_stats': snapshot['stage_stats'],
+            'cancelled': self._cancelled
+        }
+
+    # ------------------------------------------------------------------
+    # 入库线程的数据库连接（每个线程一个）
+    # ------------------------------------------------------------------
+
+    def _get_thread_connection(self):
+        conn = getattr(self._thread_local, 'conn', None)
+        if conn is None or conn.closed:
+            conn = self.import_stage._get_connection()
+            self._thread_local.conn = conn
+        return conn
+
+    def _close_thread_connection(self):
+        conn = getattr(self._thread_local, 'conn', None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            self._thread_local.conn = None
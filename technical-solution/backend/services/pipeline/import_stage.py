@@ -5,20 +5,31 @@
 """
 
 import logging
+import threading
+import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Set
 from datetime import datetime
 
 import psycopg2
 from psycopg2.extras import execute_batch, RealDictCursor
-from FlagEmbedding import FlagModel
 import numpy as np
 
+from ..embedding import BACKEND_FLAG, build_embedding_text, create_embedding_backend, embedding_fingerprint
+from ..metrics import IMPORT_CASES, IMPORT_VECTORS, EMBEDDING_SECONDS, EMBEDDING_BATCH_SIZE
 from .utils import load_json, get_existing_case_ids
 from .validator import CaseValidator
 
 logger = logging.getLogger(__name__)
 
+# 统计项 -> (运行指标, result 标签)
+_STAT_METRICS = {
+    'total_imported': (IMPORT_CASES, 'imported'),
+    'total_failed': (IMPORT_CASES, 'failed'),
+    'vectors_generated': (IMPORT_VECTORS, 'generated'),
+    'vectors_reused': (IMPORT_VECTORS, 'reused'),
+}
+
 
 class ImportStage:
     """入库阶段类"""
@@ -34,7 +45,11 @@ class ImportStage:
         import_failed_only: bool = False,
         task_id: Optional[str] = None,
         download_images: bool = True,
-        image_download_concurrency: int = 5
+        image_download_concurrency: int = 5,
+        embedding_backend: str = BACKEND_FLAG,
+        onnx_path: Optional[str] = None,
+        onnx_threads: Optional[int] = None,
+        reuse_vectors: bool = True
     ):
         """
         初始化入库阶段
@@ -57,8 +72,13 @@ class ImportStage:
             task_id: 任务ID（当 import_failed_only=True 时必需）
             download_images: 是否在导入时下载图片（默认 False）
             image_download_concurrency: 图片下载并发数（默认 5）
+            embedding_backend: 向量编码后端（flag / onnx，默认 flag）
+            onnx_path: ONNX 模型文件路径（onnx 后端，默认 data/models/<模型名>-int8.onnx）
+            onnx_threads: ONNX Runtime 推理线程数（onnx 后端）
+            reuse_vectors: 标题、描述和模型都未变化（向量文本指纹与库中一致）的已有案例复用库中向量（默认 True）
         """
         self.db_config = db_config
+        self.reuse_vectors = reuse_vectors
         self.batch_size = batch_size
         self.skip_existing = skip_existing
         self.skip_invalid = skip_invalid
@@ -71,11 +91,18 @@ class ImportStage:
         # 未导入成功的案例ID集合（延迟加载）
         self.failed_case_ids: Optional[Set[int]] = None
         
-        # 初始化嵌入模型
-        logger.info(f"加载嵌入模型: {model_name}")
-        self.model = FlagModel(
+        # 统计信息锁（流水线模式下多个线程会同时更新统计）
+        self._stats_lock = threading.Lock()
+        # 已存在 case_id 加载锁（避免多个加载线程重复查询）
+        self._existing_ids_lock = threading.Lock()
+        
+        # 初始化嵌入模型（FlagEmbedding/torch 或 onnxruntime 在此处才导入，导入 services.pipeline 时不加载）
+        logger.info(f"加载嵌入模型: {model_name}（后端: {embedding_backend}）")
+        self.model = create_embedding_backend(
+            embedding_backend,
             model_name,
-            query_instruction_for_retrieval="为这个句子生成表示以用于检索相关文章："
+            onnx_path=onnx_path,
+            onnx_threads=onnx_threads
         )
         logger.info("嵌入模型加载完成")
         
@@ -90,6 +117,8 @@ class ImportStage:
             'total_existing': 0,
             'total_imported': 0,
             'total_failed': 0,
+            'vectors_generated': 0,
+            'vectors_reused': 0,
             'images_downloaded': 0,
             'images_failed': 0,
             'images_skipped': 0,
@@ -122,6 +151,8 @@ class ImportStage:
             'total_existing': 0,
             'total_imported': 0,
             'total_failed': 0,
+            'vectors_generated': 0,
+            'vectors_reused': 0,
             'images_downloaded': 0,
             'images_failed': 0,
             'images_skipped': 0,
@@ -129,87 +160,15 @@ class ImportStage:
             'end_time': None
         }
         
-        # 加载JSON文件
-        data = load_json(json_file)
-        if not data:
-            logger.error(f"无法加载JSON文件: {json_file}")
-            return {**self.stats, 'imported_case_ids': [], 'invalid_case_errors': {}}
-        
-        cases = data.get('cases', [])
-        if not cases:
-            logger.warning(f"JSON文件中没有案例数据: {json_file}")
-            return {**self.stats, 'imported_case_ids': [], 'invalid_case_errors': {}}
-        
-        logger.info(f"JSON文件包含 {len(cases)} 个案例")
-        self.stats['total_loaded'] = len(cases)
-        
-        # 格式化数据（将数据转换为可以入库的格式）
-        if self.normalize_data:
-            logger.info("开始格式化数据...")
-            cases = self.validator.format_batch(cases, normalize=True)
-            logger.info("数据格式化完成")
-        
-        # 验证数据
-        valid_cases, invalid_cases = self.validator.validate_batch(cases)
-        self.stats['total_valid'] = len(valid_cases)
-        self.stats['total_invalid'] = len(invalid_cases)
-        
-        if invalid_cases:
-            logger.warning(f"发现 {len(invalid_cases)} 个无效案例")
-            if self.skip_invalid:
-                logger.info("将跳过无效案例")
-            else:
-                logger.warning("将尝试导入无效案例（可能失败）")
-        
-        # 收集无效案例的验证错误信息（用于更新数据库）
-        invalid_case_errors = {}
-        for invalid_case in invalid_cases:
-            case_id = invalid_case.get('case_id')
-            if case_id:
-                validation_error = invalid_case.get('validation_error', '验证失败')
-                invalid_case_errors[case_id] = {
-                    'has_validation_error': True,
-                    'validation_errors': {
-                        'validation_error': validation_error,
-                        'error': validation_error
-                    },
-                    'status': 'validation_failed'
-                }
-        
-        # 如果只导入未导入成功的案例，先加载失败案例ID列表
-        if self.import_failed_only:
-            self._load_failed_case_ids()
-            # 只保留未导入成功的案例
-            if self.failed_case_ids:
-                valid_cases = [c for c in valid_cases if c.get('case_id') in self.failed_case_ids]
-                if not self.skip_invalid:
-                    cases = [c for c in cases if c.get('case_id') in self.failed_case_ids]
-                logger.info(f"仅导入未导入成功的案例，过滤后剩余 {len(valid_cases)} 个有效案例")
-            else:
-                logger.warning("未找到未导入成功的案例，将跳过所有案例")
-                valid_cases = []
-                cases = []
-        
-        # 过滤已存在的案例（但仍然需要更新向量）
-        self._load_existing_ids()
-        new_cases = [c for c in valid_cases if c.get('case_id') not in self.existing_ids]
-        existing_cases = [c for c in valid_cases if c.get('case_id') in self.existing_ids]
-        
-        self.stats['total_existing'] = len(existing_cases)
-        logger.info(f"已存在案例: {len(existing_cases)}, 新案例: {len(new_cases)}")
-        
-        # 即使案例已存在，也导入以更新向量字段
-        if self.skip_existing:
-            cases_to_import = new_cases
-        else:
-            # 导入所有案例（包括已存在的，用于更新向量）
-            cases_to_import = valid_cases if self.skip_invalid else cases
+        # 加载、格式化、验证并过滤案例
+        prepared = self._prepare_cases(json_file)
+        for key in ['total_loaded', 'total_valid', 'total_invalid', 'total_existing']:
+            self.stats[key] = prepared[key]
+        invalid_case_errors = prepared['invalid_case_errors']
+        cases_to_import = prepared['cases_to_import']
         
         if not cases_to_import:
             logger.info("没有需要导入的案例")
-            # 确保 invalid_case_errors 存在
-            if 'invalid_case_errors' not in locals():
-                invalid_case_errors = {}
             return {**self.stats, 'imported_case_ids': [], 'invalid_case_errors': invalid_case_errors, 'import_failed_cases': {}}
         
         # 批量生成向量并入库
@@ -233,6 +192,7 @@ class ImportStage:
         logger.info(f"已存在数: {self.stats['total_existing']}")
         logger.info(f"成功导入数: {self.stats['total_imported']}")
         logger.info(f"失败数: {self.stats['total_failed']}")
+        logger.info(f"向量: 生成 {self.stats['vectors_generated']}, 复用 {self.stats['vectors_reused']}")
         if self.download_images:
             logger.info(f"图片下载: 成功 {self.stats['images_downloaded']}, 失败 {self.stats['images_failed']}, 跳过 {self.stats['images_skipped']}")
         logger.info(f"总耗时: {duration:.2f} 秒")
@@ -286,7 +246,8 @@ class ImportStage:
                 
                 # 累计统计
                 for key in ['total_loaded', 'total_valid', 'total_invalid', 
-                           'total_existing', 'total_imported', 'total_failed']:
+                           'total_existing', 'total_imported', 'total_failed',
+                           'vectors_generated', 'vectors_reused']:
                     total_stats[key] += file_stats.get(key, 0)
                 
                 # 收集导入成功的案例ID
@@ -309,19 +270,125 @@ class ImportStage:
                 continue
         
         return {**total_stats, 'imported_case_ids': all_imported_case_ids, 'invalid_case_errors': all_invalid_case_errors, 'import_failed_cases': all_import_failed_cases}
-    
+
+    def _prepare_cases(self, json_file: Path) -> Dict[str, Any]:
+        """
+        加载JSON文件，格式化、验证并过滤出需要入库的案例
+
+        不修改 self.stats，计数通过返回值给出，便于流水线模式在多个线程中并发调用
+
+        Args:
+            json_file: JSON文件路径
+
+        Returns:
+            {
+                'cases_to_import': 需要入库的案例列表,
+                'invalid_case_errors': 无效案例的验证错误信息 {case_id: {...}},
+                'total_loaded' / 'total_valid' / 'total_invalid' / 'total_existing': 计数
+            }
+        """
+        prepared = {
+            'cases_to_import': [],
+            'invalid_case_errors': {},
+            'total_loaded': 0,
+            'total_valid': 0,
+            'total_invalid': 0,
+            'total_existing': 0
+        }
+
+        # 加载JSON文件
+        data = load_json(json_file)
+        if not data:
+            logger.error(f"无法加载JSON文件: {json_file}")
+            return prepared
+
+        cases = data.get('cases', [])
+        if not cases:
+            logger.warning(f"JSON文件中没有案例数据: {json_file}")
+            return prepared
+
+        logger.info(f"JSON文件包含 {len(cases)} 个案例")
+        prepared['total_loaded'] = len(cases)
+
+        # 格式化数据（将数据转换为可以入库的格式）
+        if self.normalize_data:
+            logger.info("开始格式化数据...")
+            cases = self.validator.format_batch(cases, normalize=True)
+            logger.info("数据格式化完成")
+
+        # 验证数据
+        valid_cases, invalid_cases = self.validator.validate_batch(cases)
+        prepared['total_valid'] = len(valid_cases)
+        prepared['total_invalid'] = len(invalid_cases)
+
+        if invalid_cases:
+            logger.warning(f"发现 {len(invalid_cases)} 个无效案例")
+            if self.skip_invalid:
+                logger.info("将跳过无效案例")
+            else:
+                logger.warning("将尝试导入无效案例（可能失败）")
+
+        # 收集无效案例的验证错误信息（用于更新数据库）
+        invalid_case_errors = prepared['invalid_case_errors']
+        for invalid_case in invalid_cases:
+            case_id = invalid_case.get('case_id')
+            if case_id:
+                validation_error = invalid_case.get('validation_error', '验证失败')
+                invalid_case_errors[case_id] = {
+                    'has_validation_error': True,
+                    'validation_errors': {
+                        'validation_error': validation_error,
+                        'error': validation_error
+                    },
+                    'status': 'validation_failed'
+                }
+
+        # 如果只导入未导入成功的案例，先加载失败案例ID列表
+        if self.import_failed_only:
+            self._load_failed_case_ids()
+            # 只保留未导入成功的案例
+            if self.failed_case_ids:
+                valid_cases = [c for c in valid_cases if c.get('case_id') in self.failed_case_ids]
+                if not self.skip_invalid:
+                    cases = [c for c in cases if c.get('case_id') in self.failed_case_ids]
+                logger.info(f"仅导入未导入成功的案例，过滤后剩余 {len(valid_cases)} 个有效案例")
+            else:
+                logger.warning("未找到未导入成功的案例，将跳过所有案例")
+                valid_cases = []
+                cases = []
+
+        # 过滤已存在的案例（但仍然需要更新向量）
+        self._load_existing_ids()
+        new_cases = [c for c in valid_cases if c.get('case_id') not in self.existing_ids]
+        existing_cases = [c for c in valid_cases if c.get('case_id') in self.existing_ids]
+
+        prepared['total_existing'] = len(existing_cases)
+        logger.info(f"已存在案例: {len(existing_cases)}, 新案例: {len(new_cases)}")
+
+        # 即使案例已存在，也导入以更新向量字段
+        if self.skip_existing:
+            prepared['cases_to_import'] = new_cases
+        else:
+            # 导入所有案例（包括已存在的，用于更新向量）
+            prepared['cases_to_import'] = valid_cases if self.skip_invalid else cases
+
+        return prepared
+
     def _load_existing_ids(self):
         """加载已存在的case_id集合"""
         if self.existing_ids is not None:
             return
         
-        try:
-            conn = self._get_connection()
-            self.existing_ids = get_existing_case_ids(conn)
-            conn.close()
-        except Exception as e:
-            logger.error(f"加载已存在的case_id失败: {e}")
-            self.existing_ids = set()
+        with self._existing_ids_lock:
+            if self.existing_ids is not None:
+                return
+            try:
+                conn = self._get_connection()
+                self.existing_ids = get_existing_case_ids(conn)
+                conn.close()
+            except Exception as e:
+                logger.error(f"加载已存在的case_id失败: {e}")
+                self.existing_ids = set()
     
     def _batch_import(self, cases: List[Dict[str, Any]]) -> tuple[List[int], Dict[int, str]]:
         """
@@ -348,6 +415,9 @@ class ImportStage:
         try:
             for i in range(0, len(cases_with_vectors), self.batch_size):
                 batch = cases_with_vectors[i:i + self.batch_size]
+                # 如果启用图片下载，先批量下载图片
+                if self.download_images:
+                    self._download_images_for_batch(batch)
                 batch_imported_ids, batch_failed = self._insert_batch(conn, batch)
                 imported_case_ids.extend(batch_imported_ids)
                 failed_cases.update(batch_failed)
@@ -375,36 +445,117 @@ class ImportStage:
         Returns:
             包含向量的案例列表
         """
-        cases_with_vectors = []
-        
+        # 收集需要编码的案例，一次性批量编码（比逐条 encode 快得多）；
+        # 文本和模型都未变化（指纹与库中一致）的已有案例不编码，入库时保留库中向量
+        stored_fingerprints = self._load_fingerprints([case.get('case_id') for case in cases])
+        texts = []
+        text_cases = []
+        reused = 0
         for case in cases:
+            combined_text = build_embedding_text('combined_vector', case.get('title'), case.get('description'))
+            if not combined_text:
+                logger.warning(f"案例 {case.get('case_id')} 没有文本内容，跳过向量生成")
+                case['combined_vector'] = None
+                continue
+
+            fingerprint = embedding_fingerprint(combined_text, self.model.model_id)
+            if case.get('combined_vector') is not None and case.get('embedding_fingerprint') == fingerprint:
+                # 已生成过向量（如单条导入先生成向量再入库）
+                continue
+            case['embedding_fingerprint'] = fingerprint
+            if stored_fingerprints.get(case.get('case_id')) == fingerprint:
+                case['combined_vector'] = None
+                case['vector_reused'] = True
+                reused += 1
+                continue
+            case.pop('vector_reused', None)
+            texts.append(combined_text)
+            text_cases.append(case)
+
+        if reused:
+            self._incr_stat('vectors_reused', reused)
+            logger.info(f"{reused} 个案例的标题和描述未变化，复用已有向量")
+        
+        if texts:
             try:
-                # 生成组合向量（标题+描述）
-                title = case.get('title', '').strip()
-                description = case.get('description', '').strip()
-                combined_text = f"{title} {description}".strip()
-                
-                if combined_text:
-                    # FlagEmbedding 的 encode 方法不支持 normalize 参数
-                    # 向量默认已经归一化
-                    vector = self.model.encode(combined_text)
-                    # 手动归一化向量
-                    import numpy as np
-                    vector_norm = vector / np.linalg.norm(vector)
-                    case['combined_vector'] = vector_norm.tolist()
-                else:
-                    logger.warning(f"案例 {case.get('case_id')} 没有文本内容，跳过向量生成")
-                    case['combined_vector'] = None
-                
-                cases_with_vectors.append(case)
-                
+                # 编码后端返回未归一化的向量，需要手动归一化
+                encode_start = time.perf_counter()
+                vectors = self.model.encode(texts, batch_size=len(texts))
+                EMBEDDING_SECONDS.observe(time.perf_counter() - encode_start, source='import')
+                EMBEDDING_BATCH_SIZE.observe(len(texts), source='import')
+                vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+                for case, vector in zip(text_cases, vectors):
+                    case['combined_vector'] = vector.tolist()
+                self._incr_stat('vectors_generated', len(texts))
             except Exception as e:
-                logger.error(f"生成向量失败 [case_id={case.get('case_id')}]: {e}")
-                case['vector_error'] = str(e)
-                case['combined_vector'] = None
-                cases_with_vectors.append(case)
+                # 批量编码失败时逐条编码，定位具体失败的案例
+                logger.warning(f"批量生成向量失败，改为逐条生成: {e}")
+                for case, text in zip(text_cases, texts):
+                    try:
+                        vector = self.model.encode([text])[0]
+                        vector_norm = vector / np.linalg.norm(vector)
+                        case['combined_vector'] = vector_norm.tolist()
+                        self._incr_stat('vectors_generated')
+                    except Exception as case_error:
+                        logger.error(f"生成向量失败 [case_id={case.get('case_id')}]: {case_error}")
+                        case['vector_error'] = str(case_error)
+                        case['combined_vector'] = None
+        
+        return list(cases)
+    
+    def _load_fingerprints(self, case_ids: List[Any]) -> Dict[int, str]:
+        """
+        加载库中已有向量的指纹
+
+        Returns:
+            {case_id: 向量文本指纹}（没有向量或没有指纹的案例不返回）
+        """
+        case_ids = [case_id for case_id in case_ids if case_id]
+        if not self.reuse_vectors or not case_ids:
+            return {}
+        try:
+            conn = self._get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    """
+                    SELECT case_id, embedding_fingerprint FROM ad_cases
+                    WHERE case_id = ANY(%s)
+                    AND combined_vector IS NOT NULL AND embedding_fingerprint IS NOT NULL
+                    """,
+                    (case_ids,)
+                )
+                return dict(cur.fetchall())
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"加载向量指纹失败，全部重新生成向量: {e}")
+            return {}
+    
+    def _incr_stat(self, key: str, value: int = 1):
+        """线程安全地累加统计值（同时更新对应的运行指标）"""
+        with self._stats_lock:
+            self.stats[key] += value
+        metric = _STAT_METRICS.get(key)
+        if metric is not None:
+            metric[0].inc(value, result=metric[1])
+    
+    def _download_images_for_batch(self, batch: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        下载一个批次的图片并记录日志
         
-        return cases_with_vectors
+        Args:
+            batch: 批次数据
+            
+        Returns:
+            下载失败的案例字典 {case_id: error_message}
+        """
+        logger.info(f"开始批量下载图片，共 {len(batch)} 个案例")
+        image_failed_cases = self._download_images_batch(batch)
+        if image_failed_cases:
+            logger.warning(f"图片下载失败: {len(image_failed_cases)} 个案例")
+        logger.info(f"图片下载完成: 成功 {self.stats['images_downloaded']}, 失败 {self.stats['images_failed']}, 跳过 {self.stats['images_skipped']}")
+        return image_failed_cases
     
     def _download_images_batch(self, cases: List[Dict[str, Any]]) -> Dict[int, str]:
         """
@@ -448,7 +599,7 @@ class ImportStage:
                     is_downloaded, local_url = image_service.is_image_downloaded(case_id)
                     if is_downloaded:
                         case['main_image_local'] = local_url
-                        self.stats['images_skipped'] += 1
+                        self._incr_stat('images_skipped')
                         return
                     
                     # 下载图片
@@ -458,10 +609,10 @@ class ImportStage:
                     
                     if success and local_url:
                         case['main_image_local'] = local_url
-                        self.stats['images_downloaded'] += 1
+                        self._incr_stat('images_downloaded')
                     else:
                         failed_cases[case_id] = error or "下载失败"
-                        self.stats['images_failed'] += 1
+                        self._incr_stat('images_failed')
                         logger.warning(f"图片下载失败 [case_id={case_id}]: {error}")
             
             # 创建任务列表
@@ -494,6 +645,8 @@ class ImportStage:
         """
         批量插入数据库（逐个插入以捕获每个案例的错误）
         
+        图片下载不在此处进行，调用方需要先调用 _download_images_for_batch
+        
         Args:
             conn: 数据库连接
             batch: 批次数据
@@ -501,14 +654,6 @@ class ImportStage:
         Returns:
             (导入成功的案例ID列表, 导入失败的案例错误信息字典 {case_id: error_message})
         """
-        # 如果启用图片下载，先批量下载图片
-        if self.download_images:
-            logger.info(f"开始批量下载图片，共 {len(batch)} 个案例")
-            image_failed_cases = self._download_images_batch(batch)
-            if image_failed_cases:
-                logger.warning(f"图片下载失败: {len(image_failed_cases)} 个案例")
-            logger.info(f"图片下载完成: 成功 {self.stats['images_downloaded']}, 失败 {self.stats['images_failed']}, 跳过 {self.stats['images_skipped']}")
-        
         insert_sql = """
             INSERT INTO ad_cases (
                 case_id, source_url, title, description, author, publish_time,
@@ -516,7 +661,7 @@ class ImportStage:
                 brand_name, brand_industry, activity_type, location, tags,
                 score, score_decimal, favourite,
                 company_name, company_logo, agency_name,
-                combined_vector
+                combined_vector, embedding_fingerprint
             ) VALUES (
                 %(case_id)s, %(source_url)s, %(title)s, %(description)s, 
                 %(author)s, %(publish_time)s,
@@ -525,42 +670,84 @@ class ImportStage:
                 %(location)s, %(tags)s::jsonb,
                 %(score)s, %(score_decimal)s, %(favourite)s,
                 %(company_name)s, %(company_logo)s, %(agency_name)s,
-                %(combined_vector)s::vector(1024)
+                %(combined_vector)s::vector(1024), %(embedding_fingerprint)s
             )
             ON CONFLICT (case_id) DO UPDATE SET
                 title = EXCLUDED.title,
                 description = EXCLUDED.description,
-                combined_vector = EXCLUDED.combined_vector,
+                -- 复用向量的案例不传向量，保留库中向量
+                combined_vector = COALESCE(EXCLUDED.combined_vector, ad_cases.combined_vector),
+                embedding_fingerprint = EXCLUDED.embedding_fingerprint,
                 main_image_local = EXCLUDED.main_image_local,
                 updated_at = CURRENT_TIMESTAMP
         """
         
         # 准备数据
+        insert_data, failed_cases = self._build_insert_data(batch)
+        
+        if not insert_data:
+            return [], failed_cases
+        
+        # 逐个插入以捕获每个案例的错误
+        cur = conn.cursor()
+        imported_case_ids = []
+        
+        try:
+            for case_id, data in insert_data:
+                # 每个案例使用保存点：单个案例失败不会使整个事务进入 aborted 状态
+                cur.execute("SAVEPOINT insert_case")
+                try:
+                    cur.execute(insert_sql, data)
+                    cur.execute("RELEASE SAVEPOINT insert_case")
+                    imported_case_ids.append(case_id)
+                    self._incr_stat('total_imported')
+                except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT insert_case")
+                    error_msg = str(e)
+                    logger.error(f"插入案例失败 [case_id={case_id}]: {error_msg}")
+                    self._incr_stat('total_failed')
+                    if case_id:
+                        failed_cases[case_id] = error_msg
+        finally:
+            cur.close()
+        
+        return imported_case_ids, failed_cases
+    
+    def _build_insert_data(self, batch: List[Dict[str, Any]]) -> tuple[List[tuple], Dict[int, str]]:
+        """
+        将案例转换为入库参数（截断超长字段、序列化 JSON 字段）
+        
+        Args:
+            batch: 批次数据
+            
+        Returns:
+            ([(case_id, 入库参数字典), ...], 没有向量的案例错误信息字典 {case_id: error_message})
+        """
         import json
         insert_data = []
         failed_cases = {}  # {case_id: error_message}
         
+        # 截断字符串字段以符合数据库约束
+        def truncate_string(value: Any, max_length: int) -> Optional[str]:
+            """截断字符串到指定长度"""
+            if value is None:
+                return None
+            if isinstance(value, str):
+                return value[:max_length] if len(value) > max_length else value
+            return str(value)[:max_length] if len(str(value)) > max_length else str(value)
+        
         for case in batch:
             case_id = case.get('case_id')
             
-            # 检查向量是否存在
-            if case.get('combined_vector') is None:
+            # 检查向量是否存在（复用库中向量的案例不带向量）
+            if case.get('combined_vector') is None and not case.get('vector_reused'):
                 error_msg = case.get('vector_error', '案例没有向量')
                 logger.warning(f"案例 {case_id} 没有向量，跳过: {error_msg}")
-                self.stats['total_failed'] += 1
+                self._incr_stat('total_failed')
                 if case_id:
                     failed_cases[case_id] = error_msg
                 continue
             
-            # 截断字符串字段以符合数据库约束
-            def truncate_string(value: Any, max_length: int) -> Optional[str]:
-                """截断字符串到指定长度"""
-                if value is None:
-                    return None
-                if isinstance(value, str):
-                    return value[:max_length] if len(value) > max_length else value
-                return str(value)[:max_length] if len(str(value)) > max_length else str(value)
-            
             data = {
                 'case_id': case_id,
                 'source_url': case.get('source_url'),
@@ -583,33 +770,12 @@ class ImportStage:
                 'company_name': truncate_string(case.get('company_name'), 200),  # VARCHAR(200)
                 'company_logo': case.get('company_logo'),  # TEXT，不需要截断
                 'agency_name': truncate_string(case.get('agency_name'), 200),  # VARCHAR(200)
-                'combined_vector': case.get('combined_vector')  # 向量列表
+                'combined_vector': case.get('combined_vector'),  # 向量列表（复用库中向量时为 None）
+                'embedding_fingerprint': case.get('embedding_fingerprint')
             }
             insert_data.append((case_id, data))
         
-        if not insert_data:
-            return [], failed_cases
-        
-        # 逐个插入以捕获每个案例的错误
-        cur = conn.cursor()
-        imported_case_ids = []
-        
-        try:
-            for case_id, data in insert_data:
-                try:
-                    cur.execute(insert_sql, data)
-                    imported_case_ids.append(case_id)
-                    self.stats['total_imported'] += 1
-                except Exception as e:
-                    error_msg = str(e)
-                    logger.error(f"插入案例失败 [case_id={case_id}]: {error_msg}")
-                    self.stats['total_failed'] += 1
-                    if case_id:
-                        failed_cases[case_id] = error_msg
-        finally:
-            cur.close()
-        
-        return imported_case_ids, failed_cases
+        return insert_data, failed_cases
     
     def _get_connection(self):
         """获取数据库连接"""
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+多进程并行入库
+多个进程并行导入目录中的 cases_batch_*.json 文件，每个进程持有独立的嵌入模型和数据库连接。
+文件通过 import_file_claims 表认领（FOR UPDATE SKIP LOCKED），已完成的文件在重复运行同一作业时跳过，
+支持两种提交方式：
+    per_file: 每个文件的入库数据与认领状态在同一事务中提交
+    single_transaction: 各进程写入暂存表，全部文件成功后在一个事务中合并到 ad_cases（有文件最终失败时不合并）
+"""
+
+import os
+import socket
+import logging
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import psycopg2
+from psycopg2.extras import execute_batch, Json
+
+from ..embedding import BACKEND_ONNX
+from ..metrics import IMPORT_CASES, IMPORT_VECTORS
+from .import_stage import ImportStage
+
+logger = logging.getLogger(__name__)
+
+COMMIT_MODE_PER_FILE = 'per_file'
+COMMIT_MODE_SINGLE_TRANSACTION = 'single_transaction'
+COMMIT_MODES = (COMMIT_MODE_PER_FILE, COMMIT_MODE_SINGLE_TRANSACTION)
+
+# 暂存表与 ad_cases 共有的列（顺序与 ImportStage._build_insert_data 一致）
+_CASE_COLUMNS = [
+    'case_id', 'source_url', 'title', 'description', 'author', 'publish_time',
+    'main_image', 'main_image_local', 'images', 'video_url',
+    'brand_name', 'brand_industry', 'activity_type', 'location', 'tags',
+    'score', 'score_decimal', 'favourite',
+    'company_name', 'company_logo', 'agency_name',
+    'combined_vector', 'embedding_fingerprint'
+]
+
+_STAGING_INSERT_SQL = """
+    INSERT INTO ad_cases_import_staging (
+        job_id, file_name, case_id, source_url, title, description, author, publish_time,
+        main_image, main_image_local, images, video_url,
+        brand_name, brand_industry, activity_type, location, tags,
+        score, score_decimal, favourite,
+        company_name, company_logo, agency_name,
+        combined_vector, embedding_fingerprint
+    ) VALUES (
+        %(job_id)s, %(file_name)s, %(case_id)s, %(source_url)s, %(title)s, %(description)s,
+        %(author)s, %(publish_time)s,
+        %(main_image)s, %(main_image_local)s, %(images)s::jsonb, %(video_url)s,
+        %(brand_name)s, %(brand_industry)s, %(activity_type)s,
+        %(location)s, %(tags)s::jsonb,
+        %(score)s, %(score_decimal)s, %(favourite)s,
+        %(company_name)s, %(company_logo)s, %(agency_name)s,
+        %(combined_vector)s::vector(1024), %(embedding_fingerprint)s
+    )
+    ON CONFLICT (job_id, case_id) DO UPDATE SET
+        file_name = EXCLUDED.file_name,
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        combined_vector = EXCLUDED.combined_vector,
+        embedding_fingerprint = EXCLUDED.embedding_fingerprint,
+        main_image_local = EXCLUDED.main_image_local
+"""
+
+# 子进程内的入库阶段实例（每个进程加载一次模型）
+_worker_stage: Optional[ImportStage] = None
+
+
+def _init_worker(stage_kwargs: Dict[str, Any], torch_threads: Optional[int]):
+    """
+    子进程初始化：加载嵌入模型
+
+    Args:
+        stage_kwargs: ImportStage 构造参数
+        torch_threads: 每个进程的 torch / ONNX Runtime 线程数（避免多个进程争抢 CPU）
+    """
+    global _worker_stage
+
+    if torch_threads:
+        if stage_kwargs.get('embedding_backend') == BACKEND_ONNX:
+            # ONNX Runtime 后端按同样的份额设置推理线程数（未显式指定时）
+            stage_kwargs = {**stage_kwargs, 'onnx_threads': stage_kwargs.get('onnx_threads') or torch_threads}
+        else:
+            try:
+                import torch
+                torch.set_num_threads(torch_threads)
+            except ImportError:
+                pass
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    _worker_stage = ImportStage(**stage_kwargs)
+
+
+def _worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claim_next_file(conn, job_id: str, claim_timeout: int, max_attempts: int) -> Optional[str]:
+    """
+    认领下一个待处理文件
+
+    可认领：pending；failed 且未超过最大尝试次数；claimed 但认领超时（进程崩溃）
+
+    Returns:
+        文件名，没有可认领的文件时返回 None
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE import_file_claims
+            SET status = 'claimed',
+                worker = %s,
+                attempts = attempts + 1,
+                claimed_at = CURRENT_TIMESTAMP,
+                error_message = NULL
+            WHERE id = (
+                SELECT id FROM import_file_claims
+                WHERE job_id = %s
+                AND (
+                    status = 'pending'
+                    OR (status = 'failed' AND attempts < %s)
+                    OR (status = 'claimed' AND claimed_at < CURRENT_TIMESTAMP - make_interval(secs => %s))
+                )
+                ORDER BY file_name
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING file_name
+            """,
+            (_worker_name(), job_id, max_attempts, claim_timeout)
+        )
+        row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+    finally:
+        cur.close()
+
+
+def _mark_claim(conn, job_id: str, file_name: str, status: str,
+                stats: Optional[Dict[str, Any]] = None, error_message: Optional[str] = None):
+    """更新文件认领状态（不提交，由调用方决定事务边界）"""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE import_file_claims
+            SET status = %s,
+                stats = %s,
+                error_message = %s,
+                finished_at = CURRENT_TIMESTAMP
+            WHERE job_id = %s AND file_name = %s
+            """,
+            (status, Json(stats) if stats is not None else None, error_message, job_id, file_name)
+        )
+    finally:
+        cur.close()
+
+
+def _import_one_file(conn, stage: ImportStage, job_id: str, json_file: Path,
+                     commit_mode: str) -> Dict[str, Any]:
+    """
+    在当前事务中导入单个文件（不提交）
+
+    Returns:
+        文件结果 {'stats': {...}, 'imported_case_ids': [...], 'invalid_case_errors': {...}, 'import_failed_cases': {...}}
+    """
+    prepared = stage._prepare_cases(json_file)
+    vectors_before = (stage.stats['vectors_generated'], stage.stats['vectors_reused'])
+    cases = stage._generate_vectors_batch(prepared['cases_to_import'])
+
+    imported_case_ids = []
+    failed_cases = {}
+    for i in range(0, len(cases), stage.batch_size):
+        batch = cases[i:i + stage.batch_size]
+        if stage.download_images:
+            stage._download_images_for_batch(batch)
+
+        if commit_mode == COMMIT_MODE_PER_FILE:
+            batch_imported_ids, batch_failed = stage._insert_batch(conn, batch)
+        else:
+            insert_data, batch_failed = stage._build_insert_data(batch)
+            rows = [{**data, 'job_id': job_id, 'file_name': json_file.name} for _, data in insert_data]
+            cur = conn.cursor()
+            try:
+                execute_batch(cur, _STAGING_INSERT_SQL, rows, page_size=100)
+            finally:
+                cur.close()
+            # 暂存模式下案例在合并后才算入库，这里记录为待合并
+            batch_imported_ids = [case_id for case_id, _ in insert_data]
+
+        imported_case_ids.extend(batch_imported_ids)
+        failed_cases.update(batch_failed)
+
+    return {
+        'stats': {
+            'total_loaded': prepared['total_loaded'],
+            'total_valid': prepared['total_valid'],
+            'total_invalid': prepared['total_invalid'],
+            'total_existing': prepared['total_existing'],
+            'total_imported': len(imported_case_ids),
+            'total_failed': len(failed_cases),
+            'vectors_generated': stage.stats['vectors_generated'] - vectors_before[0],
+            'vectors_reused': stage.stats['vectors_reused'] - vectors_before[1]
+        },
+        'imported_case_ids': imported_case_ids,
+        'invalid_case_errors': prepared['invalid_case_errors'],
+        'import_failed_cases': failed_cases
+    }
+
+
+def _worker_main(job_id: str, json_dir: str, commit_mode: str,
+                 claim_timeout: int, max_attempts: int) -> Dict[str, Any]:
+    """
+    工作进程主循环：不断认领文件并导入，直到没有可认领的文件
+
+    Returns:
+        该进程处理的所有文件的汇总结果
+    """
+    stage = _worker_stage
+    result = {
+        'files_done': [],
+        'files_failed': {},
+        'stats': {
+            'total_loaded': 0,
+            'total_valid': 0,
+            'total_invalid': 0,
+            'total_existing': 0,
+            'total_imported': 0,
+            'total_failed': 0,
+            'vectors_generated': 0,
+            'vectors_reused': 0
+        },
+        'imported_case_ids': [],
+        'invalid_case_errors': {},
+        'import_failed_cases': {}
+    }
+
+    conn = stage._get_connection()
+    try:
+        while True:
+            file_name = _claim_next_file(conn, job_id, claim_timeout, max_attempts)
+            if not file_name:
+                break
+
+            logger.info(f"[{_worker_name()}] 认领文件: {file_name}")
+            try:
+                file_result = _import_one_file(conn, stage, job_id, Path(json_dir) / file_name, commit_mode)
+                # 入库数据与认领状态在同一事务中提交，重复运行时不会重复导入
+                _mark_claim(conn, job_id, file_name, 'done', stats=file_result['stats'])
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"[{_worker_name()}] 导入文件失败 {file_name}: {e}", exc_info=True)
+                _mark_claim(conn, job_id, file_name, 'failed', error_message=str(e))
+                conn.commit()
+                result['files_failed'][file_name] = str(e)
+                continue
+
+            result['files_done'].append(file_name)
+            for key, value in file_result['stats'].items():
+                result['stats'][key] += value
+            result['imported_case_ids'].extend(file_result['imported_case_ids'])
+            result['invalid_case_errors'].update(file_result['invalid_case_errors'])
+            result['import_failed_cases'].update(file_result['import_failed_cases'])
+            logger.info(
+                f"[{_worker_name()}] 文件完成: {file_name}, "
+                f"导入 {file_result['stats']['total_imported']}, 失败 {file_result['stats']['total_failed']}"
+            )
+    finally:
+        conn.close()
+
+    return result
+
+
+class ParallelImporter:
+    """多进程并行入库类"""
+
+    def __init__(
+        self,
+        db_config: Dict[str, Any],
+        workers: Optional[int] = None,
+        commit_mode: str = COMMIT_MODE_PER_FILE,
+        job_id: Optional[str] = None,
+        claim_timeout: int = 1800,
+        max_attempts: int = 3,
+        **stage_kwargs
+    ):
+        """
+        初始化并行入库
+
+        Args:
+            db_config: 数据库配置字典（同 ImportStage）
+            workers: 进程数（默认 CPU 核数的一半，每个进程会加载一份模型）
+            commit_mode: 提交方式，per_file（每个文件单独提交）或 single_transaction（最终单事务合并）
+            job_id: 作业ID，相同作业重复运行时跳过已完成的文件（默认根据目录和匹配模式生成）
+            claim_timeout: 认领超时时间（秒），超时的认领视为进程崩溃，可被重新认领
+            max_attempts: 单个文件的最大尝试次数
+            **stage_kwargs: 传给每个进程内 ImportStage 的其他参数（model_name、batch_size、skip_existing 等）
+        """
+        if commit_mode not in COMMIT_MODES:
+            raise ValueError(f"不支持的提交方式: {commit_mode}，可选: {', '.join(COMMIT_MODES)}")
+
+        self.db_config = db_config
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.commit_mode = commit_mode
+        self.job_id = job_id
+        self.claim_timeout = claim_timeout
+        self.max_attempts = max_attempts
+        self.stage_kwargs = {'db_config': db_config, **stage_kwargs}
+
+    @staticmethod
+    def default_job_id(json_dir: Path, pattern: str) -> str:
+        """根据目录绝对路径和匹配模式生成稳定的作业ID"""
+        key = f"{Path(json_dir).resolve()}|{pattern}"
+        return f"dir_{hashlib.md5(key.encode('utf-8')).hexdigest()[:16]}"
+
+    def import_from_directory(self, json_dir: Path, pattern: str = 'cases_batch_*.json') -> Dict[str, Any]:
+        """
+        并行导入目录中的所有JSON文件
+
+        Args:
+            json_dir: JSON文件目录
+            pattern: 文件匹配模式
+
+        Returns:
+            导入统计信息（字段同 ImportStage.import_from_directory，另含 job_id、files_done、files_failed、files_skipped）
+        """
+        json_dir = Path(json_dir)
+        json_files = sorted(json_dir.glob(pattern))
+        job_id = self.job_id or self.default_job_id(json_dir, pattern)
+
+        totals = {
+            'total_loaded': 0,
+            'total_valid': 0,
+            'total_invalid': 0,
+            'total_existing': 0,
+            'total_imported': 0,
+            'total_failed': 0,
+            'vectors_generated': 0,
+            'vectors_reused': 0
+        }
+        result = {
+            **totals,
+            'job_id': job_id,
+            'imported_case_ids': [],
+            'invalid_case_errors': {},
+            'import_failed_cases': {},
+            'files_done': [],
+            'files_failed': {},
+            'files_skipped': 0
+        }
+
+        if not json_files:
+            logger.warning(f"目录中没有找到JSON文件: {json_dir}")
+            return result
+
+        # 登记文件（已登记的文件保持原状态，实现断点续传）
+        self._register_files(job_id, [f.name for f in json_files])
+        pending = self._count_unfinished(job_id)
+        result['files_skipped'] = len(json_files) - pending
+        logger.info(
+            f"并行入库作业 {job_id}: 共 {len(json_files)} 个文件，待处理 {pending} 个，"
+            f"已完成跳过 {result['files_skipped']} 个，进程数 {self.workers}，提交方式 {self.commit_mode}"
+        )
+
+        if pending:
+            workers = min(self.workers, pending)
+            torch_threads = max(1, (os.cpu_count() or workers) // workers)
+            # 使用 spawn 避免 fork 后复用父进程中的模型和数据库连接
+            mp_context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(self.stage_kwargs, torch_threads)
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _worker_main, job_id, str(json_dir), self.commit_mode,
+                        self.claim_timeout, self.max_attempts
+                    )
+                    for _ in range(workers)
+                ]
+                for future in as_completed(futures):
+                    try:
+                        worker_result = future.result()
+                    except Exception as e:
+                        logger.error(f"入库进程异常退出: {e}", exc_info=True)
+                        continue
+                    for key in totals:
+                        result[key] += worker_result['stats'][key]
+                    result['files_done'].extend(worker_result['files_done'])
+                    result['files_failed'].update(worker_result['files_failed'])
+                    result['imported_case_ids'].extend(worker_result['imported_case_ids'])
+                    result['invalid_case_errors'].update(worker_result['invalid_case_errors'])
+                    result['import_failed_cases'].update(worker_result['import_failed_cases'])
+
+        if self.commit_mode == COMMIT_MODE_SINGLE_TRANSACTION:
+            unfinished = self._count_unfinished(job_id)
+            # 已达最大尝试次数的文件不会再被认领，合并后这些文件的案例永远不会入库
+            failed_files = self._failed_files(job_id)
+            if unfinished or failed_files:
+                if failed_files:
+                    logger.error(
+                        f"{len(failed_files)} 个文件已达最大尝试次数仍失败，不合并暂存数据"
+                        f"（修复后使用新的作业ID重新导入）: {', '.join(sorted(failed_files))}"
+                    )
+                    result['files_failed'].update(failed_files)
+                else:
+                    logger.warning(f"仍有 {unfinished} 个文件未完成，暂不合并（重新运行作业 {job_id} 以继续）")
+                result['imported_case_ids'] = []
+                result['total_imported'] = 0
+            else:
+                merged_ids = self._merge_staging(job_id)
+                result['imported_case_ids'] = merged_ids
+                result['total_imported'] = len(merged_ids)
+
+        # 入库进程中的运行指标不在本进程导出，按汇总结果记录
+        IMPORT_CASES.inc(result['total_imported'], result='imported')
+        IMPORT_CASES.inc(result['total_failed'], result='failed')
+        IMPORT_VECTORS.inc(result['vectors_generated'], result='generated')
+        IMPORT_VECTORS.inc(result['vectors_reused'], result='reused')
+
+        result['files_done'].sort()
+        logger.info(
+            f"并行入库完成: 导入 {result['total_imported']}, 失败 {result['total_failed']}, "
+            f"向量生成 {result['vectors_generated']}/复用 {result['vectors_reused']}, "
+            f"完成文件 {len(result['files_done'])}, 失败文件 {len(result['files_failed'])}"
+        )
+        return result
+
+    def _get_connection(self):
+        """获取数据库连接"""
+        return psycopg2.connect(**self.db_config)
+
+    def _register_files(self, job_id: str, file_names: List[str]):
+        """登记作业文件"""
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor()
+            execute_batch(
+                cur,
+                """
+                INSERT INTO import_file_claims (job_id, file_name, status)
+                VALUES (%s, %s, 'pending')
+                ON CONFLICT (job_id, file_name) DO NOTHING
+                """,
+                [(job_id, name) for name in file_names]
+            )
+            conn.commit()
+            cur.close()
+        finally:
+            conn.close()
+
+    def _count_unfinished(self, job_id: str) -> int:
+        """统计尚未完成的文件数（不含已达最大尝试次数的失败文件）"""
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT COUNT(*) FROM import_file_claims
+                WHERE job_id = %s
+                AND (status IN ('pending', 'claimed') OR (status = 'failed' AND attempts < %s))
+                """,
+                (job_id, self.max_attempts)
+            )
+            count = cur.fetchone()[0]
+            cur.close()
+            return count
+        finally:
+            conn.close()
+
+    def _failed_files(self, job_id: str) -> Dict[str, str]:
+        """
+        已达最大尝试次数的失败文件
+
+        Returns:
+            {文件名: 错误信息}
+        """
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT file_name, error_message FROM import_file_claims
+                WHERE job_id = %s AND status = 'failed' AND attempts >= %s
+                """,
+                (job_id, self.max_attempts)
+            )
+            failed = {file_name: error_message or '' for file_name, error_message in cur.fetchall()}
+            cur.close()
+            return failed
+        finally:
+            conn.close()
+
+    def _merge_staging(self, job_id: str) -> List[int]:
+        """
+        在一个事务中将暂存数据合并到 ad_cases，并清理暂存数据
+
+        Returns:
+            合并成功的案例ID列表
+        """
+        columns = ', '.join(_CASE_COLUMNS)
+        conn = self._get_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                INSERT INTO ad_cases ({columns})
+                SELECT {columns}
+                FROM ad_cases_import_staging
+                WHERE job_id = %s
+                ON CONFLICT (case_id) DO UPDATE SET
+                    title = EXCLUDED.title,
+                    description = EXCLUDED.description,
+                    combined_vector = COALESCE(EXCLUDED.combined_vector, ad_cases.combined_vector),
+                    embedding_fingerprint = EXCLUDED.embedding_fingerprint,
+                    main_image_local = EXCLUDED.main_image_local,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING case_id
+                """,
+                (job_id,)
+            )
+            merged_ids = [row[0] for row in cur.fetchall()]
+            cur.execute("DELETE FROM ad_cases_import_staging WHERE job_id = %s", (job_id,))
+            cur.execute(
+                "UPDATE import_file_claims SET status = 'merged' WHERE job_id = %s AND status = 'done'",
+                (job_id,)
+            )
+            conn.commit()
+            cur.close()
+            logger.info(f"暂存数据已合并到 ad_cases: {len(merged_ids)} 个案例")
+            return merged_ids
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+批量重新生成向量阶段
+按 ad_cases.id 顺序用服务端命名游标流式读取案例，在编码进程池中大批量编码，
+每批通过 COPY 写入临时表后与 ad_cases 关联更新，并在同一事务中记录检查点（embedding_jobs.last_id），
+中断后从检查点继续。用于补齐缺失的向量、切换模型/编码后端后全量重新生成，
+或为已有案例补充 title_vector / description_vector。
+每个向量列同时写入向量文本指纹，指纹与库中一致（文本和模型都未变化）的列不重新编码，
+所有列都未变化的行不写回
+"""
+
+import io
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import psycopg2
+
+from ..embedding import (
+    BACKEND_FLAG, DEFAULT_MODEL_NAME, FINGERPRINT_COLUMNS, build_embedding_text, create_embedding_backend,
+    embedding_fingerprint, embedding_model_id,
+)
+
+logger = logging.getLogger(__name__)
+
+VECTOR_COLUMNS = ('combined_vector', 'title_vector', 'description_vector')
+MODE_MISSING = 'missing'
+MODE_ALL = 'all'
+REEMBED_MODES = (MODE_MISSING, MODE_ALL)
+
+# 写回计划中表示该列置空的文本下标（all 模式下文本为空的列）
+CLEAR_VECTOR = -1
+
+# 运行中的作业超过该时间没有心跳，认为执行进程已退出，允许接管
+STALE_HEARTBEAT_SECONDS = 300
+
+
+def _vector_literal(vector: np.ndarray) -> str:
+    """归一化向量 -> pgvector 文本格式"""
+    return '[' + ','.join(format(x, '.7g') for x in vector.tolist()) + ']'
+
+
+# ============================================================
+# 编码工作进程（每个进程一份模型）
+# ============================================================
+
+_worker_backend = None
+
+
+def _init_worker(backend_kwargs: Dict[str, Any], torch_threads: Optional[int]):
+    """编码进程初始化"""
+    global _worker_backend
+
+    if torch_threads:
+        # 多个进程同时编码时限制每个进程的线程数，避免 CPU 超额订阅
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+    _worker_backend = create_embedding_backend(**backend_kwargs)
+
+
+def _encode_texts(texts: List[str], batch_size: int, backend=None) -> List[str]:
+    """编码一批文本，返回 pgvector 文本格式的归一化向量（backend 为空时使用编码进程的模型）"""
+    vectors = np.asarray((backend or _worker_backend).encode(texts, batch_size=batch_size), dtype=np.float32)
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [_vector_literal(vector) for vector in vectors]
+
+
+# ============================================================
+# 批量重新生成向量阶段
+# ============================================================
+
+class ReembedStage:
+    """批量重新生成向量阶段类"""
+
+    def __init__(
+        self,
+        db_config: Dict[str, Any],
+        job_id: Optional[str] = None,
+        columns: Sequence[str] = ('combined_vector',),
+        mode: str = MODE_MISSING,
+        model_name: Optional[str] = None,
+        embedding_backend: str = BACKEND_FLAG,
+        onnx_path: Optional[str] = None,
+        onnx_threads: Optional[int] = None,
+        fetch_size: int = 2000,
+        encode_batch_size: int = 64,
+        workers: int = 1,
+        restart: bool = False,
+        reuse_vectors: bool = True
+    ):
+        """
+        初始化批量重新生成向量阶段
+
+        Args:
+            db_config: 数据库配置（psycopg2.connect 参数）
+            job_id: 作业ID（相同作业ID从检查点继续），默认按模式、向量列和模型生成
+            columns: 生成的向量列（combined_vector / title_vector / description_vector）
+            mode: missing 只生成为空的向量；all 全部重新生成（切换模型或编码后端时）
+            model_name: 本地模型目录或模型名称
+            embedding_backend: 向量编码后端（flag / onnx）
+            onnx_path: ONNX 模型文件路径（onnx 后端）
+            onnx_threads: ONNX Runtime 推理线程数（onnx 后端，多进程时默认按进程数均分 CPU）
+            fetch_size: 每次从游标读取并写回的行数（一批一个事务、一个检查点）
+            encode_batch_size: 每次模型推理的文本数
+            workers: 编码进程数（1 时在当前进程的后台线程中编码）
+            restart: 忽略已有检查点，从头开始
+            reuse_vectors: all 模式下跳过向量文本指纹与库中一致的向量列（默认 True）
+        """
+        requested = list(columns or [])
+        columns = [c for c in VECTOR_COLUMNS if c in requested]
+        if not columns or any(c not in VECTOR_COLUMNS for c in requested):
+            raise ValueError(f"向量列必须是 {', '.join(VECTOR_COLUMNS)} 中的一个或多个")
+        if mode not in REEMBED_MODES:
+            raise ValueError(f"未知的模式: {mode}（可选: {', '.join(REEMBED_MODES)}）")
+
+        self.db_config = db_config
+        self.columns = columns
+        self.mode = mode
+        self.model_name = model_name or DEFAULT_MODEL_NAME
+        self.embedding_backend = embedding_backend or BACKEND_FLAG
+        self.onnx_path = onnx_path
+        self.onnx_threads = onnx_threads
+        self.fetch_size = max(1, fetch_size)
+        self.encode_batch_size = max(1, encode_batch_size)
+        self.workers = max(1, workers or 1)
+        self.restart = restart
+        self.reuse_vectors = reuse_vectors
+        self.model_id = embedding_model_id(self.embedding_backend, self.model_name, onnx_path)
+        self.job_id = job_id or self.default_job_id(self.columns, mode, self.model_name, self.embedding_backend)
+        self.worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._stop_event = threading.Event()
+        self._prepared = False
+        self._backend = None  # 单进程模式的编码模型
+        self._start_id: Optional[int] = None
+        self.stats = {
+            'total_rows': 0,
+            'processed_rows': 0,
+            'vectors_written': 0,
+            'vectors_reused': 0,
+            'chunks': 0,
+            'last_id': 0,
+            'status': 'pending',
+            'start_time': None,
+            'end_time': None,
+        }
+
+    @staticmethod
+    def default_job_id(columns: Sequence[str], mode: str, model_name: str, embedding_backend: str) -> str:
+        """默认作业ID：同一配置重复执行时命中同一个检查点"""
+        model = os.path.basename(str(model_name).rstrip('/')) or 'model'
+        short = '+'.join(c.replace('_vector', '') for c in columns)
+        return f"reembed_{mode}_{short}_{model}_{embedding_backend}"
+
+    def stop(self):
+        """请求停止（当前批次写回并记录检查点后退出）"""
+        self._stop_event.set()
+
+    def prepare(self) -> bool:
+        """
+        创建或接管作业记录并确定检查点（run 会自动调用，后台执行前单独调用可以提前发现配置错误）
+
+        Returns:
+            是否有需要执行的工作（all 模式作业已完成时返回 False）
+        """
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            self._start_id = self._prepare_job(conn)
+        finally:
+            conn.close()
+        self._prepared = True
+        return self._start_id is not None
+
+    def run(self) -> Dict[str, Any]:
+        """
+        执行批量重新生成向量
+
+        Returns:
+            统计信息
+        """
+        self.stats['start_time'] = datetime.now()
+        if not self._prepared:
+            self.prepare()
+        last_id = self._start_id
+        if last_id is None:
+            return self._result(0.0)
+
+        write_conn = psycopg2.connect(**self.db_config)
+        try:
+            logger.info("=" * 60)
+            logger.info("开始批量重新生成向量")
+            logger.info("=" * 60)
+            logger.info(f"作业ID: {self.job_id}，模式: {self.mode}，向量列: {', '.join(self.columns)}")
+            logger.info(f"模型: {self.model_name}（后端: {self.embedding_backend}），编码进程数: {self.workers}")
+            logger.info(f"检查点: id > {last_id}，待处理 {self.stats['total_rows']} 行，每批 {self.fetch_size} 行")
+
+            start = time.time()
+            try:
+                status = self._process(write_conn, last_id, start)
+            except KeyboardInterrupt:
+                write_conn.rollback()
+                self._finish_job(write_conn, 'cancelled', '用户中断')
+                raise
+            except Exception as e:
+                write_conn.rollback()
+                self._finish_job(write_conn, 'failed', str(e))
+                raise
+            self._finish_job(write_conn, status)
+            duration = time.time() - start
+
+            logger.info("=" * 60)
+            logger.info(f"批量重新生成向量{'完成' if status == 'completed' else '已取消'}")
+            logger.info("=" * 60)
+            logger.info(
+                f"处理行数: {self.stats['processed_rows']}，写入向量: {self.stats['vectors_written']}，"
+                f"指纹未变化跳过: {self.stats['vectors_reused']}"
+            )
+            logger.info(f"检查点: {self.stats['last_id']}")
+            logger.info(f"总耗时: {duration:.2f} 秒 ({self._rate(duration):.1f} 行/秒)")
+            return self._result(duration)
+        finally:
+            write_conn.close()
+
+    def _result(self, duration: float) -> Dict[str, Any]:
+        self.stats['end_time'] = datetime.now()
+        return {
+            **self.stats,
+            'job_id': self.job_id,
+            'duration_seconds': duration,
+            'rows_per_second': self._rate(duration),
+        }
+
+    def _rate(self, duration: float) -> float:
+        return self.stats['processed_rows'] / duration if duration > 0 else 0.0
+
+    # ------------------------------------------------------------
+    # 作业记录与检查点
+    # ------------------------------------------------------------
+
+    def _pending_condition(self) -> str:
+        """待处理行的过滤条件（missing 模式只取有空向量的行）"""
+        if self.mode == MODE_ALL:
+            return ''
+        return ' AND (' + ' OR '.join(f"{c} IS NULL" for c in self.columns) + ')'
+
+    def _prepare_job(self, conn) -> Optional[int]:
+        """
+        创建或接管作业记录
+
+        missing 模式的作业完成后再次执行时从头扫描（只处理之后新增的空向量行）；
+        all 模式的作业完成后需要 restart 才会重新执行
+
+        Returns:
+            开始读取的检查点（last_id），all 模式作业已完成时返回 None
+        """
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO embedding_jobs (job_id, columns, mode, model_name, embedding_backend, fetch_size, workers)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (job_id) DO NOTHING
+            """, (self.job_id, json.dumps(self.columns), self.mode, self.model_name,
+                  self.embedding_backend, self.fetch_size, self.workers))
+            cur.execute("""
+                SELECT status, columns, mode, model_name, embedding_backend, last_id, worker,
+                       EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - heartbeat_at))
+                FROM embedding_jobs WHERE job_id = %s FOR UPDATE
+            """, (self.job_id,))
+            status, columns, mode, model_name, backend, last_id, worker, idle_seconds = cur.fetchone()
+
+            if status == 'running' and worker != self.worker_name and (
+                idle_seconds is None or idle_seconds < STALE_HEARTBEAT_SECONDS
+            ):
+                conn.rollback()
+                raise RuntimeError(f"作业 {self.job_id} 正在由 {worker} 执行")
+
+            if not self.restart and last_id and (
+                list(columns) != self.columns or mode != self.mode
+                or model_name != self.model_name or backend != self.embedding_backend
+            ):
+                # 检查点之前的向量由另一套配置生成，继续执行会混用两个模型的向量
+                conn.rollback()
+                raise ValueError(
+                    f"作业 {self.job_id} 的配置（{mode}, {columns}, {model_name}, {backend}）与本次不一致，"
+                    f"请使用新的作业ID或从头开始（restart）"
+                )
+
+            if status == 'completed' and not self.restart and self.mode == MODE_ALL:
+                conn.rollback()
+                logger.info(f"作业 {self.job_id} 已完成（检查点 {last_id}），如需重新执行请从头开始（restart）")
+                self.stats.update({'status': 'completed', 'last_id': last_id})
+                return None
+
+            # 从头开始：指定 restart，或 missing 模式的作业已完成（之后可能有新的空向量行）
+            rescan = self.restart or status == 'completed'
+            if rescan:
+                last_id = 0
+
+            cur.execute(
+                f"SELECT COUNT(*) FROM ad_cases WHERE id > %s{self._pending_condition()}",
+                (last_id,)
+            )
+            total_rows = cur.fetchone()[0]
+
+            cur.execute("""
+                UPDATE embedding_jobs
+                SET status = 'running', columns = %s, mode = %s, model_name = %s, embedding_backend = %s,
+                    fetch_size = %s, workers = %s, last_id = %s,
+                    total_rows = %s + CASE WHEN %s THEN 0 ELSE processed_rows END,
+                    processed_rows = CASE WHEN %s THEN 0 ELSE processed_rows END,
+                    vectors_written = CASE WHEN %s THEN 0 ELSE vectors_written END,
+                    worker = %s, error_message = NULL, completed_at = NULL,
+                    started_at = CASE WHEN %s OR started_at IS NULL THEN CURRENT_TIMESTAMP ELSE started_at END,
+                    heartbeat_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s
+            """, (json.dumps(self.columns), self.mode, self.model_name, self.embedding_backend,
+                  self.fetch_size, self.workers, last_id, total_rows, rescan,
+                  rescan, rescan, self.worker_name, rescan, self.job_id))
+        conn.commit()
+
+        self.stats.update({'total_rows': total_rows, 'last_id': last_id, 'status': 'running'})
+        return last_id
+
+    def _is_cancelled(self, conn) -> bool:
+        """是否已请求取消（stop() 或作业状态被改为 cancelled）"""
+        if self._stop_event.is_set():
+            return True
+        with conn.cursor() as cur:
+            cur.execute("SELECT status FROM embedding_jobs WHERE job_id = %s", (self.job_id,))
+            row = cur.fetchone()
+        conn.commit()
+        return not row or row[0] == 'cancelled'
+
+    def _finish_job(self, conn, status: str, error_message: Optional[str] = None):
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE embedding_jobs
+                    SET status = %s, error_message = %s, heartbeat_at = CURRENT_TIMESTAMP,
+                        completed_at = CASE WHEN %s = 'completed' THEN CURRENT_TIMESTAMP ELSE completed_at END
+                    WHERE job_id = %s
+                """, (status, error_message, status, self.job_id))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"更新作业状态失败: {e}")
+        self.stats['status'] = status
+
+    # ------------------------------------------------------------
+    # 读取、编码与写回
+    # ------------------------------------------------------------
+
+    def _create_executor(self):
+        backend_kwargs = {
+            'backend': self.embedding_backend,
+            'model_path': self.model_name,
+            'onnx_path': self.onnx_path,
+            'onnx_threads': self.onnx_threads,
+        }
+        if self.workers <= 1:
+            # 单进程：后台线程编码，主线程同时读取下一批和写回上一批
+            # 模型只由本作业持有（不放在模块全局变量中），作业结束后随 _process 释放
+            self._backend = create_embedding_backend(**backend_kwargs)
+            return ThreadPoolExecutor(max_workers=1)
+
+        torch_threads = max(1, (os.cpu_count() or self.workers) // self.workers)
+        if not backend_kwargs['onnx_threads']:
+            backend_kwargs['onnx_threads'] = torch_threads
+        # 使用 spawn 避免 fork 后复用父进程中的数据库连接
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(backend_kwargs, torch_threads)
+        )
+
+    def _read_chunks(self, last_id: int):
+        """服务端命名游标按 id 顺序流式读取，每次返回 fetch_size 行"""
+        null_flags = ', '.join(f"{c} IS NULL" for c in self.columns)
+        fingerprints = ', '.join(FINGERPRINT_COLUMNS[c] for c in self.columns)
+        conn = psycopg2.connect(**self.db_config)
+        try:
+            conn.set_session(readonly=True)
+            with conn.cursor(name=f"reembed_{os.getpid()}") as cur:
+                cur.itersize = self.fetch_size
+                cur.execute(
+                    f"SELECT id, title, description, {null_flags}, {fingerprints} FROM ad_cases "
+                    f"WHERE id > %s{self._pending_condition()} ORDER BY id",
+                    (last_id,)
+                )
+                while True:
+                    rows = cur.fetchmany(self.fetch_size)
+                    if not rows:
+                        break
+                    yield rows
+            conn.rollback()
+        finally:
+            conn.close()
+
+    def _plan_chunk(
+        self, rows: List[tuple]
+    ) -> Tuple[List[str], List[Tuple[int, List[Optional[int]], List[Optional[str]]]]]:
+        """
+        生成一批行的编码文本和写回计划
+
+        Returns:
+            (编码文本列表, [(id, 每个向量列对应的文本下标, 每个向量列的新指纹)])
+            下标为 None 表示该列保持不变（missing 模式下已有向量、指纹未变化），
+            为 CLEAR_VECTOR 表示该列和指纹置空（all 模式下文本为空），所有列都保持不变的行不写回
+        """
+        texts: List[str] = []
+        plan: List[Tuple[int, List[Optional[int]], List[Optional[str]]]] = []
+        reused = 0
+        column_count = len(self.columns)
+        for row in rows:
+            row_id, title, description = row[:3]
+            null_flags = row[3:3 + column_count]
+            stored_fingerprints = row[3 + column_count:]
+            indices: List[Optional[int]] = []
+            fingerprints: List[Optional[str]] = []
+            for column, is_null, stored_fingerprint in zip(self.columns, null_flags, stored_fingerprints):
+                text = build_embedding_text(column, title, description)
+                if self.mode == MODE_MISSING and not is_null:
+                    indices.append(None)
+                    fingerprints.append(None)
+                    continue
+                if not text:
+                    # 全部重新生成：文本为空的列置空，避免保留旧模型的向量
+                    indices.append(CLEAR_VECTOR if self.mode == MODE_ALL and not is_null else None)
+                    fingerprints.append(None)
+                    continue
+                fingerprint = embedding_fingerprint(text, self.model_id)
+                if self.reuse_vectors and not is_null and fingerprint == stored_fingerprint:
+                    # 文本和模型都未变化（如中断后没有检查点的批次重新执行）
+                    indices.append(None)
+                    fingerprints.append(None)
+                    reused += 1
+                    continue
+                indices.append(len(texts))
+                fingerprints.append(fingerprint)
+                texts.append(text)
+            if any(i is not None for i in indices):
+                plan.append((row_id, indices, fingerprints))
+        self.stats['vectors_reused'] += reused
+        return texts, plan
+
+    def _process(self, write_conn, last_id: int, start: float) -> str:
+        """流水线执行：读取/写回与编码并行，最多两批在编码中"""
+        with write_conn.cursor() as cur:
+            # 每个向量列：向量、指纹、是否保持不变
+            column_defs = ', '.join(
+                f"{c} vector, {FINGERPRINT_COLUMNS[c]} VARCHAR(64), {c}_keep BOOLEAN" for c in self.columns
+            )
+            cur.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS reembed_staging (id BIGINT PRIMARY KEY, {column_defs}) "
+                f"ON COMMIT DELETE ROWS"
+            )
+        write_conn.commit()
+
+        in_flight: deque = deque()
+        max_in_flight = self.workers + 1
+        status = 'completed'
+        chunks = self._read_chunks(last_id)
+        try:
+            with self._create_executor() as executor:
+                for rows in chunks:
+                    texts, plan = self._plan_chunk(rows)
+                    future = executor.submit(
+                        _encode_texts, texts, self.encode_batch_size, self._backend
+                    ) if texts else None
+                    in_flight.append((rows[-1][0], len(rows), plan, future))
+
+                    while len(in_flight) >= max_in_flight:
+                        self._write_chunk(write_conn, *in_flight.popleft(), start=start)
+                    if self._is_cancelled(write_conn):
+                        status = 'cancelled'
+                        break
+
+                # 已提交编码的批次按顺序写回（取消时检查点停在最后写回的一批）
+                while in_flight:
+                    self._write_chunk(write_conn, *in_flight.popleft(), start=start)
+        finally:
+            chunks.close()
+            # 释放单进程模式加载的模型（API 进程中执行的作业结束后不再常驻内存）
+            self._backend = None
+        return status
+
+    def _write_chunk(
+        self,
+        conn,
+        chunk_last_id: int,
+        row_count: int,
+        plan: List[Tuple[int, List[Optional[int]], List[Optional[str]]]],
+        future: Optional[Future],
+        start: float
+    ):
+        """COPY 写入临时表 -> 关联更新 ad_cases -> 记录检查点（同一事务）"""
+        vectors = future.result() if future is not None else []
+        written = 0
+        try:
+            with conn.cursor() as cur:
+                if plan:
+                    buffer = io.StringIO()
+                    for row_id, indices, fingerprints in plan:
+                        values = []
+                        for i, fingerprint in zip(indices, fingerprints):
+                            if i is None:
+                                values.extend(('\\N', '\\N', 't'))
+                            elif i == CLEAR_VECTOR:
+                                values.extend(('\\N', '\\N', 'f'))
+                            else:
+                                values.extend((vectors[i], fingerprint, 'f'))
+                                written += 1
+                        buffer.write(f"{row_id}\t" + '\t'.join(values) + '\n')
+                    buffer.seek(0)
+                    copy_columns = []
+                    assignments = []
+                    for c in self.columns:
+                        f = FINGERPRINT_COLUMNS[c]
+                        copy_columns.extend((c, f, f"{c}_keep"))
+                        # 保持不变的列（missing 模式下已有向量、指纹未变化）保留库中的向量和指纹，
+                        # 其余列按临时表写入（all 模式下文本为空的列置空）
+                        assignments.append(f"{c} = CASE WHEN s.{c}_keep THEN a.{c} ELSE s.{c} END")
+                        assignments.append(f"{f} = CASE WHEN s.{c}_keep THEN a.{f} ELSE s.{f} END")
+                    cur.copy_expert(
+                        f"COPY reembed_staging (id, {', '.join(copy_columns)}) FROM STDIN",
+                        buffer
+                    )
+                    cur.execute(
+                        f"UPDATE ad_cases a SET {', '.join(assignments)}, updated_at = CURRENT_TIMESTAMP "
+                        f"FROM reembed_staging s WHERE a.id = s.id"
+                    )
+                cur.execute("""
+                    UPDATE embedding_jobs
+                    SET last_id = %s, processed_rows = processed_rows + %s,
+                        vectors_written = vectors_written + %s, heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE job_id = %s
+                """, (chunk_last_id, row_count, written, self.job_id))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        self.stats['chunks'] += 1
+        self.stats['processed_rows'] += row_count
+        self.stats['vectors_written'] += written
+        self.stats['last_id'] = chunk_last_id
+
+        elapsed = time.time() - start
+        total = self.stats['total_rows']
+        progress = f"{self.stats['processed_rows']}/{total}" if total else str(self.stats['processed_rows'])
+        logger.info(
+            f"已处理 {progress} 行，写入 {self.stats['vectors_written']} 个向量，"
+            f"检查点 {chunk_last_id} ({self._rate(elapsed):.1f} 行/秒)"
+        )
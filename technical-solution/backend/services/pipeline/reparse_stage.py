@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+离线重新解析阶段
+读取原始 HTML 归档，使用当前的列表页/详情页解析器在进程池中重新解析，生成新的批次文件，
+解析逻辑变化后无需重新爬取即可刷新字段
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from ..spider.html_archive import HtmlArchive, KIND_DETAIL, KIND_LIST
+from .utils import save_json, format_batch_filename, get_next_batch_number, merge_case_data
+from .validator import CaseValidator
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# 工作进程（每个进程一份归档和解析器实例）
+# ============================================================
+
+_worker_archive: Optional[HtmlArchive] = None
+_worker_detail_parser = None
+_worker_list_parser = None
+
+
+def _init_worker(archive_dir: str, parser_backend: Optional[str]):
+    """工作进程初始化"""
+    global _worker_archive, _worker_detail_parser, _worker_list_parser
+
+    from ..spider.detail_parser import DetailPageParser
+    from ..spider.list_page_html_parser import ListPageHTMLParser
+
+    # 解析器按页输出 INFO 日志，离线批量解析时只保留警告
+    logging.getLogger('services.spider').setLevel(logging.WARNING)
+
+    _worker_archive = HtmlArchive(Path(archive_dir))
+    _worker_detail_parser = DetailPageParser(parser_backend=parser_backend)
+    _worker_list_parser = ListPageHTMLParser(base_url='https://www.adquan.com', parser_backend=parser_backend)
+
+
+def _parse_list_entry(entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """重新解析一个列表页，返回案例列表项"""
+    html = _worker_archive.get(entry['sha256'])
+    if not html:
+        return []
+    try:
+        return _worker_list_parser.parse_html(html)
+    except Exception as e:
+        logger.warning(f"重新解析列表页失败 {entry.get('url')}: {e}")
+        return []
+
+
+def _parse_detail_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    重新解析一个详情页
+
+    Returns:
+        {'case_id', 'url', 'detail', 'error'}
+    """
+    url = entry.get('url')
+    case_id = entry.get('case_id') or _worker_list_parser._extract_case_id_from_url(url)
+    result = {'case_id': case_id, 'url': url, 'detail': None, 'error': None}
+
+    html = _worker_archive.get(entry['sha256'])
+    if not html:
+        result['error'] = f"归档内容不存在: {entry['sha256']}"
+        return result
+
+    try:
+        result['detail'] = _worker_detail_parser.parse_html(html, url)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+# ============================================================
+# 重新解析阶段
+# ============================================================
+
+class ReparseStage:
+    """离线重新解析阶段类"""
+
+    def __init__(
+        self,
+        archive_dir: Path,
+        output_dir: Path,
+        batch_size: int = 30,
+        workers: Optional[int] = None,
+        chunksize: int = 8,
+        parser_backend: Optional[str] = None
+    ):
+        """
+        初始化重新解析阶段
+
+        Args:
+            archive_dir: 原始 HTML 归档目录（爬取任务目录下的 html_archive）
+            output_dir: 新批次文件输出目录
+            batch_size: 每批保存的案例数量
+            workers: 解析进程数，默认为 CPU 核数
+            chunksize: 每次分发给工作进程的页面数
+            parser_backend: HTML 解析后端（html.parser / lxml），默认 html.parser
+        """
+        self.archive_dir = Path(archive_dir)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.parser_backend = parser_backend
+        self.validator = CaseValidator()
+
+        self.stats = {
+            'total_list_pages': 0,
+            'total_detail_pages': 0,
+            'total_parsed': 0,
+            'total_failed': 0,
+            'total_invalid': 0,
+            'total_saved': 0,
+            'batches_saved': 0,
+            'start_time': None,
+            'end_time': None,
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """
+        执行重新解析
+
+        Returns:
+            统计信息
+        """
+        archive = HtmlArchive(self.archive_dir)
+        list_entries = archive.latest_entries(KIND_LIST)
+        detail_entries = archive.latest_entries(KIND_DETAIL)
+
+        self.stats['total_list_pages'] = len(list_entries)
+        self.stats['total_detail_pages'] = len(detail_entries)
+        self.stats['start_time'] = datetime.now()
+
+        logger.info("=" * 60)
+        logger.info("开始离线重新解析")
+        logger.info("=" * 60)
+        logger.info(f"归档目录: {self.archive_dir}")
+        logger.info(f"输出目录: {self.output_dir}")
+        logger.info(f"列表页: {len(list_entries)}, 详情页: {len(detail_entries)}, 进程数: {self.workers}")
+
+        start = time.time()
+        batch_num = get_next_batch_number(self.output_dir)
+        current_batch: List[Dict[str, Any]] = []
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(str(self.archive_dir), self.parser_backend)
+        ) as executor:
+            # 1. 重新解析列表页，得到 case_id -> 列表项（标题、评分、公司等列表页字段）
+            list_items: Dict[int, Dict[str, Any]] = {}
+            for items in executor.map(_parse_list_entry, list_entries, chunksize=self.chunksize):
+                for item in items:
+                    if item.get('id'):
+                        list_items[item['id']] = item
+            logger.info(f"列表页解析完成: {len(list_items)} 个案例列表项")
+
+            # 2. 重新解析详情页并与列表项合并
+            for processed, result in enumerate(
+                executor.map(_parse_detail_entry, detail_entries, chunksize=self.chunksize), 1
+            ):
+                case_id = result['case_id']
+                if result['error']:
+                    self.stats['total_failed'] += 1
+                    current_batch.append({
+                        'case_id': case_id,
+                        'url': result['url'],
+                        'title': f'案例 {case_id}',
+                        'error': result['error'],
+                        'crawl_time': datetime.now().isoformat()
+                    })
+                else:
+                    list_item = list_items.get(case_id) or {'id': case_id, 'url': result['url']}
+                    case_data = merge_case_data(list_item, result['detail'])
+                    is_valid, error = self.validator.validate_case(case_data)
+                    if not is_valid:
+                        case_data['validation_error'] = error
+                        self.stats['total_invalid'] += 1
+                    current_batch.append(case_data)
+                    self.stats['total_parsed'] += 1
+
+                if len(current_batch) >= self.batch_size:
+                    self._save_batch(current_batch, batch_num)
+                    current_batch = []
+                    batch_num += 1
+
+                if processed % 500 == 0:
+                    elapsed = time.time() - start
+                    logger.info(f"已解析 {processed}/{len(detail_entries)} 个详情页 ({processed / elapsed:.1f} 页/秒)")
+
+        if current_batch:
+            self._save_batch(current_batch, batch_num)
+
+        self.stats['end_time'] = datetime.now()
+        duration = time.time() - start
+        pages_per_second = len(detail_entries) / duration if duration > 0 else 0.0
+
+        logger.info("=" * 60)
+        logger.info("离线重新解析完成")
+        logger.info("=" * 60)
+        logger.info(f"解析成功: {self.stats['total_parsed']}（验证失败 {self.stats['total_invalid']}）")
+        logger.info(f"解析失败: {self.stats['total_failed']}")
+        logger.info(f"保存批次数: {self.stats['batches_saved']}")
+        logger.info(f"总耗时: {duration:.2f} 秒 ({pages_per_second:.1f} 页/秒)")
+
+        return {
+            **self.stats,
+            'duration_seconds': duration,
+            'pages_per_second': pages_per_second,
+            'output_dir': str(self.output_dir),
+        }
+
+    def _save_batch(self, batch: List[Dict[str, Any]], batch_num: int) -> bool:
+        """保存批次数据到JSON文件（格式与爬取阶段一致）"""
+        file_path = self.output_dir / format_batch_filename(batch_num)
+        output_data = {
+            'batch_num': batch_num,
+            'batch_size': len(batch),
+            'created_at': datetime.now().isoformat(),
+            'reparsed_from': str(self.archive_dir),
+            'cases': batch
+        }
+
+        if save_json(output_data, file_path):
+            self.stats['total_saved'] += len(batch)
+            self.stats['batches_saved'] += 1
+            logger.info(f"批次 {batch_num} 已保存: {file_path} ({len(batch)} 个案例)")
+            return True
+
+        logger.error(f"批次 {batch_num} 保存失败: {file_path}")
+        return False
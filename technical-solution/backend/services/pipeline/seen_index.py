@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+跨任务已爬取案例索引
+持久化在 crawl_seen_cases 表中，进程内使用位图缓存并定时增量刷新，
+爬取阶段在请求详情页前查询，避免不同任务重复爬取同一案例
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Iterable
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+# 增量刷新时向前多查询的时间窗口（秒），覆盖刷新期间尚未提交的写入
+REFRESH_OVERLAP_SECONDS = 60
+
+
+class CaseIdBitmap:
+    """
+    case_id 位图
+
+    case_id 为非负整数且分布较密集，位图按最大 case_id 分配内存（百万级 ID 约 125KB），
+    查询结果精确，不会像布隆过滤器一样出现误判
+    """
+
+    def __init__(self):
+        self._bits = bytearray()
+        self._count = 0
+
+    def add(self, case_id: int) -> bool:
+        """
+        添加 case_id
+
+        Returns:
+            是否为新增（之前不存在）
+        """
+        if case_id < 0:
+            return False
+        index, mask = case_id >> 3, 1 << (case_id & 7)
+        if index >= len(self._bits):
+            # 按倍数扩容，减少大量新增时的拷贝次数
+            self._bits.extend(bytes(max(index + 1, len(self._bits) * 2) - len(self._bits)))
+        if self._bits[index] & mask:
+            return False
+        self._bits[index] |= mask
+        self._count += 1
+        return True
+
+    def __contains__(self, case_id: int) -> bool:
+        if case_id < 0:
+            return False
+        index = case_id >> 3
+        return index < len(self._bits) and bool(self._bits[index] & (1 << (case_id & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """占用内存（字节）"""
+        return len(self._bits)
+
+
+class SeenCaseIndex:
+    """跨任务已爬取案例索引（线程安全，同一进程内的爬取任务共享）"""
+
+    def __init__(self, db_config: Dict[str, Any], refresh_interval: float = 60.0):
+        """
+        初始化索引
+
+        Args:
+            db_config: 数据库配置字典
+            refresh_interval: 增量刷新间隔（秒），用于感知其它进程写入的案例，<= 0 表示不刷新
+        """
+        self.db_config = db_config
+        self.refresh_interval = refresh_interval
+
+        self._bitmap = CaseIdBitmap()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._watermark: Optional[datetime] = None  # 数据库时间，下次增量刷新的起点
+        self._last_refresh = 0.0
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'marked': 0,
+            'refreshes': 0,
+        }
+
+    def _get_connection(self):
+        """获取数据库连接"""
+        return psycopg2.connect(**self.db_config)
+
+    def load(self) -> bool:
+        """
+        从数据库全量加载索引（crawl_seen_cases 及已入库的 ad_cases）
+
+        Returns:
+            是否加载成功，失败时索引保持为空（不跳过任何案例）
+        """
+        start_time = time.time()
+        try:
+            conn = self._get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT CURRENT_TIMESTAMP")
+                watermark = cur.fetchone()[0]
+                cur.execute(
+                    """
+                    SELECT case_id FROM crawl_seen_cases
+                    UNION
+                    SELECT case_id FROM ad_cases
+                    """
+                )
+                with self._lock:
+                    while True:
+                        rows = cur.fetchmany(10000)
+                        if not rows:
+                            break
+                        for (case_id,) in rows:
+                            self._bitmap.add(case_id)
+                    self._watermark = watermark
+                    self._last_refresh = time.time()
+                    self._loaded = True
+                cur.close()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"加载已爬取案例索引失败: {e}，本次不跳过其它任务已爬取的案例")
+            return False
+
+        logger.info(
+            f"已爬取案例索引加载完成: {len(self._bitmap)} 个案例, "
+            f"占用 {self._bitmap.nbytes / 1024:.1f} KB, 耗时 {time.time() - start_time:.2f} 秒"
+        )
+        return True
+
+    def refresh(self) -> int:
+        """
+        增量刷新：加载上次刷新之后其它任务/进程写入的案例
+
+        Returns:
+            新增的案例数
+        """
+        if not self._loaded:
+            return 0
+
+        added = 0
+        try:
+            conn = self._get_connection()
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT CURRENT_TIMESTAMP")
+                watermark = cur.fetchone()[0]
+                since = self._watermark - timedelta(seconds=REFRESH_OVERLAP_SECONDS)
+                cur.execute(
+                    """
+                    SELECT case_id FROM crawl_seen_cases WHERE last_seen_at > %s
+                    UNION
+                    SELECT case_id FROM ad_cases WHERE created_at > %s
+                    """,
+                    (since, since)
+                )
+                rows = cur.fetchall()
+                cur.close()
+            finally:
+                conn.close()
+
+            with self._lock:
+                for (case_id,) in rows:
+                    if self._bitmap.add(case_id):
+                        added += 1
+                self._watermark = watermark
+                self.stats['refreshes'] += 1
+        except Exception as e:
+            logger.warning(f"刷新已爬取案例索引失败: {e}")
+        finally:
+            self._last_refresh = time.time()
+
+        if added:
+            logger.info(f"已爬取案例索引增量刷新: 新增 {added} 个案例")
+        return added
+
+    def _maybe_refresh(self):
+        """到达刷新间隔时执行增量刷新"""
+        if self.refresh_interval > 0 and time.time() - self._last_refresh >= self.refresh_interval:
+            # 先更新时间，避免多个线程同时触发刷新
+            self._last_refresh = time.time()
+            self.refresh()
+
+    def contains(self, case_id: Any) -> bool:
+        """
+        检查案例是否已被任意任务成功爬取
+
+        Args:
+            case_id: 案例ID
+
+        Returns:
+            是否已爬取
+        """
+        try:
+            case_id = int(case_id)
+        except (TypeError, ValueError):
+            return False
+
+        self._maybe_refresh()
+
+        with self._lock:
+            found = case_id in self._bitmap
+            if found:
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+        return found
+
+    def mark_seen(self, case_ids: Iterable[Any], data_source: Optional[str] = None,
+                  task_id: Optional[str] = None) -> int:
+        """
+        记录已成功爬取的案例（写入数据库并更新内存索引）
+
+        Args:
+            case_ids: 案例ID列表
+            data_source: 数据源
+            task_id: 任务ID
+
+        Returns:
+            写入的案例数
+        """
+        ids = set()
+        for case_id in case_ids:
+            try:
+                ids.add(int(case_id))
+            except (TypeError, ValueError):
+                continue
+        if not ids:
+            return 0
+
+        # 先更新内存索引：即使数据库写入失败，本进程内的其它任务也能跳过
+        with self._lock:
+            for case_id in ids:
+                self._bitmap.add(case_id)
+
+        try:
+            conn = self._get_connection()
+            try:
+                cur = conn.cursor()
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO crawl_seen_cases (case_id, data_source, first_task_id, last_task_id)
+                    VALUES %s
+                    ON CONFLICT (case_id) DO UPDATE SET
+                        last_task_id = EXCLUDED.last_task_id,
+                        seen_count = crawl_seen_cases.seen_count + 1,
+                        last_seen_at = CURRENT_TIMESTAMP
+                    """,
+                    [(case_id, data_source, task_id, task_id) for case_id in sorted(ids)]
+                )
+                conn.commit()
+                cur.close()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"写入已爬取案例索引失败: {e}")
+            return 0
+
+        with self._lock:
+            self.stats['marked'] += len(ids)
+        return len(ids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        with self._lock:
+            return {
+                **self.stats,
+                'loaded': self._loaded,
+                'size': len(self._bitmap),
+                'memory_bytes': self._bitmap.nbytes,
+            }
+
+
+# 进程级共享索引（同一进程内的所有爬取任务共用一份内存位图）
+_shared_index: Optional[SeenCaseIndex] = None
+_shared_index_lock = threading.Lock()
+
+
+def get_seen_index(db_config: Dict[str, Any], refresh_interval: float = 60.0) -> SeenCaseIndex:
+    """
+    获取进程级共享的已爬取案例索引（首次调用时从数据库加载）
+
+    Args:
+        db_config: 数据库配置字典
+        refresh_interval: 增量刷新间隔（秒）
+
+    Returns:
+        共享索引实例
+    """
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = SeenCaseIndex(db_config, refresh_interval=refresh_interval)
+        if not _shared_index._loaded:
+            _shared_index.load()
+        return _shared_index
@@ -130,12 +130,13 @@ def load_resume_file(resume_file: Path) -> Set[int]:
         return set()
 
 
-def get_saved_case_ids_from_json(output_dir) -> Set[int]:
+def get_saved_case_ids_from_json(output_dir, successful_only: bool = False) -> Set[int]:
     """
     从JSON文件中获取已保存的case_id集合
     
     Args:
         output_dir: JSON文件输出目录（可以是Path对象或字符串）
+        successful_only: 只返回成功爬取的案例（不含爬取失败和验证失败的记录）
         
     Returns:
         已保存的case_id集合
@@ -152,12 +153,14 @@ def get_saved_case_ids_from_json(output_dir) -> Set[int]:
             if data and 'cases' in data:
                 for case in data['cases']:
                     case_id = case.get('case_id')
+                    if successful_only and ('error' in case or 'validation_error' in case):
+                        continue
                     if case_id:
                         saved_ids.add(case_id)
         except Exception as e:
             logger.error(f"读取批次文件失败 {batch_file}: {e}")
     
-    logger.info(f"从JSON文件加载已保存的case_id: {len(saved_ids)} 个")
+    logger.info(f"从JSON文件加载已{'成功' if successful_only else ''}保存的case_id: {len(saved_ids)} 个")
     return saved_ids
 
 
@@ -334,6 +337,92 @@ def calculate_progress_from_files(task_dir: Path, batch_size: int) -> Dict[str,
     return result
 
 
+# 只来自列表页的案例字段（重试时详情页重新爬取，这些字段需要从保存的列表项合并）
+LIST_ITEM_FIELDS = ('thumb', 'score', 'score_decimal', 'favourite', 'company_name', 'company_logo')
+
+
+def list_item_from_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    从批次文件中的案例还原列表项（merge_case_data 的 list_item 参数）
+    
+    失败记录中保存了原始列表项时直接使用，否则从合并后的案例数据中取列表页字段
+    
+    Args:
+        case: 批次文件中的案例
+        
+    Returns:
+        列表项字典
+    """
+    if case.get('list_item'):
+        return case['list_item']
+    list_item = {
+        'id': case.get('case_id'),
+        'url': case.get('url') or case.get('source_url'),
+        'title': case.get('title'),
+    }
+    for field in LIST_ITEM_FIELDS:
+        if case.get(field) is not None:
+            list_item[field] = case[field]
+    return list_item
+
+
+def collect_case_records_from_json(output_dir) -> Dict[str, Any]:
+    """
+    从批次文件收集案例记录（用于批量同步 crawl_case_records）
+    
+    同一个 case_id 出现在多个批次文件中时以最后一个为准
+    
+    Args:
+        output_dir: JSON文件输出目录（可以是Path对象或字符串）
+        
+    Returns:
+        {
+            'records': [{'case_id', 'case_url', 'case_title', 'status', 'error_message', 'error_type',
+                         'batch_file_name', 'list_item'}, ...],
+            'file_errors': 读取失败的文件数
+        }
+    """
+    output_dir = Path(output_dir)
+    records: Dict[int, Dict[str, Any]] = {}
+    file_errors = 0
+    
+    for batch_file in sorted(output_dir.glob('cases_batch_*.json')):
+        try:
+            data = load_json(batch_file)
+            if not data or 'cases' not in data:
+                continue
+            
+            for case in data['cases']:
+                case_id = case.get('case_id')
+                if not case_id:
+                    continue
+                
+                # 检查是否有错误信息（表示失败）
+                has_error = 'error' in case or 'validation_error' in case
+                if has_error:
+                    error_message = case.get('error') or case.get('validation_error', '未知错误')
+                    error_type = 'parse_error' if 'error' in case else 'validation_error'
+                else:
+                    error_message = None
+                    error_type = None
+                
+                records[case_id] = {
+                    'case_id': case_id,
+                    'case_url': case.get('url') or case.get('source_url'),
+                    'case_title': case.get('title', '未知标题'),
+                    'status': 'failed' if has_error else 'success',
+                    'error_message': str(error_message) if error_message is not None else None,
+                    'error_type': error_type,
+                    'batch_file_name': batch_file.name,
+                    'list_item': list_item_from_case(case),
+                }
+        except Exception as e:
+            logger.error(f"处理批次文件失败 {batch_file}: {e}")
+            file_errors += 1
+    
+    return {'records': list(records.values()), 'file_errors': file_errors}
+
+
 def merge_case_data(list_item: Dict[str, Any], detail_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     合并列表页数据和详情页数据
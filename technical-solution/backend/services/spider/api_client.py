@@ -8,21 +8,41 @@ import requests
 import json
 import logging
 import time
-from datetime import datetime
 from typing import Optional, Dict, List, Any
+from urllib.parse import urlencode
 from .csrf_token_manager import CSRFTokenManager
 from .list_page_html_parser import ListPageHTMLParser
 from .proxy_manager import ProxyManager
+from .html_archive import HtmlArchive, KIND_LIST
+from .rate_controller import AdaptiveRateController
+from .token_cache import SharedTokenCache
+from .event_log import log_event, should_sample
+from ..metrics import ADQUAN_RESPONSES, ADQUAN_REQUEST_SECONDS
 
 logger = logging.getLogger(__name__)
 
 
+def _mask_headers(headers: Dict[str, Any]) -> Dict[str, Any]:
+    """隐藏 Token 和 Cookie（诊断日志中只保留前几位）"""
+    masked = {}
+    for key, value in headers.items():
+        lowered = key.lower()
+        if 'token' in lowered or 'cookie' in lowered:
+            value = f"{str(value)[:6]}***"
+        masked[key] = value
+    return masked
+
+
 class AdquanAPIClient:
     """广告门API客户端类"""
     
     def __init__(self, base_url: str = 'https://www.adquan.com/case_library/index', 
                  delay_range: tuple = (1, 3), max_retries: int = 3,
-                 proxy_manager: Optional[ProxyManager] = None):
+                 proxy_manager: Optional[ProxyManager] = None,
+                 html_archive: Optional[HtmlArchive] = None,
+                 parser_backend: Optional[str] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None,
+                 token_cache: Optional[SharedTokenCache] = None):
         """
         初始化API客户端
         
@@ -31,17 +51,32 @@ class AdquanAPIClient:
             delay_range: 请求延迟范围（秒），用于控制请求频率
             max_retries: 最大重试次数
             proxy_manager: 代理管理器实例（可选）
+            html_archive: 原始 HTML 归档（可选），设置后保存每次获取的列表页 HTML
+            parser_backend: 列表页 HTML 解析后端（html.parser / lxml），默认 html.parser
+            rate_controller: 自适应速率控制器（可选），设置后请求间隔由其根据响应情况自动调整，
+                             不再使用 delay_range 随机等待
+            token_cache: 进程内共享的 Token 缓存（可选），设置后所有客户端共用一个 Token，
+                         只有缓存中还没有 Token 时才请求页面获取
         """
         self.base_url = base_url
         self.delay_range = delay_range
         self.max_retries = max_retries
         self.proxy_manager = proxy_manager
+        self.html_archive = html_archive
+        self.parser_backend = parser_backend
+        self.rate_controller = rate_controller
         
         # 创建Session
         self.session = requests.Session()
+        if proxy_manager:
+            # 节点有专用端口时为会话设置代理（获取Token前完成）
+            proxy_manager.bind_session(self.session)
         
         # 创建CSRF Token管理器（先获取Token，此时使用HTML请求的headers）
-        self.token_manager = CSRFTokenManager(base_url=base_url, session=self.session, proxy_manager=proxy_manager)
+        self.token_manager = CSRFTokenManager(
+            base_url=base_url, session=self.session, proxy_manager=proxy_manager, rate_controller=rate_controller,
+            token_cache=token_cache
+        )
         
         # 预先获取Token，确保Token可用
         # 这样后续API请求时Token已经准备好
@@ -78,6 +113,9 @@ class AdquanAPIClient:
     
     def _wait(self):
         """等待指定时间，控制请求频率"""
+        if self.rate_controller:
+            # 由速率控制器在下一次请求前按当前速率等待
+            return
         delay = self._get_delay()
         time.sleep(delay)
     
@@ -126,6 +164,7 @@ class AdquanAPIClient:
             
         Note:
             **新接口**：返回的 data 字段是 HTML 字符串，需要解析后转换为原有格式。
+            每次请求只记录一条 list_request 事件，请求/响应头和响应内容按采样率记录为 DEBUG 事件。
         """
         # 准备请求参数（新接口格式）
         params = self._map_params(page, case_type, **kwargs)
@@ -139,363 +178,194 @@ class AdquanAPIClient:
             token_headers = self.token_manager.get_token_for_header()  # 会触发刷新
         
         headers = {**self.session.headers, **token_headers}
+        full_url = f"{self.base_url}?{urlencode(params)}"
         
+        response = None
+        html_content = None
+        request_duration = 0.0
         try:
-            # 构建完整的请求URL（用于日志和调试）
-            from urllib.parse import urlencode
-            full_url = f"{self.base_url}?{urlencode(params)}"
-            
-            logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            logger.info(f"【完整请求信息】")
-            logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            logger.info(f"请求URL:")
-            logger.info(f"  - 完整URL: {full_url}")
-            logger.info(f"  - 基础URL: {self.base_url}")
-            logger.info(f"请求参数:")
-            logger.info(f"  - 页码（内部）: {page} (API使用: {page + 1})")
-            logger.info(f"  - 案例类型: {case_type}")
-            logger.info(f"  - 完整参数: {params}")
-            logger.info(f"请求配置:")
-            logger.info(f"  - 请求方法: GET")
-            logger.info(f"  - 超时设置: 30 秒")
-            logger.info(f"  - 重试次数: {retry_count}/{self.max_retries}")
-            logger.info(f"  - 请求时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"完整请求Headers:")
-            for key, value in headers.items():
-                # 对于敏感信息（如Token），可以完整记录但标记
-                logger.info(f"  - {key}: {value}")
-            logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            
             # 发送请求
             request_start_time = time.time()
             try:
-                response = self.session.get(
-                    self.base_url,
-                    params=params,
-                    headers=headers,
-                    timeout=30
-                )
+                if self.rate_controller:
+                    response = self.rate_controller.request(lambda: self.session.get(
+                        self.base_url,
+                        params=params,
+                        headers=headers,
+                        timeout=30
+                    ))
+                else:
+                    response = self.session.get(
+                        self.base_url,
+                        params=params,
+                        headers=headers,
+                        timeout=30
+                    )
                 request_duration = time.time() - request_start_time
+                ADQUAN_RESPONSES.inc(endpoint='list', status=response.status_code)
+                ADQUAN_REQUEST_SECONDS.observe(request_duration, endpoint='list')
                 
                 # 记录成功的请求
                 if self.proxy_manager:
-                    self.proxy_manager.record_request(success=True)
+                    self.proxy_manager.record_request(success=True, latency_ms=request_duration * 1000)
             except Exception as e:
                 request_duration = time.time() - request_start_time
+                ADQUAN_RESPONSES.inc(endpoint='list', status='error')
                 # 记录失败的请求并处理错误
                 if self.proxy_manager:
                     self.proxy_manager.handle_error(e)
                 raise
             
-            logger.info(f"【完整响应信息】")
-            logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            logger.info(f"响应状态:")
-            logger.info(f"  - HTTP状态码: {response.status_code}")
-            logger.info(f"  - 请求耗时: {request_duration:.2f} 秒")
-            logger.info(f"  - 响应大小: {len(response.content)} 字节")
-            logger.info(f"完整响应Headers:")
-            for key, value in response.headers.items():
-                logger.info(f"  - {key}: {value}")
-            logger.info(f"响应内容:")
-            logger.info(f"  - Content-Type: {response.headers.get('Content-Type', 'N/A')}")
-            logger.info(f"  - Content-Length: {response.headers.get('Content-Length', 'N/A')}")
+            # 采样记录完整的请求/响应信息（用于排查接口变化）
+            if logger.isEnabledFor(logging.DEBUG) and should_sample():
+                log_event(
+                    logger, 'list_request_detail', logging.DEBUG,
+                    page=page, url=full_url,
+                    request_headers=_mask_headers(headers),
+                    response_headers=dict(response.headers),
+                    body=response.text
+                )
             
             # 检查响应状态
             response.raise_for_status()
-            logger.info(f"  - HTTP状态检查: ✓ 通过")
             
             # 检查是否是Token错误
             if response.status_code in (401, 403):
-                logger.warning(f"⚠️ 检测到HTTP {response.status_code}，可能是Token失效")
-                logger.warning(f"完整错误响应内容:")
-                logger.warning(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                error_text = response.text
-                if len(error_text) > 10000:
-                    logger.warning(f"响应内容长度: {len(error_text)} 字符（超过10000，显示前后各5000字符）")
-                    logger.warning(f"【错误响应前5000字符】:")
-                    logger.warning(error_text[:5000])
-                    logger.warning(f"【错误响应后5000字符】:")
-                    logger.warning(error_text[-5000:])
-                else:
-                    logger.warning(error_text)
-                logger.warning(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+                log_event(
+                    logger, 'list_token_rejected', logging.WARNING,
+                    page=page, status=response.status_code, retry=retry_count, body=response.text
+                )
                 if self.token_manager.handle_token_error(response):
                     # Token已刷新，重试请求
                     if retry_count < self.max_retries:
-                        logger.info(f"✓ Token已刷新，准备重试请求（第{retry_count + 1}次，最多{self.max_retries}次）...")
                         self._wait()  # 等待后再重试
                         return self.get_creative_list(page, case_type, retry_count + 1, **kwargs)
                     else:
-                        error_msg = f"Token刷新后仍失败，已达到最大重试次数 {self.max_retries}"
-                        logger.error(f"✗ {error_msg}")
-                        raise requests.RequestException(error_msg)
+                        raise requests.RequestException(f"Token刷新后仍失败，已达到最大重试次数 {self.max_retries}")
             
             # 解析JSON响应
-            logger.info(f"开始解析JSON响应...")
-            logger.info(f"原始响应内容（完整）:")
-            logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            # 记录完整响应内容
-            response_text = response.text
-            response_len = len(response_text)
-            if response_len > 50000:
-                # 如果响应太大，记录前后各25000字符
-                logger.info(f"响应内容长度: {response_len} 字符（超过50000，显示前后各25000字符）")
-                logger.info(f"【响应前25000字符】:")
-                logger.info(response_text[:25000])
-                logger.info(f"【响应后25000字符】:")
-                logger.info(response_text[-25000:])
-            else:
-                logger.info(f"响应内容长度: {response_len} 字符")
-                logger.info(response_text)
-            logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            
             try:
                 data = response.json()
-                logger.info(f"JSON解析: ✓ 成功")
-                logger.info(f"  - 数据类型: {type(data).__name__}")
-                if isinstance(data, dict):
-                    logger.info(f"  - 数据键: {list(data.keys())}")
-                    logger.info(f"完整解析后的JSON数据:")
-                    logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                    import json as json_module
-                    json_str = json_module.dumps(data, ensure_ascii=False, indent=2)
-                    json_len = len(json_str)
-                    if json_len > 50000:
-                        logger.info(f"JSON数据长度: {json_len} 字符（超过50000，显示前后各25000字符）")
-                        logger.info(f"【JSON前25000字符】:")
-                        logger.info(json_str[:25000])
-                        logger.info(f"【JSON后25000字符】:")
-                        logger.info(json_str[-25000:])
-                    else:
-                        logger.info(json_str)
-                    logger.info(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
             except json.JSONDecodeError as e:
-                logger.error(f"✗ JSON解析失败")
-                logger.error(f"  错误: {e}")
-                logger.error(f"  响应内容（前500字符）: {response.text[:500]}")
-                logger.error(f"  响应内容（后500字符）: {response.text[-500:]}")
                 raise ValueError(f"响应不是有效的JSON格式: {e}")
             
             # 检查API返回的状态码
-            if isinstance(data, dict) and 'code' in data:
-                api_code = data.get('code')
-                api_message = data.get('message', '')
-                logger.info(f"  - API状态码: {api_code}")
-                if api_message:
-                    logger.info(f"  - API消息: {api_message}")
-                
-                if api_code != 0:
-                    error_msg = api_message or '未知错误'
-                    logger.error(f"✗ API返回错误")
-                    logger.error(f"  - 错误码: {api_code}")
-                    logger.error(f"  - 错误消息: {error_msg}")
-                    logger.error(f"完整错误响应数据:")
-                    logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                    import json as json_module
-                    error_json = json_module.dumps(data, ensure_ascii=False, indent=2)
-                    logger.error(error_json)
-                    logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                    raise ValueError(f"API错误: {error_msg}")
-                else:
-                    logger.info(f"  - API状态码检查: ✓ 通过")
+            if isinstance(data, dict) and 'code' in data and data.get('code') != 0:
+                raise ValueError(f"API错误: {data.get('message') or '未知错误'}")
             
             # 新接口：data 字段是 HTML 字符串，需要解析
             # 注意：typeclass=0 时，API返回JSON格式，但data字段是HTML字符串
-            if isinstance(data, dict) and 'data' in data:
-                html_content = data.get('data', '')
-                
-                logger.info(f"data字段类型检查:")
-                logger.info(f"  - data字段类型: {type(html_content).__name__}")
-                logger.info(f"  - typeclass参数: {params.get('typeclass', 'N/A')}")
-                
-                if not html_content:
-                    logger.warning(f"⚠️ API 返回的 data 字段为空")
-                    logger.warning(f"完整响应数据:")
-                    logger.warning(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                    import json as json_module
-                    logger.warning(json_module.dumps(data, ensure_ascii=False, indent=2))
-                    logger.warning(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                    return {
-                        'code': 0,
-                        'message': '请求成功',
-                        'data': {
-                            'items': [],
-                            'page': page,
-                        }
+            if not isinstance(data, dict) or 'data' not in data:
+                log_event(
+                    logger, 'list_response_unexpected', logging.WARNING,
+                    page=page, reason='missing_data_field', body=response.text
+                )
+                return data
+            
+            html_content = data.get('data', '')
+            if not html_content:
+                log_event(
+                    logger, 'list_request', logging.WARNING,
+                    page=page, api_page=params['page'], case_type=case_type, retry=retry_count,
+                    status=response.status_code, ms=round(request_duration * 1000, 1),
+                    bytes=len(response.content), items=0, reason='empty_data_field'
+                )
+                return {
+                    'code': 0,
+                    'message': '请求成功',
+                    'data': {
+                        'items': [],
+                        'page': page,
                     }
+                }
+            
+            # 检查 data 是字符串（HTML）还是字典（旧格式）
+            if isinstance(html_content, str):
+                # 归档原始 HTML（用于离线重新解析）
+                if self.html_archive:
+                    self.html_archive.put(full_url, html_content, kind=KIND_LIST, page=page, case_type=case_type)
                 
-                # 检查 data 是字符串（HTML）还是字典（旧格式）
-                if isinstance(html_content, str):
-                    # 新接口：typeclass=0 时，返回JSON但data字段是HTML字符串
-                    logger.info(f"  - 检测到 HTML 字符串格式（typeclass=0 的标准格式）")
-                    logger.info(f"  - HTML 内容长度: {len(html_content)} 字符")
-                    # 记录HTML内容的前500字符用于诊断
-                    html_preview = html_content[:500] if len(html_content) > 500 else html_content
-                    logger.info(f"  - HTML 内容预览（前500字符）: {html_preview}")
-                    
-                    try:
-                        parser = ListPageHTMLParser(base_url='https://www.adquan.com')
-                        items = parser.parse_html(html_content)
-                        logger.info(f"  - HTML 解析完成，提取到 {len(items)} 个案例")
-                        
-                        # 如果解析结果为空，记录更详细的诊断信息和完整HTML
-                        if not items:
-                            logger.warning(f"⚠️ HTML 解析结果为空，可能的原因：")
-                            logger.warning(f"   1. HTML 结构已变化，未找到 article_1 元素")
-                            logger.warning(f"   2. HTML 内容不完整或格式错误")
-                            logger.warning(f"   3. 该页确实没有数据")
-                            # 检查HTML中是否包含 article_1
-                            if 'article_1' not in html_content:
-                                logger.warning(f"   - 诊断: HTML中未找到 'article_1' 字符串")
-                            else:
-                                logger.warning(f"   - 诊断: HTML中包含 'article_1' 字符串，但解析失败")
-                            # 记录HTML中的关键元素
-                            if '<div' in html_content:
-                                div_count = html_content.count('<div')
-                                logger.warning(f"   - HTML中包含 {div_count} 个 <div> 标签")
-                            
-                            # 记录完整HTML内容用于排查问题
-                            logger.warning("=" * 80)
-                            logger.warning("解析结果为空时的完整HTML内容（用于排查问题）:")
-                            logger.warning("=" * 80)
-                            html_len = len(html_content)
-                            if html_len > 10000:
-                                logger.warning(f"HTML内容长度: {html_len} 字符（超过10000，仅显示前后各5000字符）")
-                                logger.warning("【HTML前5000字符】:")
-                                logger.warning(html_content[:5000])
-                                logger.warning("【HTML后5000字符】:")
-                                logger.warning(html_content[-5000:])
-                            else:
-                                logger.warning(f"HTML内容长度: {html_len} 字符")
-                                logger.warning(html_content)
-                            logger.warning("=" * 80)
-                        
-                        # 转换为旧格式（保持向后兼容）
-                        result = {
-                            'code': 0,
-                            'message': '请求成功',
-                            'data': {
-                                'items': items,
-                                'page': page,
-                            }
-                        }
-                        
-                        logger.info(f"✓ API请求成功完成")
-                        logger.info(f"  - 页码: {page}")
-                        logger.info(f"  - 案例数量: {len(items)}")
-                        
-                        return result
-                    except Exception as e:
-                        logger.error(f"✗ HTML 解析失败: {e}")
-                        logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                        logger.error(f"解析异常详情:")
-                        logger.error(f"  - 异常类型: {type(e).__name__}")
-                        logger.error(f"  - 异常消息: {str(e)}")
-                        logger.error(f"  - HTML 内容长度: {len(html_content)} 字符")
-                        import traceback
-                        logger.error(f"完整异常堆栈:")
-                        logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                        logger.error(traceback.format_exc())
-                        logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                        logger.error("解析异常时的完整HTML内容:")
-                        logger.error("=" * 80)
-                        html_len = len(html_content)
-                        if html_len > 50000:
-                            logger.error(f"HTML内容长度: {html_len} 字符（超过50000，显示前后各25000字符）")
-                            logger.error("【HTML前25000字符】:")
-                            logger.error(html_content[:25000])
-                            logger.error("【HTML后25000字符】:")
-                            logger.error(html_content[-25000:])
-                        else:
-                            logger.error(f"HTML内容长度: {html_len} 字符")
-                            logger.error(html_content)
-                        logger.error("=" * 80)
-                        raise ValueError(f"HTML 解析失败: {e}")
-                elif isinstance(html_content, dict):
-                    # 旧接口格式（向后兼容）
-                    logger.info(f"  - 检测到 JSON 格式响应（旧接口格式）")
-                    items_count = len(html_content.get('items', []))
-                    logger.info(f"  - items数量: {items_count}")
-                    
-                    # 如果items为空，记录完整的响应数据用于排查
-                    if items_count == 0:
-                        logger.warning(f"⚠️ JSON格式响应中items为空")
-                        logger.warning(f"完整JSON响应数据:")
-                        logger.warning(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                        import json as json_module
-                        json_str = json_module.dumps(data, ensure_ascii=False, indent=2)
-                        logger.warning(json_str)
-                        logger.warning(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-                        logger.warning(f"可能的原因：")
-                        logger.warning(f"  1. typeclass={params.get('typeclass', 'N/A')} 对应的案例类型在第{page + 1}页确实没有数据")
-                        logger.warning(f"  2. 该案例类型的数据范围可能小于第{page + 1}页")
-                        logger.warning(f"  3. API对不同typeclass返回的数据格式或范围可能不同")
-                    
-                    return data
+                try:
+                    parser = ListPageHTMLParser(base_url='https://www.adquan.com', parser_backend=self.parser_backend)
+                    items = parser.parse_html(html_content)
+                except Exception as e:
+                    raise ValueError(f"HTML 解析失败: {e}")
+                
+                if items:
+                    log_event(
+                        logger, 'list_request',
+                        page=page, api_page=params['page'], case_type=case_type, retry=retry_count,
+                        status=response.status_code, ms=round(request_duration * 1000, 1),
+                        bytes=len(response.content), items=len(items)
+                    )
                 else:
-                    logger.warning(f"  - 'data' 字段类型: {type(html_content).__name__}（期望字符串或字典）")
-                    return data
+                    # 解析结果为空：HTML 结构已变化、内容不完整或该页确实没有数据
+                    log_event(
+                        logger, 'list_request', logging.WARNING,
+                        page=page, api_page=params['page'], case_type=case_type, retry=retry_count,
+                        status=response.status_code, ms=round(request_duration * 1000, 1),
+                        bytes=len(response.content), items=0, reason='html_parse_empty',
+                        has_article_marker='article_1' in html_content,
+                        div_count=html_content.count('<div'), html=html_content
+                    )
+                
+                # 转换为旧格式（保持向后兼容）
+                return {
+                    'code': 0,
+                    'message': '请求成功',
+                    'data': {
+                        'items': items,
+                        'page': page,
+                    }
+                }
+            elif isinstance(html_content, dict):
+                # 旧接口格式（向后兼容）
+                items_count = len(html_content.get('items', []))
+                log_event(
+                    logger, 'list_request', logging.INFO if items_count else logging.WARNING,
+                    page=page, api_page=params['page'], case_type=case_type, retry=retry_count,
+                    status=response.status_code, ms=round(request_duration * 1000, 1),
+                    bytes=len(response.content), items=items_count, format='json',
+                    typeclass=params.get('typeclass')
+                )
+                return data
             else:
-                logger.warning(f"  - 响应中未找到 'data' 字段")
+                log_event(
+                    logger, 'list_response_unexpected', logging.WARNING,
+                    page=page, reason='data_field_type', data_type=type(html_content).__name__
+                )
                 return data
             
         except requests.RequestException as e:
-            logger.error(f"✗ HTTP请求异常")
-            logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            logger.error(f"异常详情:")
-            logger.error(f"  - 异常类型: {type(e).__name__}")
-            logger.error(f"  - 异常消息: {str(e)}")
-            logger.error(f"请求信息（异常时）:")
-            logger.error(f"  - 完整URL: {full_url if 'full_url' in locals() else 'N/A'}")
-            logger.error(f"  - 请求参数: {params if 'params' in locals() else 'N/A'}")
-            logger.error(f"  - 请求Headers: {headers if 'headers' in locals() else 'N/A'}")
-            # 如果有响应对象，记录响应信息
-            if 'response' in locals() and response is not None:
-                logger.error(f"响应信息（异常时）:")
-                logger.error(f"  - HTTP状态码: {response.status_code}")
-                logger.error(f"  - 响应Headers: {dict(response.headers)}")
-                logger.error(f"  - 响应内容: {response.text[:1000] if hasattr(response, 'text') else 'N/A'}")
-            logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            
             # 处理代理错误
             if self.proxy_manager:
                 self.proxy_manager.handle_error(e)
             
+            will_retry = retry_count < self.max_retries
+            log_event(
+                logger, 'list_request_failed', logging.WARNING if will_retry else logging.ERROR,
+                page=page, retry=retry_count, max_retries=self.max_retries, will_retry=will_retry,
+                status=response.status_code if response is not None else None,
+                ms=round(request_duration * 1000, 1), error=f"{type(e).__name__}: {e}",
+                body=response.text if response is not None else None
+            )
+            
             # 如果是网络错误且未达到最大重试次数，进行重试
-            if retry_count < self.max_retries:
-                logger.info(f"准备重试请求（第{retry_count + 1}次，最多{self.max_retries}次）...")
+            if will_retry:
                 self._wait()
                 return self.get_creative_list(page, case_type, retry_count + 1, **kwargs)
-            else:
-                logger.error(f"已达到最大重试次数 {self.max_retries}，放弃重试")
-                raise
+            raise
         
         except Exception as e:
-            logger.error(f"✗ 获取案例列表时发生未知异常")
-            logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            logger.error(f"异常详情:")
-            logger.error(f"  - 异常类型: {type(e).__name__}")
-            logger.error(f"  - 异常消息: {str(e)}")
-            import traceback
-            logger.error(f"完整异常堆栈:")
-            logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            logger.error(traceback.format_exc())
-            logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-            logger.error(f"请求信息（异常时）:")
-            logger.error(f"  - 完整URL: {full_url if 'full_url' in locals() else 'N/A'}")
-            logger.error(f"  - 请求参数: {params if 'params' in locals() else 'N/A'}")
-            logger.error(f"  - 请求Headers: {headers if 'headers' in locals() else 'N/A'}")
-            if 'response' in locals() and response is not None:
-                logger.error(f"响应信息（异常时）:")
-                logger.error(f"  - HTTP状态码: {response.status_code}")
-                logger.error(f"  - 响应Headers: {dict(response.headers)}")
-                response_text = response.text if hasattr(response, 'text') else 'N/A'
-                if isinstance(response_text, str) and len(response_text) > 10000:
-                    logger.error(f"  - 响应内容（前5000字符）: {response_text[:5000]}")
-                    logger.error(f"  - 响应内容（后5000字符）: {response_text[-5000:]}")
-                else:
-                    logger.error(f"  - 响应内容: {response_text}")
-            logger.error(f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+            # 解析错误带上 HTML 内容（截断）便于排查，其它未知异常记录堆栈
+            log_event(
+                logger, 'list_request_failed', logging.ERROR,
+                exc_info=not isinstance(e, ValueError),
+                page=page, retry=retry_count, url=full_url,
+                status=response.status_code if response is not None else None,
+                ms=round(request_duration * 1000, 1), error=f"{type(e).__name__}: {e}",
+                body=html_content if isinstance(html_content, str) else (response.text if response is not None else None)
+            )
             raise
     
     def get_creative_list_paginated(self, start_page: int = 0, max_pages: Optional[int] = 100, case_type: int = 1) -> List[Dict[str, Any]]:
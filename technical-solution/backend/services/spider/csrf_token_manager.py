@@ -13,6 +13,8 @@ import base64
 import json
 import binascii
 from .proxy_manager import ProxyManager
+from .rate_controller import AdaptiveRateController
+from .token_cache import SharedTokenCache, session_route
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +24,9 @@ class CSRFTokenManager:
     
     def __init__(self, base_url: str = 'https://www.adquan.com/case_library/index', 
                  session: Optional[requests.Session] = None,
-                 proxy_manager: Optional[ProxyManager] = None):
+                 proxy_manager: Optional[ProxyManager] = None,
+                 rate_controller: Optional[AdaptiveRateController] = None,
+                 token_cache: Optional[SharedTokenCache] = None):
         """
         初始化CSRF Token管理器
         
@@ -30,12 +34,18 @@ class CSRFTokenManager:
             base_url: 基础URL，用于获取Token的HTML页面
             session: requests.Session实例，如果为None则创建新的
             proxy_manager: 代理管理器实例（可选）
+            rate_controller: 自适应速率控制器（可选），Token 失效时通知其降速
+            token_cache: 进程内共享的 Token 缓存（可选），设置后 Token 和会话 Cookie 从缓存获取，
+                         不再由每个管理器各自请求页面
         """
         self.base_url = base_url
         self._session = session or requests.Session()
         self._token: Optional[str] = None
         self._token_fetch_time: Optional[float] = None
         self.proxy_manager = proxy_manager
+        self.rate_controller = rate_controller
+        self.token_cache = token_cache
+        self._cache_generation = 0  # 已同步到本会话的缓存 Token 代数
         
         # 设置默认请求头（桌面端浏览器）
         self._session.headers.update({
@@ -57,6 +67,9 @@ class CSRFTokenManager:
         Raises:
             ValueError: 如果无法获取Token
         """
+        if self.token_cache:
+            return self._get_cached_token(force_refresh)
+        
         # 如果已有Token且不强制刷新，直接返回
         if self._token and not force_refresh:
             return self._token
@@ -77,6 +90,22 @@ class CSRFTokenManager:
         
         return self._token
     
+    def _get_cached_token(self, force_refresh: bool) -> str:
+        """
+        从共享缓存获取Token（缓存已有Token时不发请求、不阻塞）
+        强制刷新时把当前Token标记为失效，多个管理器同时报告同一Token失效只会刷新一次
+        """
+        # 按会话当前的代理出口取 Token（节点切换后出口变化，取到的是新出口的 Token）
+        route = session_route(self._session)
+        token, generation = self.token_cache.get(stale_token=self._token if force_refresh else None, route=route)
+        if generation != self._cache_generation:
+            # 缓存已刷新或出口已变化，Token 需要配合对应的会话 Cookie 使用
+            self.token_cache.install_cookies(self._session)
+            self._cache_generation = generation
+        self._token = token
+        self._token_fetch_time = self.token_cache.fetched_at(route)
+        return token
+    
     def _extract_csrf_from_cookie(self) -> Optional[str]:
         """
         从 Cookie 中提取并解析 XSRF-TOKEN
@@ -137,7 +166,10 @@ class CSRFTokenManager:
         try:
             logger.info(f"正在访问 {self.base_url} 获取CSRF Token...")
             try:
-                response = self._session.get(self.base_url, timeout=30)
+                if self.rate_controller:
+                    response = self.rate_controller.request(lambda: self._session.get(self.base_url, timeout=30))
+                else:
+                    response = self._session.get(self.base_url, timeout=30)
                 response.raise_for_status()
                 
                 # 记录成功的请求
@@ -237,6 +269,8 @@ class CSRFTokenManager:
         # 检查是否是Token相关的错误
         if response.status_code in (401, 403):
             logger.warning(f"检测到HTTP {response.status_code}错误，可能是CSRF Token失效，尝试刷新...")
+            if self.rate_controller:
+                self.rate_controller.record_csrf_failure()
             try:
                 self.refresh_token()
                 return True
@@ -251,6 +285,8 @@ class CSRFTokenManager:
                 response_lower = response.text.lower()
                 if any(indicator in response_lower for indicator in error_indicators):
                     logger.warning("响应内容中可能包含Token错误信息，尝试刷新Token...")
+                    if self.rate_controller:
+                        self.rate_controller.record_csrf_failure()
                     try:
                         self.refresh_token()
                         return True
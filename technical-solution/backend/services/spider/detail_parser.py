@@ -5,21 +5,41 @@
 """
 
 import requests
-from bs4 import BeautifulSoup, NavigableString
+from bs4 import BeautifulSoup, NavigableString, Tag
+import copy
 import logging
 import re
 from typing import Optional, Dict, Any, List
 from urllib.parse import urljoin, urlparse
 from .proxy_manager import ProxyManager
+from .html_archive import HtmlArchive, KIND_DETAIL
+from .html_backend import resolve_parser_backend, make_soup
+from .rate_controller import AdaptiveRateController
+from ..metrics import ADQUAN_RESPONSES, ADQUAN_REQUEST_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# 发布时间
+_DATE_PREFIX_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_PUBLISH_TIME_PATTERNS = (
+    re.compile(r'发布时间[：:]\s*(\d{4}-\d{2}-\d{2})'),
+    re.compile(r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})'),
+)
+
+# PC端"案例信息"区域
+_CASE_INFO_RE = re.compile('案例信息')
+_INDUSTRY_RE = re.compile(r'行业[：:]\s*([^\n\r]+)')
+_TYPE_RE = re.compile(r'类型[：:]\s*([^\n\r]+)')
+_AREA_RE = re.compile(r'地区[：:]\s*([^\n\r]+)')
+
 
 class DetailPageParser:
     """详情页解析器类"""
     
     def __init__(self, session: Optional[requests.Session] = None, base_url: str = 'https://m.adquan.com',
-                 proxy_manager: Optional[ProxyManager] = None):
+                 proxy_manager: Optional[ProxyManager] = None, html_archive: Optional[HtmlArchive] = None,
+                 parser_backend: Optional[str] = None, rate_controller: Optional[AdaptiveRateController] = None):
         """
         初始化详情页解析器
         
@@ -27,10 +47,18 @@ class DetailPageParser:
             session: requests.Session实例，如果为None则创建新的
             base_url: 基础URL，用于转换相对路径
             proxy_manager: 代理管理器实例（可选）
+            html_archive: 原始 HTML 归档（可选），设置后保存每次抓取的详情页 HTML
+            parser_backend: HTML 解析后端（html.parser / lxml），默认 html.parser
+            rate_controller: 自适应速率控制器（可选），设置后请求按其速率和并发限制发送
         """
         self.session = session or requests.Session()
         self.base_url = base_url
         self.proxy_manager = proxy_manager
+        self.html_archive = html_archive
+        self.parser_backend = resolve_parser_backend(parser_backend)
+        self.rate_controller = rate_controller
+        if self.proxy_manager:
+            self.proxy_manager.bind_session(self.session)
         
         # 设置默认请求头（使用PC端User-Agent以获取完整信息）
         if not hasattr(self.session, 'headers') or not self.session.headers:
@@ -40,12 +68,13 @@ class DetailPageParser:
                 'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
             })
     
-    def parse(self, url: str) -> Dict[str, Any]:
+    def parse(self, url: str, case_id: Optional[int] = None) -> Dict[str, Any]:
         """
         解析详情页，返回结构化数据
         
         Args:
             url: 详情页URL
+            case_id: 案例ID（可选，写入 HTML 归档索引）
             
         Returns:
             包含案例信息的字典
@@ -53,51 +82,9 @@ class DetailPageParser:
         try:
             logger.info(f"开始解析详情页: {url}")
             
-            # 检测是PC端还是移动端URL，并转换为PC端URL以获取完整信息
-            normalized_url = self._normalize_url_to_pc(url)
-            
-            # 获取HTML
-            try:
-                response = self.session.get(normalized_url, timeout=30)
-                response.raise_for_status()
-                response.encoding = 'utf-8'
-                
-                # 记录成功的请求
-                if self.proxy_manager:
-                    self.proxy_manager.record_request(success=True)
-            except Exception as e:
-                # 记录失败的请求并处理错误
-                if self.proxy_manager:
-                    self.proxy_manager.handle_error(e)
-                raise
+            html = self.fetch(url, case_id=case_id)
             
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 检测页面类型（PC端或移动端）
-            is_pc_page = self._is_pc_page(soup)
-            
-            # 提取各字段
-            result = {
-                'source_url': url,  # 保留原始URL
-                'title': self._extract_title(soup, is_pc_page),
-                'description': self._extract_description(soup),
-                'main_image': self._extract_main_image(soup, is_pc_page),
-                'images': self._extract_images(soup),
-                'video_url': self._extract_video(soup),
-                'author': self._extract_author(soup, is_pc_page),
-                'publish_time': self._extract_publish_time(soup, is_pc_page),
-                'brand_name': None,  # 将从agent区域提取
-                'brand_industry': None,
-                'activity_type': None,
-                'location': None,
-                'tags': [],
-                'agency_name': None,
-            }
-            
-            # 提取agent区域的信息（支持PC端和移动端）
-            agent_info = self._extract_agent_info(soup, is_pc_page)
-            result.update(agent_info)
+            result = self.parse_html(html, url)
             
             logger.info(f"成功解析详情页: {url}, 标题: {result['title']}")
             
@@ -110,6 +97,105 @@ class DetailPageParser:
             logger.error(f"解析详情页失败 {url}: {e}")
             raise
     
+    def fetch(self, url: str, case_id: Optional[int] = None) -> str:
+        """
+        获取详情页HTML并归档（不解析，解析可交给 parse_html 或解析进程池）
+        
+        Args:
+            url: 详情页URL
+            case_id: 案例ID（可选，写入 HTML 归档索引）
+            
+        Returns:
+            HTML 内容
+        """
+        html = self.fetch_html(url)
+        
+        # 归档原始 HTML（用于离线重新解析）
+        if self.html_archive:
+            self.html_archive.put(url, html, kind=KIND_DETAIL, case_id=case_id)
+        
+        return html
+    
+    def fetch_html(self, url: str) -> str:
+        """
+        获取详情页HTML（不解析）
+        
+        Args:
+            url: 详情页URL
+            
+        Returns:
+            HTML 内容
+        """
+        # 检测是PC端还是移动端URL，并转换为PC端URL以获取完整信息
+        normalized_url = self._normalize_url_to_pc(url)
+        
+        response = None
+        try:
+            if self.rate_controller:
+                response = self.rate_controller.request(lambda: self.session.get(normalized_url, timeout=30))
+            else:
+                response = self.session.get(normalized_url, timeout=30)
+            ADQUAN_RESPONSES.inc(endpoint='detail', status=response.status_code)
+            ADQUAN_REQUEST_SECONDS.observe(response.elapsed.total_seconds(), endpoint='detail')
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            
+            # 记录成功的请求
+            if self.proxy_manager:
+                self.proxy_manager.record_request(success=True, latency_ms=response.elapsed.total_seconds() * 1000)
+        except Exception as e:
+            if response is None:
+                ADQUAN_RESPONSES.inc(endpoint='detail', status='error')
+            # 记录失败的请求并处理错误
+            if self.proxy_manager:
+                self.proxy_manager.handle_error(e)
+            raise
+        
+        return response.text
+    
+    def parse_html(self, html: str, url: str) -> Dict[str, Any]:
+        """
+        从HTML中提取案例信息（不发起网络请求，可用于离线重新解析）
+        
+        Args:
+            html: 详情页HTML
+            url: 详情页原始URL
+            
+        Returns:
+            包含案例信息的字典
+        """
+        soup = make_soup(html, self.parser_backend)
+        
+        # 检测页面类型（PC端或移动端）
+        is_pc_page = self._is_pc_page(soup)
+        
+        # PC端页面多处按全文正则提取，全文只计算一次
+        page_text = soup.get_text() if is_pc_page else None
+        
+        # 提取各字段
+        result = {
+            'source_url': url,  # 保留原始URL
+            'title': self._extract_title(soup, is_pc_page),
+            'description': self._extract_description(soup),
+            'main_image': self._extract_main_image(soup, is_pc_page),
+            'images': self._extract_images(soup),
+            'video_url': self._extract_video(soup),
+            'author': self._extract_author(soup, is_pc_page),
+            'publish_time': self._extract_publish_time(soup, is_pc_page, page_text),
+            'brand_name': None,  # 将从agent区域提取
+            'brand_industry': None,
+            'activity_type': None,
+            'location': None,
+            'tags': [],
+            'agency_name': None,
+        }
+        
+        # 提取agent区域的信息（支持PC端和移动端）
+        agent_info = self._extract_agent_info(soup, is_pc_page, page_text)
+        result.update(agent_info)
+        
+        return result
+    
     def _normalize_url_to_pc(self, url: str) -> str:
         """将URL转换为PC端URL"""
         if 'm.adquan.com' in url:
@@ -228,12 +314,7 @@ class DetailPageParser:
             提取的文字内容
         """
         # 创建副本以避免修改原始对象
-        soup_copy = BeautifulSoup(str(container), 'html.parser')
-        # 获取容器本身（不再假设容器有特定的类名）
-        container_copy = soup_copy.find(container.name, class_=container.get('class'))
-        if not container_copy:
-            # 如果找不到，尝试获取第一个div或section
-            container_copy = soup_copy.find(['div', 'section', 'article'])
+        container_copy = self._copy_element(container)
         if not container_copy:
             return None
         
@@ -354,7 +435,7 @@ class DetailPageParser:
         
         # 先处理<br>标签，将其替换为换行符
         # 创建一个副本
-        p_copy = BeautifulSoup(str(p_tag), 'html.parser').find('p')
+        p_copy = self._copy_element(p_tag)
         if not p_copy:
             return ''
         
@@ -372,6 +453,14 @@ class DetailPageParser:
         
         return text.strip()
     
+    def _copy_element(self, element):
+        """
+        复制元素子树（后续会删除/替换副本中的节点，不能修改原始文档）
+        
+        直接复制节点树，不再序列化为字符串后重新解析
+        """
+        return copy.copy(element)
+    
     def _extract_text_from_element(self, element) -> str:
         """
         递归提取元素中的文字内容（忽略包含图片/视频/水印的节点）
@@ -511,7 +600,8 @@ class DetailPageParser:
         
         return None
     
-    def _extract_publish_time(self, soup: BeautifulSoup, is_pc_page: bool = False) -> Optional[str]:
+    def _extract_publish_time(self, soup: BeautifulSoup, is_pc_page: bool = False,
+                              page_text: Optional[str] = None) -> Optional[str]:
         """提取发布时间"""
         # 移动端
         case_info = soup.find('div', class_='case_info')
@@ -520,38 +610,32 @@ class DetailPageParser:
             if span_02:
                 time_text = self._clean_text(span_02.get_text())
                 # 验证时间格式 (YYYY-MM-DD)
-                if re.match(r'^\d{4}-\d{2}-\d{2}', time_text):
+                if _DATE_PREFIX_RE.match(time_text):
                     return time_text
         
         # PC端：从页面中查找发布时间
         if is_pc_page:
-            # 查找包含"发布时间"或"发布时间："的文本
-            time_patterns = [
-                r'发布时间[：:]\s*(\d{4}-\d{2}-\d{2})',
-                r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2})',
-            ]
-            
-            # 在页面文本中搜索
-            page_text = soup.get_text()
-            for pattern in time_patterns:
-                match = re.search(pattern, page_text)
+            # 在页面文本中搜索（"发布时间：YYYY-MM-DD" 或 "YYYY-MM-DD HH:MM"）
+            if page_text is None:
+                page_text = soup.get_text()
+            for pattern in _PUBLISH_TIME_PATTERNS:
+                match = pattern.search(page_text)
                 if match:
-                    time_str = match.group(1)
                     # 只提取日期部分（YYYY-MM-DD）
-                    date_match = re.match(r'(\d{4}-\d{2}-\d{2})', time_str)
+                    date_match = _DATE_RE.match(match.group(1))
                     if date_match:
                         return date_match.group(1)
             
-            # 尝试从特定的时间元素中提取
-            time_elements = soup.find_all(string=re.compile(r'\d{4}-\d{2}-\d{2}'))
-            for time_elem in time_elements:
+            # 尝试从包含日期的文本节点中提取（以日期开头的节点）
+            for time_elem in soup.find_all(string=_DATE_RE):
                 time_text = self._clean_text(str(time_elem))
-                if re.match(r'^\d{4}-\d{2}-\d{2}', time_text):
+                if _DATE_PREFIX_RE.match(time_text):
                     return time_text[:10]  # 只取日期部分
         
         return None
     
-    def _extract_agent_info(self, soup: BeautifulSoup, is_pc_page: bool = False) -> Dict[str, Any]:
+    def _extract_agent_info(self, soup: BeautifulSoup, is_pc_page: bool = False,
+                            page_text: Optional[str] = None) -> Dict[str, Any]:
         """
         从agent区域提取相关信息（行业、标签、品牌等）
         支持PC端和移动端两种页面结构
@@ -570,7 +654,7 @@ class DetailPageParser:
         
         # PC端：从"案例信息"区域提取
         if is_pc_page:
-            pc_info = self._extract_pc_case_info(soup)
+            pc_info = self._extract_pc_case_info(soup, page_text)
             if pc_info:
                 result.update(pc_info)
         
@@ -620,7 +704,7 @@ class DetailPageParser:
         
         return result
     
-    def _extract_pc_case_info(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _extract_pc_case_info(self, soup: BeautifulSoup, page_text: Optional[str] = None) -> Dict[str, Any]:
         """
         从PC端"案例信息"区域提取信息
         
@@ -638,29 +722,26 @@ class DetailPageParser:
         }
         
         # 查找"案例信息"区域
-        # 可能的容器：包含"案例信息"文本的div
-        case_info_containers = [
-            soup.find('div', string=re.compile('案例信息')),
-            soup.find('h3', string=re.compile('案例信息')),
-            soup.find('h4', string=re.compile('案例信息')),
-        ]
-        
+        # 可能的容器：包含"案例信息"文本的div、h3、h4（按此优先级）
         case_info_section = None
-        for container in case_info_containers:
+        for name in ('div', 'h3', 'h4'):
+            container = soup.find(name, string=_CASE_INFO_RE)
             if container:
                 # 找到包含"案例信息"的元素，向上或向下查找信息区域
                 case_info_section = container.find_parent() or container.find_next_sibling()
                 if case_info_section:
                     break
         
+        if page_text is None:
+            page_text = soup.get_text()
+        
         # 如果没有找到，尝试查找包含这些关键词的区域
         if not case_info_section:
             # 查找包含"行业"、"类型"、"地区"等关键词的区域
-            page_text = soup.get_text()
             if '行业：' in page_text or '类型：' in page_text or '地区：' in page_text:
-                # 查找包含这些信息的div
-                all_divs = soup.find_all('div')
-                for div in all_divs:
+                # 查找包含这些信息的第一个div：外层div的文本包含内层div的文本，
+                # 按文档顺序第一个匹配的div必然是最外层div，只需检查最外层div
+                for div in self._iter_outermost(soup, 'div'):
                     div_text = div.get_text()
                     if '行业：' in div_text or '类型：' in div_text:
                         case_info_section = div
@@ -670,17 +751,17 @@ class DetailPageParser:
             section_text = case_info_section.get_text()
             
             # 提取行业
-            industry_match = re.search(r'行业[：:]\s*([^\n\r]+)', section_text)
+            industry_match = _INDUSTRY_RE.search(section_text)
             if industry_match:
                 result['brand_industry'] = self._clean_text(industry_match.group(1))
             
             # 提取类型（活动类型）
-            type_match = re.search(r'类型[：:]\s*([^\n\r]+)', section_text)
+            type_match = _TYPE_RE.search(section_text)
             if type_match:
                 result['activity_type'] = self._clean_text(type_match.group(1))
             
             # 提取地区
-            area_match = re.search(r'地区[：:]\s*([^\n\r]+)', section_text)
+            area_match = _AREA_RE.search(section_text)
             if area_match:
                 result['location'] = self._clean_text(area_match.group(1))
             
@@ -689,28 +770,36 @@ class DetailPageParser:
             
         # 备用方案：直接从页面文本中提取
         if not result['brand_industry'] or not result['activity_type'] or not result['location']:
-            page_text = soup.get_text()
-            
             # 行业
             if not result['brand_industry']:
-                industry_match = re.search(r'行业[：:]\s*([^\n\r]+)', page_text)
+                industry_match = _INDUSTRY_RE.search(page_text)
                 if industry_match:
                     result['brand_industry'] = self._clean_text(industry_match.group(1))
             
             # 类型
             if not result['activity_type']:
-                type_match = re.search(r'类型[：:]\s*([^\n\r]+)', page_text)
+                type_match = _TYPE_RE.search(page_text)
                 if type_match:
                     result['activity_type'] = self._clean_text(type_match.group(1))
             
             # 地区
             if not result['location']:
-                area_match = re.search(r'地区[：:]\s*([^\n\r]+)', page_text)
+                area_match = _AREA_RE.search(page_text)
                 if area_match:
                     result['location'] = self._clean_text(area_match.group(1))
         
         return result
     
+    @staticmethod
+    def _iter_outermost(parent, name: str):
+        """按文档顺序返回指定名称的最外层元素（不进入已匹配元素的子树）"""
+        for child in parent.children:
+            if isinstance(child, Tag):
+                if child.name == name:
+                    yield child
+                else:
+                    yield from DetailPageParser._iter_outermost(child, name)
+    
     def _find_agent_field(self, agent, field_name: str):
         """在agent区域中查找指定字段的容器"""
         # 查找包含指定文本的p标签
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+结构化事件日志
+爬取热路径上每个请求只记录一条带字段的事件：
+- 消息在处理器真正输出时才格式化，日志级别被过滤时只有一次级别判断的开销；
+- 请求/响应头、响应内容等详细诊断信息按采样率记录为 DEBUG 事件；
+- 字段值按长度上限截断，避免把整页 HTML 写入日志文件和任务日志表
+"""
+
+import logging
+import random
+from typing import Any, Dict, Optional
+
+# 进程级配置（由执行器按 app.config 设置，脚本中使用默认值）
+_config = {
+    'sample_rate': 0.01,  # 详细诊断事件的采样率（0 关闭，1 全部记录）
+    'max_field_chars': 2000,  # 单个字段值的最大字符数
+}
+
+
+def configure_event_log(sample_rate: Optional[float] = None, max_field_chars: Optional[int] = None):
+    """
+    设置事件日志的采样率和字段长度上限
+
+    Args:
+        sample_rate: 详细诊断事件的采样率（0~1）
+        max_field_chars: 单个字段值的最大字符数
+    """
+    if sample_rate is not None:
+        _config['sample_rate'] = min(max(sample_rate, 0.0), 1.0)
+    if max_field_chars is not None:
+        _config['max_field_chars'] = max(max_field_chars, 16)
+
+
+def should_sample(rate: Optional[float] = None) -> bool:
+    """按采样率决定本次是否记录详细诊断信息"""
+    rate = _config['sample_rate'] if rate is None else rate
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+def truncate(value: Any, limit: Optional[int] = None) -> Any:
+    """截断过长的字符串（保留前后两段并标明省略的字符数），其它类型原样返回"""
+    if not isinstance(value, str):
+        return value
+    limit = limit or _config['max_field_chars']
+    if len(value) <= limit:
+        return value
+    half = limit // 2
+    return f"{value[:half]} ...（省略 {len(value) - 2 * half} 字符）... {value[-half:]}"
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    if isinstance(value, (dict, list, tuple)):
+        value = str(value)
+    value = truncate(value) if isinstance(value, str) else str(value)
+    return f'"{value}"' if ' ' in value or not value else value
+
+
+class Event:
+    """日志事件（作为 LogRecord.msg，str() 时才格式化）"""
+
+    __slots__ = ('name', 'fields')
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+
+    def capped_fields(self) -> Dict[str, Any]:
+        """截断后的字段（写入数据库 details 时使用）"""
+        capped = {}
+        for key, value in self.fields.items():
+            if value is None or isinstance(value, (bool, int, float)):
+                capped[key] = value
+            else:
+                capped[key] = truncate(value if isinstance(value, str) else str(value))
+        return capped
+
+    def __str__(self) -> str:
+        parts = [self.name]
+        parts.extend(f"{key}={_format_value(value)}" for key, value in self.fields.items())
+        return ' '.join(parts)
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, exc_info: Any = None, **fields):
+    """
+    记录一条结构化事件
+
+    Args:
+        logger: 模块 logger
+        event: 事件名（如 list_request）
+        level: 日志级别
+        exc_info: 异常信息（同 logging 的 exc_info）
+        **fields: 事件字段，字符串值在输出时按长度上限截断
+    """
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, Event(event, fields), exc_info=exc_info, stacklevel=2)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+原始 HTML 归档
+按内容哈希（sha256）去重并 gzip 压缩保存抓取到的 HTML，索引文件记录 URL 与抓取时间，
+解析逻辑变化后可离线重新解析，无需重新请求广告门
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# 归档类型
+KIND_DETAIL = 'detail'  # 详情页
+KIND_LIST = 'list'  # 列表页（接口返回的 HTML 片段）
+
+
+class HtmlArchive:
+    """
+    原始 HTML 归档
+
+    目录结构：
+        <root>/objects/<sha256前2位>/<sha256>.html.gz  内容文件（相同内容只保存一份）
+        <root>/index.jsonl                             索引，每行一条抓取记录
+    """
+
+    INDEX_FILE = 'index.jsonl'
+
+    def __init__(self, root_dir: Path, compress_level: int = 6):
+        """
+        初始化归档
+
+        Args:
+            root_dir: 归档根目录
+            compress_level: gzip 压缩级别（1-9）
+        """
+        self.root_dir = Path(root_dir)
+        self.objects_dir = self.root_dir / 'objects'
+        self.index_file = self.root_dir / self.INDEX_FILE
+        self.compress_level = compress_level
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+
+    def _object_path(self, sha256: str) -> Path:
+        """内容文件路径"""
+        return self.objects_dir / sha256[:2] / f"{sha256}.html.gz"
+
+    def put(self, url: str, html: str, kind: str = KIND_DETAIL, **meta) -> Optional[str]:
+        """
+        保存一次抓取结果
+
+        Args:
+            url: 请求URL
+            html: HTML 内容
+            kind: 归档类型（detail / list）
+            **meta: 附加信息，如 case_id、page、case_type
+
+        Returns:
+            内容哈希，保存失败时返回 None（归档失败不影响爬取）
+        """
+        if not html:
+            return None
+
+        try:
+            content = html.encode('utf-8')
+            sha256 = hashlib.sha256(content).hexdigest()
+            object_path = self._object_path(sha256)
+
+            if not object_path.exists():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                # 先写临时文件再重命名，避免中断时留下不完整的内容文件
+                tmp_path = object_path.with_name(f"{sha256}.{threading.get_ident()}.tmp")
+                with gzip.open(tmp_path, 'wb', compresslevel=self.compress_level) as f:
+                    f.write(content)
+                tmp_path.replace(object_path)
+
+            entry = {
+                'url': url,
+                'kind': kind,
+                'sha256': sha256,
+                'size': len(content),
+                'fetched_at': datetime.now().isoformat(),
+                **meta,
+            }
+            line = json.dumps(entry, ensure_ascii=False) + '\n'
+            with self._lock:
+                with open(self.index_file, 'a', encoding='utf-8') as f:
+                    f.write(line)
+
+            return sha256
+        except Exception as e:
+            logger.warning(f"归档 HTML 失败 {url}: {e}")
+            return None
+
+    def get(self, sha256: str) -> Optional[str]:
+        """
+        读取归档内容
+
+        Args:
+            sha256: 内容哈希
+
+        Returns:
+            HTML 内容，不存在时返回 None
+        """
+        object_path = self._object_path(sha256)
+        if not object_path.exists():
+            return None
+        with gzip.open(object_path, 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def iter_entries(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        按写入顺序遍历索引
+
+        Args:
+            kind: 只返回指定类型，为 None 时返回全部
+        """
+        if not self.index_file.exists():
+            return
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"跳过损坏的索引行 {self.index_file}:{line_num}")
+                    continue
+                if kind is None or entry.get('kind') == kind:
+                    yield entry
+
+    def latest_entries(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        每个 URL 只保留最近一次抓取的记录（保持首次出现的顺序）
+
+        Args:
+            kind: 只返回指定类型，为 None 时返回全部
+        """
+        latest: Dict[str, Dict[str, Any]] = {}
+        for entry in self.iter_entries(kind):
+            key = f"{entry.get('kind')}|{entry.get('url')}"
+            previous = latest.get(key)
+            if previous is None or entry.get('fetched_at', '') >= previous.get('fetched_at', ''):
+                latest[key] = entry
+        return list(latest.values())
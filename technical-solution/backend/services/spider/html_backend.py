@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+HTML 解析后端
+列表页/详情页解析器共用的 BeautifulSoup 解析后端选择：
+html.parser 为纯 Python 实现（默认），lxml 为 C 实现，建树速度快数倍，提取代码无需改动
+"""
+
+import logging
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+BACKEND_HTML_PARSER = 'html.parser'
+BACKEND_LXML = 'lxml'
+PARSER_BACKENDS = (BACKEND_HTML_PARSER, BACKEND_LXML)
+
+_warned_backends = set()
+
+
+def resolve_parser_backend(backend: Optional[str] = None) -> str:
+    """
+    解析后端名称，不可用时回退到 html.parser
+
+    Args:
+        backend: 后端名称（html.parser / lxml），为空时使用 html.parser
+
+    Returns:
+        实际使用的后端名称
+    """
+    if not backend or backend == BACKEND_HTML_PARSER:
+        return BACKEND_HTML_PARSER
+
+    if backend not in PARSER_BACKENDS:
+        if backend not in _warned_backends:
+            _warned_backends.add(backend)
+            logger.warning(f"未知的 HTML 解析后端: {backend}，使用 {BACKEND_HTML_PARSER}")
+        return BACKEND_HTML_PARSER
+
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        if backend not in _warned_backends:
+            _warned_backends.add(backend)
+            logger.warning(f"未安装 lxml，HTML 解析后端回退到 {BACKEND_HTML_PARSER}")
+        return BACKEND_HTML_PARSER
+    return backend
+
+
+def make_soup(html: str, backend: str = BACKEND_HTML_PARSER) -> BeautifulSoup:
+    """
+    使用指定后端解析 HTML
+
+    Args:
+        html: HTML 字符串
+        backend: 已通过 resolve_parser_backend 解析的后端名称
+
+    Returns:
+        BeautifulSoup 对象
+    """
+    return BeautifulSoup(html, backend)
@@ -9,6 +9,7 @@ from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
 import re
 from urllib.parse import urljoin, urlparse
+from .html_backend import resolve_parser_backend, make_soup
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +17,16 @@ logger = logging.getLogger(__name__)
 class ListPageHTMLParser:
     """列表页 HTML 解析器类"""
     
-    def __init__(self, base_url: str = 'https://www.adquan.com'):
+    def __init__(self, base_url: str = 'https://www.adquan.com', parser_backend: Optional[str] = None):
         """
         初始化解析器
         
         Args:
             base_url: 基础 URL，用于转换相对路径
+            parser_backend: HTML 解析后端（html.parser / lxml），默认 html.parser
         """
         self.base_url = base_url
+        self.parser_backend = resolve_parser_backend(parser_backend)
     
     def parse_html(self, html: str) -> List[Dict[str, Any]]:
         """
@@ -41,7 +44,7 @@ class ListPageHTMLParser:
             return []
         
         try:
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = make_soup(html, self.parser_backend)
             articles = soup.find_all('div', class_='article_1')
             
             if not articles:
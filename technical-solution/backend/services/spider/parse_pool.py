@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+详情页解析进程池
+BeautifulSoup 解析是纯 CPU 计算且受 GIL 限制，在抓取线程内解析会与网络请求串行。
+抓取线程只负责请求，HTML 交给独立进程解析，在途任务数有上限（背压），
+解析结果按完成顺序取回后交给批次写入
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional
+
+from .html_backend import resolve_parser_backend
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# 工作进程（每个进程一个解析器实例）
+# ============================================================
+
+_worker_parser = None
+
+
+def _init_parse_worker(parser_backend: str):
+    """工作进程初始化"""
+    global _worker_parser
+
+    from .detail_parser import DetailPageParser
+
+    # 解析器按页输出 INFO 日志，工作进程中只保留警告
+    logging.getLogger('services.spider').setLevel(logging.WARNING)
+    _worker_parser = DetailPageParser(parser_backend=parser_backend)
+
+
+def _parse_with(parser, url: str, html: str) -> Dict[str, Any]:
+    """
+    解析一个详情页
+
+    Returns:
+        {'detail', 'error', 'parse_seconds'}
+    """
+    start = time.perf_counter()
+    result = {'detail': None, 'error': None, 'parse_seconds': 0.0}
+    try:
+        result['detail'] = parser.parse_html(html, url)
+    except Exception as e:
+        result['error'] = f"解析详情页失败: {e}"
+    result['parse_seconds'] = time.perf_counter() - start
+    return result
+
+
+def _parse_detail_job(url: str, html: str) -> Dict[str, Any]:
+    """工作进程中解析一个详情页"""
+    return _parse_with(_worker_parser, url, html)
+
+
+# ============================================================
+# 解析进程池
+# ============================================================
+
+class DetailParsePool:
+    """
+    详情页解析进程池
+
+    用法：
+        pool = DetailParsePool(workers=2)
+        pool.submit(url, html, context)   # 在途任务已满时阻塞（背压）
+        for result in pool.drain():       # 取回已完成的解析结果
+            ...
+        pool.drain(wait=True)             # 等待全部在途任务完成
+        pool.close()
+
+    workers 为 0 时在调用线程内同步解析（与原流程一致），接口不变
+    """
+
+    def __init__(self, workers: int = 0, parser_backend: Optional[str] = None, max_pending: Optional[int] = None):
+        """
+        初始化解析进程池
+
+        Args:
+            workers: 解析进程数，0 表示在调用线程内解析
+            parser_backend: HTML 解析后端（html.parser / lxml）
+            max_pending: 最大在途任务数（已提交未完成），默认为进程数的 2 倍
+        """
+        self.workers = max(0, workers)
+        self.parser_backend = resolve_parser_backend(parser_backend)
+        self.max_pending = max_pending or max(1, self.workers) * 2
+
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._results: queue.Queue = queue.Queue()
+        self._in_flight = 0  # 已提交但尚未被 drain 取回的任务数（只在调用线程中修改）
+        self._inline_parser = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        if self.workers > 0:
+            # 使用 spawn 启动：调用方运行在多线程的服务进程中，fork 可能复制其它线程持有的锁
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_parse_worker,
+                initargs=(self.parser_backend,)
+            )
+            logger.info(f"详情页解析进程池已启动: {self.workers} 个进程，最大在途任务数 {self.max_pending}")
+
+    def submit(self, url: str, html: str, context: Any = None) -> float:
+        """
+        提交一个解析任务
+
+        Args:
+            url: 详情页URL
+            html: 详情页HTML
+            context: 调用方上下文（如列表项），随解析结果原样返回
+
+        Returns:
+            等待空闲槽位的秒数（解析跟不上抓取时大于 0）
+        """
+        wait_start = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - wait_start
+        self._in_flight += 1
+
+        if self._executor is not None:
+            try:
+                future = self._executor.submit(_parse_detail_job, url, html)
+                future.add_done_callback(lambda f: self._on_done(f, context))
+                return waited
+            except BrokenProcessPool as e:
+                logger.warning(f"解析进程池已损坏，改为在当前线程内解析: {e}")
+                self._executor = None
+
+        self._results.put({'context': context, **_parse_with(self._get_inline_parser(), url, html)})
+        self._slots.release()
+        return waited
+
+    def drain(self, wait: bool = False) -> List[Dict[str, Any]]:
+        """
+        取回已完成的解析结果
+
+        Args:
+            wait: 是否等待全部在途任务完成
+
+        Returns:
+            [{'context', 'detail', 'error', 'parse_seconds'}, ...]，按完成顺序
+        """
+        results = []
+        while self._in_flight > 0:
+            try:
+                result = self._results.get(block=wait)
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            results.append(result)
+        return results
+
+    @property
+    def pending(self) -> int:
+        """尚未取回的任务数"""
+        return self._in_flight
+
+    def close(self):
+        """关闭进程池（未完成的任务将被取消）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _on_done(self, future: Future, context: Any):
+        """任务完成回调（在进程池的管理线程中执行）"""
+        try:
+            result = future.result()
+        except Exception as e:
+            # 取消、工作进程崩溃等
+            result = {'detail': None, 'error': f"解析进程异常: {e}", 'parse_seconds': 0.0}
+        self._results.put({'context': context, **result})
+        self._slots.release()
+
+    def _get_inline_parser(self):
+        if self._inline_parser is None:
+            from .detail_parser import DetailPageParser
+            self._inline_parser = DetailPageParser(parser_backend=self.parser_backend)
+        return self._inline_parser
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 代理管理器
-支持通过 Clash Verge API 定时切换代理节点，避免被封禁
+支持通过 Clash Verge API 定时切换代理节点，避免被封禁；
+设置节点池（ProxyPool）后按健康评分为每个任务分配固定节点，不再随机选择
 """
 
 import requests
@@ -11,6 +12,9 @@ import random
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 
+from .proxy_pool import ProxyPool
+from ..metrics import CRAWL_PROXY_SWITCHES
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +31,8 @@ class ProxyManager:
         switch_interval_minutes: int = 10,  # 时间间隔（分钟）
         auto_switch_on_error: bool = True,  # 错误时自动切换
         exclude_nodes: Optional[List[str]] = None,  # 排除的节点（如 DIRECT, REJECT）
+        proxy_pool: Optional[ProxyPool] = None,  # 共享节点池（健康评分 + 固定分配）
+        worker_id: Optional[str] = None,  # 在节点池中的任务标识
     ):
         """
         初始化代理管理器
@@ -40,6 +46,8 @@ class ProxyManager:
             switch_interval_minutes: 时间间隔（分钟，switch_mode 为 time 或 hybrid 时使用）
             auto_switch_on_error: 是否在错误时自动切换
             exclude_nodes: 要排除的节点列表（如 ['DIRECT', 'REJECT', 'Auto']）
+            proxy_pool: 共享节点池，设置后节点列表和评分由节点池维护，选择节点时按评分分配固定节点
+            worker_id: 在节点池中的任务标识（同一任务始终分配同一个健康节点）
         """
         self.api_url = api_url.rstrip('/')
         self.secret = secret
@@ -49,6 +57,8 @@ class ProxyManager:
         self.switch_interval_minutes = switch_interval_minutes
         self.auto_switch_on_error = auto_switch_on_error
         self.exclude_nodes = exclude_nodes or ['DIRECT', 'REJECT', 'Auto']
+        self.proxy_pool = proxy_pool
+        self.worker_id = worker_id or f"proxy-manager-{id(self)}"
         
         # 状态跟踪
         self.request_count = 0
@@ -56,6 +66,7 @@ class ProxyManager:
         self.current_node: Optional[str] = None
         self.available_nodes: List[str] = []
         self.failed_nodes: set = set()  # 记录失败的节点
+        self._sessions: List[requests.Session] = []  # 节点有专用端口时需要设置代理的会话
         
         # 初始化
         logger.info("=" * 60)
@@ -69,15 +80,25 @@ class ProxyManager:
         self._init_headers()
         logger.info("✓ 请求头初始化完成")
         
-        nodes_loaded = self._load_available_nodes()
-        if not nodes_loaded:
-            logger.warning("⚠️ 加载节点列表失败，代理管理器可能无法正常工作")
-        
-        current_node = self._get_current_node()
-        if current_node:
-            logger.info(f"✓ 当前节点: {current_node}")
+        if self.proxy_pool:
+            # 节点列表和健康评分由节点池维护（已并发探测），按评分分配本任务的固定节点
+            self.available_nodes = self.proxy_pool.nodes
+            self.current_node = self.proxy_pool.global_node
+            node = self.proxy_pool.acquire(self.worker_id)
+            if node:
+                self._switch_to_node(node)
+            else:
+                logger.warning("⚠️ 节点池中没有可用节点")
         else:
-            logger.warning("⚠️ 无法获取当前节点")
+            nodes_loaded = self._load_available_nodes()
+            if not nodes_loaded:
+                logger.warning("⚠️ 加载节点列表失败，代理管理器可能无法正常工作")
+            
+            current_node = self._get_current_node()
+            if current_node:
+                logger.info(f"✓ 当前节点: {current_node}")
+            else:
+                logger.warning("⚠️ 无法获取当前节点")
         
         logger.info("=" * 60)
         logger.info(f"代理管理器初始化完成")
@@ -173,6 +194,9 @@ class ProxyManager:
     
     def _switch_to_node(self, node_name: str) -> bool:
         """切换到指定节点"""
+        if self.proxy_pool:
+            return self._route_to_node(node_name)
+        
         old_node = self.current_node
         logger.info(f"准备切换代理节点: {old_node} -> {node_name}")
         
@@ -185,6 +209,7 @@ class ProxyManager:
             )
             
             if response.status_code == 204:
+                CRAWL_PROXY_SWITCHES.inc(result='switched')
                 self.current_node = node_name
                 self.last_switch_time = datetime.now()
                 logger.info(f"✓ 成功切换到节点: {node_name}")
@@ -194,15 +219,72 @@ class ProxyManager:
                 logger.info(f"  到节点: {node_name}")
                 return True
             else:
+                CRAWL_PROXY_SWITCHES.inc(result='failed')
                 logger.error(f"✗ 切换节点失败，状态码: {response.status_code}")
                 logger.error(f"  尝试切换的节点: {node_name}")
                 return False
                 
         except Exception as e:
+            CRAWL_PROXY_SWITCHES.inc(result='failed')
             logger.error(f"✗ 切换节点失败: {e}")
             logger.error(f"  尝试切换的节点: {node_name}")
             return False
     
+    def _route_to_node(self, node_name: str) -> bool:
+        """
+        通过节点池路由到指定节点
+        
+        节点有专用端口时只修改本任务会话的代理；否则切换所有任务共用的全局选择器，
+        节点池限制最小切换间隔，未切换时继续使用当前全局节点
+        """
+        old_node = self.current_node
+        
+        if self.proxy_pool.has_dedicated_port(node_name):
+            switched = True
+        else:
+            # 当前全局节点已被本任务判定失败时忽略最小切换间隔
+            force = old_node in self.failed_nodes
+            switched = self.proxy_pool.switch_global(node_name, force=force)
+            if not switched:
+                node_name = self.proxy_pool.global_node
+        
+        self.current_node = node_name
+        self.last_switch_time = datetime.now()
+        self._apply_session_proxies()
+        CRAWL_PROXY_SWITCHES.inc(result='switched' if switched else 'skipped')
+        
+        if switched:
+            logger.info(f"✓ 任务 {self.worker_id} 使用节点: {old_node} -> {node_name}（代理: {self.get_proxy_url() or '全局选择器'}）")
+        else:
+            logger.info(f"全局节点刚切换过，任务 {self.worker_id} 继续使用: {node_name}")
+        return switched
+    
+    def bind_session(self, session: requests.Session):
+        """
+        绑定请求会话（节点有专用端口时为其设置代理）
+        
+        Args:
+            session: requests.Session 实例
+        """
+        if not any(bound is session for bound in self._sessions):
+            self._sessions.append(session)
+            self._apply_session_proxies()
+    
+    def _apply_session_proxies(self):
+        """按当前节点设置已绑定会话的代理"""
+        proxy_url = self.get_proxy_url()
+        for session in self._sessions:
+            if proxy_url:
+                session.proxies.update({'http': proxy_url, 'https': proxy_url})
+            else:
+                session.proxies.pop('http', None)
+                session.proxies.pop('https', None)
+    
+    def close(self):
+        """任务结束，释放节点池中分配的节点"""
+        if self.proxy_pool:
+            self.proxy_pool.release(self.worker_id)
+    
     def _should_switch(self) -> bool:
         """判断是否应该切换节点"""
         if not self.available_nodes:
@@ -235,6 +317,11 @@ class ProxyManager:
     
     def _select_next_node(self) -> Optional[str]:
         """选择下一个节点"""
+        if self.proxy_pool:
+            # 按健康评分分配（排除当前节点，实现轮换）
+            exclude = [self.current_node] if self.current_node else None
+            return self.proxy_pool.acquire(self.worker_id, exclude=exclude)
+        
         if not self.available_nodes:
             return None
         
@@ -299,22 +386,27 @@ class ProxyManager:
             old_count = self.request_count
             self.request_count = 0
             logger.info(f"  请求计数器已重置: {old_count} -> 0")
-            # 等待一下，确保切换生效
-            logger.info(f"  等待 0.5 秒以确保切换生效...")
-            time.sleep(0.5)
+            if not self.proxy_pool:
+                # 等待一下，确保切换生效
+                logger.info(f"  等待 0.5 秒以确保切换生效...")
+                time.sleep(0.5)
             logger.info(f"✓ 节点切换流程完成")
         
         return success
     
-    def record_request(self, success: bool = True):
+    def record_request(self, success: bool = True, latency_ms: Optional[float] = None):
         """
         记录一次请求
         
         Args:
             success: 请求是否成功
+            latency_ms: 请求耗时（毫秒，可选），计入节点池的延迟评分
         """
         self.request_count += 1
         
+        if self.proxy_pool:
+            self.proxy_pool.record(self.current_node, success, latency_ms)
+        
         # 如果请求失败且启用了自动切换，立即切换
         if not success and self.auto_switch_on_error:
             logger.warning(f"请求失败，自动切换节点（请求计数: {self.request_count}）")
@@ -428,6 +520,10 @@ class ProxyManager:
             代理 URL，格式: http://127.0.0.1:7897
             如果使用系统代理，返回 None
         """
+        # 节点池中配置了节点专用端口时，直接使用该端口
+        if self.proxy_pool:
+            return self.proxy_pool.proxy_url(self.current_node)
+        
         # Clash Verge 通常使用系统代理，不需要手动设置代理 URL
         # 如果需要手动设置，可以返回代理地址
         # 例如: return "http://127.0.0.1:7897"
@@ -444,6 +540,8 @@ class ProxyManager:
             "switch_mode": self.switch_mode,
             "switch_interval": self.switch_interval,
             "switch_interval_minutes": self.switch_interval_minutes,
+            "worker_id": self.worker_id,
+            "proxy_pool": self.proxy_pool.get_stats() if self.proxy_pool else None,
         }
 
 
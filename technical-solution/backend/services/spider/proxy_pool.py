@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+代理节点健康评分池
+通过 Clash API 的节点延迟测试接口定时并发探测全部节点（不切换选择器），
+结合真实请求结果维护每个节点的 EWMA 成功率和延迟，按评分为每个爬取任务分配固定节点：
+- 配置了节点专用端口（如 mihomo listeners）时，各任务直接走自己节点的端口，互不影响；
+- 否则所有任务共用全局选择器，只在评分明显变化且超过最小切换间隔时才切换，避免并发任务来回切换
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable
+from urllib.parse import quote
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+def parse_node_ports(value: Optional[str]) -> Dict[str, int]:
+    """
+    解析节点专用端口配置
+
+    Args:
+        value: 形如 "香港01=7901,日本02=7902" 的字符串
+
+    Returns:
+        {节点名: 端口}
+    """
+    ports: Dict[str, int] = {}
+    for part in (value or '').split(','):
+        name, sep, port = part.strip().rpartition('=')
+        if not sep or not name.strip():
+            continue
+        try:
+            ports[name.strip()] = int(port)
+        except ValueError:
+            logger.warning(f"忽略无效的节点端口配置: {part}")
+    return ports
+
+
+class NodeHealth:
+    """单个节点的健康状态（EWMA 成功率和延迟）"""
+
+    def __init__(self, name: str, alpha: float = 0.3):
+        self.name = name
+        self.alpha = alpha
+        self.success_rate = 0.5  # 未探测的节点按中等评分对待
+        self.latency_ms: Optional[float] = None
+        self.samples = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_update: Optional[datetime] = None
+
+    def update(self, success: bool, latency_ms: Optional[float] = None):
+        """记录一次探测或请求结果"""
+        a = self.alpha
+        self.success_rate = (1 - a) * self.success_rate + a * (1.0 if success else 0.0)
+        if success and latency_ms is not None:
+            self.latency_ms = latency_ms if self.latency_ms is None else (1 - a) * self.latency_ms + a * latency_ms
+        self.samples += 1
+        if success:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+        self.last_update = datetime.now()
+
+    def score(self, default_latency_ms: float) -> float:
+        """健康评分：成功率越高、延迟越低，评分越高（0~1）"""
+        latency = self.latency_ms if self.latency_ms is not None else default_latency_ms
+        return self.success_rate / (1.0 + latency / 1000.0)
+
+    def to_dict(self, default_latency_ms: float) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'score': round(self.score(default_latency_ms), 4),
+            'success_rate': round(self.success_rate, 3),
+            'latency_ms': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            'samples': self.samples,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_update': self.last_update.isoformat() if self.last_update else None,
+        }
+
+
+class ProxyPool:
+    """代理节点健康评分池（进程内共享，线程安全）"""
+
+    def __init__(
+        self,
+        api_url: str = "http://127.0.0.1:9097",
+        secret: Optional[str] = None,
+        proxy_group: str = "GLOBAL",
+        exclude_nodes: Optional[List[str]] = None,
+        probe_url: str = "https://www.adquan.com",
+        probe_timeout_ms: int = 5000,
+        probe_interval: float = 300.0,
+        probe_concurrency: int = 16,
+        ewma_alpha: float = 0.3,
+        min_score_ratio: float = 0.5,
+        node_ports: Optional[Dict[str, int]] = None,
+        proxy_host: str = "127.0.0.1",
+        min_switch_interval: float = 60.0,
+    ):
+        """
+        初始化节点池
+
+        Args:
+            api_url: Clash API 地址
+            secret: Clash API 认证密钥
+            proxy_group: 代理组名称
+            exclude_nodes: 要排除的节点列表
+            probe_url: 探测使用的目标 URL
+            probe_timeout_ms: 单个节点探测超时（毫秒），也作为未知延迟节点的默认延迟
+            probe_interval: 定时探测间隔（秒）
+            probe_concurrency: 并发探测数
+            ewma_alpha: EWMA 平滑系数（越大越看重最近结果）
+            min_score_ratio: 评分低于最佳节点评分的该比例时，不再分配并让持有该节点的任务重新选择
+            node_ports: 节点专用监听端口 {节点名: 端口}
+            proxy_host: 节点专用端口所在主机
+            min_switch_interval: 全局选择器两次切换的最小间隔（秒，无专用端口时生效）
+        """
+        self.api_url = api_url.rstrip('/')
+        self.proxy_group = proxy_group
+        self.exclude_nodes = exclude_nodes or ['DIRECT', 'REJECT', 'Auto']
+        self.probe_url = probe_url
+        self.probe_timeout_ms = probe_timeout_ms
+        self.probe_interval = probe_interval
+        self.probe_concurrency = max(1, probe_concurrency)
+        self.ewma_alpha = ewma_alpha
+        self.min_score_ratio = min_score_ratio
+        self.node_ports = node_ports or {}
+        self.proxy_host = proxy_host
+        self.min_switch_interval = min_switch_interval
+
+        self.headers = {"Content-Type": "application/json"}
+        if secret:
+            self.headers["Authorization"] = f"Bearer {secret}"
+
+        self._lock = threading.RLock()
+        self._nodes: Dict[str, NodeHealth] = {}
+        self._assignments: Dict[str, str] = {}  # worker_id -> 节点
+        self._global_node: Optional[str] = None
+        self._last_global_switch = 0.0
+        self._switching_global = False  # 正在调用 API 切换全局选择器（请求期间不持有锁）
+        self._last_probe_at: Optional[datetime] = None
+
+        self._stop_event = threading.Event()
+        self._probe_thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------
+    # 节点列表与探测
+    # ------------------------------------------------------------
+
+    def load_nodes(self) -> bool:
+        """从 Clash API 加载节点列表和全局选择器当前节点"""
+        try:
+            response = requests.get(
+                f"{self.api_url}/proxies/{quote(self.proxy_group)}",
+                headers=self.headers,
+                timeout=5
+            )
+            if response.status_code != 200:
+                logger.error(f"获取节点列表失败，状态码: {response.status_code}")
+                return False
+
+            data = response.json()
+            all_nodes = data.get("all", [])
+            names = [node for node in all_nodes if node not in self.exclude_nodes] or all_nodes
+            with self._lock:
+                for name in names:
+                    if name not in self._nodes:
+                        self._nodes[name] = NodeHealth(name, self.ewma_alpha)
+                for name in list(self._nodes):
+                    if name not in names:
+                        del self._nodes[name]
+                self._global_node = data.get("now")
+            logger.info(f"节点池已加载 {len(names)} 个节点（专用端口 {len(self.node_ports)} 个），全局节点: {self._global_node}")
+            return True
+        except Exception as e:
+            logger.error(f"加载节点列表失败: {e}")
+            return False
+
+    def _probe_node(self, name: str) -> Optional[float]:
+        """探测单个节点延迟（毫秒），失败返回 None"""
+        try:
+            response = requests.get(
+                f"{self.api_url}/proxies/{quote(name, safe='')}/delay",
+                headers=self.headers,
+                params={'url': self.probe_url, 'timeout': self.probe_timeout_ms},
+                timeout=self.probe_timeout_ms / 1000.0 + 2
+            )
+            if response.status_code == 200:
+                delay = response.json().get('delay')
+                if delay:
+                    return float(delay)
+            return None
+        except Exception:
+            return None
+
+    def probe_all(self) -> Dict[str, Optional[float]]:
+        """
+        并发探测全部节点，并更新健康评分
+
+        Returns:
+            {节点名: 延迟毫秒或 None}
+        """
+        with self._lock:
+            names = list(self._nodes)
+        if not names:
+            return {}
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=min(self.probe_concurrency, len(names))) as executor:
+            results = dict(zip(names, executor.map(self._probe_node, names)))
+
+        with self._lock:
+            for name, delay in results.items():
+                health = self._nodes.get(name)
+                if health:
+                    health.update(delay is not None, delay)
+            self._last_probe_at = datetime.now()
+
+        alive = sum(1 for delay in results.values() if delay is not None)
+        logger.info(f"节点探测完成: {alive}/{len(names)} 个可用，耗时 {time.time() - start:.1f} 秒")
+        return results
+
+    def start(self):
+        """加载节点并启动后台定时探测（首次探测同步完成）"""
+        if self._probe_thread and self._probe_thread.is_alive():
+            return
+        if self.load_nodes():
+            self.probe_all()
+        self._stop_event.clear()
+        self._probe_thread = threading.Thread(target=self._probe_loop, name='proxy-pool-probe', daemon=True)
+        self._probe_thread.start()
+
+    def stop(self):
+        """停止后台探测"""
+        self._stop_event.set()
+
+    def _probe_loop(self):
+        while not self._stop_event.wait(self.probe_interval):
+            try:
+                self.load_nodes()
+                self.probe_all()
+            except Exception as e:
+                logger.warning(f"节点定时探测失败: {e}")
+
+    # ------------------------------------------------------------
+    # 评分与分配
+    # ------------------------------------------------------------
+
+    @property
+    def nodes(self) -> List[str]:
+        with self._lock:
+            return list(self._nodes)
+
+    def record(self, node: Optional[str], success: bool, latency_ms: Optional[float] = None):
+        """记录真实请求结果（与探测结果共同决定评分）"""
+        if not node:
+            return
+        with self._lock:
+            health = self._nodes.get(node)
+            if health:
+                health.update(success, latency_ms)
+
+    def _score(self, node: str) -> float:
+        return self._nodes[node].score(self.probe_timeout_ms)
+
+    def _best_score(self) -> float:
+        return max((self._score(name) for name in self._nodes), default=0.0)
+
+    def _is_healthy(self, node: str, best: Optional[float] = None) -> bool:
+        """评分不低于最佳节点评分的 min_score_ratio（批量判断时由调用方传入 best，避免重复计算）"""
+        if node not in self._nodes:
+            return False
+        if best is None:
+            best = self._best_score()
+        return self._score(node) >= best * self.min_score_ratio
+
+    def ranked_nodes(self) -> List[str]:
+        """按评分从高到低排列的节点"""
+        with self._lock:
+            return sorted(self._nodes, key=self._score, reverse=True)
+
+    def acquire(self, worker_id: str, exclude: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        为任务分配节点（固定分配，节点仍健康时返回同一个节点）
+
+        Args:
+            worker_id: 任务标识
+            exclude: 不希望分配的节点（如刚失败或需要轮换的当前节点）
+
+        Returns:
+            节点名，没有节点时返回 None
+        """
+        excluded = set(exclude or ())
+        with self._lock:
+            if not self._nodes:
+                return None
+
+            best = self._best_score()
+            current = self._assignments.get(worker_id)
+            if current and current not in excluded and self._is_healthy(current, best):
+                return current
+
+            candidates = [name for name in self._nodes if name not in excluded and self._is_healthy(name, best)]
+            if not candidates:
+                candidates = [name for name in self._nodes if name not in excluded] or list(self._nodes)
+
+            holders: Dict[str, int] = {}
+            for owner, node in self._assignments.items():
+                if owner != worker_id:
+                    holders[node] = holders.get(node, 0) + 1
+
+            def load(name: str) -> int:
+                # 无专用端口的节点都经过全局选择器：优先当前全局节点，避免并发任务来回切换
+                if not self.has_dedicated_port(name):
+                    return 0 if name == self._global_node else 1
+                # 有专用端口：优先持有任务最少的节点，使并发任务分散到不同节点
+                return holders.get(name, 0)
+
+            selected = min(candidates, key=lambda name: (load(name), -self._score(name)))
+
+            self._assignments[worker_id] = selected
+            return selected
+
+    def release(self, worker_id: str):
+        """任务结束，释放节点"""
+        with self._lock:
+            self._assignments.pop(worker_id, None)
+
+    # ------------------------------------------------------------
+    # 路由
+    # ------------------------------------------------------------
+
+    def has_dedicated_port(self, node: Optional[str]) -> bool:
+        return bool(node) and node in self.node_ports
+
+    def proxy_url(self, node: Optional[str]) -> Optional[str]:
+        """节点专用端口的代理 URL，没有专用端口时返回 None（走系统代理/全局选择器）"""
+        if not self.has_dedicated_port(node):
+            return None
+        return f"http://{self.proxy_host}:{self.node_ports[node]}"
+
+    @property
+    def global_node(self) -> Optional[str]:
+        return self._global_node
+
+    def switch_global(self, node: str, force: bool = False) -> bool:
+        """
+        切换全局选择器（无专用端口时所有任务共用）
+
+        Args:
+            node: 目标节点
+            force: 忽略最小切换间隔（当前全局节点已不健康时）
+
+        Returns:
+            全局选择器当前是否为目标节点
+        """
+        # 在锁内决定是否切换，调用 API 时释放锁（不阻塞其它任务的 acquire/record），完成后再提交结果
+        with self._lock:
+            if self._global_node == node:
+                return True
+            if self._switching_global:
+                logger.debug(f"全局节点正在切换中，继续使用 {self._global_node}")
+                return False
+            elapsed = time.monotonic() - self._last_global_switch
+            if not force and elapsed < self.min_switch_interval and self._global_node \
+                    and self._is_healthy(self._global_node):
+                logger.debug(f"距上次切换全局节点 {elapsed:.0f} 秒，继续使用 {self._global_node}")
+                return False
+            self._switching_global = True
+
+        switched = False
+        try:
+            response = requests.put(
+                f"{self.api_url}/proxies/{quote(self.proxy_group)}",
+                headers=self.headers,
+                json={"name": node},
+                timeout=5
+            )
+            if response.status_code == 204:
+                switched = True
+            else:
+                logger.error(f"切换全局节点失败，状态码: {response.status_code}")
+        except Exception as e:
+            logger.error(f"切换全局节点失败: {e}")
+        finally:
+            with self._lock:
+                self._switching_global = False
+                if switched:
+                    logger.info(f"全局节点已切换: {self._global_node} -> {node}")
+                    self._global_node = node
+                    self._last_global_switch = time.monotonic()
+        return switched
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取节点池统计信息"""
+        with self._lock:
+            return {
+                'nodes': [self._nodes[name].to_dict(self.probe_timeout_ms)
+                          for name in sorted(self._nodes, key=self._score, reverse=True)],
+                'assignments': dict(self._assignments),
+                'global_node': self._global_node,
+                'dedicated_ports': len(self.node_ports),
+                'last_probe_at': self._last_probe_at.isoformat() if self._last_probe_at else None,
+            }
+
+
+# 进程内共享的节点池（所有爬取任务共用探测结果和全局选择器）
+_pool: Optional[ProxyPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool(**kwargs) -> ProxyPool:
+    """
+    获取进程内共享的节点池（首次调用时创建并启动后台探测）
+
+    Args:
+        **kwargs: ProxyPool 构造参数（只在首次调用时生效）
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProxyPool(**kwargs)
+            _pool.start()
+        return _pool
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+自适应请求速率控制（AIMD）
+根据广告门的响应情况自动调整请求速率和并发数：
+连续成功且延迟正常时加性增加（每个成功窗口速率 +increase），
+出现 429/403/5xx、网络错误、CSRF 失效或延迟过高时乘性减少（速率和并发 ×decrease_factor），
+在不触发限流的前提下尽量提高吞吐量。进程内同一数据源的所有爬取任务共用一个控制器，
+每个任务通过 register() 领取一份 RateBudget，速率和并发在正在运行的任务之间平均分配
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# 限流信号（站点明确要求降速）
+THROTTLE_STATUS_CODES = (403, 429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（只支持秒数格式）"""
+    try:
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateController:
+    """AIMD 自适应速率控制器（线程安全）"""
+
+    def __init__(
+        self,
+        initial_rate: float = 0.3,
+        min_rate: float = 0.05,
+        max_rate: float = 3.0,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        initial_concurrency: int = 1,
+        max_concurrency: int = 4,
+        success_window: int = 10,
+        target_latency_ms: float = 3000.0,
+        decrease_cooldown: float = 5.0,
+    ):
+        """
+        初始化速率控制器
+
+        Args:
+            initial_rate: 初始速率（请求/秒）
+            min_rate: 最低速率（请求/秒）
+            max_rate: 最高速率（请求/秒）
+            increase_step: 每个成功窗口增加的速率（请求/秒）
+            decrease_factor: 拥塞时速率和并发数的缩减系数
+            initial_concurrency: 初始并发数
+            max_concurrency: 最大并发数
+            success_window: 连续成功多少次后增加一次速率（并发数每 success_window × 当前并发数 次成功增加 1）
+            target_latency_ms: 延迟 EWMA 超过该值时视为拥塞
+            decrease_cooldown: 两次减速的最小间隔（秒），避免同一波错误连续多次减速
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.max_concurrency = max(1, max_concurrency)
+        self.success_window = max(1, success_window)
+        self.target_latency_ms = target_latency_ms
+        self.decrease_cooldown = decrease_cooldown
+
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.concurrency = min(max(1, initial_concurrency), self.max_concurrency)
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._next_send = 0.0  # 下一个请求最早的发送时间（monotonic）
+        self._paused_until = 0.0  # Retry-After 等明确要求的暂停
+        self._successes = 0  # 距上次调整后的连续成功数
+        self._last_decrease = 0.0
+        self._latency_ewma: Optional[float] = None
+        # 按任务划分的额度：任务 -> [在途请求数, 该任务下一个请求最早的发送时间]
+        self._consumers: Dict[str, list] = {}
+
+        self.stats = {
+            'requests': 0,
+            'successes': 0,
+            'throttled': 0,  # 429/403/503
+            'errors': 0,  # 网络错误和其它 5xx
+            'csrf_failures': 0,
+            'increases': 0,
+            'decreases': 0,
+            'wait_seconds': 0.0,  # 累计等待发送的时间
+        }
+
+    # ------------------------------------------------------------
+    # 发送控制
+    # ------------------------------------------------------------
+
+    @contextmanager
+    def slot(self, consumer: Optional[str] = None):
+        """
+        获取一个发送许可（按当前速率排队，并发数达到上限时等待），请求结束后自动释放
+
+        用法（也可直接使用 request）：
+            with controller.slot():
+                response = session.get(url)
+            controller.record_response(response.status_code, latency_ms)
+        """
+        waited = self._acquire(consumer)
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                state = self._consumers.get(consumer) if consumer else None
+                if state:
+                    state[0] -= 1
+                self._cond.notify_all()
+
+    def request(self, send: Callable[[], Any], consumer: Optional[str] = None):
+        """
+        在速率和并发限制下发送一个请求，并根据结果调整速率
+
+        Args:
+            send: 发送请求的函数，返回 requests.Response
+            consumer: 使用方（已 register 的任务），按其额度排队
+
+        Returns:
+            send 的返回值（异常原样抛出）
+        """
+        with self.slot(consumer):
+            start = time.monotonic()
+            try:
+                response = send()
+            except Exception as e:
+                self.record_error(e)
+                raise
+            latency_ms = (time.monotonic() - start) * 1000
+        self.record_response(
+            response.status_code,
+            latency_ms,
+            parse_retry_after(response.headers.get('Retry-After'))
+        )
+        return response
+
+    def _acquire(self, consumer: Optional[str] = None) -> float:
+        start = time.monotonic()
+
+        # 先按任务额度排队（使用方越多，每个任务的请求间隔越长），排队期间不占用全局并发
+        consumer_ready = 0.0
+        with self._cond:
+            state = self._consumers.get(consumer) if consumer else None
+            while state is not None and state[0] >= self._consumer_share():
+                self._cond.wait()
+                state = self._consumers.get(consumer)
+            if state is not None:
+                state[0] += 1
+                consumer_ready = state[1]
+                state[1] = max(time.monotonic(), consumer_ready) + len(self._consumers) / self.rate
+
+        delay = consumer_ready - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._cond:
+            while self._in_flight >= self.concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+
+            # 按速率排定发送时间（多个线程依次占用时间槽）
+            now = time.monotonic()
+            send_at = max(now, self._next_send, self._paused_until)
+            self._next_send = send_at + 1.0 / self.rate
+            self.stats['requests'] += 1
+
+        delay = send_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        waited = time.monotonic() - start
+        with self._cond:
+            self.stats['wait_seconds'] += waited
+        return waited
+
+    # ------------------------------------------------------------
+    # 按任务分配额度
+    # ------------------------------------------------------------
+
+    def register(self, consumer: str) -> 'RateBudget':
+        """
+        登记一个使用方（通常是爬取任务），返回其专属额度
+
+        每个使用方的并发不超过 当前并发 / 使用方数（至少 1），
+        两次请求的间隔不小于 使用方数 / 当前速率，避免单个任务占满站点额度
+        """
+        with self._cond:
+            self._consumers.setdefault(consumer, [0, 0.0])
+            self._cond.notify_all()
+        return RateBudget(self, consumer)
+
+    def unregister(self, consumer: str):
+        """注销使用方，其额度由其它任务分享"""
+        with self._cond:
+            self._consumers.pop(consumer, None)
+            self._cond.notify_all()
+
+    def _consumer_share(self) -> int:
+        return max(1, self.concurrency // max(1, len(self._consumers)))
+
+    # ------------------------------------------------------------
+    # 反馈
+    # ------------------------------------------------------------
+
+    def record_response(self, status_code: int, latency_ms: Optional[float] = None,
+                        retry_after: Optional[float] = None):
+        """
+        记录一次响应
+
+        Args:
+            status_code: HTTP 状态码
+            latency_ms: 请求耗时（毫秒）
+            retry_after: 响应中 Retry-After 要求的等待秒数（可选）
+        """
+        if status_code in THROTTLE_STATUS_CODES:
+            with self._cond:
+                self.stats['throttled'] += 1
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._decrease(f"HTTP {status_code}")
+            return
+
+        if status_code >= 500:
+            with self._cond:
+                self.stats['errors'] += 1
+            self._decrease(f"HTTP {status_code}")
+            return
+
+        with self._cond:
+            if latency_ms is not None:
+                self._latency_ewma = latency_ms if self._latency_ewma is None \
+                    else 0.8 * self._latency_ewma + 0.2 * latency_ms
+            latency_high = self._latency_ewma is not None and self._latency_ewma > self.target_latency_ms
+        if latency_high:
+            self._decrease(f"延迟 {self._latency_ewma:.0f}ms 超过目标 {self.target_latency_ms:.0f}ms")
+            return
+
+        self._on_success()
+
+    def record_error(self, error: Exception):
+        """记录一次网络错误（超时、连接失败、代理错误等）"""
+        with self._cond:
+            self.stats['errors'] += 1
+        self._decrease(type(error).__name__)
+
+    def record_csrf_failure(self):
+        """记录一次 CSRF Token 失效（通常意味着请求过快被风控）"""
+        with self._cond:
+            self.stats['csrf_failures'] += 1
+        self._decrease("CSRF Token 失效")
+
+    def _on_success(self):
+        with self._cond:
+            self.stats['successes'] += 1
+            self._successes += 1
+            if self._successes % self.success_window == 0 and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                self.stats['increases'] += 1
+            if self._successes >= self.success_window * self.concurrency and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._successes = 0
+                self._cond.notify_all()
+
+    def _decrease(self, reason: str):
+        with self._cond:
+            now = time.monotonic()
+            self._successes = 0
+            if now - self._last_decrease < self.decrease_cooldown:
+                return
+            self._last_decrease = now
+            old_rate, old_concurrency = self.rate, self.concurrency
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.concurrency = max(1, int(self.concurrency * self.decrease_factor))
+            # 已排定的发送时间按新速率顺延
+            self._next_send = max(self._next_send, now + 1.0 / self.rate)
+            self.stats['decreases'] += 1
+        logger.warning(
+            f"请求降速（{reason}）: 速率 {old_rate:.2f} -> {self.rate:.2f} 次/秒，"
+            f"并发 {old_concurrency} -> {self.concurrency}"
+        )
+
+    # ------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------
+
+    @property
+    def current_delay(self) -> float:
+        """当前请求间隔（秒）"""
+        return 1.0 / self.rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取当前速率、并发数和累计统计"""
+        with self._cond:
+            return {
+                'rate': round(self.rate, 3),  # 请求/秒
+                'delay_seconds': round(1.0 / self.rate, 3),
+                'concurrency': self.concurrency,
+                'in_flight': self._in_flight,
+                'consumers': len(self._consumers),
+                'latency_ms': round(self._latency_ewma, 1) if self._latency_ewma is not None else None,
+                **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.stats.items()},
+            }
+
+
+class RateBudget:
+    """
+    单个任务的速率额度（AdaptiveRateController.register 返回）
+    接口与 AdaptiveRateController 一致，可直接传给 API 客户端和详情页解析器
+    """
+
+    def __init__(self, controller: AdaptiveRateController, consumer: str):
+        self.controller = controller
+        self.consumer = consumer
+
+    def slot(self):
+        return self.controller.slot(self.consumer)
+
+    def request(self, send: Callable[[], Any]):
+        return self.controller.request(send, self.consumer)
+
+    def record_response(self, status_code: int, latency_ms: Optional[float] = None,
+                        retry_after: Optional[float] = None):
+        self.controller.record_response(status_code, latency_ms, retry_after)
+
+    def record_error(self, error: Exception):
+        self.controller.record_error(error)
+
+    def record_csrf_failure(self):
+        self.controller.record_csrf_failure()
+
+    @property
+    def current_delay(self) -> float:
+        """本任务的请求间隔（秒）"""
+        with self.controller._cond:
+            consumers = max(1, len(self.controller._consumers))
+        return consumers / self.controller.rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """控制器统计，rate/delay_seconds/concurrency 为本任务分到的额度"""
+        stats = self.controller.get_stats()
+        consumers = max(1, stats['consumers'])
+        stats['site_rate'] = stats['rate']
+        stats['site_concurrency'] = stats['concurrency']
+        stats['rate'] = round(self.controller.rate / consumers, 3)
+        stats['delay_seconds'] = round(consumers / self.controller.rate, 3)
+        stats['concurrency'] = max(1, stats['concurrency'] // consumers)
+        return stats
+
+    def close(self):
+        """释放额度"""
+        self.controller.unregister(self.consumer)
+
+
+# 进程内共享的控制器（同一站点的所有爬取任务共用速率和并发额度）
+_controllers: Dict[str, AdaptiveRateController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_rate_controller(name: str = 'adquan', **kwargs) -> AdaptiveRateController:
+    """
+    获取进程内共享的速率控制器
+
+    Args:
+        name: 站点名称
+        **kwargs: AdaptiveRateController 构造参数（只在首次调用时生效）
+    """
+    with _controllers_lock:
+        if name not in _controllers:
+            _controllers[name] = AdaptiveRateController(**kwargs)
+        return _controllers[name]
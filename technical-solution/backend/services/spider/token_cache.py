@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+进程内共享的 CSRF Token / Cookie 缓存
+同一代理出口（节点专用端口，或无专用端口时的全局选择器/系统代理）的 API 客户端共用一个 Token 及其对应的会话 Cookie：
+- Token 通过与使用它的会话相同的代理获取（Token 与出口 IP、会话 Cookie 绑定）；
+- 每个出口只在首次使用时同步获取一次（并发调用方等待同一次获取）；
+- 后台线程在 Token 接近过期前主动刷新，刷新期间请求继续使用旧 Token，不阻塞请求路径；
+- 某个客户端报告 Token 失效时只刷新一次，其它客户端拿到已刷新的新 Token
+"""
+
+import logging
+import threading
+import time
+from typing import Optional, Tuple, Dict, Any, List
+
+import requests
+
+from .rate_controller import AdaptiveRateController
+from ..metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# 无专用端口（经过全局选择器或系统代理）的会话
+DEFAULT_ROUTE = ''
+
+
+def session_route(session: Optional[requests.Session]) -> str:
+    """会话的代理出口（节点专用端口的代理 URL，没有设置代理时为 DEFAULT_ROUTE）"""
+    if session is None:
+        return DEFAULT_ROUTE
+    return session.proxies.get('https') or session.proxies.get('http') or DEFAULT_ROUTE
+
+
+class _TokenEntry:
+    """一个代理出口的 Token 和会话 Cookie"""
+
+    def __init__(self):
+        self.token: Optional[str] = None
+        self.cookies: Optional[requests.cookies.RequestsCookieJar] = None
+        self.fetched_at: Optional[float] = None
+        self.generation = 0
+        self.refresh_lock = threading.Lock()  # 保证同一出口同一时间只有一次网络获取
+
+
+class SharedTokenCache:
+    """共享 Token 缓存（线程安全）"""
+
+    def __init__(
+        self,
+        base_url: str = 'https://www.adquan.com/case_library/index',
+        max_age: float = 3600.0,
+        refresh_ratio: float = 0.8,
+        check_interval: float = 30.0,
+        rate_controller: Optional[AdaptiveRateController] = None,
+    ):
+        """
+        初始化 Token 缓存
+
+        Args:
+            base_url: 获取 Token 的页面
+            max_age: Token 有效期（秒）
+            refresh_ratio: Token 年龄达到有效期的该比例时后台主动刷新
+            check_interval: 后台检查间隔（秒）
+            rate_controller: 自适应速率控制器（可选），获取 Token 的请求同样受其限制
+        """
+        self.base_url = base_url
+        self.max_age = max_age
+        self.refresh_ratio = refresh_ratio
+        self.check_interval = check_interval
+        self.rate_controller = rate_controller
+
+        self._lock = threading.Lock()  # 保护下面的状态（只在内存中读写，持有时间极短）
+        self._entries: Dict[str, _TokenEntry] = {}  # 代理出口 -> Token
+        self._generation = 0  # 任一出口刷新时加 1，客户端据此判断是否需要同步 Cookie（切换出口时代数也会变化）
+
+        self.stats = {
+            'fetches': 0,
+            'proactive_refreshes': 0,
+            'invalidations': 0,
+            'fetch_failures': 0,
+        }
+
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------
+    # 获取
+    # ------------------------------------------------------------
+
+    def get(self, stale_token: Optional[str] = None, route: str = DEFAULT_ROUTE) -> Tuple[str, int]:
+        """
+        获取代理出口的当前 Token
+
+        Args:
+            stale_token: 调用方确认已失效的 Token。缓存中仍是该 Token 时立即刷新；
+                         已被其它调用方刷新过时直接返回新 Token
+            route: 使用 Token 的会话的代理出口（见 session_route）
+
+        Returns:
+            (token, generation)
+
+        Raises:
+            ValueError: 无法获取 Token
+        """
+        with self._lock:
+            entry = self._entries.get(route)
+            if entry and entry.token and (stale_token is None or stale_token != entry.token):
+                CACHE_LOOKUPS.inc(cache='csrf_token', result='hit')
+                return entry.token, entry.generation
+
+        CACHE_LOOKUPS.inc(cache='csrf_token', result='miss')
+        if stale_token is not None:
+            with self._lock:
+                self.stats['invalidations'] += 1
+        return self._refresh(route, stale_token)
+
+    def install_cookies(self, session: requests.Session):
+        """将会话代理出口对应的 Cookie 写入客户端会话（Token 与会话 Cookie 必须配套使用）"""
+        with self._lock:
+            entry = self._entries.get(session_route(session))
+            cookies = entry.cookies if entry else None
+        if cookies is not None:
+            session.cookies.update(cookies)
+
+    def fetched_at(self, route: str = DEFAULT_ROUTE) -> Optional[float]:
+        """代理出口的 Token 获取时间"""
+        with self._lock:
+            entry = self._entries.get(route)
+            return entry.fetched_at if entry else None
+
+    def get_token_age(self, route: Optional[str] = None) -> Optional[float]:
+        """Token 的年龄（秒），不指定出口时返回最旧的 Token 的年龄"""
+        with self._lock:
+            if route is not None:
+                entry = self._entries.get(route)
+                fetched = [entry.fetched_at] if entry and entry.fetched_at is not None else []
+            else:
+                fetched = [e.fetched_at for e in self._entries.values() if e.fetched_at is not None]
+        return time.time() - min(fetched) if fetched else None
+
+    def _routes(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def _refresh(self, route: str = DEFAULT_ROUTE, stale_token: Optional[str] = None,
+                 proactive: bool = False) -> Tuple[str, int]:
+        """获取代理出口的新 Token（单次飞行：同一出口的并发调用方等待同一次获取）"""
+        with self._lock:
+            entry = self._entries.setdefault(route, _TokenEntry())
+
+        with entry.refresh_lock:
+            # 等待期间其它调用方可能已经刷新
+            with self._lock:
+                if entry.token and not proactive and (stale_token is None or stale_token != entry.token):
+                    return entry.token, entry.generation
+
+            from .csrf_token_manager import CSRFTokenManager  # 避免循环导入
+
+            # 与使用 Token 的会话走同一个代理出口
+            session = requests.Session()
+            if route:
+                session.proxies.update({'http': route, 'https': route})
+            manager = CSRFTokenManager(base_url=self.base_url, session=session, rate_controller=self.rate_controller)
+            try:
+                token = manager.get_token(force_refresh=True)
+            except Exception as e:
+                with self._lock:
+                    self.stats['fetch_failures'] += 1
+                    current, generation = entry.token, entry.generation
+                if proactive and current:
+                    # 主动刷新失败时继续使用旧 Token，下次检查再试
+                    logger.warning(f"主动刷新 CSRF Token 失败，继续使用当前 Token: {e}")
+                    return current, generation
+                raise ValueError(f"无法获取CSRF Token: {e}")
+            finally:
+                session.close()
+
+            with self._lock:
+                self._generation += 1
+                entry.token = token
+                entry.cookies = session.cookies.copy()
+                entry.fetched_at = time.time()
+                entry.generation = self._generation
+                self.stats['fetches'] += 1
+                if proactive:
+                    self.stats['proactive_refreshes'] += 1
+                generation = self._generation
+
+            logger.info(
+                f"共享 CSRF Token 已{'主动刷新' if proactive else '更新'}"
+                f"（出口: {route or '全局'}，第 {generation} 代）"
+            )
+            return token, generation
+
+    # ------------------------------------------------------------
+    # 后台主动刷新
+    # ------------------------------------------------------------
+
+    def start(self):
+        """启动后台主动刷新线程"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name='csrf-token-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        """停止后台刷新"""
+        self._stop_event.set()
+
+    def _refresh_loop(self):
+        while not self._stop_event.wait(self.check_interval):
+            for route in self._routes():
+                age = self.get_token_age(route)
+                if age is None or age < self.max_age * self.refresh_ratio:
+                    continue
+                logger.info(
+                    f"CSRF Token（出口: {route or '全局'}）已使用 {age:.0f} 秒，"
+                    f"接近有效期 {self.max_age:.0f} 秒，后台主动刷新"
+                )
+                try:
+                    self._refresh(route, proactive=True)
+                except Exception as e:
+                    logger.warning(f"后台刷新 CSRF Token 失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        age = self.get_token_age()
+        with self._lock:
+            return {
+                'has_token': any(entry.token for entry in self._entries.values()),
+                'routes': sum(1 for entry in self._entries.values() if entry.token),
+                'generation': self._generation,
+                'token_age_seconds': round(age, 1) if age is not None else None,
+                'max_age_seconds': self.max_age,
+                **self.stats,
+            }
+
+
+# 进程内共享的缓存（按获取 Token 的页面区分）
+_caches: Dict[str, SharedTokenCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_token_cache(base_url: str = 'https://www.adquan.com/case_library/index', **kwargs) -> SharedTokenCache:
+    """
+    获取进程内共享的 Token 缓存（首次调用时创建并启动后台刷新）
+
+    Args:
+        base_url: 获取 Token 的页面
+        **kwargs: SharedTokenCache 构造参数（只在首次调用时生效）
+    """
+    with _caches_lock:
+        if base_url not in _caches:
+            cache = SharedTokenCache(base_url=base_url, **kwargs)
+            cache.start()
+            _caches[base_url] = cache
+        return _caches[base_url]
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+案例重试测试
+通过 CrawlStage 爬取的案例同步到 crawl_case_records 时保存列表项，
+CrawlWorker 重试时与重新爬取的详情页合并，只来自列表页的字段不能丢失；
+增量爬取时失败的案例不算已知，需要重新爬取
+
+运行: pytest tests/test_crawl_retry.py
+"""
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip('bs4')
+pytest.importorskip('requests')
+pytest.importorskip('psycopg2')
+
+from services.pipeline.crawl_stage import CrawlStage
+from services.pipeline.crawl_worker import CrawlWorker
+from services.pipeline.utils import (
+    collect_case_records_from_json, get_saved_case_ids_from_json, merge_case_data, save_json
+)
+
+LIST_ITEM = {
+    'id': 320001,
+    'url': 'https://www.adquan.com/post-2-320001.html',
+    'title': '品牌夏季营销案例',
+    'thumb': 'https://oss.adquan.com/thumb/320001.jpg',
+    'score': 8.6,
+    'score_decimal': '8.6',
+    'favourite': 12,
+    'company_name': '某某广告公司',
+    'company_logo': 'https://oss.adquan.com/logo/company.png',
+}
+
+DETAIL = {
+    'title': '品牌夏季营销案例',
+    'description': '案例描述',
+    'source_url': LIST_ITEM['url'],
+    'main_image': 'https://oss.adquan.com/main/320001.jpg',
+    'images': [],
+    'brand_name': '某品牌',
+    'tags': [],
+}
+
+LIST_ONLY_FIELDS = ('thumb', 'score_decimal', 'favourite', 'company_name', 'company_logo')
+
+
+class _DetailParser:
+    def fetch(self, url, case_id=None):
+        return '<html></html>'
+
+    def parse_html(self, html, url):
+        return dict(DETAIL)
+
+
+class _Validator:
+    def validate_case(self, case):
+        return True, None
+
+
+def _retry(record):
+    """用 CrawlWorker 重试案例，返回加入批次的案例数据"""
+    worker = CrawlWorker.__new__(CrawlWorker)
+    worker.detail_parser = _DetailParser()
+    worker.validator = _Validator()
+    worker.batch_size = 100
+    worker.retry_only = True
+    worker._batch = []
+    worker._process_case(record)
+    assert len(worker._batch) == 1
+    return worker._batch[0][1]
+
+
+def _record_from_batch(tmp_path, case):
+    save_json({'cases': [case]}, tmp_path / 'cases_batch_0001.json')
+    records = collect_case_records_from_json(tmp_path)['records']
+    assert len(records) == 1
+    record = records[0]
+    # list_item 以 JSONB 保存，读取时为字典
+    return {
+        'id': 1,
+        'case_id': record['case_id'],
+        'case_url': record['case_url'],
+        'case_title': record['case_title'],
+        'list_item': json.loads(json.dumps(record['list_item'], ensure_ascii=False)),
+        'retry_count': 1,
+    }
+
+
+@pytest.mark.parametrize('error_key', ['error', 'validation_error'])
+def test_retry_keeps_list_fields(tmp_path, error_key):
+    if error_key == 'error':
+        # 详情页爬取失败：批次中保存原始列表项
+        case = {
+            'case_id': LIST_ITEM['id'],
+            'url': LIST_ITEM['url'],
+            'title': LIST_ITEM['title'],
+            'error': 'timeout',
+            'list_item': LIST_ITEM,
+        }
+    else:
+        # 验证失败：批次中为合并后的案例数据
+        case = merge_case_data(LIST_ITEM, DETAIL)
+        case['validation_error'] = '缺少字段'
+
+    record = _record_from_batch(tmp_path, case)
+    retried = _retry(record)
+    expected = merge_case_data(LIST_ITEM, DETAIL)
+
+    assert retried['case_id'] == LIST_ITEM['id']
+    for field in LIST_ONLY_FIELDS + ('score',):
+        assert retried.get(field) == expected.get(field), field
+
+
+def test_failed_cases_are_not_known(tmp_path, monkeypatch):
+    from app.services.crawl_task_executor_sync_db import SyncDatabase
+    monkeypatch.setattr(SyncDatabase, 'get_known_case_ids', staticmethod(lambda case_ids: set()))
+
+    stage = CrawlStage.__new__(CrawlStage)
+    stage.output_dir = tmp_path
+    stage.stats = {'total_saved': 0, 'batches_saved': 0}
+    stage.seen_index = None
+    stage.saved_ids = set()
+    stage.success_ids = set()
+
+    batch = [
+        merge_case_data(LIST_ITEM, DETAIL),
+        {'case_id': 320002, 'url': 'https://www.adquan.com/post-2-320002.html', 'error': 'timeout'},
+        {'case_id': 320003, 'title': '案例', 'validation_error': '缺少字段'},
+    ]
+    assert stage._save_batch(batch, 1)
+
+    case_ids = [320001, 320002, 320003]
+    assert stage._get_known_case_ids(case_ids) == {320001}
+    # 断点续传时从批次文件加载
+    assert get_saved_case_ids_from_json(tmp_path, successful_only=True) == {320001}
+    assert get_saved_case_ids_from_json(tmp_path) == set(case_ids)
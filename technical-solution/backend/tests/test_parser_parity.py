@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+HTML 解析后端一致性测试
+每种解析后端对语料页面的提取结果必须与基准解析器（html.parser + 子树重新解析 + 原提取逻辑）完全一致，
+列表页的 lxml 提取结果必须与 html.parser 完全一致
+
+运行: pytest tests/test_parser_parity.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip('bs4')
+pytest.importorskip('requests')
+
+from benchmarks.corpus import (
+    CORPUS_URL, load_detail_pages, load_list_pages, ReferenceDetailPageParser
+)
+from services.spider.detail_parser import DetailPageParser
+from services.spider.list_page_html_parser import ListPageHTMLParser
+from services.spider.html_backend import PARSER_BACKENDS, BACKEND_HTML_PARSER, BACKEND_LXML
+
+DETAIL_PAGES = load_detail_pages()
+LIST_PAGES = load_list_pages()
+
+
+def _require_backend(backend: str):
+    if backend == BACKEND_LXML:
+        pytest.importorskip('lxml')
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKENDS)
+@pytest.mark.parametrize('name,html', DETAIL_PAGES, ids=[name for name, _ in DETAIL_PAGES])
+def test_detail_parser_parity(name, html, backend):
+    _require_backend(backend)
+
+    expected = ReferenceDetailPageParser().parse_html(html, CORPUS_URL)
+    actual = DetailPageParser(parser_backend=backend).parse_html(html, CORPUS_URL)
+
+    diff = {key: (expected.get(key), actual.get(key))
+            for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key)}
+    assert not diff, f"{name} 使用 {backend} 的提取结果与基准不一致: {diff}"
+
+
+@pytest.mark.parametrize('backend', [backend for backend in PARSER_BACKENDS if backend != BACKEND_HTML_PARSER])
+@pytest.mark.parametrize('name,html', LIST_PAGES, ids=[name for name, _ in LIST_PAGES])
+def test_list_parser_parity(name, html, backend):
+    _require_backend(backend)
+
+    # 列表页提取逻辑未改动，基准为 html.parser 的提取结果
+    expected = ListPageHTMLParser(parser_backend=BACKEND_HTML_PARSER).parse_html(html)
+    actual = ListPageHTMLParser(parser_backend=backend).parse_html(html)
+
+    assert actual == expected, f"{name} 使用 {backend} 的列表页提取结果与基准不一致"
+
+
+def test_copy_does_not_mutate_document():
+    """提取描述会删除副本中的图片节点，原文档中的图片必须保留（后续提取图片依赖原文档）"""
+    if not DETAIL_PAGES:
+        pytest.skip('语料为空')
+    name, html = DETAIL_PAGES[0]
+    parser = DetailPageParser()
+    result = parser.parse_html(html, CORPUS_URL)
+    reference = ReferenceDetailPageParser().parse_html(html, CORPUS_URL)
+    assert result['images'] == reference['images']
+
+
+# PC端页面：日期单独放在普通元素中（页面文本中没有"发布时间"和"HH:MM"），
+# 没有"案例信息"标题，行业/类型/地区在嵌套的div中
+PC_PAGE_BARE_DATE = '''
+<html><head><title>案例标题</title></head><body>
+<div class="header"><a href="/">广告门</a></div>
+<div class="wrap"><div class="meta"><span>2023-05-01</span></div>
+<div class="info">
+<div>行业：互联网</div>
+<div>类型：平面</div>
+</div>
+<div class="articleContent"><p>案例正文</p></div></div>
+</body></html>
+'''
+
+
+@pytest.mark.parametrize('backend', PARSER_BACKENDS)
+def test_pc_page_fallbacks(backend):
+    _require_backend(backend)
+
+    result = DetailPageParser(parser_backend=backend).parse_html(PC_PAGE_BARE_DATE, CORPUS_URL)
+
+    assert result['publish_time'] == '2023-05-01'
+    assert result['brand_industry'] == '互联网'
+    assert result['activity_type'] == '平面'
+    assert result == ReferenceDetailPageParser().parse_html(PC_PAGE_BARE_DATE, CORPUS_URL)
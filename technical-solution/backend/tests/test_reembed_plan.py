@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+批量重新生成向量的写回计划测试
+每个向量列按各自的文本指纹判断是否复用：未变化的列保持不变，所有列都未变化的行不写回；
+all 模式下文本为空的列连同指纹置空，不保留旧模型的向量
+
+运行: pytest tests/test_reembed_plan.py
+"""
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+# 添加 backend 目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip('numpy')
+pytest.importorskip('psycopg2')
+
+from services.embedding import build_embedding_text, embedding_fingerprint
+from services.pipeline.reembed_stage import (
+    CLEAR_VECTOR, MODE_ALL, MODE_MISSING, VECTOR_COLUMNS, ReembedStage
+)
+
+TITLE = '品牌夏季营销案例'
+DESCRIPTION = '案例描述'
+
+
+def _stage(mode):
+    return ReembedStage(db_config={}, columns=VECTOR_COLUMNS, mode=mode)
+
+
+def _fingerprints(stage, title, description):
+    return tuple(
+        embedding_fingerprint(build_embedding_text(c, title, description), stage.model_id) for c in VECTOR_COLUMNS
+    )
+
+
+def _row(row_id, title, description, null_flags, fingerprints):
+    """_read_chunks 返回的行：id, title, description, 每列是否为空, 每列指纹"""
+    return (row_id, title, description) + tuple(null_flags) + tuple(fingerprints)
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, buffer):
+        self.conn.copied.append((sql, buffer.read()))
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+
+
+class _Connection:
+    def __init__(self):
+        self.copied = []
+        self.executed = []
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_unchanged_row_is_skipped():
+    stage = _stage(MODE_ALL)
+    row = _row(1, TITLE, DESCRIPTION, (False,) * 3, _fingerprints(stage, TITLE, DESCRIPTION))
+
+    texts, plan = stage._plan_chunk([row])
+
+    assert texts == []
+    assert plan == []
+    assert stage.stats['vectors_reused'] == 3
+
+
+def test_only_changed_columns_are_encoded():
+    stage = _stage(MODE_ALL)
+    stored = _fingerprints(stage, TITLE, '旧的描述')
+    row = _row(1, TITLE, DESCRIPTION, (False,) * 3, stored)
+
+    texts, plan = stage._plan_chunk([row])
+
+    assert texts == [f"{TITLE} {DESCRIPTION}", DESCRIPTION]
+    assert plan == [(1, [0, None, 1], [
+        embedding_fingerprint(texts[0], stage.model_id), None, embedding_fingerprint(texts[1], stage.model_id)
+    ])]
+    assert stage.stats['vectors_reused'] == 1
+
+
+def test_model_change_reencodes_all_columns():
+    stage = _stage(MODE_ALL)
+    other = ReembedStage(db_config={}, columns=VECTOR_COLUMNS, mode=MODE_ALL, model_name='other-model')
+    row = _row(1, TITLE, DESCRIPTION, (False,) * 3, _fingerprints(other, TITLE, DESCRIPTION))
+
+    texts, plan = stage._plan_chunk([row])
+
+    assert len(texts) == 3
+    assert plan[0][1] == [0, 1, 2]
+
+
+def test_all_mode_clears_empty_columns():
+    stage = _stage(MODE_ALL)
+    stored = _fingerprints(stage, TITLE, DESCRIPTION)
+    row = _row(1, TITLE, '', (False,) * 3, stored)
+
+    texts, plan = stage._plan_chunk([row])
+    # 标题未变化，组合文本变化，描述为空
+    assert texts == [TITLE]
+    assert plan[0][1] == [0, None, CLEAR_VECTOR]
+
+    future = Future()
+    future.set_result(['[1,0]'])
+    conn = _Connection()
+    stage._write_chunk(conn, 1, 1, plan, future, start=0.0)
+
+    (copy_sql, copied), = conn.copied
+    assert copied == '\t'.join([
+        '1', '[1,0]', plan[0][2][0], 'f', '\\N', '\\N', 't', '\\N', '\\N', 'f'
+    ]) + '\n'
+    assert 'description_vector = CASE WHEN s.description_vector_keep' in conn.executed[0]
+    assert 'COALESCE' not in conn.executed[0]
+    assert stage.stats['vectors_written'] == 1
+
+
+def test_missing_mode_keeps_existing_vectors():
+    stage = _stage(MODE_MISSING)
+    rows = [
+        _row(1, TITLE, DESCRIPTION, (False,) * 3, (None,) * 3),
+        _row(2, TITLE, '', (False, True, True), (None,) * 3),
+    ]
+
+    texts, plan = stage._plan_chunk(rows)
+
+    # 已有向量的列不重新编码，文本为空的列保持为空
+    assert texts == [TITLE]
+    assert plan == [(2, [None, 0, None], [None, embedding_fingerprint(TITLE, stage.model_id), None])]
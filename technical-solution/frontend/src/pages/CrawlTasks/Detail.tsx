@@ -468,6 +468,7 @@ const CrawlTasksDetail: React.FC = () => {
   const getStatusColor = (status: string): string => {
     const colorMap: Record<string, string> = {
       pending: "blue",
+      queued: "cyan",
       running: "green",
       paused: "orange",
       completed: "green",
@@ -482,6 +483,7 @@ const CrawlTasksDetail: React.FC = () => {
   const getStatusText = (status: string): string => {
     const textMap: Record<string, string> = {
       pending: "等待中",
+      queued: "排队中",
       running: "运行中",
       paused: "已暂停",
       completed: "已完成",
@@ -510,6 +512,8 @@ const CrawlTasksDetail: React.FC = () => {
       failed: "red",
       skipped: "orange",
       pending: "blue",
+      claimed: "cyan",
+      dead_letter: "magenta",
     };
     return colorMap[status] || "default";
   };
@@ -521,6 +525,8 @@ const CrawlTasksDetail: React.FC = () => {
       failed: "失败",
       skipped: "跳过",
       pending: "等待中",
+      claimed: "处理中",
+      dead_letter: "死信",
     };
     return textMap[status] || status;
   };
@@ -533,6 +539,8 @@ const CrawlTasksDetail: React.FC = () => {
       skipped: "orange",
       validation_failed: "purple",
       pending: "blue",
+      claimed: "cyan",
+      dead_letter: "magenta",
     };
     return colorMap[status] || "default";
   };
@@ -545,6 +553,8 @@ const CrawlTasksDetail: React.FC = () => {
       skipped: "跳过",
       validation_failed: "验证失败",
       pending: "等待中",
+      claimed: "处理中",
+      dead_letter: "死信",
     };
     return textMap[status] || status;
   };
@@ -1576,6 +1586,7 @@ const CrawlTasksDetail: React.FC = () => {
                   <Select.Option value="failed">失败</Select.Option>
                   <Select.Option value="skipped">跳过</Select.Option>
                   <Select.Option value="pending">等待中</Select.Option>
+                  <Select.Option value="dead_letter">死信</Select.Option>
                 </Select>
                 <Button onClick={fetchListPages}>刷新</Button>
                 <Button
@@ -1632,6 +1643,7 @@ const CrawlTasksDetail: React.FC = () => {
                   </Select.Option>
                   <Select.Option value="skipped">跳过</Select.Option>
                   <Select.Option value="pending">等待中</Select.Option>
+                  <Select.Option value="dead_letter">死信</Select.Option>
                 </Select>
                 <Select
                   value={caseRecordSavedToJson}
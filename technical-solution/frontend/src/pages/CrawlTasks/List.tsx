@@ -70,6 +70,7 @@ const CrawlTasksList: React.FC = () => {
   const getStatusColor = (status: TaskStatus): string => {
     const colorMap: Record<TaskStatus, string> = {
       pending: 'blue',
+      queued: 'cyan',
       running: 'green',
       paused: 'orange',
       completed: 'green',
@@ -84,6 +85,7 @@ const CrawlTasksList: React.FC = () => {
   const getStatusText = (status: TaskStatus): string => {
     const textMap: Record<TaskStatus, string> = {
       pending: '等待中',
+      queued: '排队中',
       running: '运行中',
       paused: '已暂停',
       completed: '已完成',
@@ -328,6 +330,7 @@ const CrawlTasksList: React.FC = () => {
               }}
             >
               <Option value="pending">等待中</Option>
+              <Option value="queued">排队中</Option>
               <Option value="running">运行中</Option>
               <Option value="paused">已暂停</Option>
               <Option value="completed">已完成</Option>
@@ -4,6 +4,7 @@
 
 export type TaskStatus =
   | 'pending'
+  | 'queued'
   | 'running'
   | 'paused'
   | 'completed'
@@ -165,7 +166,7 @@ export interface TaskListParams {
 /**
  * 列表页记录状态
  */
-export type ListPageStatus = 'success' | 'failed' | 'skipped' | 'pending';
+export type ListPageStatus = 'success' | 'failed' | 'skipped' | 'pending' | 'claimed' | 'dead_letter';
 
 /**
  * 列表页爬取记录
@@ -199,7 +200,7 @@ export interface CrawlListPageRecordsResponse {
 /**
  * 案例记录状态
  */
-export type CaseRecordStatus = 'success' | 'failed' | 'skipped' | 'validation_failed' | 'pending';
+export type CaseRecordStatus = 'success' | 'failed' | 'skipped' | 'validation_failed' | 'pending' | 'claimed' | 'dead_letter';
 
 /**
  * 案例爬取记录